@@ -0,0 +1,193 @@
+"""Wall-clock benchmark for farmer-document PDF text extraction.
+
+Writes synthetic multi-page land records (a khatauni-style header on page 1
+followed by pages of mutation history) and compares:
+
+* ``legacy``   - every page read in sequence, as ``extract_from_file`` did;
+* ``parallel`` - ``read_document_text_async`` over a process pool with the
+  usual form fields requested, stopping once they have all matched;
+* ``worst``    - the same, with a field that only appears on the last page;
+* ``cached``   - a re-upload of the same document (text layer cache hit).
+
+Needs pdfplumber (``pip install pdfplumber``); no network or database.
+
+Usage:
+  python scripts/benchmark_pdf_extraction.py
+  python scripts/benchmark_pdf_extraction.py --pages 60 --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from services.market.services import langextract_service as ls
+
+TARGET_FIELDS = ["farmer_name", "father_name", "khasra_number", "village", "district", "land_area_acres"]
+LAST_PAGE_FIELD = "mobile_number"
+
+
+def _escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _pdf_bytes(pages: list[list[str]]) -> bytes:
+    """Smallest valid PDF with one Helvetica text block per page."""
+    objects: list[bytes] = []
+    page_ids = [4 + 2 * i for i in range(len(pages))]
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for pid, lines in zip(page_ids, pages):
+        body = "BT /F1 9 Tf 11 TL 40 810 Td " + " ".join(f"({_escape(l)}) Tj T*" for l in lines) + " ET"
+        stream = body.encode("latin-1")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {pid + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _land_record(pages: int, seed: int) -> list[list[str]]:
+    rng = random.Random(seed)
+    header = [
+        "Khasra Khatauni - Record of Rights",
+        f"Khata No: {rng.randint(100, 999)}/2024",
+        f"Khasra No: {rng.randint(100, 300)}, {rng.randint(301, 600)}",
+        "Owner Name: Vikash Yadav",
+        "Father's Name: Ram Prasad Yadav",
+        "Village: Semra, Tehsil: Ghazipur",
+        "District: Ghazipur, State: Uttar Pradesh",
+        f"Total Area: {rng.randint(1, 9)}.{rng.randint(0, 9)} Acres",
+    ]
+    body = []
+    for page in range(pages):
+        lines = list(header) if page == 0 else []
+        while len(lines) < 70:
+            lines.append(
+                f"Mutation {page:03d}-{len(lines):02d}  Plot {rng.randint(1, 999)}  "
+                f"Area {rng.uniform(0.1, 3):.2f} ha  Order dated {rng.randint(1, 28):02d}/"
+                f"{rng.randint(1, 12):02d}/{rng.randint(1990, 2024)}  Entry by Lekhpal"
+            )
+        body.append(lines)
+    body[-1][-1] = "Contact mobile: 9876543210"
+    return body
+
+
+def _legacy_read(path: str) -> str:
+    import pdfplumber
+
+    text = ""
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            text += page.extract_text() or ""
+    return text
+
+
+async def _parallel_read(path: str, fields: list[str], executor: ProcessPoolExecutor) -> dict:
+    loop = asyncio.get_running_loop()
+
+    async def run_cpu(fn, *args):
+        return await loop.run_in_executor(executor, fn, *args)
+
+    return await ls.read_document_text_async(path, fields, run_cpu)
+
+
+def _time(fn, repeat: int) -> tuple[float, object]:
+    samples, result = [], None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="PDF extraction benchmark")
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    args = parser.parse_args()
+
+    try:
+        import pdfplumber  # noqa: F401
+    except ImportError:
+        print("pdfplumber is required: pip install pdfplumber", file=sys.stderr)
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Set before the pool starts so worker processes inherit it.
+        ls.DOCUMENT_TEXT_CACHE_DIR = os.path.join(tmp, "cache")
+
+        def write_records(prefix: str, seed: int) -> list[str]:
+            paths = []
+            for i in range(args.repeat):
+                path = os.path.join(tmp, f"{prefix}_{i}.pdf")
+                with open(path, "wb") as f:
+                    f.write(_pdf_bytes(_land_record(args.pages, seed=seed + i)))
+                paths.append(path)
+            return paths
+
+        legacy_paths = write_records("legacy", 0)
+        early_paths = write_records("early", 100)
+        worst_paths = write_records("worst", 200)
+
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            # Warm the workers' imports so the first parallel run is not charged for them.
+            list(executor.map(ls.match_fields, ["warm-up"] * args.workers))
+            legacy = iter(legacy_paths)
+            legacy_ms, _ = _time(lambda: _legacy_read(next(legacy)), args.repeat)
+            early = iter(early_paths)
+            parallel_ms, early_result = _time(
+                lambda: asyncio.run(_parallel_read(next(early), TARGET_FIELDS, executor)), args.repeat
+            )
+            worst = iter(worst_paths)
+            worst_ms, worst_result = _time(
+                lambda: asyncio.run(_parallel_read(next(worst), TARGET_FIELDS + [LAST_PAGE_FIELD], executor)),
+                args.repeat,
+            )
+            cached_ms, _ = _time(
+                lambda: asyncio.run(_parallel_read(worst_paths[0], TARGET_FIELDS + [LAST_PAGE_FIELD], executor)),
+                args.repeat,
+            )
+
+    report = {
+        "pages": args.pages,
+        "workers": args.workers,
+        "legacy_ms": round(legacy_ms, 1),
+        "parallel_early_exit_ms": round(parallel_ms, 1),
+        "parallel_early_exit_pages_read": early_result["pages_read"],
+        "parallel_full_scan_ms": round(worst_ms, 1),
+        "parallel_full_scan_pages_read": worst_result["pages_read"],
+        "cached_reupload_ms": round(cached_ms, 1),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,123 @@
+"""Recall/latency benchmark for Qdrant search settings.
+
+Samples stored vectors from each collection as queries, takes an exact
+(brute-force) search as ground truth and measures recall@k and latency for a
+range of ``hnsw_ef`` values, with quantization rescoring when the collection
+is quantized.
+
+Usage:
+  python scripts/benchmark_qdrant_search.py
+  python scripts/benchmark_qdrant_search.py --collections schemes_semantic --queries 200 --ef 16 64 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from shared.core.constants import Qdrant
+from shared.services.qdrant_service import QdrantService
+
+
+def _sample_vectors(collection: str, count: int) -> list[list[float]]:
+    client = QdrantService.get_client()
+    points, _ = client.scroll(
+        collection_name=collection,
+        limit=count,
+        with_payload=False,
+        with_vectors=True,
+    )
+    return [p.vector for p in points if p.vector]
+
+
+def _timed_ids(collection: str, vector: list[float], limit: int, **kwargs) -> tuple[list, float]:
+    started = time.perf_counter()
+    hits = QdrantService.search(collection, "", limit=limit, query_vector=vector, **kwargs)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return [h.id for h in hits], elapsed_ms
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[idx], 3)
+
+
+def benchmark_collection(collection: str, queries: int, top_k: int, ef_values: list[int]) -> dict:
+    vectors = _sample_vectors(collection, queries)
+    if not vectors:
+        return {"status": "empty_or_missing"}
+
+    truth = [_timed_ids(collection, v, top_k, exact=True) for v in vectors]
+    exact_latencies = [ms for _, ms in truth]
+    runs: dict[str, dict] = {}
+    for ef in ef_values:
+        recalls: list[float] = []
+        latencies: list[float] = []
+        for vector, (expected, _) in zip(vectors, truth):
+            got, ms = _timed_ids(collection, vector, top_k, hnsw_ef=ef)
+            latencies.append(ms)
+            if expected:
+                recalls.append(len(set(got) & set(expected)) / len(expected))
+        runs[str(ef)] = {
+            "recall_at_k": round(statistics.mean(recalls), 4) if recalls else None,
+            "p50_ms": _percentile(latencies, 50),
+            "p95_ms": _percentile(latencies, 95),
+        }
+
+    return {
+        "status": "ok",
+        "queries": len(vectors),
+        "top_k": top_k,
+        "quantized": QdrantService._is_quantized(collection),
+        "exact_p50_ms": _percentile(exact_latencies, 50),
+        "exact_p95_ms": _percentile(exact_latencies, 95),
+        "hnsw_ef": runs,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Qdrant recall/latency benchmark")
+    parser.add_argument(
+        "--collections",
+        nargs="+",
+        default=[Qdrant.SCHEMES_SEMANTIC, Qdrant.MANDI_PRICE_INTELLIGENCE],
+    )
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    args = parser.parse_args()
+
+    report = {
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "collections": {},
+    }
+    for collection in args.collections:
+        try:
+            report["collections"][collection] = benchmark_collection(
+                collection, args.queries, args.top_k, args.ef
+            )
+        except Exception as exc:  # noqa: BLE001
+            report["collections"][collection] = {"status": "error", "error": str(exc)}
+
+    out_path = os.path.join(os.path.dirname(__file__), "qdrant_search_benchmark_report.json")
+    with open(out_path, "w", encoding="utf-8") as fp:
+        json.dump(report, fp, ensure_ascii=True, indent=2)
+
+    print(json.dumps(report, ensure_ascii=True, indent=2))
+    print(f"Report written to {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
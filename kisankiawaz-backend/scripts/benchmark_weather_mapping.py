@@ -0,0 +1,82 @@
+"""CPU-time microbenchmark for turning one Open-Meteo payload into weather output.
+
+Builds a synthetic 16-day forecast (384 hourly rows of every ``HOURLY_FIELDS``
+column, with scattered nulls) and times the work ``_fetch_full_weather`` does
+after the upstream calls return: closest-hour lookup, farm decisions and the
+hourly/daily output mapping. No network or database is touched.
+
+Usage:
+  python scripts/benchmark_weather_mapping.py
+  python scripts/benchmark_weather_mapping.py --iterations 2000 --days 7
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, ROOT_DIR)
+
+from services.market.services import weather_service as ws
+
+
+def _synthetic_payload(days: int, seed: int = 7) -> tuple[dict, dict]:
+    rng = random.Random(seed)
+    start = datetime.now(ws.IST).replace(tzinfo=None, minute=0, second=0, microsecond=0) - timedelta(hours=12)
+    hours = days * 24
+    hourly: dict = {"time": [(start + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(hours)]}
+    for field in ws.HOURLY_FIELDS:
+        hourly[field] = [None if rng.random() < 0.01 else round(rng.uniform(0, 40), 2) for _ in range(hours)]
+    daily: dict = {"time": [(start.date() + timedelta(days=i)).isoformat() for i in range(days)]}
+    for field in ws.DAILY_FIELDS:
+        daily[field] = [round(rng.uniform(0, 40), 2) for _ in range(days)]
+    return hourly, daily
+
+
+def _map_payload(hourly: dict, daily: dict) -> dict:
+    idx = ws._find_closest_time_index(ws._safe_list_values(hourly, "time"))
+    current = {"wind_speed": ws._to_float(ws._value_at(ws._safe_list_values(hourly, "wind_speed_10m"), idx))}
+    return {
+        "hourly": ws._map_hourly_output(hourly),
+        "daily": ws._map_daily_output(daily),
+        "farm_decisions": ws._build_farm_decisions(hourly=hourly, daily=daily, current=current, idx=idx),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Weather payload mapping CPU benchmark")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--days", type=int, default=16)
+    args = parser.parse_args()
+
+    hourly, daily = _synthetic_payload(args.days)
+    _map_payload(hourly, daily)  # warm-up
+
+    samples_us: list[float] = []
+    for _ in range(args.iterations):
+        started = time.process_time()
+        _map_payload(hourly, daily)
+        samples_us.append((time.process_time() - started) * 1e6)
+
+    ordered = sorted(samples_us)
+    report = {
+        "hourly_rows": len(hourly["time"]),
+        "hourly_fields": len(ws.HOURLY_FIELDS),
+        "iterations": args.iterations,
+        "cpu_us_mean": round(statistics.fmean(samples_us), 1),
+        "cpu_us_p50": round(ordered[len(ordered) // 2], 1),
+        "cpu_us_p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
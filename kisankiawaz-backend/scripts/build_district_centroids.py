@@ -0,0 +1,61 @@
+"""Build ref_district_centroids from the mandi directory and PIN master.
+
+Averages coordinates per normalized (state, district), pincode and state so
+the market service can resolve a farmer's location with a dictionary lookup.
+Entries the service learned live (geocoded districts) are kept unless this
+build now has reference data for them.
+
+Usage:
+  python scripts/build_district_centroids.py
+  python scripts/build_district_centroids.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, "/app")
+sys.path.insert(0, ROOT_DIR)
+
+from shared.core.constants import MongoCollections
+from shared.db.mongodb import get_db
+from shared.services.district_centroids import compute_centroids
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="compute and report without writing")
+    args = parser.parse_args()
+
+    db = get_db()
+    mandi_rows = (d.to_dict() or {} for d in db.collection(MongoCollections.REF_MANDI_DIRECTORY).stream())
+    pin_rows = (d.to_dict() or {} for d in db.collection(MongoCollections.REF_PIN_MASTER).stream())
+    docs = compute_centroids(mandi_rows, pin_rows)
+
+    kinds: dict[str, int] = {}
+    for doc in docs.values():
+        kinds[doc["kind"]] = kinds.get(doc["kind"], 0) + 1
+    print(f"Computed {len(docs)} centroids: {kinds}")
+    if args.dry_run:
+        return
+
+    target = db.collection(MongoCollections.REF_DISTRICT_CENTROIDS)
+    batch = db.batch()
+    pending = 0
+    for doc_id, doc in docs.items():
+        batch.set(target.document(doc_id), doc)
+        pending += 1
+        if pending >= 350:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    print(f"Wrote {len(docs)} documents to {MongoCollections.REF_DISTRICT_CENTROIDS}")
+
+
+if __name__ == "__main__":
+    main()
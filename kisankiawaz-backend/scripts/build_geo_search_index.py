@@ -0,0 +1,47 @@
+"""Build the memory-mapped village/PIN search index from ref_pin_master.
+
+The geo service maps the resulting file (GEO_SEARCH_INDEX_PATH) and reloads
+it within a minute of it being replaced, so rerun this after PIN master
+imports.
+
+Usage:
+  python scripts/build_geo_search_index.py
+  python scripts/build_geo_search_index.py --output /app/data/geo_search_index.bin
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
+sys.path.insert(0, "/app")
+sys.path.insert(0, ROOT_DIR)
+
+from shared.core.constants import MongoCollections
+from shared.db.mongodb import get_db
+from shared.services.geo_search_index import INDEX_PATH, GeoSearchIndex, write_index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=INDEX_PATH, help="index file to write")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    db = get_db()
+    rows = [doc.to_dict() or {} for doc in db.collection(MongoCollections.REF_PIN_MASTER).stream()]
+    size = write_index(args.output, rows)
+
+    index = GeoSearchIndex(args.output)
+    print(
+        f"Wrote {args.output}: {len(index)} records from {len(rows)} rows, "
+        f"{len(index.states)} states, {size / 1024:.1f} KiB in {time.perf_counter() - started:.1f}s"
+    )
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -131,6 +131,32 @@ INDEX_SPECS = {
             "keys": [("provider_id", ASCENDING)],
         },
     ],
+    "equipment_booking_calendars": [
+        {
+            "name": "ix_equipment_id",
+            "keys": [("equipment_id", ASCENDING)],
+        },
+    ],
+    "ref_equipment_rate_history_agg": [
+        {
+            "name": "ix_equipment_key_state_key_period",
+            "keys": [
+                ("equipment_key", ASCENDING),
+                ("state_key", ASCENDING),
+                ("period", ASCENDING),
+            ],
+        },
+        {
+            "name": "ix_state_key_period",
+            "keys": [("state_key", ASCENDING), ("period", ASCENDING)],
+        },
+    ],
+    "ref_district_centroids": [
+        {
+            "name": "ix_updated_at",
+            "keys": [("updated_at", ASCENDING)],
+        },
+    ],
     "equipment": [
         {
             "name": "ix_farmer_updated_desc",
@@ -1,5 +1,9 @@
 """Create payload indexes for Qdrant collections used in retrieval filters.
 
+Index declarations live in ``shared.services.qdrant_service.COLLECTION_SPECS``
+and are also applied automatically whenever QdrantService provisions or
+filters a collection; this script backfills them on existing deployments.
+
 Usage:
   python scripts/build_qdrant_payload_indexes.py
 """
@@ -14,81 +18,28 @@ from datetime import datetime, timezone
 ROOT_DIR = os.path.join(os.path.dirname(__file__), "..")
 sys.path.insert(0, ROOT_DIR)
 
-from qdrant_client import QdrantClient
-from qdrant_client.models import PayloadSchemaType
-
 from shared.core.config import get_settings
-
-
-PAYLOAD_INDEX_SPECS: dict[str, list[tuple[str, PayloadSchemaType]]] = {
-    "schemes_semantic": [
-        ("scheme_id", PayloadSchemaType.KEYWORD),
-        ("ministry", PayloadSchemaType.KEYWORD),
-        ("beneficiary_state", PayloadSchemaType.KEYWORD),
-        ("categories", PayloadSchemaType.KEYWORD),
-        ("source", PayloadSchemaType.KEYWORD),
-    ],
-    "mandi_price_intelligence": [
-        ("commodity", PayloadSchemaType.KEYWORD),
-        ("state", PayloadSchemaType.KEYWORD),
-        ("district", PayloadSchemaType.KEYWORD),
-        ("market", PayloadSchemaType.KEYWORD),
-        ("trend", PayloadSchemaType.KEYWORD),
-    ],
-    "crop_advisory_kb": [
-        ("topic", PayloadSchemaType.KEYWORD),
-        ("crop", PayloadSchemaType.KEYWORD),
-        ("state", PayloadSchemaType.KEYWORD),
-        ("source", PayloadSchemaType.KEYWORD),
-        ("language", PayloadSchemaType.KEYWORD),
-    ],
-    "geo_location_index": [
-        ("pincode", PayloadSchemaType.KEYWORD),
-        ("district_name", PayloadSchemaType.KEYWORD),
-        ("state_name", PayloadSchemaType.KEYWORD),
-        ("source", PayloadSchemaType.KEYWORD),
-    ],
-    "equipment_semantic": [
-        ("equipment_id", PayloadSchemaType.KEYWORD),
-        ("state", PayloadSchemaType.KEYWORD),
-        ("district", PayloadSchemaType.KEYWORD),
-        ("category", PayloadSchemaType.KEYWORD),
-        ("source", PayloadSchemaType.KEYWORD),
-        ("is_active", PayloadSchemaType.BOOL),
-    ],
-}
+from shared.services.qdrant_service import COLLECTION_SPECS, QdrantService
 
 
 def main() -> int:
     settings = get_settings()
-    client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+    QdrantService.get_client()
 
-    existing = {c.name for c in client.get_collections().collections}
+    existing = QdrantService._collection_names() | set(QdrantService._alias_targets())
     report: dict[str, dict] = {}
 
-    for collection_name, fields in PAYLOAD_INDEX_SPECS.items():
+    for collection_name, spec in COLLECTION_SPECS.items():
         if collection_name not in existing:
             report[collection_name] = {"status": "missing_collection"}
             continue
 
-        created: list[str] = []
-        failed: list[dict] = []
-        for field_name, field_type in fields:
-            try:
-                client.create_payload_index(
-                    collection_name=collection_name,
-                    field_name=field_name,
-                    field_schema=field_type,
-                    wait=True,
-                )
-                created.append(field_name)
-            except Exception as exc:  # noqa: BLE001
-                failed.append({"field": field_name, "error": str(exc)})
-
+        created = QdrantService.ensure_payload_indexes(collection_name, force=True)
+        declared = list(spec.payload_indexes)
         report[collection_name] = {
             "status": "ok",
             "created": created,
-            "failed": failed,
+            "skipped_existing_or_failed": [f for f in declared if f not in created],
         }
 
     payload = {
@@ -2,6 +2,10 @@
 
 Usage:
   python scripts/download_scheme_docs_from_db.py --reset --force
+
+An interrupted run is resumed by the next invocation with the same --force
+flag (schemes it already finished are not fetched again); pass --no-resume
+to start over.
 """
 
 from __future__ import annotations
@@ -29,7 +33,7 @@ async def _load_db_schemes() -> list[dict[str, Any]]:
     return items
 
 
-async def main(reset: bool, force: bool) -> None:
+async def main(reset: bool, force: bool, resume: bool = True) -> None:
     downloader = SchemeDocumentDownloader("/scheme_documents")
 
     reset_info = None
@@ -42,12 +46,14 @@ async def main(reset: bool, force: bool) -> None:
         schemes = get_all_schemes()
         source = "builtin_fallback"
 
-    result = await downloader.download_all_schemes(force=force, schemes=schemes)
+    result = await downloader.download_all_schemes(force=force, schemes=schemes, resume=resume)
 
     summary = {
         "scheme_source": source,
         "input_scheme_count": len(schemes),
         "reset": reset_info,
+        "job_id": result.get("job_id"),
+        "resumed_schemes": result.get("resumed_schemes", 0),
         "total_schemes": result.get("total_schemes", 0),
         "total_downloaded": result.get("total_downloaded", 0),
         "total_cached": result.get("total_cached", 0),
@@ -62,6 +68,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--reset", action="store_true", help="Delete all existing downloaded docs first")
     parser.add_argument("--force", action="store_true", help="Force re-download even if already cached")
+    parser.add_argument("--no-resume", action="store_true", help="Start a new job instead of resuming an interrupted one")
     args = parser.parse_args()
 
-    asyncio.run(main(reset=args.reset, force=args.force))
+    asyncio.run(main(reset=args.reset, force=args.force, resume=not args.no_resume))
@@ -27,6 +27,7 @@ sys.path.insert(0, ROOT_DIR)
 
 from shared.core.constants import MongoCollections
 from shared.db.mongodb import get_db
+from shared.services.rate_history_aggregates import sync_rate_history_aggregates
 
 
 def slugify(value: str) -> str:
@@ -223,6 +224,7 @@ def main() -> int:
     db = get_db()
     deleted = delete_collection(db, MongoCollections.REF_EQUIPMENT_RATE_HISTORY)
     inserted = insert_rows(db, rows)
+    aggregates = sync_rate_history_aggregates(db)
 
     db.collection(MongoCollections.REF_DATA_INGESTION_META).document("equipment_rate_history_replace_from_json").set(
         {
@@ -231,6 +233,7 @@ def main() -> int:
             "months": args.months,
             "deleted_docs": deleted,
             "inserted_docs": inserted,
+            "aggregates": aggregates,
             "providers_count": len(payload.get("providers", [])) if isinstance(payload, dict) else None,
             "timestamp": now_iso,
             "status": "success",
@@ -238,7 +241,7 @@ def main() -> int:
         merge=True,
     )
 
-    print({"deleted": deleted, "inserted": inserted, "months": args.months})
+    print({"deleted": deleted, "inserted": inserted, "months": args.months, "aggregates": aggregates})
     return 0
 
 
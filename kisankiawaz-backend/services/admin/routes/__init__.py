@@ -11,6 +11,7 @@ from shared.auth.deps import get_current_admin, get_current_super_admin
 from shared.auth.security import hash_password, verify_password, create_access_token, create_refresh_token
 from shared.db.mongodb import get_async_db, FieldFilter
 from shared.core.constants import MongoCollections
+from shared.services.rate_history_aggregates import apply_rate_history_entry_async
 from shared.errors import HttpStatus, bad_request, not_found, conflict, ErrorCode
 from shared.schemas.admin import (
     AdminLoginRequest,
@@ -479,7 +480,11 @@ async def create_rate_history_entry(body: RateHistoryEntry, admin: dict = Depend
             "created_by": admin.get("id", ""),
         }
     )
-    await db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY).document(doc_id).set(payload, merge=True)
+    ref = db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY).document(doc_id)
+    snap = await ref.get()
+    previous = snap.to_dict() if snap.exists else None
+    await ref.set(payload, merge=True)
+    await apply_rate_history_entry_async(db, previous, {**(previous or {}), **payload})
     await db.collection(MongoCollections.ADMIN_AUDIT_LOGS).add(
         {
             "admin_id": admin.get("id", ""),
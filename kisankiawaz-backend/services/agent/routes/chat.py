@@ -1,6 +1,8 @@
 from uuid import uuid4
 import asyncio
+import hmac
 import json
+import math
 import os
 import time
 import re
@@ -15,6 +17,8 @@ from shared.core.constants import QdrantCollections, MongoCollections
 from shared.db.mongodb import FieldFilter, get_async_db
 from services.chat_service import ChatService
 from services.groq_fallback_service import generate_groq_reply
+from services.response_cache import get_response_cache
+from shared.patterns.llm_gateway import PRIORITIES, LlmGatewayShed, get_llm_gateway
 from shared.services.api_key_allocator import get_api_key_allocator
 from loguru import logger
 
@@ -45,9 +49,6 @@ _CHAT_FINALIZE_JOB_TIMEOUT_SECONDS = max(
 _CHAT_RATE_LIMIT_WAIT_SECONDS = max(
     0.0, float(os.getenv("AGENT_RATE_LIMIT_WAIT_SECONDS", "90"))
 )
-_CHAT_RATE_LIMIT_POLL_SECONDS = max(
-    0.2, float(os.getenv("AGENT_RATE_LIMIT_POLL_SECONDS", "2"))
-)
 _CHAT_PRIMARY_PROVIDER_RAW = str(
     os.getenv("AGENT_PRIMARY_PROVIDER", "groq")
 ).strip().lower()
@@ -535,6 +536,10 @@ class SearchRequest(BaseModel):
 class _ChatCapacityError(Exception):
     """Signals exhausted model capacity after retries."""
 
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
 
 def _resolve_effective_language(
     *,
@@ -572,25 +577,26 @@ def _is_fallback_allowed(request_allow_fallback: bool) -> bool:
     return bool(request_allow_fallback) and _CHAT_SERVER_ENABLE_FALLBACK
 
 
-def _secondary_provider(primary_provider: str) -> str:
-    return "gemini" if primary_provider == "groq" else "groq"
+def _is_internal_caller(request: Request) -> bool:
+    expected = get_settings().INTERNAL_SERVICE_TOKEN
+    presented = str(request.headers.get("x-service-token") or "")
+    return bool(expected) and hmac.compare_digest(presented.encode(), expected.encode())
 
 
-def _provider_cooldown_wait_hint(allocator, provider: str) -> tuple[bool, float]:
-    """Return (ready_now, min_cooldown_seconds)."""
-    snapshot = allocator.snapshot()
-    provider_data = (snapshot.get("providers") or {}).get(provider) or {}
-    keys = provider_data.get("keys") or []
-    if not keys:
-        return True, 0.0
+def _request_priority(request: Request) -> str:
+    """Gateway priority class (voice|chat|background).
 
-    remaining = [
-        float(k.get("cooldown_remaining_seconds") or 0.0)
-        for k in keys
-    ]
-    if any(v <= 0 for v in remaining):
-        return True, 0.0
-    return False, min(remaining)
+    ``X-Request-Priority`` is only trusted from other services presenting
+    ``INTERNAL_SERVICE_TOKEN``; a client setting it directly is served as chat.
+    """
+    if not _is_internal_caller(request):
+        return "chat"
+    value = str(request.headers.get("x-request-priority") or "").strip().lower()
+    return value if value in PRIORITIES else "chat"
+
+
+def _secondary_provider(primary_provider: str) -> str:
+    return "gemini" if primary_provider == "groq" else "groq"
 
 
 async def _run_chat_via_gemini_with_allocator(
@@ -604,7 +610,8 @@ async def _run_chat_via_gemini_with_allocator(
 ) -> dict:
     gemini_lease = None
     if allocator.has_provider("gemini"):
-        gemini_lease = allocator.acquire("gemini")
+        # The allocator's shared key state is a blocking Redis round trip.
+        gemini_lease = await asyncio.to_thread(allocator.acquire, "gemini")
         os.environ["GOOGLE_API_KEY"] = gemini_lease.key
         os.environ["GEMINI_API_KEY"] = gemini_lease.key
 
@@ -617,15 +624,15 @@ async def _run_chat_via_gemini_with_allocator(
             agent_type=agent_type,
         )
         if gemini_lease:
-            allocator.report_success(gemini_lease)
+            await asyncio.to_thread(allocator.report_success, gemini_lease)
         return result
     except Exception as exc:  # noqa: BLE001
         retryable = _is_retryable_capacity_error(exc)
         if gemini_lease:
             if retryable:
-                allocator.report_rate_limited(gemini_lease, str(exc))
+                await asyncio.to_thread(allocator.report_rate_limited, gemini_lease, str(exc))
             else:
-                allocator.report_error(gemini_lease, str(exc))
+                await asyncio.to_thread(allocator.report_error, gemini_lease, str(exc))
         raise
 
 
@@ -696,6 +703,45 @@ async def _cleanup_expired_jobs() -> None:
             _CHAT_JOBS.pop(req_id, None)
 
 
+async def _run_chat_on_provider(
+    *,
+    provider: str,
+    allocator,
+    user_id: str,
+    session_id: str,
+    message: str,
+    language: str | None,
+    agent_type: str | None,
+    priority: str,
+    timeout: float,
+) -> dict:
+    async def call() -> dict:
+        if provider == "groq":
+            return await _chat_service.process_message_with_groq_fallback(
+                user_id=user_id,
+                session_id=session_id,
+                message=message,
+                language=language,
+                agent_type=agent_type,
+            )
+        return await _run_chat_via_gemini_with_allocator(
+            allocator=allocator,
+            user_id=user_id,
+            session_id=session_id,
+            message=message,
+            language=language,
+            agent_type=agent_type,
+        )
+
+    return await get_llm_gateway().run(
+        provider,
+        call,
+        priority=priority,
+        timeout=timeout,
+        is_overload=_is_retryable_capacity_error,
+    )
+
+
 async def _run_chat_with_allocator(
     *,
     user_id: str,
@@ -704,6 +750,7 @@ async def _run_chat_with_allocator(
     language: str | None,
     agent_type: str | None,
     allow_fallback: bool,
+    priority: str = "chat",
 ) -> dict:
     settings = get_settings()
     allocator = get_api_key_allocator()
@@ -713,73 +760,40 @@ async def _run_chat_with_allocator(
     attempt_count = 0
     wait_deadline = time.time() + _CHAT_RATE_LIMIT_WAIT_SECONDS
 
+    # Retries do not sleep: the gateway queues each attempt until a key is out
+    # of cooldown and the provider budget allows it, or sheds it.
     while True:
+        remaining_wait = wait_deadline - time.time()
         can_keep_trying = attempt_count < settings.key_router_max_retries
-        can_wait_more = (
-            last_rate_limit_error is not None
-            and _CHAT_RATE_LIMIT_WAIT_SECONDS > 0
-            and time.time() < wait_deadline
-        )
+        can_wait_more = last_rate_limit_error is not None and remaining_wait > 0
         if not can_keep_trying and not can_wait_more:
             break
 
-        if allocator.has_provider(primary_provider):
-            ready_now, min_cooldown = _provider_cooldown_wait_hint(
-                allocator, primary_provider
-            )
-            if not ready_now:
-                remaining_wait = wait_deadline - time.time()
-                if remaining_wait <= 0:
-                    break
-                sleep_s = min(
-                    max(_CHAT_RATE_LIMIT_POLL_SECONDS, 0.2),
-                    max(min_cooldown, 0.2),
-                    remaining_wait,
-                )
-                logger.info(
-                    f"All {primary_provider.upper()} keys cooling down; waiting {sleep_s:.1f}s before retry"
-                )
-                await asyncio.sleep(sleep_s)
-                continue
-
         attempt_count += 1
-
         try:
-            if primary_provider == "groq":
-                result = await _chat_service.process_message_with_groq_fallback(
-                    user_id=user_id,
-                    session_id=session_id,
-                    message=message,
-                    language=language,
-                    agent_type=agent_type,
-                )
-            else:
-                result = await _run_chat_via_gemini_with_allocator(
-                    allocator=allocator,
-                    user_id=user_id,
-                    session_id=session_id,
-                    message=message,
-                    language=language,
-                    agent_type=agent_type,
-                )
-            return result
+            return await _run_chat_on_provider(
+                provider=primary_provider,
+                allocator=allocator,
+                user_id=user_id,
+                session_id=session_id,
+                message=message,
+                language=language,
+                agent_type=agent_type,
+                priority=priority,
+                timeout=max(remaining_wait, 0.0),
+            )
+        except LlmGatewayShed as exc:
+            logger.warning(
+                f"{primary_provider.upper()} gateway shed {priority} request for user {user_id}: {exc.reason}"
+            )
+            last_rate_limit_error = exc
+            break
         except Exception as exc:  # noqa: BLE001
-            retryable = _is_retryable_capacity_error(exc)
-            if retryable:
+            if _is_retryable_capacity_error(exc):
                 logger.warning(
                     f"{primary_provider.upper()} rate/capacity issue for user {user_id}; rotating key"
                 )
                 last_rate_limit_error = exc
-                if _CHAT_RATE_LIMIT_WAIT_SECONDS > 0 and time.time() < wait_deadline:
-                    remaining_wait = wait_deadline - time.time()
-                    sleep_s = min(
-                        max(_CHAT_RATE_LIMIT_POLL_SECONDS, 0.2),
-                        max(remaining_wait, 0.2),
-                    )
-                    logger.info(
-                        f"Rate-limited {primary_provider.upper()} primary; backing off for {sleep_s:.1f}s"
-                    )
-                    await asyncio.sleep(sleep_s)
                 continue
             raise
 
@@ -791,26 +805,26 @@ async def _run_chat_with_allocator(
         logger.warning(
             f"Falling back to {secondary_provider.upper()} for user {user_id} after {primary_provider.upper()} retries"
         )
-        if secondary_provider == "groq":
-            return await _chat_service.process_message_with_groq_fallback(
+        try:
+            return await _run_chat_on_provider(
+                provider=secondary_provider,
+                allocator=allocator,
                 user_id=user_id,
                 session_id=session_id,
                 message=message,
                 language=language,
                 agent_type=agent_type,
+                priority=priority,
+                timeout=_CHAT_FALLBACK_TIMEOUT_SECONDS,
             )
-        return await _run_chat_via_gemini_with_allocator(
-            allocator=allocator,
-            user_id=user_id,
-            session_id=session_id,
-            message=message,
-            language=language,
-            agent_type=agent_type,
-        )
+        except LlmGatewayShed as exc:
+            last_rate_limit_error = exc
 
     if last_rate_limit_error is not None:
+        retry_after = getattr(last_rate_limit_error, "retry_after", None)
         raise _ChatCapacityError(
-            "AI model rate limit exceeded across configured keys. Please retry shortly."
+            "AI model rate limit exceeded across configured keys. Please retry shortly.",
+            retry_after=retry_after,
         )
 
     raise _ChatCapacityError("AI response generation failed due to model capacity.")
@@ -827,6 +841,7 @@ async def _run_finalize_job(
     allow_fallback: bool,
     response_mode: str,
     partial_response: str,
+    priority: str = "chat",
 ) -> None:
     try:
         fallback_provider = _secondary_provider(_CHAT_PRIMARY_PROVIDER)
@@ -840,6 +855,7 @@ async def _run_finalize_job(
                         language=language,
                         agent_type=agent_type,
                         allow_fallback=allow_fallback,
+                        priority=priority,
                     ),
                     timeout=_CHAT_FINALIZE_JOB_TIMEOUT_SECONDS,
                 )
@@ -852,6 +868,7 @@ async def _run_finalize_job(
                     language=language,
                     agent_type=agent_type,
                     allow_fallback=False,
+                    priority=priority,
                 )
         except asyncio.TimeoutError:
             allocator = get_api_key_allocator()
@@ -1267,6 +1284,7 @@ async def chat(body: ChatRequest, request: Request, user=Depends(get_current_use
     warmup_wait_s = max(0.5, float(os.getenv("EMBEDDING_WARMUP_WAIT_SECONDS", "2.5")))
     await embedding_service.ensure_warm(timeout_seconds=warmup_wait_s)
     allow_fallback = _is_fallback_allowed(body.allow_fallback)
+    priority = _request_priority(request)
     timeout_fallback_provider = _secondary_provider(_CHAT_PRIMARY_PROVIDER)
     try:
         if allow_fallback:
@@ -1279,6 +1297,7 @@ async def chat(body: ChatRequest, request: Request, user=Depends(get_current_use
                         language=effective_language,
                         agent_type=body.agent_type,
                         allow_fallback=True,
+                        priority=priority,
                     ),
                     timeout=_CHAT_PRIMARY_TIMEOUT_SECONDS,
                 )
@@ -1370,6 +1389,7 @@ async def chat(body: ChatRequest, request: Request, user=Depends(get_current_use
                 language=effective_language,
                 agent_type=body.agent_type,
                 allow_fallback=False,
+                priority=priority,
             )
 
         if isinstance(result, dict):
@@ -1383,15 +1403,17 @@ async def chat(body: ChatRequest, request: Request, user=Depends(get_current_use
                 result=result,
             )
         return result
-    except _ChatCapacityError:
+    except _ChatCapacityError as exc:
         from fastapi.responses import JSONResponse
 
+        retry_after = int(math.ceil(exc.retry_after or 15))
         return JSONResponse(
             status_code=429,
             content={
                 "detail": "AI model rate limit exceeded across configured keys. Please retry shortly.",
-                "retry_after_seconds": 15,
+                "retry_after_seconds": retry_after,
             },
+            headers={"Retry-After": str(retry_after)},
         )
 
 
@@ -1521,6 +1543,7 @@ async def chat_prepare(body: ChatPrepareRequest, request: Request, user=Depends(
             allow_fallback=allow_fallback,
             response_mode=effective_mode,
             partial_response=partial_response,
+            priority=_request_priority(request),
         )
     )
 
@@ -1639,7 +1662,13 @@ async def chat_finalize(body: ChatFinalizeRequest, user=Depends(get_current_user
 async def key_pool_status(_admin=Depends(get_current_admin)):
     """Return anonymized allocator activity/load status for monitoring."""
     allocator = get_api_key_allocator()
-    return allocator.snapshot()
+    return {**await asyncio.to_thread(allocator.snapshot), "gateway": get_llm_gateway().stats()}
+
+
+@router.get("/response-cache/status")
+async def response_cache_status(_admin=Depends(get_current_admin)):
+    """Return shared reply cache hit rate and LLM calls saved since process start."""
+    return get_response_cache().stats()
 
 
 @router.get("/sessions")
@@ -9,9 +9,18 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from shared.db.mongodb import FieldFilter, get_async_db
-from shared.core.constants import MongoCollections
+from shared.core.constants import MongoCollections, QdrantCollections
 from agents.coordinator import build_coordinator
-from services.groq_fallback_service import generate_groq_reply
+from services.groq_fallback_service import generate_groq_reply as _generate_groq_reply
+from services.language_check import expected_script, language_mismatch
+from services.llm_usage import begin_turn, current_usage, llm_call, usage_metadata
+from services.response_cache import (
+    CacheKey,
+    get_response_cache,
+    is_shareable_question,
+    tool_data_digest,
+)
+from services.single_pass_reply import parse_single_pass_reply
 from loguru import logger
 
 
@@ -108,6 +117,11 @@ _ENABLE_ENGLISH_PIVOT_TRANSLATION = str(
 ).strip().lower() in {"1", "true", "yes"}
 
 
+def generate_groq_reply(*args, stage: str = "groq", **kwargs) -> dict[str, Any]:
+    with llm_call(stage):
+        return _generate_groq_reply(*args, **kwargs)
+
+
 class ChatService:
     def __init__(self):
         self.session_service = InMemorySessionService()
@@ -125,6 +139,14 @@ class ChatService:
         self._prefer_direct_scheme_equipment = str(
             os.getenv("AGENT_PREFER_DIRECT_RESPONSES", "0")
         ).strip().lower() in {"1", "true", "yes"}
+        # Single pass: language, script, tone and domain constraints go into the generation prompt and
+        # follow-up rewrites run only when the local script check flags the reply.
+        self._single_pass = str(os.getenv("AGENT_SINGLE_PASS_GENERATION", "1")).strip().lower() in {
+            "1",
+            "true",
+            "yes",
+        }
+        self._response_cache = get_response_cache()
 
     @staticmethod
     def _compact_text(text: str, max_chars: int) -> str:
@@ -212,7 +234,7 @@ class ChatService:
         )
         try:
             translated = await asyncio.to_thread(
-                lambda: generate_groq_reply(message=prompt, language="en").get("response", "")
+                lambda: generate_groq_reply(message=prompt, language="en", stage="pivot").get("response", "")
             )
             clean = str(translated or "").strip()
             return clean if clean else text
@@ -256,6 +278,9 @@ class ChatService:
             return turn_language, user_message
         if normalized.startswith("auto") and self._is_probably_english(user_message):
             return turn_language, user_message
+        # Romanized Hindi/Hinglish already hits the intent markers; only native scripts need the pivot.
+        if self._single_pass and self._infer_script_mode(user_message) == "auto-latin":
+            return turn_language, user_message
 
         pivot_message = await self._translate_to_english_pivot(
             user_message=user_message,
@@ -380,6 +405,28 @@ class ChatService:
             logger.warning(f"Agentic tool {tool_name} failed: {exc}")
             return tool_name, {"ok": False, "error": str(exc)}
 
+    async def _run_retrieval_tools_async(
+        self,
+        query: str,
+        targets: dict[str, int],
+        jobs: list[tuple[str, Any, dict]],
+    ) -> list[tuple[str, dict]]:
+        """Embed *query* once, batch-search *targets*, then run the retrieval tools.
+
+        The tools still call ``EmbeddingService.search`` themselves; the batched
+        prefetch primes its result cache so those calls return without another
+        embedding or Qdrant round trip.
+        """
+        try:
+            import main as m
+
+            await asyncio.to_thread(m.embedding_service.search_many, query, targets)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning(f"Batched retrieval prefetch failed: {exc}")
+        return list(
+            await asyncio.gather(*[self._run_tool_async(name, fn, **kwargs) for name, fn, kwargs in jobs])
+        )
+
     def _choose_primary_agent_hint(self, message: str, explicit_agent_type: str | None) -> str:
         if explicit_agent_type:
             return explicit_agent_type.strip().lower()
@@ -410,6 +457,7 @@ class ChatService:
         from tools.general_tools import get_livestock_advice, search_farming_knowledge
         from tools.market_tools import get_live_mandi_prices, get_live_mandis, get_price_trends
         from tools.scheme_tools import (
+            VECTOR_TOP_K,
             check_scheme_eligibility,
             search_equipment_rentals,
             search_government_schemes,
@@ -494,41 +542,44 @@ class ChatService:
                 ]
             )
 
+        # Every vector lookup of the turn shares one query embedding and one batched search.
+        retrieval_targets = {QdrantCollections.FARMING_GENERAL: 5}
+        retrieval_jobs: list[tuple[str, Any, dict]] = []
         if is_scheme or primary_agent == "scheme":
             independent_tools.append("scheme.search_government_schemes")
-            independent_jobs.append(
-                self._run_tool_async(
+            retrieval_targets[QdrantCollections.SCHEMES_SEMANTIC] = VECTOR_TOP_K
+            retrieval_jobs.append(
+                (
                     "scheme.search_government_schemes",
                     search_government_schemes,
-                    query=user_message,
-                    state=state_hint,
+                    {"query": user_message, "state": state_hint},
                 )
             )
 
         if is_equipment or primary_agent == "scheme":
             independent_tools.append("scheme.search_equipment_rentals")
-            independent_jobs.append(
-                self._run_tool_async(
+            retrieval_targets[QdrantCollections.EQUIPMENT_SEMANTIC] = VECTOR_TOP_K
+            retrieval_jobs.append(
+                (
                     "scheme.search_equipment_rentals",
                     search_equipment_rentals,
-                    query=user_message,
-                    state=state_hint,
+                    {"query": user_message, "state": state_hint},
                 )
             )
 
         if is_crop or primary_agent == "crop":
             independent_tools.append("crop.search_crop_knowledge")
-            independent_jobs.append(
-                self._run_tool_async("crop.search_crop_knowledge", search_crop_knowledge, query=user_message)
-            )
+            retrieval_targets[QdrantCollections.CROP_KNOWLEDGE] = 5
+            retrieval_jobs.append(("crop.search_crop_knowledge", search_crop_knowledge, {"query": user_message}))
 
         independent_tools.append("general.search_farming_knowledge")
-        independent_jobs.append(
-            self._run_tool_async("general.search_farming_knowledge", search_farming_knowledge, query=user_message)
-        )
+        retrieval_jobs.append(("general.search_farming_knowledge", search_farming_knowledge, {"query": user_message}))
 
-        independent_results = await asyncio.gather(*independent_jobs)
-        tool_outputs = {name: payload for name, payload in independent_results}
+        independent_results, retrieval_results = await asyncio.gather(
+            asyncio.gather(*independent_jobs),
+            self._run_retrieval_tools_async(user_message, retrieval_targets, retrieval_jobs),
+        )
+        tool_outputs = {name: payload for name, payload in [*independent_results, *retrieval_results]}
 
         sequential_tools: list[str] = []
 
@@ -871,7 +922,7 @@ class ChatService:
         )
         try:
             raw = await asyncio.to_thread(
-                lambda: generate_groq_reply(message=prompt, language=language or "auto").get("response", "")
+                lambda: generate_groq_reply(message=prompt, language=language or "auto", stage="generic_reply").get("response", "")
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning(f"Generic response generation failed: {exc}")
@@ -1402,15 +1453,16 @@ class ChatService:
         )
         content = types.Content(role="user", parts=[types.Part.from_text(text=prompt)])
         translated = ""
-        async for event in self.runner.run_async(
-            user_id="translator", session_id=runtime_session_id, new_message=content
-        ):
-            if event.is_final_response():
-                parts = getattr(getattr(event, "content", None), "parts", None) or []
-                for part in parts:
-                    part_text = getattr(part, "text", None)
-                    if part_text:
-                        translated += part_text
+        with llm_call("runner_translation"):
+            async for event in self.runner.run_async(
+                user_id="translator", session_id=runtime_session_id, new_message=content
+            ):
+                if event.is_final_response():
+                    parts = getattr(getattr(event, "content", None), "parts", None) or []
+                    for part in parts:
+                        part_text = getattr(part, "text", None)
+                        if part_text:
+                            translated += part_text
         return translated.strip()
 
     async def _infer_latin_script_language(self, user_message: str) -> str:
@@ -1431,6 +1483,8 @@ class ChatService:
             roman_indic_hints = HINDI_MARKERS | HINGLISH_MARKERS | {"mane", "shu", "tame", "che", "nathi", "majha", "kay"}
             if any(t in en_like for t in tokens) and not any(t in roman_indic_hints for t in tokens):
                 return "english"
+        if self._single_pass:
+            return "unknown"
 
         prompt = (
             "Identify the most likely natural language of this user message written in Latin script. "
@@ -1443,7 +1497,7 @@ class ChatService:
         )
         try:
             label = await asyncio.to_thread(
-                lambda: generate_groq_reply(message=prompt, language="auto-latin").get("response", "")
+                lambda: generate_groq_reply(message=prompt, language="auto-latin", stage="language_id").get("response", "")
             )
             clean = str(label or "").strip().lower().split()[0] if str(label or "").strip() else "unknown"
             allowed = {
@@ -1504,6 +1558,9 @@ class ChatService:
         lower = txt.lower()
         if any(m in lower for m in quick_markers):
             return True
+        if self._single_pass:
+            # The generation prompt carries the domain check and reports it back (see _single_pass_contract).
+            return True
 
         try:
             prompt = (
@@ -1512,7 +1569,7 @@ class ChatService:
                 f"Query: {txt}"
             )
             label = await asyncio.to_thread(
-                lambda: generate_groq_reply(message=prompt, language="en").get("response", "")
+                lambda: generate_groq_reply(message=prompt, language="en", stage="domain_check").get("response", "")
             )
             return str(label or "").strip().lower().startswith("in_domain")
         except Exception as exc:  # noqa: BLE001
@@ -1532,7 +1589,7 @@ class ChatService:
         )
         try:
             raw = await asyncio.to_thread(
-                lambda: generate_groq_reply(message=prompt, language=language or "auto").get("response", "")
+                lambda: generate_groq_reply(message=prompt, language=language or "auto", stage="out_of_scope_reply").get("response", "")
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning(f"Out-of-domain response generation failed: {exc}")
@@ -1556,6 +1613,8 @@ class ChatService:
         return self._strip_timestamp_details(self._sanitize_internal_source_labels(enforced))
 
     async def _enforce_language(self, response_text: str, language: str, user_message: str = "") -> str:
+        if self._single_pass:
+            return await self._repair_language(response_text, language, user_message)
         # Language is controlled by prompt instructions that mirror the current user turn.
         lang = str(language or "").lower().strip()
         normalized_lang = self._normalize_language_label(language)
@@ -1570,6 +1629,7 @@ class ChatService:
                             f"Answer:\n{response_text}"
                         ),
                         language="en",
+                        stage="language_repair",
                     ).get("response", "")
                 )
                 if rewritten.strip():
@@ -1586,6 +1646,7 @@ class ChatService:
                             f"Answer:\n{response_text}"
                         ),
                         language="kn",
+                        stage="language_repair",
                     ).get("response", "")
                 )
                 if rewritten.strip():
@@ -1602,6 +1663,7 @@ class ChatService:
                             f"Answer:\n{response_text}"
                         ),
                         language="es",
+                        stage="language_repair",
                     ).get("response", "")
                 )
                 if rewritten.strip():
@@ -1610,14 +1672,17 @@ class ChatService:
                 logger.warning(f"Spanish enforcement failed: {exc}")
         if lang.startswith("auto-latin") and self._contains_devanagari(response_text):
             try:
-                transliterated = generate_groq_reply(
-                    message=(
-                        "Rewrite the following answer in Latin script only. "
-                        "Do not use Devanagari. Preserve all facts, numbers, and recommendations exactly.\n\n"
-                        f"Answer:\n{response_text}"
-                    ),
-                    language="auto-latin",
-                ).get("response", "")
+                transliterated = await asyncio.to_thread(
+                    lambda: generate_groq_reply(
+                        message=(
+                            "Rewrite the following answer in Latin script only. "
+                            "Do not use Devanagari. Preserve all facts, numbers, and recommendations exactly.\n\n"
+                            f"Answer:\n{response_text}"
+                        ),
+                        language="auto-latin",
+                        stage="language_repair",
+                    ).get("response", "")
+                )
                 if transliterated.strip() and not self._contains_devanagari(transliterated):
                     return transliterated.strip()
             except Exception as exc:  # noqa: BLE001
@@ -1636,6 +1701,7 @@ class ChatService:
                                 f"Answer:\n{response_text}"
                             ),
                             language="en",
+                            stage="language_repair",
                         ).get("response", "")
                     )
                     if english_only.strip():
@@ -1662,6 +1728,7 @@ class ChatService:
                                 f"Answer:\n{response_text}"
                             ),
                             language="auto-latin",
+                            stage="language_repair",
                         ).get("response", "")
                     )
                     if rewritten.strip():
@@ -1683,6 +1750,7 @@ class ChatService:
                                 f"Answer:\n{response_text}"
                             ),
                             language="auto-latin",
+                            stage="language_repair",
                         ).get("response", "")
                     )
                     if style_matched.strip() and not self._contains_devanagari(style_matched):
@@ -1713,6 +1781,7 @@ class ChatService:
                                 f"Answer:\n{response_text}"
                             ),
                             language="auto",
+                            stage="language_repair",
                         ).get("response", "")
                     )
                     if rewritten_script.strip():
@@ -1740,6 +1809,7 @@ class ChatService:
                             f"Answer:\n{response_text}"
                         ),
                         language=normalized_lang,
+                        stage="language_repair",
                     ).get("response", "")
                 )
                 clean = str(rewritten or "").strip()
@@ -1750,9 +1820,65 @@ class ChatService:
 
         return self._sanitize_internal_source_labels(response_text)
 
+    def _language_target_for_prompt(self, language: str, user_message: str) -> str:
+        normalized = self._normalize_language_label(language)
+        script = expected_script(normalized, user_message)
+        script_label = f"{script.title()} script" if script else "the script of the user message"
+        if normalized.startswith("auto"):
+            return f"the same language as the user message, written in {script_label}"
+        return f"{self._language_label_for_prompt(normalized)}, written in {script_label}"
+
+    async def _repair_language(self, response_text: str, language: str, user_message: str = "") -> str:
+        """Single-pass counterpart of the enforcement chain: one rewrite, and only when the local check fails."""
+        reason = language_mismatch(
+            response_text,
+            self._normalize_language_label(language),
+            user_message,
+            romanized_hindi=HINDI_MARKERS | HINGLISH_MARKERS,
+        )
+        if reason:
+            target = self._language_target_for_prompt(language, user_message)
+            try:
+                rewritten = await asyncio.to_thread(
+                    lambda: generate_groq_reply(
+                        message=(
+                            f"Rewrite the answer in {target} only. "
+                            "Preserve all facts, numbers, named entities, units, locations, and actions exactly. "
+                            "Return only the rewritten answer.\n\n"
+                            f"User message (for language/script reference):\n{user_message}\n\n"
+                            f"Answer:\n{response_text}"
+                        ),
+                        language=language or "auto",
+                        stage="language_repair",
+                    ).get("response", "")
+                )
+                if str(rewritten or "").strip():
+                    response_text = str(rewritten).strip()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning(f"Language repair failed ({reason}): {exc}")
+        return self._sanitize_internal_source_labels(response_text)
+
+    def _single_pass_contract(self, language: str, user_message: str, structured: bool) -> str:
+        """Output constraints that the multi-pass pipeline used to apply with follow-up LLM rewrites."""
+        lines = [
+            "Response contract:",
+            f"- Write the reply in {self._language_target_for_prompt(language, user_message)}; "
+            "keep crop, place and scheme names, numbers and units exact.",
+            "- Farmer-first, clear and actionable; choose the best format for the question, "
+            "bullets only when they improve clarity; no repetition or generic fluff.",
+            "- If the question is not about agriculture/farming, politely say it is outside your scope "
+            "and offer help with crops, mandi prices, weather, schemes, equipment, livestock and planning.",
+        ]
+        if structured:
+            lines.append(
+                'Return only a JSON object: {"reply": "<answer for the farmer>", '
+                '"in_domain": <true if the question is about agriculture/farming, else false>}.'
+            )
+        return "\n".join(lines)
+
     async def _polish_farmer_response(self, response_text: str, user_message: str, language: str) -> str:
         base = str(response_text or "").strip()
-        if not base:
+        if not base or self._single_pass:
             return base
         try:
             prompt = (
@@ -1765,7 +1891,7 @@ class ChatService:
                 f"Response:\n{base}"
             )
             polished = await asyncio.to_thread(
-                lambda: generate_groq_reply(message=prompt, language=language or "auto").get("response", "")
+                lambda: generate_groq_reply(message=prompt, language=language or "auto", stage="polish").get("response", "")
             )
             if str(polished or "").strip():
                 return str(polished).strip()
@@ -2076,6 +2202,10 @@ class ChatService:
 
         return "\n".join(lines)
 
+    def _attach_llm_usage(self, result: dict) -> dict:
+        result["llm_usage"] = usage_metadata("single_pass" if self._single_pass else "multi_pass")
+        return result
+
     async def build_partial_response(
         self,
         user_id: str,
@@ -2085,6 +2215,24 @@ class ChatService:
         agent_type: str | None = None,
     ) -> dict[str, Any]:
         """Build fast partial response from DB/vector context without running full LLM completion."""
+        begin_turn()
+        result = await self._build_partial_response(
+            user_id=user_id,
+            session_id=session_id,
+            message=message,
+            language=language,
+            agent_type=agent_type,
+        )
+        return self._attach_llm_usage(result)
+
+    async def _build_partial_response(
+        self,
+        user_id: str,
+        session_id: str,
+        message: str,
+        language: str = "hi",
+        agent_type: str | None = None,
+    ) -> dict[str, Any]:
         db = get_async_db()
         session_doc = await db.collection(MongoCollections.AGENT_SESSIONS).document(session_id).get()
         session_data = session_doc.to_dict() if session_doc.exists else {}
@@ -2345,6 +2493,165 @@ class ChatService:
             assistant_message=assistant_message,
         )
 
+    @staticmethod
+    def _public_geo(profile_geo: dict | None) -> dict:
+        profile_geo = profile_geo or {}
+        return {k: profile_geo[k] for k in ("state", "district") if str(profile_geo.get(k) or "").strip()}
+
+    def _response_cache_key(
+        self,
+        *,
+        original_message: str,
+        reasoning_message: str,
+        turn_language: str,
+        agent_type: str | None,
+        profile_geo: dict | None,
+    ) -> CacheKey | None:
+        """Shared-cache key for standalone market/weather/scheme/crop questions, else None.
+
+        Turns with a key are generated from public context only (state, district, crop from the
+        question), so the key carries nothing farmer-specific and farmers in a district share replies.
+        """
+        if not is_shareable_question(original_message, reasoning_message):
+            return None
+        if (
+            self._intent_has_any(reasoning_message, CALENDAR_INTENT_MARKERS)
+            or self._intent_has_any(reasoning_message, LIVESTOCK_INTENT_MARKERS)
+            or self._is_equipment_intent(reasoning_message)
+        ):
+            return None
+        if self._intent_has_any(reasoning_message, MARKET_INTENT_MARKERS):
+            topic = "market"
+        elif self._intent_has_any(reasoning_message, WEATHER_INTENT_MARKERS):
+            topic = "weather"
+        elif self._is_scheme_intent(reasoning_message):
+            topic = "scheme"
+        elif self._intent_has_any(reasoning_message, CROP_INTENT_MARKERS):
+            topic = "crop"
+        else:
+            return None
+        public_geo = self._public_geo(profile_geo)
+        state, district, _city = self._extract_geo_hints(
+            user_message=reasoning_message,
+            farmer_facts=[],
+            profile_geo=public_geo,
+        )
+        return self._response_cache.key_for(
+            message=reasoning_message,
+            topic=topic,
+            crop=self._extract_primary_crop(reasoning_message, []),
+            state=state,
+            district=district,
+            language=self._normalize_language_label(turn_language),
+            agent_type=agent_type,
+        )
+
+    async def _lookup_shared_response(
+        self,
+        *,
+        cache_key: CacheKey,
+        user_id: str,
+        reasoning_message: str,
+        farmer_facts: list[str],
+        profile_geo: dict | None,
+        agent_type: str | None,
+    ) -> tuple[dict | None, dict]:
+        """Return (cached entry or None, agentic plan if fresh tool data had to be fetched)."""
+        cached = await self._response_cache.lookup(cache_key, reasoning_message)
+        if cached is None or not self._agentic_mode_enabled or not self._response_cache.needs_verification(cached):
+            return cached, {}
+        agentic_plan = await self._execute_agentic_tool_plan(
+            user_id=user_id,
+            user_message=reasoning_message,
+            farmer_facts=farmer_facts,
+            profile_geo=profile_geo,
+            explicit_agent_type=agent_type,
+        )
+        if tool_data_digest(agentic_plan.get("tool_outputs") or {}) == cached.get("data_digest"):
+            await self._response_cache.verified(cached)
+            return cached, agentic_plan
+        await self._response_cache.drop(cached)
+        return None, agentic_plan
+
+    async def _serve_shared_response(
+        self,
+        *,
+        db,
+        cached: dict,
+        user_id: str,
+        session_id: str,
+        language: str,
+        agent_type: str | None,
+        original_message: str,
+        reasoning_message: str,
+        previous_summary: str,
+        previous_facts: list[str],
+    ) -> dict:
+        self._response_cache.served(cached)
+        agent_used = str(cached.get("agent_used") or "assistant")
+        await self._persist_turn(
+            db=db,
+            user_id=user_id,
+            session_id=session_id,
+            language=language,
+            agent_type=agent_type,
+            user_message=original_message,
+            assistant_message=cached["response"],
+            agent_used=agent_used,
+            previous_summary=previous_summary,
+            previous_facts=previous_facts,
+        )
+        result = {
+            "session_id": session_id,
+            "response": cached["response"],
+            "language": language,
+            "pivot_message_en": reasoning_message,
+            "agent_used": agent_used,
+            "source_provenance": cached.get("source_provenance") or [],
+            "agentic_primary_agent": cached.get("agentic_primary_agent"),
+            "agentic_trace": cached.get("agentic_trace") or {"parallel_tools": [], "sequential_tools": []},
+            "response_cache": {
+                "match": cached.get("match"),
+                "similarity": cached.get("similarity"),
+                "llm_calls_saved": int(cached.get("llm_calls") or 0),
+            },
+        }
+        for field in ("provider", "model"):
+            if cached.get(field):
+                result[field] = cached[field]
+        return result
+
+    async def _store_shared_response(
+        self,
+        *,
+        cache_key: CacheKey,
+        reasoning_message: str,
+        response_text: str,
+        agentic_plan: dict,
+        profile_geo: dict | None,
+        llm_calls: int,
+        extras: dict,
+    ) -> None:
+        # Generation saw public context only; still never cache a reply that echoes the farmer's identity.
+        private_terms = [str((profile_geo or {}).get(k) or "").strip() for k in ("name", "phone")]
+        await self._response_cache.store(
+            cache_key,
+            reasoning_message,
+            response_text,
+            data_digest=tool_data_digest(agentic_plan.get("tool_outputs") or {}),
+            llm_calls=llm_calls,
+            private_terms=private_terms,
+            extras={
+                **extras,
+                "source_provenance": self._build_source_provenance(agentic_plan=agentic_plan),
+                "agentic_primary_agent": agentic_plan.get("primary_agent"),
+                "agentic_trace": {
+                    "parallel_tools": agentic_plan.get("parallel_tools", []),
+                    "sequential_tools": agentic_plan.get("sequential_tools", []),
+                },
+            },
+        )
+
     async def process_message_with_groq_fallback(
         self,
         user_id: str,
@@ -2352,6 +2659,24 @@ class ChatService:
         message: str,
         language: str = "hi",
         agent_type: str | None = None,
+    ) -> dict:
+        begin_turn()
+        result = await self._process_message_with_groq_fallback(
+            user_id=user_id,
+            session_id=session_id,
+            message=message,
+            language=language,
+            agent_type=agent_type,
+        )
+        return self._attach_llm_usage(result)
+
+    async def _process_message_with_groq_fallback(
+        self,
+        user_id: str,
+        session_id: str,
+        message: str,
+        language: str = "hi",
+        agent_type: str | None = None,
     ) -> dict:
         db = get_async_db()
 
@@ -2427,13 +2752,49 @@ class ChatService:
                 },
             }
 
+        cache_key = self._response_cache_key(
+            original_message=original_message,
+            reasoning_message=reasoning_message,
+            turn_language=turn_language,
+            agent_type=agent_type,
+            profile_geo=profile_geo,
+        )
+        # Shareable turns are answered from public context only, so the reply fits any farmer in the district.
+        context_facts, context_geo = effective_farmer_facts, profile_geo
+        if cache_key is not None:
+            context_geo = self._public_geo(profile_geo)
+            context_facts = self._profile_geo_facts(context_geo)
         agentic_plan = {}
-        if self._agentic_mode_enabled:
+        llm_calls_before_generation = current_usage()["calls"]
+        if cache_key is not None:
+            cached, agentic_plan = await self._lookup_shared_response(
+                cache_key=cache_key,
+                user_id=user_id,
+                reasoning_message=reasoning_message,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
+                agent_type=agent_type,
+            )
+            if cached is not None:
+                return await self._serve_shared_response(
+                    db=db,
+                    cached=cached,
+                    user_id=user_id,
+                    session_id=session_id,
+                    language=turn_language,
+                    agent_type=agent_type,
+                    original_message=original_message,
+                    reasoning_message=reasoning_message,
+                    previous_summary=rolling_summary,
+                    previous_facts=effective_farmer_facts,
+                )
+
+        if self._agentic_mode_enabled and not agentic_plan:
             agentic_plan = await self._execute_agentic_tool_plan(
                 user_id=user_id,
                 user_message=reasoning_message,
-                farmer_facts=effective_farmer_facts,
-                profile_geo=profile_geo,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
                 explicit_agent_type=agent_type,
             )
 
@@ -2441,8 +2802,8 @@ class ChatService:
             direct = self._render_scheme_detail_response(
                 message=reasoning_message,
                 language=turn_language,
-                farmer_facts=effective_farmer_facts,
-                profile_geo=profile_geo,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
             )
             if direct.strip():
                 direct = await self._enforce_language(
@@ -2459,13 +2820,13 @@ class ChatService:
                 direct = self._enforce_memory_reference(
                     response_text=direct,
                     user_message=reasoning_message,
-                    farmer_facts=effective_farmer_facts,
+                    farmer_facts=context_facts,
                     language=turn_language,
                 )
                 direct = self._ensure_location_grounding(
                     response_text=direct,
                     user_message=reasoning_message,
-                    profile_geo=profile_geo,
+                    profile_geo=context_geo,
                     language=turn_language,
                 )
                 direct = self._append_calendar_verification_block(
@@ -2519,8 +2880,8 @@ class ChatService:
             direct = self._render_equipment_detail_response(
                 message=reasoning_message,
                 language=turn_language,
-                farmer_facts=effective_farmer_facts,
-                profile_geo=profile_geo,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
             )
             if direct.strip():
                 direct = await self._enforce_language(
@@ -2537,13 +2898,13 @@ class ChatService:
                 direct = self._enforce_memory_reference(
                     response_text=direct,
                     user_message=reasoning_message,
-                    farmer_facts=effective_farmer_facts,
+                    farmer_facts=context_facts,
                     language=turn_language,
                 )
                 direct = self._ensure_location_grounding(
                     response_text=direct,
                     user_message=reasoning_message,
-                    profile_geo=profile_geo,
+                    profile_geo=context_geo,
                     language=turn_language,
                 )
                 direct = self._append_calendar_verification_block(
@@ -2603,14 +2964,14 @@ class ChatService:
             summary=rolling_summary,
             recent_messages=recent_messages,
             language=turn_language,
-            farmer_facts=effective_farmer_facts,
+            farmer_facts=context_facts,
         )
 
         grounded_context = await asyncio.to_thread(
             self._build_grounded_fallback_context,
             user_message=reasoning_message,
-            farmer_facts=effective_farmer_facts,
-            profile_geo=profile_geo,
+            farmer_facts=context_facts,
+            profile_geo=context_geo,
         )
         agentic_context_block = self._render_agentic_context_block(agentic_plan)
 
@@ -2631,12 +2992,16 @@ class ChatService:
             "Avoid rigid templates; choose concise paragraphs or bullets based on what best fits this query. "
             "Output must be in the REQUIRED output language above."
         )
+        if self._single_pass:
+            augmented_message += "\n\n" + self._single_pass_contract(turn_language, original_message, structured=True)
 
         try:
             fallback = await asyncio.to_thread(
                 generate_groq_reply,
                 message=augmented_message,
                 language=turn_language,
+                json_mode=self._single_pass,
+                stage="generation",
             )
         except Exception as exc:  # noqa: BLE001
             logger.warning(f"Groq fallback generation failed in process_message_with_groq_fallback: {exc}")
@@ -2646,6 +3011,10 @@ class ChatService:
                 "model": "unavailable",
             }
         response_text = (fallback.get("response", "") or "").strip()
+        in_domain = True
+        if self._single_pass and response_text:
+            response_text, in_domain = parse_single_pass_reply(response_text)
+        agent_used = "assistant" if in_domain else "domain_guard"
         if not response_text:
             localized_degraded = {
                 "en": "I could not fetch the full model response right now. Here is a practical farmer action plan based on currently verified data and nearest references.",
@@ -2674,34 +3043,35 @@ class ChatService:
             language=turn_language,
             user_message=original_message,
         )
-        response_text = self._sanitize_unhelpful_response(response_text=response_text, language=turn_language)
-        response_text = self._enforce_source_freshness_note(
-            response_text=response_text,
-            user_message=reasoning_message,
-            language=turn_language,
-        )
-        response_text = self._enforce_memory_reference(
-            response_text=response_text,
-            user_message=reasoning_message,
-            farmer_facts=effective_farmer_facts,
-            language=turn_language,
-        )
-        response_text = self._ensure_location_grounding(
-            response_text=response_text,
-            user_message=reasoning_message,
-            profile_geo=profile_geo,
-            language=turn_language,
-        )
-        response_text = self._append_calendar_verification_block(
-            response_text=response_text,
-            agentic_plan=agentic_plan,
-            language=turn_language,
-        )
-        response_text = self._append_topic_checklist(
-            response_text=response_text,
-            user_message=reasoning_message,
-            language=turn_language,
-        )
+        if in_domain:
+            response_text = self._sanitize_unhelpful_response(response_text=response_text, language=turn_language)
+            response_text = self._enforce_source_freshness_note(
+                response_text=response_text,
+                user_message=reasoning_message,
+                language=turn_language,
+            )
+            response_text = self._enforce_memory_reference(
+                response_text=response_text,
+                user_message=reasoning_message,
+                farmer_facts=context_facts,
+                language=turn_language,
+            )
+            response_text = self._ensure_location_grounding(
+                response_text=response_text,
+                user_message=reasoning_message,
+                profile_geo=context_geo,
+                language=turn_language,
+            )
+            response_text = self._append_calendar_verification_block(
+                response_text=response_text,
+                agentic_plan=agentic_plan,
+                language=turn_language,
+            )
+            response_text = self._append_topic_checklist(
+                response_text=response_text,
+                user_message=reasoning_message,
+                language=turn_language,
+            )
         response_text = await self._polish_farmer_response(
             response_text=response_text,
             user_message=original_message,
@@ -2709,6 +3079,23 @@ class ChatService:
         )
         response_text = self._strip_timestamp_details(response_text)
 
+        # A reply that drew on this session's history is specific to it and is not shared.
+        shareable = cache_key is not None and not rolling_summary and not recent_messages
+        if shareable and in_domain and fallback.get("provider") != "groq_unavailable":
+            await self._store_shared_response(
+                cache_key=cache_key,
+                reasoning_message=reasoning_message,
+                response_text=response_text,
+                agentic_plan=agentic_plan,
+                profile_geo=profile_geo,
+                llm_calls=current_usage()["calls"] - llm_calls_before_generation,
+                extras={
+                    "agent_used": "assistant",
+                    "provider": fallback.get("provider", "groq"),
+                    "model": fallback.get("model", "unknown"),
+                },
+            )
+
         await self._persist_turn(
             db=db,
             user_id=user_id,
@@ -2717,7 +3104,7 @@ class ChatService:
             agent_type=agent_type,
             user_message=original_message,
             assistant_message=response_text,
-            agent_used="assistant",
+            agent_used=agent_used,
             previous_summary=rolling_summary,
             previous_facts=effective_farmer_facts,
         )
@@ -2727,7 +3114,7 @@ class ChatService:
             "response": response_text,
             "language": turn_language,
             "pivot_message_en": reasoning_message,
-            "agent_used": "assistant",
+            "agent_used": agent_used,
             "provider": fallback.get("provider", "groq"),
             "model": fallback.get("model", "unknown"),
             "source_provenance": self._build_source_provenance(agentic_plan=agentic_plan),
@@ -2872,6 +3259,24 @@ class ChatService:
         message: str,
         language: str = "hi",
         agent_type: str | None = None,
+    ) -> dict:
+        begin_turn()
+        result = await self._process_message(
+            user_id=user_id,
+            session_id=session_id,
+            message=message,
+            language=language,
+            agent_type=agent_type,
+        )
+        return self._attach_llm_usage(result)
+
+    async def _process_message(
+        self,
+        user_id: str,
+        session_id: str,
+        message: str,
+        language: str = "hi",
+        agent_type: str | None = None,
     ) -> dict:
         db = get_async_db()
 
@@ -2947,13 +3352,49 @@ class ChatService:
                 },
             }
 
+        cache_key = self._response_cache_key(
+            original_message=original_message,
+            reasoning_message=reasoning_message,
+            turn_language=turn_language,
+            agent_type=agent_type,
+            profile_geo=profile_geo,
+        )
+        # Shareable turns are answered from public context only, so the reply fits any farmer in the district.
+        context_facts, context_geo = effective_farmer_facts, profile_geo
+        if cache_key is not None:
+            context_geo = self._public_geo(profile_geo)
+            context_facts = self._profile_geo_facts(context_geo)
         agentic_plan = {}
-        if self._agentic_mode_enabled:
+        llm_calls_before_generation = current_usage()["calls"]
+        if cache_key is not None:
+            cached, agentic_plan = await self._lookup_shared_response(
+                cache_key=cache_key,
+                user_id=user_id,
+                reasoning_message=reasoning_message,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
+                agent_type=agent_type,
+            )
+            if cached is not None:
+                return await self._serve_shared_response(
+                    db=db,
+                    cached=cached,
+                    user_id=user_id,
+                    session_id=session_id,
+                    language=turn_language,
+                    agent_type=agent_type,
+                    original_message=original_message,
+                    reasoning_message=reasoning_message,
+                    previous_summary=rolling_summary,
+                    previous_facts=effective_farmer_facts,
+                )
+
+        if self._agentic_mode_enabled and not agentic_plan:
             agentic_plan = await self._execute_agentic_tool_plan(
                 user_id=user_id,
                 user_message=reasoning_message,
-                farmer_facts=effective_farmer_facts,
-                profile_geo=profile_geo,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
                 explicit_agent_type=agent_type,
             )
 
@@ -2961,8 +3402,8 @@ class ChatService:
             direct = self._render_scheme_detail_response(
                 message=reasoning_message,
                 language=turn_language,
-                farmer_facts=effective_farmer_facts,
-                profile_geo=profile_geo,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
             )
             if direct.strip():
                 direct = await self._enforce_language(
@@ -3005,8 +3446,8 @@ class ChatService:
             direct = self._render_equipment_detail_response(
                 message=reasoning_message,
                 language=turn_language,
-                farmer_facts=effective_farmer_facts,
-                profile_geo=profile_geo,
+                farmer_facts=context_facts,
+                profile_geo=context_geo,
             )
             if direct.strip():
                 direct = await self._enforce_language(
@@ -3053,7 +3494,7 @@ class ChatService:
             summary=rolling_summary,
             recent_messages=recent_messages,
             language=turn_language,
-            farmer_facts=effective_farmer_facts,
+            farmer_facts=context_facts,
         )
         agentic_context_block = self._render_agentic_context_block(agentic_plan)
 
@@ -3080,6 +3521,8 @@ class ChatService:
             "Avoid rigid templates; choose concise paragraphs or bullets based on what best fits this query. "
             "Output must be in the REQUIRED output language above."
         )
+        if self._single_pass:
+            augmented_message += "\n\n" + self._single_pass_contract(turn_language, original_message, structured=False)
 
         content = types.Content(
             role="user",
@@ -3088,18 +3531,20 @@ class ChatService:
 
         response_text = ""
         agent_used = "coordinator"
-        async for event in self.runner.run_async(
-            user_id=user_id, session_id=runtime_session_id, new_message=content
-        ):
-            if event.is_final_response():
-                parts = getattr(getattr(event, "content", None), "parts", None) or []
-                for part in parts:
-                    part_text = getattr(part, "text", None)
-                    if part_text:
-                        response_text += part_text
-                agent_used = event.author or "coordinator"
-
-        if not response_text.strip():
+        with llm_call("generation"):
+            async for event in self.runner.run_async(
+                user_id=user_id, session_id=runtime_session_id, new_message=content
+            ):
+                if event.is_final_response():
+                    parts = getattr(getattr(event, "content", None), "parts", None) or []
+                    for part in parts:
+                        part_text = getattr(part, "text", None)
+                        if part_text:
+                            response_text += part_text
+                    agent_used = event.author or "coordinator"
+
+        generated = bool(response_text.strip())
+        if not generated:
             response_text = "Here is a practical farmer action plan from currently available verified records."
 
         response_text = await self._enforce_language(
@@ -3116,13 +3561,13 @@ class ChatService:
         response_text = self._enforce_memory_reference(
             response_text=response_text,
             user_message=reasoning_message,
-            farmer_facts=effective_farmer_facts,
+            farmer_facts=context_facts,
             language=turn_language,
         )
         response_text = self._ensure_location_grounding(
             response_text=response_text,
             user_message=reasoning_message,
-            profile_geo=profile_geo,
+            profile_geo=context_geo,
             language=turn_language,
         )
         response_text = self._append_calendar_verification_block(
@@ -3142,6 +3587,19 @@ class ChatService:
         )
         response_text = self._strip_timestamp_details(response_text)
 
+        # A reply that drew on this session's history is specific to it and is not shared.
+        shareable = cache_key is not None and not rolling_summary and not recent_messages
+        if shareable and generated:
+            await self._store_shared_response(
+                cache_key=cache_key,
+                reasoning_message=reasoning_message,
+                response_text=response_text,
+                agentic_plan=agentic_plan,
+                profile_geo=profile_geo,
+                llm_calls=current_usage()["calls"] - llm_calls_before_generation,
+                extras={"agent_used": agent_used},
+            )
+
         await self._persist_turn(
             db=db,
             user_id=user_id,
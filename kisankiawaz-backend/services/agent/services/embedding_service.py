@@ -1,12 +1,21 @@
 import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams, models
+from qdrant_client.models import PointStruct, Distance, VectorParams, QueryRequest, models
 from fastembed import TextEmbedding
 from shared.core.config import get_settings
 from shared.core.constants import EMBEDDING_DIM, QdrantCollections
 from loguru import logger
 
+_COLLECTION_MAP_TTL_SECONDS = 300.0
+_VECTOR_CACHE_SIZE = 256
+_RESULT_CACHE_SIZE = 512
+_RESULT_CACHE_TTL_SECONDS = 60.0
+
 
 class EmbeddingService:
     def __init__(self):
@@ -26,6 +35,13 @@ class EmbeddingService:
             ],
         }
         self._sensitive_key_fragments = ("password", "password_hash", "token", "secret", "otp", "pin")
+        # Collection name -> exists (collections and aliases), refreshed every few minutes.
+        self._collection_map: dict[str, bool] = {}
+        self._collection_map_loaded_at = 0.0
+        # Query text -> vector, and (collection, query, top_k) -> results prefetched by search_many.
+        self._vector_cache: OrderedDict[str, list[float]] = OrderedDict()
+        self._result_cache: OrderedDict[tuple[str, str, int], tuple[float, list[dict]]] = OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def _is_sensitive_key(self, key: str) -> bool:
         lowered = str(key).lower()
@@ -37,7 +53,55 @@ class EmbeddingService:
         for item in aliases:
             if item not in unique:
                 unique.append(item)
-        return unique
+        known = self._known_collections()
+        if known is None:
+            return unique
+        # Skip candidates Qdrant is known not to have instead of probing them one by one.
+        existing = [item for item in unique if known.get(item, True)]
+        return existing
+
+    def _known_collections(self) -> dict[str, bool] | None:
+        """Return the cached collection-existence map, refreshing it when stale."""
+        if self.client is None:
+            return None
+        now = time.monotonic()
+        if self._collection_map and now - self._collection_map_loaded_at < _COLLECTION_MAP_TTL_SECONDS:
+            return self._collection_map
+        try:
+            names = {c.name for c in self.client.get_collections().collections}
+            try:
+                names.update(a.alias_name for a in self.client.get_aliases().aliases)
+            except Exception:
+                pass
+        except Exception:
+            return self._collection_map or None
+        tracked = {c for targets in self._collection_aliases.values() for c in targets}
+        tracked.update(self._collection_map)
+        self._collection_map = {name: True for name in names}
+        for name in tracked - names:
+            self._collection_map[name] = False
+        self._collection_map_loaded_at = now
+        return self._collection_map
+
+    def _mark_missing(self, collection: str) -> None:
+        self._collection_map[collection] = False
+        if collection not in self._missing_collections_logged:
+            logger.warning(f"Collection '{collection}' not found in Qdrant")
+            self._missing_collections_logged.add(collection)
+
+    def _format_points(self, points) -> list[dict]:
+        return [
+            {
+                "text": p.payload.get("text", ""),
+                "score": p.score,
+                "metadata": {
+                    k: v
+                    for k, v in p.payload.items()
+                    if k != "text" and not self._is_sensitive_key(k)
+                },
+            }
+            for p in points
+        ]
 
     async def initialize(self):
         if self._initialized:
@@ -89,7 +153,96 @@ class EmbeddingService:
                 logger.warning("Embedding model unavailable; retrieval will use graceful fallback")
                 self._unavailable_components_logged.add("model")
             return []
-        return next(self.model.embed([text])).tolist()
+        with self._cache_lock:
+            cached = self._vector_cache.get(text)
+            if cached is not None:
+                self._vector_cache.move_to_end(text)
+                return cached
+        vector = next(self.model.embed([text])).tolist()
+        with self._cache_lock:
+            self._vector_cache[text] = vector
+            while len(self._vector_cache) > _VECTOR_CACHE_SIZE:
+                self._vector_cache.popitem(last=False)
+        return vector
+
+    def _cached_results(self, collection: str, query: str, top_k: int) -> list[dict] | None:
+        key = (collection, query, top_k)
+        with self._cache_lock:
+            entry = self._result_cache.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.monotonic() - stored_at > _RESULT_CACHE_TTL_SECONDS:
+                self._result_cache.pop(key, None)
+                return None
+            return results
+
+    def _store_results(self, collection: str, query: str, top_k: int, results: list[dict]) -> None:
+        with self._cache_lock:
+            self._result_cache[(collection, query, top_k)] = (time.monotonic(), results)
+            while len(self._result_cache) > _RESULT_CACHE_SIZE:
+                self._result_cache.popitem(last=False)
+
+    def search_many(self, query: str, targets: dict[str, int]) -> dict[str, list[dict]]:
+        """Search several collections with a single query embedding.
+
+        ``targets`` maps logical collection -> top_k. Logical names are resolved
+        through the alias table and the cached existence map, requests that land
+        on the same physical collection share one ``query_batch_points`` call,
+        and distinct collections are queried concurrently. Results are grouped
+        per logical collection and also primed into the short-lived result
+        cache, so tool calls issued later in the same turn with the same query
+        are answered without another embedding or Qdrant round trip.
+        """
+        grouped: dict[str, list[dict]] = {name: [] for name in targets}
+        if self.client is None or not targets:
+            return grouped
+        vector = self.embed(query)
+        if not vector:
+            return grouped
+
+        def _run(physical: str, requests: list[tuple[str, int]]) -> list[tuple[str, int]]:
+            """Run one batch; return the requests to retry on the next alias candidate."""
+            try:
+                responses = self.client.query_batch_points(
+                    collection_name=physical,
+                    requests=[
+                        QueryRequest(query=vector, limit=top_k, with_payload=True)
+                        for _, top_k in requests
+                    ],
+                )
+            except Exception as e:
+                msg = str(e).lower()
+                if "not found" in msg or "doesn't exist" in msg:
+                    self._mark_missing(physical)
+                    missing.add(physical)
+                    return requests
+                logger.warning(f"Batched search on '{physical}' failed: {e}")
+                return []
+            for (logical, top_k), response in zip(requests, responses):
+                results = self._format_points(response.points)
+                grouped[logical] = results
+                self._store_results(logical, query, top_k, results)
+            return []
+
+        # A logical collection whose first candidate turns out to be missing is
+        # retried on its next alias candidate, as ``search`` does one by one.
+        pending = list(targets.items())
+        missing: set[str] = set()
+        while pending:
+            by_physical: dict[str, list[tuple[str, int]]] = {}
+            for logical, top_k in pending:
+                candidates = [c for c in self._candidate_collections(logical) if c not in missing]
+                if candidates:
+                    by_physical.setdefault(candidates[0], []).append((logical, top_k))
+            if not by_physical:
+                break
+            if len(by_physical) == 1:
+                pending = _run(*next(iter(by_physical.items())))
+            else:
+                with ThreadPoolExecutor(max_workers=len(by_physical)) as pool:
+                    pending = [req for retry in pool.map(lambda item: _run(*item), by_physical.items()) for req in retry]
+        return grouped
 
     def search(self, collection: str, query: str, top_k: int = 5) -> list[dict]:
         if self.client is None:
@@ -98,6 +251,10 @@ class EmbeddingService:
                 self._unavailable_components_logged.add("client")
             return []
 
+        cached = self._cached_results(collection, query, top_k)
+        if cached is not None:
+            return cached
+
         vector = self.embed(query)
         if not vector:
             return []
@@ -113,9 +270,7 @@ class EmbeddingService:
             except Exception as e:
                 msg = str(e).lower()
                 if "not found" in msg or "doesn't exist" in msg:
-                    if candidate not in self._missing_collections_logged:
-                        logger.warning(f"Collection '{candidate}' not found in Qdrant")
-                        self._missing_collections_logged.add(candidate)
+                    self._mark_missing(candidate)
                     continue
                 last_error = e
                 break
@@ -125,18 +280,7 @@ class EmbeddingService:
                     f"Using fallback Qdrant collection '{candidate}' for requested '{collection}'"
                 )
 
-            return [
-                {
-                    "text": p.payload.get("text", ""),
-                    "score": p.score,
-                    "metadata": {
-                        k: v
-                        for k, v in p.payload.items()
-                        if k != "text" and not self._is_sensitive_key(k)
-                    },
-                }
-                for p in results.points
-            ]
+            return self._format_points(results.points)
 
         if last_error is not None:
             raise last_error
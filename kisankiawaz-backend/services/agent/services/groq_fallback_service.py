@@ -50,7 +50,7 @@ def _extract_text(payload: dict[str, Any]) -> str:
     return ""
 
 
-def generate_groq_reply(message: str, language: str = "hi") -> dict[str, Any]:
+def generate_groq_reply(message: str, language: str = "hi", json_mode: bool = False) -> dict[str, Any]:
     settings = get_settings()
     allocator = get_api_key_allocator()
 
@@ -97,6 +97,24 @@ def generate_groq_reply(message: str, language: str = "hi") -> dict[str, Any]:
                 "If Preferred language hint is a concrete language code (for example en, hi, kn, es), output MUST be only in that language."
             )
 
+            body: dict[str, Any] = {
+                "model": settings.GROQ_MODEL,
+                "temperature": 0.2,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": system_prompt,
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Preferred language hint={language or 'auto'}. Query: {message}",
+                    },
+                ],
+            }
+            if json_mode:
+                # The prompt must itself ask for JSON; the API only enforces well-formed output.
+                body["response_format"] = {"type": "json_object"}
+
             with httpx.Client(timeout=45.0) as client:
                 response = client.post(
                     "https://api.groq.com/openai/v1/chat/completions",
@@ -104,26 +122,21 @@ def generate_groq_reply(message: str, language: str = "hi") -> dict[str, Any]:
                         "Authorization": f"Bearer {lease.key}",
                         "Content-Type": "application/json",
                     },
-                    json={
-                        "model": settings.GROQ_MODEL,
-                        "temperature": 0.2,
-                        "messages": [
-                            {
-                                "role": "system",
-                                "content": system_prompt,
-                            },
-                            {
-                                "role": "user",
-                                "content": f"Preferred language hint={language or 'auto'}. Query: {message}",
-                            },
-                        ],
-                    },
+                    json=body,
                 )
 
             if response.status_code == 429:
                 allocator.report_rate_limited(lease, "groq_429")
                 continue
 
+            if json_mode and response.status_code == 400 and "json_validate_failed" in response.text:
+                # The model produced invalid JSON; the key is fine. Retry once without
+                # JSON mode and let the caller's parser fall back to the plain text.
+                allocator.report_success(lease)
+                json_mode = False
+                attempt_count -= 1
+                continue
+
             response.raise_for_status()
             payload = response.json()
             text = _extract_text(payload)
@@ -0,0 +1,111 @@
+"""Local script/language check for generated replies.
+
+Single-pass generation asks the model for the right language and script up
+front; this module decides, without another model call, whether the reply
+actually honoured that contract and a repair rewrite is needed. It only
+looks at Unicode script ranges and, for English targets, the share of
+romanized Hindi words, so it cannot tell apart languages sharing a script
+(Hindi vs Marathi) -- those are left to the prompt.
+"""
+
+import re
+from typing import Iterable
+
+SCRIPT_RANGES = {
+    "devanagari": ("\u0900", "\u097f"),
+    "bengali": ("\u0980", "\u09ff"),
+    "gurmukhi": ("\u0a00", "\u0a7f"),
+    "gujarati": ("\u0a80", "\u0aff"),
+    "odia": ("\u0b00", "\u0b7f"),
+    "tamil": ("\u0b80", "\u0bff"),
+    "telugu": ("\u0c00", "\u0c7f"),
+    "kannada": ("\u0c80", "\u0cff"),
+    "malayalam": ("\u0d00", "\u0d7f"),
+}
+LANGUAGE_SCRIPTS = {
+    "en": "latin",
+    "es": "latin",
+    "hinglish": "latin",
+    "hi": "devanagari",
+    "mr": "devanagari",
+    "bn": "bengali",
+    "as": "bengali",
+    "pa": "gurmukhi",
+    "gu": "gujarati",
+    "od": "odia",
+    "ta": "tamil",
+    "te": "telugu",
+    "kn": "kannada",
+    "ml": "malayalam",
+}
+# Native-script replies legitimately carry Latin names, units and acronyms.
+MIN_NATIVE_SCRIPT_SHARE = 0.5
+# Latin-script replies should carry (almost) no native-script letters.
+MAX_FOREIGN_SCRIPT_SHARE = 0.05
+MAX_ROMANIZED_HINDI_SHARE = 0.12
+
+
+def _script_of(ch: str) -> str:
+    if ch.isascii():
+        return "latin" if ch.isalpha() else ""
+    for script, (lo, hi) in SCRIPT_RANGES.items():
+        if lo <= ch <= hi:
+            return script
+    return ""
+
+
+def script_shares(text: str) -> dict[str, float]:
+    """Share of letters per script, e.g. ``{"devanagari": 0.9, "latin": 0.1}``."""
+    counts: dict[str, int] = {}
+    for ch in text or "":
+        script = _script_of(ch)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    total = sum(counts.values())
+    return {script: n / total for script, n in counts.items()} if total else {}
+
+
+def dominant_script(text: str) -> str:
+    shares = script_shares(text)
+    return max(shares, key=shares.get) if shares else ""
+
+
+def expected_script(language: str, user_message: str = "") -> str:
+    """Script a reply must use for a turn language label (``hi``, ``auto-tamil``, ``auto``...)."""
+    lang = (language or "").strip().lower()
+    if lang in LANGUAGE_SCRIPTS:
+        # Farmers typing e.g. Hindi in Latin letters get their reply in Latin letters too.
+        if LANGUAGE_SCRIPTS[lang] != "latin" and dominant_script(user_message) == "latin":
+            return "latin"
+        return LANGUAGE_SCRIPTS[lang]
+    if lang.startswith("auto-"):
+        script = lang.split("-", 1)[1]
+        if script in SCRIPT_RANGES or script == "latin":
+            return script
+    # "auto" / "auto-mixed": mirror whatever dominates the user's message.
+    return dominant_script(user_message)
+
+
+def language_mismatch(
+    reply: str,
+    language: str,
+    user_message: str = "",
+    romanized_hindi: Iterable[str] = (),
+) -> str:
+    """Reason the reply breaks the language contract, or "" when no repair is needed."""
+    target = expected_script(language, user_message)
+    shares = script_shares(reply)
+    if not target or not shares:
+        return ""
+    if target == "latin":
+        if 1.0 - shares.get("latin", 0.0) > MAX_FOREIGN_SCRIPT_SHARE:
+            return f"script:{dominant_script(reply)}"
+    elif shares.get(target, 0.0) < MIN_NATIVE_SCRIPT_SHARE:
+        return f"script:{dominant_script(reply)}"
+
+    if (language or "").strip().lower() == "en":
+        markers = set(romanized_hindi)
+        tokens = re.findall(r"[a-z]+", (reply or "").lower())
+        if tokens and markers and sum(t in markers for t in tokens) / len(tokens) > MAX_ROMANIZED_HINDI_SHARE:
+            return "romanized_hindi"
+    return ""
@@ -0,0 +1,61 @@
+"""Per-turn accounting of LLM round trips.
+
+``begin_turn()`` starts a fresh tally in the current task's context;
+``llm_call(stage)`` wraps every model call the chat pipeline makes and
+records its count and latency per stage (the tally object is shared with
+``asyncio.to_thread`` workers, which run in a copy of the context).
+``usage_metadata()`` renders the tally for the chat response.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_turn_usage: ContextVar[Optional[dict]] = ContextVar("llm_turn_usage", default=None)
+
+
+def begin_turn() -> dict:
+    usage = {"calls": 0, "latency_s": 0.0, "by_stage": {}, "started": time.perf_counter()}
+    _turn_usage.set(usage)
+    return usage
+
+
+def record_llm_call(stage: str, latency_s: float = 0.0) -> None:
+    usage = _turn_usage.get()
+    if usage is None:
+        return
+    usage["calls"] += 1
+    usage["latency_s"] += latency_s
+    bucket = usage["by_stage"].setdefault(stage, {"calls": 0, "latency_s": 0.0})
+    bucket["calls"] += 1
+    bucket["latency_s"] += latency_s
+
+
+@contextmanager
+def llm_call(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_llm_call(stage, time.perf_counter() - started)
+
+
+def current_usage() -> dict:
+    return _turn_usage.get() or {"calls": 0, "latency_s": 0.0, "by_stage": {}}
+
+
+def usage_metadata(mode: str) -> dict:
+    """``{"mode", "llm_calls", "llm_latency_ms", "turn_latency_ms", "by_stage"}`` for the current turn."""
+    usage = current_usage()
+    started = usage.get("started")
+    return {
+        "mode": mode,
+        "llm_calls": usage["calls"],
+        "llm_latency_ms": round(usage["latency_s"] * 1000),
+        "turn_latency_ms": round((time.perf_counter() - started) * 1000) if started else None,
+        "by_stage": {
+            stage: {"calls": bucket["calls"], "latency_ms": round(bucket["latency_s"] * 1000)}
+            for stage, bucket in usage["by_stage"].items()
+        },
+    }
@@ -0,0 +1,368 @@
+"""Shared cache of chat replies to repeated, non-personal farmer questions.
+
+Questions such as "wheat price in Indore today" or "PM-KISAN eligibility"
+repeat across farmers of a district every day. A reply is reused when the
+next question has the same normalized intent, crop, state/district,
+language and tool-data freshness bucket:
+
+* exact lookup on a hash of those fields, then
+* semantic lookup: the question embedding is compared against the other
+  intents cached for the same crop/location/language/bucket and the best
+  match above ``RESPONSE_CACHE_SIMILARITY`` is served -- provided both
+  questions name the same entities (scheme, crop, commodity, place), since
+  near-paraphrases like "PM-KISAN eligibility" / "PMFBY eligibility" embed
+  almost identically.
+
+Only standalone questions without personal details are eligible. Such
+turns are generated from public context alone (state, district and the
+crop named in the question), so any farmer of the district can be served
+the reply; replies that drew on a session's conversation history are not
+stored. Market and weather entries also record a digest of the tool data they were generated
+from; once older than the topic's verify interval they are re-checked
+against fresh tool output and dropped when the data changed.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+from loguru import logger
+
+from shared.db.redis import get_redis
+
+RESPONSE_CACHE_ENABLED = str(os.getenv("RESPONSE_CACHE_ENABLED", "1")).strip().lower() in {"1", "true", "yes"}
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+RESPONSE_CACHE_PARTITION_LIMIT = max(1, int(os.getenv("RESPONSE_CACHE_PARTITION_LIMIT", "64")))
+# Freshness bucket per topic: a reply is never served outside the bucket it was generated in.
+TOPIC_BUCKET_SECONDS = {
+    "market": int(os.getenv("RESPONSE_CACHE_MARKET_BUCKET_SECONDS", "1800")),
+    "weather": int(os.getenv("RESPONSE_CACHE_WEATHER_BUCKET_SECONDS", "3600")),
+    "scheme": int(os.getenv("RESPONSE_CACHE_SCHEME_BUCKET_SECONDS", "86400")),
+    "crop": int(os.getenv("RESPONSE_CACHE_CROP_BUCKET_SECONDS", "86400")),
+}
+# Within the bucket, live-data replies are re-checked against tool output after this long.
+TOPIC_VERIFY_SECONDS = {"market": 300, "weather": 600}
+
+_KEY_PREFIX = "kkawaz:resp_cache"
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "of", "in", "on", "at", "for", "to", "and", "or", "what", "whats",
+    "which", "how", "much", "tell", "please", "about", "give", "show", "today", "todays", "now", "current",
+    "currently", "latest", "kya", "hai", "ka", "ki", "ke", "ko", "me", "mein", "aaj", "batao", "bataiye",
+    "abhi", "kitna", "kitne", "kaise", "se",
+}
+_PERSONAL = re.compile(
+    r"\b(i|i'm|im|i've|ive|my|mine|me|myself|our|we|mera|meri|mere|mujhe|main|hamara|hamari|hum|apna|apni)\b",
+    re.IGNORECASE,
+)
+# Generic question vocabulary: what is left of an intent after removing these names its entities.
+_QUERY_WORDS = {
+    "price", "prices", "rate", "rates", "bhav", "bhaav", "daam", "cost", "value", "market", "mandi", "mandis",
+    "sell", "selling", "buy", "trend", "forecast", "weather", "mausam", "rain", "rainfall", "baarish", "barish",
+    "temperature", "humidity", "wind", "week", "weekly", "tomorrow", "next", "days", "will", "be", "there",
+    "scheme", "schemes", "yojana", "eligibility", "eligible", "criteria", "who", "can", "apply", "application",
+    "benefit", "benefits", "documents", "document", "required", "needed", "need", "details", "detail", "info",
+    "information", "explain", "get", "do", "does", "should", "when", "where", "best", "time", "grow", "growing",
+    "sow", "sowing", "cultivation", "farming", "crop", "crops", "variety", "varieties", "disease", "pest",
+    "fertilizer", "dose", "per", "acre", "hectare", "quintal", "qtl", "kg", "by", "with", "from", "this", "it",
+}
+_FOLLOW_UP = {"it", "that", "this", "those", "these", "same", "above", "previous", "earlier", "again", "also", "more", "else"}
+_LONG_NUMBER = re.compile(r"\d{6,}")
+# Payload keys that change on every fetch without the data changing.
+_VOLATILE_KEY = re.compile(
+    r"^(.*_at|.*time(stamp)?|fetched.*|generated.*|updated.*|freshness.*|.*latency.*|cache.*|.*_age.*|age_.*|request_id)$",
+    re.IGNORECASE,
+)
+
+
+def normalize_intent(text: str) -> str:
+    """Order-insensitive content words of a question: "Wheat price in Indore today?" -> "indore price wheat"."""
+    tokens = re.findall(r"[^\W_]+(?:-[^\W_]+)*", (text or "").lower())
+    return " ".join(sorted({t for t in tokens if t not in _STOPWORDS}))
+
+
+def entity_tokens(intent: str) -> frozenset[str]:
+    """Tokens of a normalized intent that name something (scheme, crop, commodity, place)."""
+    return frozenset(t for t in intent.split() if t not in _QUERY_WORDS and not t.isdigit())
+
+
+def is_shareable_question(*texts: str) -> bool:
+    """True for standalone questions that carry no personal detail."""
+    for text in texts:
+        if not text:
+            continue
+        if _PERSONAL.search(text) or _LONG_NUMBER.search(text):
+            return False
+        words = set(re.findall(r"[a-z]+", text.lower()))
+        if words & _FOLLOW_UP:
+            return False
+    return True
+
+
+def _stable(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: _stable(v) for k, v in sorted(value.items()) if not _VOLATILE_KEY.search(str(k))}
+    if isinstance(value, list):
+        return [_stable(v) for v in value]
+    return value
+
+
+def tool_data_digest(tool_outputs: dict) -> str:
+    """Digest of the tool payloads a reply was grounded on, ignoring timestamps and cache metadata."""
+    payload = json.dumps(_stable(tool_outputs or {}), sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:24]
+
+
+def contains_private_detail(text: str, private_terms: list[str]) -> bool:
+    text_l = (text or "").lower()
+    if _LONG_NUMBER.search(text_l):
+        return True
+    return any(term and len(term) >= 3 and term.lower() in text_l for term in private_terms)
+
+
+def _unit(vector: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in vector))
+    return [round(v / norm, 5) for v in vector] if norm else []
+
+
+@dataclass(frozen=True)
+class CacheKey:
+    intent: str
+    topic: str
+    crop: str
+    state: str
+    district: str
+    language: str
+    agent_type: str
+    bucket: int
+
+    def _hash(self, fields: dict) -> str:
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+    @property
+    def exact(self) -> str:
+        return self._hash(asdict(self))
+
+    @property
+    def partition(self) -> str:
+        fields = asdict(self)
+        fields.pop("intent")
+        return self._hash(fields)
+
+
+class ResponseCache:
+    """Redis-backed exact + embedding-similarity reply cache."""
+
+    def __init__(
+        self,
+        redis_factory: Callable[[], Awaitable[Any]] = get_redis,
+        embed: Optional[Callable[[str], list[float]]] = None,
+        clock: Callable[[], float] = time.time,
+        similarity: float = RESPONSE_CACHE_SIMILARITY,
+    ) -> None:
+        self._redis_factory = redis_factory
+        self._embed = embed
+        self._clock = clock
+        self.similarity = similarity
+        self.counters = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stale_dropped": 0,
+            "stores": 0,
+            "skipped_private": 0,
+            "llm_calls_saved": 0,
+        }
+
+    # ── keys ───────────────────────────────────────────────────
+
+    def key_for(
+        self,
+        *,
+        message: str,
+        topic: str,
+        crop: str,
+        state: str,
+        district: str,
+        language: str,
+        agent_type: str | None,
+    ) -> Optional[CacheKey]:
+        intent = normalize_intent(message)
+        if not RESPONSE_CACHE_ENABLED or topic not in TOPIC_BUCKET_SECONDS or not intent:
+            return None
+        return CacheKey(
+            intent=intent,
+            topic=topic,
+            crop=(crop or "").strip().lower(),
+            state=(state or "").strip().lower(),
+            district=(district or "").strip().lower(),
+            language=(language or "").strip().lower(),
+            agent_type=(agent_type or "").strip().lower(),
+            bucket=int(self._clock() // TOPIC_BUCKET_SECONDS[topic]),
+        )
+
+    def _ttl(self, key: CacheKey) -> int:
+        size = TOPIC_BUCKET_SECONDS[key.topic]
+        return max(60, int((key.bucket + 1) * size - self._clock()) + 60)
+
+    def _vector(self, text: str) -> list[float]:
+        if self._embed is None:
+            try:
+                import main as m
+
+                self._embed = m.embedding_service.embed
+            except Exception:  # noqa: BLE001
+                self._embed = lambda _text: []
+        try:
+            return _unit(self._embed(text) or [])
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Response cache embedding failed: {exc}")
+            return []
+
+    # ── lookup / store ─────────────────────────────────────────
+
+    async def lookup(self, key: CacheKey, question: str) -> Optional[dict]:
+        self.counters["lookups"] += 1
+        try:
+            redis = await self._redis_factory()
+            raw = await redis.get(f"{_KEY_PREFIX}:e:{key.exact}")
+            if raw:
+                entry = json.loads(raw)
+                entry["match"], entry["similarity"] = "exact", 1.0
+                self.counters["exact_hits"] += 1
+                return entry
+            entry = await self._semantic_lookup(redis, key, question)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Response cache lookup failed: {exc}")
+            entry = None
+        if entry is None:
+            self.counters["misses"] += 1
+        else:
+            self.counters["semantic_hits"] += 1
+        return entry
+
+    async def _semantic_lookup(self, redis, key: CacheKey, question: str) -> Optional[dict]:
+        members = await redis.hgetall(f"{_KEY_PREFIX}:p:{key.partition}")
+        entities = entity_tokens(key.intent)
+        candidates = {}
+        for exact, raw in (members or {}).items():
+            member = json.loads(raw)
+            if entity_tokens(str(member.get("intent") or "")) == entities:
+                candidates[exact] = member.get("vector") or []
+        if not candidates:
+            return None
+        vector = await asyncio.to_thread(self._vector, question)
+        if not vector:
+            return None
+        best, best_score = None, self.similarity
+        for exact, candidate in candidates.items():
+            if len(candidate) != len(vector):
+                continue
+            score = sum(a * b for a, b in zip(vector, candidate))
+            if score >= best_score:
+                best, best_score = exact, score
+        if best is None:
+            return None
+        raw = await redis.get(f"{_KEY_PREFIX}:e:{best}")
+        if not raw:
+            await redis.hdel(f"{_KEY_PREFIX}:p:{key.partition}", best)
+            return None
+        entry = json.loads(raw)
+        entry["match"], entry["similarity"] = "semantic", round(best_score, 4)
+        return entry
+
+    def needs_verification(self, entry: dict) -> bool:
+        interval = TOPIC_VERIFY_SECONDS.get(str(entry.get("topic")))
+        return bool(interval) and self._clock() - float(entry.get("verified_at") or 0) > interval
+
+    async def verified(self, entry: dict) -> None:
+        """Record that fresh tool output still matches ``entry``'s data digest."""
+        entry = {k: v for k, v in entry.items() if k not in {"match", "similarity"}}
+        entry["verified_at"] = self._clock()
+        try:
+            redis = await self._redis_factory()
+            await redis.set(f"{_KEY_PREFIX}:e:{entry['exact']}", json.dumps(entry, ensure_ascii=False), ex=entry["ttl"])
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Response cache refresh failed: {exc}")
+
+    async def drop(self, entry: dict) -> None:
+        self.counters["stale_dropped"] += 1
+        try:
+            redis = await self._redis_factory()
+            await redis.delete(f"{_KEY_PREFIX}:e:{entry['exact']}")
+            await redis.hdel(f"{_KEY_PREFIX}:p:{entry['partition']}", entry["exact"])
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Response cache drop failed: {exc}")
+
+    def served(self, entry: dict) -> None:
+        self.counters["llm_calls_saved"] += int(entry.get("llm_calls") or 0)
+
+    async def store(
+        self,
+        key: CacheKey,
+        question: str,
+        response: str,
+        *,
+        data_digest: str,
+        llm_calls: int,
+        private_terms: list[str],
+        extras: Optional[dict] = None,
+    ) -> bool:
+        if not response.strip():
+            return False
+        if contains_private_detail(response, private_terms):
+            self.counters["skipped_private"] += 1
+            return False
+        ttl = self._ttl(key)
+        entry = {
+            "exact": key.exact,
+            "partition": key.partition,
+            "topic": key.topic,
+            "intent": key.intent,
+            "response": response,
+            "data_digest": data_digest,
+            "llm_calls": llm_calls,
+            "created_at": self._clock(),
+            "verified_at": self._clock(),
+            "ttl": ttl,
+            **(extras or {}),
+        }
+        vector = await asyncio.to_thread(self._vector, question)
+        try:
+            redis = await self._redis_factory()
+            await redis.set(f"{_KEY_PREFIX}:e:{key.exact}", json.dumps(entry, ensure_ascii=False), ex=ttl)
+            partition_key = f"{_KEY_PREFIX}:p:{key.partition}"
+            if vector and await redis.hlen(partition_key) < RESPONSE_CACHE_PARTITION_LIMIT:
+                await redis.hset(partition_key, key.exact, json.dumps({"intent": key.intent, "vector": vector}))
+                await redis.expire(partition_key, ttl)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug(f"Response cache store failed: {exc}")
+            return False
+        self.counters["stores"] += 1
+        return True
+
+    def stats(self) -> dict:
+        hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+        lookups = self.counters["lookups"]
+        return {
+            "enabled": RESPONSE_CACHE_ENABLED,
+            "similarity_threshold": self.similarity,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            **self.counters,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
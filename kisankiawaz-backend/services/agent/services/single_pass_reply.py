@@ -0,0 +1,55 @@
+"""Parsing of the structured single-pass generation reply.
+
+Single-pass generation asks for ``{"reply": ..., "in_domain": ...}`` in one
+model call. Models do not always comply exactly: the object comes wrapped in
+Markdown code fences, cut off at the token limit, or (after a JSON-mode
+validation failure) as plain text. This module recovers the farmer-facing
+reply from all of those without another model call, and never lets raw JSON
+reach the farmer.
+"""
+
+import json
+import re
+
+_FENCE = re.compile(r"^```[a-zA-Z]*\s*\n?(.*?)\n?```$", re.DOTALL)
+# "reply" string value up to its closing quote, or up to the end of a truncated object.
+_REPLY_VALUE = re.compile(r'"reply"\s*:\s*"((?:[^"\\]|\\.)*)', re.DOTALL)
+_OUT_OF_DOMAIN = re.compile(r'"in_domain"\s*:\s*false\b')
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE.match(text)
+    return match.group(1).strip() if match else text
+
+
+def _decode_partial_string(body: str) -> str:
+    """Decode a JSON string body that may stop mid-escape."""
+    for cut in range(len(body), max(len(body) - 6, -1), -1):
+        try:
+            return json.loads(f'"{body[:cut]}"')
+        except ValueError:
+            continue
+    return ""
+
+
+def parse_single_pass_reply(raw: str) -> tuple[str, bool]:
+    """``(reply, in_domain)`` from a structured generation.
+
+    Plain text is taken as an in-domain reply. JSON that cannot be parsed
+    yields whatever ``reply`` text it carries, or ``""`` so the caller falls
+    back to its degraded reply.
+    """
+    text = _strip_fences(str(raw or "").strip())
+    if not text.startswith("{"):
+        return text, True
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        payload = json.loads(text[start : end + 1])
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict):
+        reply = payload.get("reply")
+        return (reply.strip() if isinstance(reply, str) else ""), payload.get("in_domain") is not False
+    match = _REPLY_VALUE.search(text)
+    reply = _decode_partial_string(match.group(1)).strip() if match else ""
+    return reply, not _OUT_OF_DOMAIN.search(text)
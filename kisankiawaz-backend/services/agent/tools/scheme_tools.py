@@ -1,6 +1,7 @@
 from services.embedding_service import EmbeddingService
 from shared.core.constants import QdrantCollections
-from shared.db.mongodb import get_db
+from shared.services.lexical_index import CorpusGeneration, reciprocal_rank_fusion, tokenize
+from shared.services.scheme_catalog import EQUIPMENT_CORPUS, SchemeCatalog
 from datetime import datetime, timezone
 from functools import lru_cache
 from pathlib import Path
@@ -8,26 +9,6 @@ import json
 import re
 
 
-SCHEME_ID_HINTS = {
-    "pm-kisan": "pm_kisan",
-    "pmfby": "pmfby",
-    "pm-kusum": "pm_kusum",
-    "kcc": "kcc",
-    "enam": "enam",
-}
-
-EQUIPMENT_CATEGORY_HINTS = {
-    "tractor": "tractor",
-    "harvester": "harvester",
-    "sprayer": "sprayer",
-    "drone": "drone",
-    "rotavator": "rotavator",
-    "seed": "seed drill",
-    "trolley": "trolley",
-    "thresher": "thresher",
-}
-
-
 def _get_embedding_service() -> EmbeddingService:
     import main as m
     return m.embedding_service
@@ -97,26 +78,6 @@ def _score_scheme_row(row: dict, query: str) -> int:
     return score
 
 
-def _extract_scheme_id_hint(query: str) -> str:
-    txt = (query or "").strip().lower()
-    if not txt:
-        return ""
-    for marker, scheme_id in SCHEME_ID_HINTS.items():
-        if marker in txt:
-            return scheme_id
-    return ""
-
-
-def _extract_equipment_category_hint(query: str) -> str:
-    txt = (query or "").strip().lower()
-    if not txt:
-        return ""
-    for marker, category in EQUIPMENT_CATEGORY_HINTS.items():
-        if marker in txt:
-            return category
-    return ""
-
-
 def _map_local_scheme_row(row: dict) -> dict:
     links = []
     for c in [row.get("official_portal"), row.get("application_link")]:
@@ -169,74 +130,138 @@ def _search_local_schemes(query: str, state: str = "") -> list[dict]:
     return [s[1] for s in scored[:8]]
 
 
+def _is_list(value) -> list:
+    return value if isinstance(value, list) else []
+
+
+# Vector candidates fused with the lexical ranking; the chat pipeline prefetches this many.
+VECTOR_TOP_K = 20
+
+
+def _vector_ids(collection: str, query: str, id_field: str, top_k: int = VECTOR_TOP_K) -> list[str]:
+    try:
+        hits = _get_embedding_service().search(collection, query, top_k=top_k)
+    except Exception:
+        return []
+    ids = []
+    for hit in hits or []:
+        value = str((hit.get("metadata") or {}).get(id_field) or "")
+        if value and value not in ids:
+            ids.append(value)
+    return ids
+
+
+def _hybrid_rank(
+    corpus: CorpusGeneration,
+    rows: dict,
+    query: str,
+    accept,
+    collection: str,
+    id_field: str,
+    shortcut: list[str] = (),
+    phrase: list[str] = (),
+) -> tuple[list[str], str]:
+    """Rank ids for *query*; exact-name or acronym hits short-circuit embedding."""
+
+    def ok(doc_id: str) -> bool:
+        return doc_id in rows and accept(doc_id)
+
+    exact = [doc_id for doc_id in dict.fromkeys([*corpus.index.exact(query), *shortcut]) if ok(doc_id)]
+    if exact:
+        return exact, "exact"
+    lexical = [doc_id for doc_id, _ in corpus.index.search(query, limit=20, accept=ok)]
+    vector = [doc_id for doc_id in _vector_ids(collection, query, id_field) if ok(doc_id)]
+    return reciprocal_rank_fusion([[d for d in phrase if ok(d)], lexical, vector]), "hybrid"
+
+
+def _map_ref_scheme_row(item: dict) -> dict:
+    return {
+        "scheme_id": item.get("scheme_id", ""),
+        "title": str(item.get("title", "") or ""),
+        "ministry": item.get("ministry", ""),
+        "beneficiary_state": _is_list(item.get("beneficiary_state", [])),
+        "categories": item.get("categories", []),
+        "tags": item.get("tags", []),
+        "summary": str(item.get("summary", "") or ""),
+        "benefits": item.get("benefits", ""),
+        "where_to_apply": item.get("where_to_apply", ""),
+        "application_process": item.get("application_process", ""),
+        "how_to_apply": item.get("how_to_apply", ""),
+        "required_documents": item.get("required_documents", ""),
+        "eligibility": item.get("eligibility", ""),
+        "official_links": item.get("official_links", []),
+        "contact_numbers": item.get("contact_numbers", []),
+        "last_updated": item.get("_ingested_at", ""),
+    }
+
+
+def _map_equipment_row(item: dict) -> dict:
+    return {
+        "equipment": item.get("name", ""),
+        "category": item.get("category", ""),
+        "provider": item.get("provider_name", ""),
+        "provider_id": item.get("provider_id", ""),
+        "state": item.get("state", ""),
+        "district": item.get("district", ""),
+        "city": item.get("city", ""),
+        "address": item.get("address", ""),
+        "pincode": item.get("pincode", ""),
+        "rate_hourly": item.get("rate_hourly"),
+        "rate_daily": item.get("rate_daily"),
+        "rate_per_acre": item.get("rate_per_acre"),
+        "rate_per_trip": item.get("rate_per_trip"),
+        "contact": item.get("provider_phone", ""),
+        "alternate_contact": item.get("alternate_phone", ""),
+        "whatsapp": item.get("whatsapp", ""),
+        "contact_person": item.get("contact_person", ""),
+        "eligibility": item.get("eligibility", []),
+        "documents_required": item.get("documents_required", []),
+        "source": item.get("source", ""),
+        "source_type": item.get("source_type", ""),
+        "source_url": item.get("source_url", ""),
+        "operator_included": item.get("operator_included"),
+        "fuel_extra": item.get("fuel_extra"),
+        "availability": item.get("availability", ""),
+        "last_updated": item.get("last_verified_at") or item.get("_ingested_at", ""),
+    }
+
+
 def search_government_schemes(query: str, state: str = "") -> dict:
     """Search for government agricultural schemes, subsidies, and loan programs.
     Covers 30+ schemes including PM-KISAN, PMFBY, KCC, PM-KUSUM, SMAM, RKVY, MIDH, eNAM, and more."""
-    q = (query or "").strip().lower()
     state_filter = (state or "").strip().lower()
+    q = (query or "").strip().lower()
     try:
-        db = get_db()
-        collection = db.collection("ref_farmer_schemes")
-        state_raw = (state or "").strip()
-        if state_raw:
-            collection = collection.where("beneficiary_state", "array_contains", state_raw)
-
-        scheme_id_hint = _extract_scheme_id_hint(query)
-        if scheme_id_hint:
-            collection = collection.where("scheme_id", "==", scheme_id_hint)
-
-        docs = list(collection.limit(500).stream())
-        if not docs and state_raw:
+        corpus, catalog = SchemeCatalog.get()
+        acronym_hits = [doc_id for token in tokenize(query) for doc_id in catalog.by_acronym(token)]
+        phrase_hits = [doc_id for doc_id, hay in catalog.haystacks.items() if q and q in hay]
+
+        def _rank(accept):
+            return _hybrid_rank(
+                corpus,
+                catalog.rows,
+                query,
+                accept,
+                QdrantCollections.SCHEMES_SEMANTIC,
+                "scheme_id",
+                shortcut=acronym_hits,
+                phrase=phrase_hits,
+            )
+
+        if state_filter:
+            mask = catalog.state_mask(state_filter)
+            ranked, match = _rank(lambda doc_id: catalog.in_mask(doc_id, mask))
+        else:
+            ranked, match = _rank(lambda doc_id: True)
+        if not ranked and state_filter:
             # Relax state filter only when strict state query has no rows.
-            collection = db.collection("ref_farmer_schemes")
-            if scheme_id_hint:
-                collection = collection.where("scheme_id", "==", scheme_id_hint)
-            docs = list(collection.limit(500).stream())
-
-        scored = []
-        for d in docs:
-            item = d.to_dict() or {}
-            title = str(item.get("title", "") or "")
-            summary = str(item.get("summary", "") or "")
-            tags = " ".join(item.get("tags", []) if isinstance(item.get("tags", []), list) else [])
-            states = item.get("beneficiary_state", []) if isinstance(item.get("beneficiary_state", []), list) else []
-
-            if state_filter and states and all(str(s).lower() != state_filter for s in states):
-                continue
-
-            hay = f"{title} {summary} {tags}".lower()
-            score = 0
-            if q and q in hay:
-                score += 4
-            for token in [t for t in q.split() if len(t) > 2][:6]:
-                if token in hay:
-                    score += 1
-            if score > 0:
-                scored.append((score, {
-                    "scheme_id": item.get("scheme_id", ""),
-                    "title": title,
-                    "ministry": item.get("ministry", ""),
-                    "beneficiary_state": states,
-                    "categories": item.get("categories", []),
-                    "tags": item.get("tags", []),
-                    "summary": summary,
-                    "benefits": item.get("benefits", ""),
-                    "where_to_apply": item.get("where_to_apply", ""),
-                    "application_process": item.get("application_process", ""),
-                    "how_to_apply": item.get("how_to_apply", ""),
-                    "required_documents": item.get("required_documents", ""),
-                    "eligibility": item.get("eligibility", ""),
-                    "official_links": item.get("official_links", []),
-                    "contact_numbers": item.get("contact_numbers", []),
-                    "last_updated": item.get("_ingested_at", ""),
-                }))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        if scored:
+            ranked, match = _rank(lambda doc_id: True)
+        if ranked:
             return {
                 "found": True,
                 "source": "ref_farmer_schemes",
-                "results": [x[1] for x in scored[:6]],
+                "match": match,
+                "results": [_map_ref_scheme_row(catalog.rows[doc_id]) for doc_id in ranked[:6]],
             }
     except Exception:
         local = _search_local_schemes(query=query, state=state)
@@ -274,38 +299,16 @@ def search_government_schemes(query: str, state: str = "") -> dict:
 
 def check_scheme_eligibility(scheme_name: str, land_size: str = "", category: str = "") -> dict:
     """Check eligibility criteria for a specific government scheme."""
-    name = (scheme_name or "").strip().lower()
     try:
-        db = get_db()
-        scheme_id_hint = _extract_scheme_id_hint(scheme_name)
-        if scheme_id_hint:
-            docs = list(
-                db.collection("ref_farmer_schemes")
-                .where("scheme_id", "==", scheme_id_hint)
-                .limit(20)
-                .stream()
-            )
-        else:
-            docs = list(db.collection("ref_farmer_schemes").limit(500).stream())
-
-        best = None
-        best_score = -1
-        for d in docs:
-            item = d.to_dict() or {}
-            title = str(item.get("title", "") or "")
-            sid = str(item.get("scheme_id", "") or "")
-            text = f"{title} {sid}".lower()
-            score = 0
-            if name and name in text:
-                score += 3
-            for tok in [t for t in name.split() if len(t) > 2][:5]:
-                if tok in text:
-                    score += 1
-            if score > best_score:
-                best_score = score
-                best = item
-
-        if best and best_score > 0:
+        corpus, catalog = SchemeCatalog.get()
+        candidates = [
+            *corpus.index.exact(scheme_name),
+            *(doc_id for token in tokenize(scheme_name) for doc_id in catalog.by_acronym(token)),
+            catalog.best_name_match(scheme_name),
+        ]
+        best = next((catalog.rows[doc_id] for doc_id in candidates if doc_id in catalog.rows), None)
+
+        if best:
             return {
                 "found": True,
                 "source": "ref_farmer_schemes",
@@ -361,68 +364,24 @@ def search_document_builder(query: str) -> dict:
 
 def search_equipment_rentals(query: str, state: str = "") -> dict:
     """Search for agricultural equipment rentals - tractors, harvesters, drones, sprayers, and more across 10 categories."""
-    q = (query or "").strip().lower()
     st = (state or "").strip().lower()
     try:
-        db = get_db()
-        category_hint = _extract_equipment_category_hint(query)
-        collection = db.collection("ref_equipment_providers").where("is_active", "==", True)
-        if st:
-            collection = collection.where("state", "==", state.strip())
-        if category_hint:
-            collection = collection.where("category", "==", category_hint)
-
-        docs = list(collection.limit(500).stream())
-        if not docs and category_hint:
-            # Relax category only; keep state filter when present.
-            collection = db.collection("ref_equipment_providers").where("is_active", "==", True)
-            if st:
-                collection = collection.where("state", "==", state.strip())
-            docs = list(collection.limit(500).stream())
-
-        rows = []
-        for d in docs:
-            item = d.to_dict() or {}
-            hay = f"{item.get('name','')} {item.get('category','')} {item.get('provider_name','')}".lower()
-            if q and q not in hay and not any(t in hay for t in q.split() if len(t) > 2):
-                continue
-            rows.append(
-                {
-                    "equipment": item.get("name", ""),
-                    "category": item.get("category", ""),
-                    "provider": item.get("provider_name", ""),
-                    "provider_id": item.get("provider_id", ""),
-                    "state": item.get("state", ""),
-                    "district": item.get("district", ""),
-                    "city": item.get("city", ""),
-                    "address": item.get("address", ""),
-                    "pincode": item.get("pincode", ""),
-                    "rate_hourly": item.get("rate_hourly"),
-                    "rate_daily": item.get("rate_daily"),
-                    "rate_per_acre": item.get("rate_per_acre"),
-                    "rate_per_trip": item.get("rate_per_trip"),
-                    "contact": item.get("provider_phone", ""),
-                    "alternate_contact": item.get("alternate_phone", ""),
-                    "whatsapp": item.get("whatsapp", ""),
-                    "contact_person": item.get("contact_person", ""),
-                    "eligibility": item.get("eligibility", []),
-                    "documents_required": item.get("documents_required", []),
-                    "source": item.get("source", ""),
-                    "source_type": item.get("source_type", ""),
-                    "source_url": item.get("source_url", ""),
-                    "operator_included": item.get("operator_included"),
-                    "fuel_extra": item.get("fuel_extra"),
-                    "availability": item.get("availability", ""),
-                    "last_updated": item.get("last_verified_at") or item.get("_ingested_at", ""),
-                }
-            )
-
-        if rows:
+        corpus = EQUIPMENT_CORPUS.ensure_fresh()
+        accept = (
+            (lambda doc_id: str(corpus.rows[doc_id].get("state") or "").strip().lower() == st)
+            if st
+            else (lambda doc_id: True)
+        )
+        ranked, match = _hybrid_rank(
+            corpus, corpus.rows, query, accept, QdrantCollections.EQUIPMENT_SEMANTIC, "equipment_id"
+        )
+        if ranked:
             return {
                 "found": True,
                 "source": "ref_equipment_providers",
-                "results": rows[:10],
-                "total": len(rows),
+                "match": match,
+                "results": [_map_equipment_row(corpus.rows[doc_id]) for doc_id in ranked[:10]],
+                "total": len(ranked),
             }
     except Exception:
         pass
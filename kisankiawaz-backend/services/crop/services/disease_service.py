@@ -1,5 +1,6 @@
 """Crop disease detection service using Gemini multimodal."""
 
+import asyncio
 import base64
 import io
 import json
@@ -140,7 +141,7 @@ async def analyze_crop_image(image_bytes: bytes, api_key: str) -> dict:
         lease = None
         selected_key = api_key
         if allocator.has_provider("gemini"):
-            lease = allocator.acquire("gemini")
+            lease = await asyncio.to_thread(allocator.acquire, "gemini")
             selected_key = lease.key
         elif not selected_key:
             selected_key = os.getenv("GEMINI_API_KEY", "")
@@ -160,16 +161,16 @@ async def analyze_crop_image(image_bytes: bytes, api_key: str) -> dict:
                 generation_config={"response_mime_type": "application/json"},
             )
             if lease:
-                allocator.report_success(lease)
+                await asyncio.to_thread(allocator.report_success, lease)
             break
         except Exception as exc:  # noqa: BLE001
             last_error = exc
             err_str = str(exc).lower()
             if lease:
                 if "429" in err_str or "resource_exhausted" in err_str or "quota" in err_str:
-                    allocator.report_rate_limited(lease, str(exc))
+                    await asyncio.to_thread(allocator.report_rate_limited, lease, str(exc))
                 else:
-                    allocator.report_error(lease, str(exc))
+                    await asyncio.to_thread(allocator.report_error, lease, str(exc))
             # Retry all model-call failures and use fallback if none succeed.
             continue
 
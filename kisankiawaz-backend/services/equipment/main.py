@@ -4,27 +4,45 @@ import sys
 
 sys.path.insert(0, "/app")
 
-from contextlib import asynccontextmanager
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from shared.core.config import get_settings
-from shared.db.mongodb import init_mongodb, close_mongodb
+from shared.db.mongodb import init_mongodb, close_mongodb, get_async_db
 from shared.db.redis import get_redis, close_redis
 from shared.errors import AppError, HttpStatus
 from shared.errors.handlers import global_exception_handler
 from shared.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware, RateLimiterMiddleware
+from shared.services.rate_history_aggregates import backfill_rate_history_aggregates
 
 from routes import router as api_router
 
+logger = logging.getLogger("kisankiawaz.equipment")
+
+
+async def _backfill_rate_history() -> None:
+    try:
+        summary = await backfill_rate_history_aggregates(get_async_db())
+        if summary is not None:
+            logger.info("Backfilled equipment rate-history aggregates: %s", summary)
+    except Exception as exc:
+        logger.warning("Rate-history aggregate backfill failed: %s", exc)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup / shutdown lifecycle."""
     init_mongodb()
     await get_redis()
+    backfill = asyncio.create_task(_backfill_rate_history())
     yield
+    backfill.cancel()
+    with suppress(asyncio.CancelledError):
+        await backfill
     await close_redis()
     close_mongodb()
 
@@ -1,10 +1,8 @@
 ﻿"""Equipment rental rate routes with provider-level details from DB."""
 
-import re
 import hashlib
 from urllib.parse import quote_plus
 from typing import Optional, Any
-from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel, Field
@@ -13,6 +11,13 @@ from shared.auth.deps import get_current_user, get_current_admin
 from shared.db.mongodb import FieldFilter, get_async_db
 from shared.core.constants import MongoCollections
 from shared.errors import HttpStatus
+from shared.cache.market_cache import cache_get, cache_set
+from shared.services.rate_history_aggregates import (
+    equipment_key,
+    history_rows,
+    state_key,
+    sync_rate_history_aggregates_async,
+)
 
 from services.equipment_rental_data import (
     get_categories,
@@ -20,10 +25,11 @@ from services.equipment_rental_data import (
     fetch_mechanization_stats,
     EquipmentRentalSyncService,
 )
+from services.provider_catalog import ProviderCatalog
 
 router = APIRouter(prefix="/rental-rates", tags=["Equipment Rental Rates"])
 
-_RATE_HISTORY_CACHE: dict[str, tuple[datetime, dict[str, Any]]] = {}
+_RATE_HISTORY_CACHE_NS = "equipment_rate_history"
 _RATE_HISTORY_TTL_SECONDS = 300
 
 
@@ -55,10 +61,6 @@ def _hash_seed(*parts: Any) -> int:
     return int(digest[:8], 16)
 
 
-def _normalize_equipment_key(value: Any) -> str:
-    return re.sub(r"[^a-z0-9]+", " ", str(value or "").strip().lower()).strip()
-
-
 def _default_stock(availability: Any) -> int:
     key = str(availability or "").strip().lower()
     if key == "high":
@@ -147,47 +149,15 @@ async def _load_provider_rows(
     source_type: Optional[str] = None,
     limit: int = 300,
 ) -> list[dict[str, Any]]:
-    db = get_async_db()
-    # Fetch a broad working set first, then filter in-memory to avoid missing
-    # valid rows when requested state/equipment appears later in insertion order.
-    fetch_limit = min(max(limit * 20, 5000), 20000)
-    docs = [d async for d in db.collection("ref_equipment_providers").limit(fetch_limit).stream()]
-
-    out: list[dict[str, Any]] = []
-    st = (state or "").strip().lower()
-    dist = (district or "").strip().lower()
-    cat = (category or "").strip().lower()
-    equip = (equipment_name or "").strip().lower()
-    q = (search or "").strip().lower()
-    src_type = (source_type or "").strip().lower()
-
-    for d in docs:
-        row = d.to_dict() or {}
-        row_state = str(row.get("state") or "").strip().lower()
-        row_dist = str(row.get("district") or row.get("city") or "").strip().lower()
-        row_cat = str(row.get("category") or "").strip().lower()
-        row_name = str(row.get("name") or "").strip().lower()
-        row_provider = str(row.get("provider_name") or "").strip().lower()
-        row_source_type = str(row.get("source_type") or "").strip().lower()
-
-        if row.get("is_active") is False:
-            continue
-
-        if st and row_state != st:
-            continue
-        if dist and row_dist != dist:
-            continue
-        if cat and row_cat != cat:
-            continue
-        if equip and equip not in row_name:
-            continue
-        if q and not (q in row_name or q in row_provider or q in row_cat or q in row_dist):
-            continue
-        if src_type and row_source_type != src_type:
-            continue
-        out.append(row)
-
-    return out
+    await ProviderCatalog.ensure_loaded()
+    return ProviderCatalog.query(
+        state=state,
+        district=district,
+        category=category,
+        equipment_name=equipment_name,
+        search=search,
+        source_type=source_type,
+    )
 
 
 async def _load_provider_rows_with_location_fallback(
@@ -460,123 +430,28 @@ async def get_rate_history(
     user: dict = Depends(get_current_user),
 ):
     """Return historical rate entries for a specific equipment name and optional state."""
-    db = get_async_db()
-    cache_key = f"{equipment_name.strip().lower()}|{(state or '').strip().lower()}|{max_periods}"
-    now = datetime.now(timezone.utc)
-    cached = _RATE_HISTORY_CACHE.get(cache_key)
-    if cached and cached[0] > now:
-        return cached[1]
+    ekey = equipment_key(equipment_name)
+    skey = state_key(state)
+    cache_parts = (ekey, skey, str(max_periods))
+    cached = await cache_get(_RATE_HISTORY_CACHE_NS, *cache_parts)
+    if cached is not None:
+        return cached
 
-    exact_docs = [
-        d
-        async for d in db
-        .collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY)
-        .where(filter=FieldFilter("equipment_name", "==", equipment_name.strip()))
-        .limit(5000)
+    db = get_async_db()
+    agg = db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY_AGG)
+    docs = [
+        d.to_dict() or {}
+        async for d in agg
+        .where(filter=FieldFilter("equipment_key", "==", ekey))
+        .where(filter=FieldFilter("state_key", "==", skey))
         .stream()
     ]
+    if not docs and ekey:
+        # No exact key: fall back to every equipment whose key contains the query.
+        candidates = [d.to_dict() or {} async for d in agg.where(filter=FieldFilter("state_key", "==", skey)).stream()]
+        docs = [item for item in candidates if ekey in str(item.get("equipment_key") or "")]
 
-    docs = exact_docs
-    if not docs:
-        docs = [
-            d
-            async for d in db
-            .collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY)
-            .limit(6000)
-            .stream()
-        ]
-
-    equipment_q = equipment_name.strip().lower()
-    equipment_norm = _normalize_equipment_key(equipment_name)
-    state_q = (state or "").strip().lower()
-    matched_exact: list[dict[str, Any]] = []
-    matched_partial: list[dict[str, Any]] = []
-
-    for doc in docs:
-        item = doc.to_dict() or {}
-        item_name = str(item.get("equipment_name") or "").strip().lower()
-        item_name_norm = _normalize_equipment_key(item_name)
-        item_state = str(item.get("state") or "").strip().lower()
-        if state_q and item_state != state_q:
-            continue
-
-        row = {
-            "id": doc.id,
-            "equipment_name": item.get("equipment_name"),
-            "category": item.get("category"),
-            "state": item.get("state"),
-            "period": item.get("period"),
-            "rate_daily": item.get("rate_daily"),
-            "rate_hourly": item.get("rate_hourly"),
-            "rate_per_acre": item.get("rate_per_acre"),
-            "source_note": item.get("source_note"),
-            "created_at": item.get("created_at"),
-        }
-
-        if equipment_norm and item_name_norm == equipment_norm:
-            matched_exact.append(row)
-        elif equipment_q and equipment_q in item_name:
-            matched_partial.append(row)
-
-    source_rows = matched_exact if matched_exact else matched_partial
-
-    buckets: dict[str, dict[str, Any]] = {}
-    for row in source_rows:
-        period = str(row.get("period") or "").strip()
-        if not period:
-            continue
-        bucket = buckets.setdefault(
-            period,
-            {
-                "equipment_name": row.get("equipment_name") or equipment_name,
-                "category": row.get("category"),
-                "state": state if state else "All states",
-                "period": period,
-                "rate_daily_sum": 0.0,
-                "rate_daily_count": 0,
-                "rate_hourly_sum": 0.0,
-                "rate_hourly_count": 0,
-                "rate_per_acre_sum": 0.0,
-                "rate_per_acre_count": 0,
-                "sample_size": 0,
-            },
-        )
-
-        bucket["sample_size"] += 1
-
-        daily = _to_float(row.get("rate_daily"))
-        if daily > 0:
-            bucket["rate_daily_sum"] += daily
-            bucket["rate_daily_count"] += 1
-
-        hourly = _to_float(row.get("rate_hourly"))
-        if hourly > 0:
-            bucket["rate_hourly_sum"] += hourly
-            bucket["rate_hourly_count"] += 1
-
-        per_acre = _to_float(row.get("rate_per_acre"))
-        if per_acre > 0:
-            bucket["rate_per_acre_sum"] += per_acre
-            bucket["rate_per_acre_count"] += 1
-
-    rows: list[dict[str, Any]] = []
-    for period in sorted(buckets.keys()):
-        b = buckets[period]
-        rows.append(
-            {
-                "equipment_name": b["equipment_name"],
-                "category": b["category"],
-                "state": b["state"],
-                "period": b["period"],
-                "rate_daily": round(b["rate_daily_sum"] / b["rate_daily_count"], 2) if b["rate_daily_count"] else None,
-                "rate_hourly": round(b["rate_hourly_sum"] / b["rate_hourly_count"], 2) if b["rate_hourly_count"] else None,
-                "rate_per_acre": round(b["rate_per_acre_sum"] / b["rate_per_acre_count"], 2) if b["rate_per_acre_count"] else None,
-                "source_note": "Monthly aggregated from seeded provider-level history",
-                "created_at": None,
-                "sample_size": b["sample_size"],
-            }
-        )
-
+    rows = history_rows(docs, equipment_name=equipment_name, state=state)
     if len(rows) > max_periods:
         rows = rows[-max_periods:]
 
@@ -587,10 +462,7 @@ async def get_rate_history(
         if rows
         else "No historical rate data found for this equipment/state.",
     }
-    _RATE_HISTORY_CACHE[cache_key] = (
-        now + timedelta(seconds=_RATE_HISTORY_TTL_SECONDS),
-        payload,
-    )
+    await cache_set(_RATE_HISTORY_CACHE_NS, payload, *cache_parts, ttl=_RATE_HISTORY_TTL_SECONDS)
     return payload
 
 
@@ -713,6 +585,7 @@ async def replace_seed_equipment_rental_data(
         deleted += 1
 
     inserted = 0
+    seeded_keys: set[str] = set()
     now = datetime.now(timezone.utc).isoformat()
     for provider in providers:
         inventory = provider.get("inventory") if isinstance(provider.get("inventory"), list) else []
@@ -794,11 +667,15 @@ async def replace_seed_equipment_rental_data(
                 merge=True,
             )
             inserted += 1
+            seeded_keys.add(equipment_key(name))
 
+    ProviderCatalog.invalidate()
+    aggregates = await sync_rate_history_aggregates_async(db, equipment_keys=seeded_keys)
     return {
         "status": "ok",
         "deleted": deleted,
         "inserted": inserted,
+        "rate_history_aggregates": aggregates,
         "providers": len(providers),
         "input_file": str(src),
     }
@@ -1,12 +1,16 @@
 """Rental management routes."""
 
-from fastapi import APIRouter, Depends
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
-from shared.auth.deps import get_current_farmer
+from fastapi import APIRouter, Depends, Query
+
+from shared.auth.deps import get_current_farmer, get_current_user
 from shared.db.mongodb import get_async_db
-from shared.errors import HttpStatus
+from shared.errors import HttpStatus, bad_request
 from shared.schemas.equipment import RentalRequestCreate
 
+from services.booking_calendar import BookingCalendar, parse_booking_time
 from services.rental_service import RentalService
 
 router = APIRouter(prefix="/rentals", tags=["Rentals"])
@@ -32,6 +36,34 @@ async def create_rental(
     return await RentalService.create_rental(db=db, renter_id=user["id"], data=body.model_dump())
 
 
+@router.get("/availability", status_code=HttpStatus.OK)
+async def get_availability(
+    equipment_ids: str = Query(..., description="Comma-separated equipment/rental ids"),
+    start: Optional[str] = Query(default=None, description="Window start (ISO); defaults to now"),
+    end: Optional[str] = Query(default=None, description="Window end (ISO); defaults to start + 30 days"),
+    user: dict = Depends(get_current_user),
+):
+    """Bulk availability calendar: busy intervals per equipment inside the window."""
+    ids = list(dict.fromkeys(x.strip() for x in equipment_ids.split(",") if x.strip()))
+    if not ids:
+        raise bad_request("equipment_ids is required")
+    if len(ids) > 200:
+        raise bad_request("At most 200 equipment_ids per request")
+
+    window_start = parse_booking_time(start) if start else datetime.now(timezone.utc)
+    window_end = parse_booking_time(end, inclusive_end=True) if end else window_start + timedelta(days=30)
+    if window_end <= window_start:
+        raise bad_request("end must be after start")
+
+    db = get_async_db()
+    calendar = await BookingCalendar.availability(db, ids, window_start, window_end)
+    return {
+        "start": window_start.isoformat(),
+        "end": window_end.isoformat(),
+        "equipment": calendar,
+    }
+
+
 @router.get("/{rental_id}", status_code=HttpStatus.OK)
 async def get_rental(
     rental_id: str,
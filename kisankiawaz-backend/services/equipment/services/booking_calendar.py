@@ -0,0 +1,272 @@
+"""Per-equipment booking calendars with O(log n) overlap checks.
+
+Each piece of equipment has one document in ``equipment_booking_calendars``
+holding its pending/approved booking intervals and a version counter. That
+document is the source of truth and every change is a compare-and-set on the
+version, so two requests (or two replicas) cannot both reserve overlapping
+slots. Each process keeps a sorted :class:`IntervalIndex` per equipment and
+rebuilds it only when the stored version moves.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Iterable, Optional
+
+from shared.core.constants import MongoCollections
+from shared.db.mongodb import DocumentAlreadyExists, FieldFilter
+from shared.errors import ErrorCode, bad_request, conflict
+
+logger = logging.getLogger("kisankiawaz.equipment.booking_calendar")
+
+ACTIVE_STATUSES = ("pending", "approved")
+_MAX_CAS_ATTEMPTS = 5
+# Intervals that ended this long ago are dropped the next time a calendar is written.
+_PRUNE_AFTER = timedelta(days=2)
+
+
+def parse_booking_time(value: Any, *, inclusive_end: bool = False) -> datetime:
+    """Parse an ISO date/datetime as UTC; a bare end date covers that whole day."""
+    raw = str(value or "").strip()
+    try:
+        parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    except ValueError:
+        raise bad_request("start_date and end_date must be valid ISO date-time strings")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    if inclusive_end and len(raw) == 10:
+        parsed += timedelta(days=1)
+    return parsed.astimezone(timezone.utc)
+
+
+class IntervalIndex:
+    """Intervals sorted by start with a prefix maximum of end times.
+
+    Half-open ``[start, end)`` intervals may overlap each other (legacy
+    bookings predate conflict checks), so overlap queries use the prefix
+    max instead of assuming disjoint neighbours.
+    """
+
+    __slots__ = ("starts", "ends", "ids", "max_end")
+
+    def __init__(self, intervals: Iterable[tuple[datetime, datetime, str]]) -> None:
+        ordered = sorted(intervals)
+        self.starts = [iv[0] for iv in ordered]
+        self.ends = [iv[1] for iv in ordered]
+        self.ids = [iv[2] for iv in ordered]
+        self.max_end: list[datetime] = []
+        for end in self.ends:
+            self.max_end.append(max(end, self.max_end[-1]) if self.max_end else end)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def has_overlap(self, start: datetime, end: datetime) -> bool:
+        i = bisect_left(self.starts, end)
+        return i > 0 and self.max_end[i - 1] > start
+
+    def overlapping(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime, str]]:
+        i = bisect_left(self.starts, end)
+        out = []
+        j = i - 1
+        while j >= 0 and self.max_end[j] > start:
+            if self.ends[j] > start:
+                out.append((self.starts[j], self.ends[j], self.ids[j]))
+            j -= 1
+        out.reverse()
+        return out
+
+
+def _interval_entry(booking_id: str, start: datetime, end: datetime, status: str) -> dict[str, Any]:
+    return {"booking_id": booking_id, "start": start.isoformat(), "end": end.isoformat(), "status": status}
+
+
+def _entries_from_bookings(rows: Iterable[tuple[str, dict[str, Any]]]) -> list[dict[str, Any]]:
+    entries = []
+    for booking_id, row in rows:
+        if row.get("status") not in ACTIVE_STATUSES:
+            continue
+        try:
+            start = parse_booking_time(row.get("start_date"))
+            end = parse_booking_time(row.get("end_date"), inclusive_end=True)
+        except Exception:
+            continue
+        entries.append(_interval_entry(booking_id, start, end, str(row.get("status"))))
+    return entries
+
+
+def _index_for(entries: Iterable[dict[str, Any]]) -> IntervalIndex:
+    return IntervalIndex(
+        (datetime.fromisoformat(e["start"]), datetime.fromisoformat(e["end"]), str(e["booking_id"]))
+        for e in entries
+    )
+
+
+class BookingCalendar:
+    """Reservation and availability queries over the calendar documents."""
+
+    _indexes: dict[str, tuple[int, IntervalIndex]] = {}
+
+    @classmethod
+    def _index(cls, equipment_id: str, doc: dict[str, Any]) -> IntervalIndex:
+        version = int(doc.get("version") or 0)
+        cached = cls._indexes.get(equipment_id)
+        if cached and cached[0] == version:
+            return cached[1]
+        index = _index_for(doc.get("intervals") or [])
+        cls._indexes[equipment_id] = (version, index)
+        return index
+
+    @classmethod
+    async def _load(cls, db, equipment_id: str) -> dict[str, Any]:
+        """Return the calendar document, seeding it from existing bookings on first use."""
+        ref = db.collection(MongoCollections.EQUIPMENT_BOOKING_CALENDARS).document(equipment_id)
+        snap = await ref.get()
+        if snap.exists:
+            return snap.to_dict()
+
+        bookings = db.collection(MongoCollections.EQUIPMENT_BOOKINGS).where(
+            filter=FieldFilter("equipment_id", "==", equipment_id)
+        )
+        rows = [(d.id, d.to_dict() or {}) async for d in bookings.stream()]
+        doc = {
+            "equipment_id": equipment_id,
+            "version": 0,
+            "intervals": _entries_from_bookings(rows),
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        try:
+            await ref.create(doc)
+        except DocumentAlreadyExists:
+            snap = await ref.get()
+            return snap.to_dict()
+        return doc
+
+    @classmethod
+    async def _mutate(
+        cls,
+        db,
+        equipment_id: str,
+        change: Callable[[list[dict[str, Any]], IntervalIndex], Optional[list[dict[str, Any]]]],
+    ) -> None:
+        """Apply ``change`` with optimistic concurrency; ``None`` from it means no-op."""
+        ref = db.collection(MongoCollections.EQUIPMENT_BOOKING_CALENDARS).document(equipment_id)
+        for _ in range(_MAX_CAS_ATTEMPTS):
+            doc = await cls._load(db, equipment_id)
+            version = int(doc.get("version") or 0)
+            entries = list(doc.get("intervals") or [])
+            updated = change(entries, cls._index(equipment_id, doc))
+            if updated is None:
+                return
+            cutoff = datetime.now(timezone.utc) - _PRUNE_AFTER
+            updated = [e for e in updated if datetime.fromisoformat(e["end"]) > cutoff]
+            write_id = uuid.uuid4().hex
+            applied = await ref.update_if(
+                {"version": version},
+                {
+                    "intervals": updated,
+                    "version": version + 1,
+                    "write_id": write_id,
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                },
+            )
+            if not applied:
+                # A network retry of an update that already landed matches nothing; that write is ours.
+                stored = (await ref.get()).to_dict() or {}
+                applied = stored.get("version") == version + 1 and stored.get("write_id") == write_id
+            if applied:
+                cls._indexes[equipment_id] = (version + 1, _index_for(updated))
+                return
+            logger.info(f"Booking calendar for {equipment_id} changed concurrently; retrying")
+        raise conflict(
+            "Equipment calendar is busy, please retry",
+            code=ErrorCode.EQUIPMENT_BOOKING_CONFLICT,
+        )
+
+    @classmethod
+    async def reserve(
+        cls,
+        db,
+        equipment_id: str,
+        booking_id: str,
+        start: datetime,
+        end: datetime,
+        status: str = "pending",
+    ) -> None:
+        """Atomically add a booking, failing with 409 if it overlaps an active one."""
+
+        def _add(entries, index):
+            if index.has_overlap(start, end):
+                raise conflict(
+                    "Equipment is already booked for the requested dates",
+                    code=ErrorCode.EQUIPMENT_BOOKING_CONFLICT,
+                )
+            return entries + [_interval_entry(booking_id, start, end, status)]
+
+        await cls._mutate(db, equipment_id, _add)
+
+    @classmethod
+    async def release(cls, db, equipment_id: str, booking_id: str) -> None:
+        """Drop a booking from the calendar (rejected, cancelled or completed)."""
+        if not equipment_id:
+            return
+
+        def _drop(entries, index):
+            kept = [e for e in entries if e.get("booking_id") != booking_id]
+            return kept if len(kept) != len(entries) else None
+
+        await cls._mutate(db, equipment_id, _drop)
+
+    @classmethod
+    async def mark_status(cls, db, equipment_id: str, booking_id: str, status: str) -> None:
+        if not equipment_id:
+            return
+
+        def _mark(entries, index):
+            if not any(e.get("booking_id") == booking_id for e in entries):
+                return None
+            return [{**e, "status": status} if e.get("booking_id") == booking_id else e for e in entries]
+
+        await cls._mutate(db, equipment_id, _mark)
+
+    @classmethod
+    async def availability(
+        cls,
+        db,
+        equipment_ids: list[str],
+        start: datetime,
+        end: datetime,
+    ) -> dict[str, dict[str, Any]]:
+        """Busy intervals inside ``[start, end)`` for many equipment ids in two queries."""
+        calendars = db.collection(MongoCollections.EQUIPMENT_BOOKING_CALENDARS)
+        docs = {
+            d.id: d.to_dict() or {}
+            async for d in calendars.where(filter=FieldFilter("equipment_id", "in", equipment_ids)).stream()
+        }
+        missing = [eid for eid in equipment_ids if eid not in docs]
+        if missing:
+            # Equipment never booked through the calendar yet: derive from bookings without writing.
+            grouped: dict[str, list[tuple[str, dict[str, Any]]]] = {eid: [] for eid in missing}
+            bookings = db.collection(MongoCollections.EQUIPMENT_BOOKINGS).where(
+                filter=FieldFilter("equipment_id", "in", missing)
+            )
+            async for d in bookings.stream():
+                row = d.to_dict() or {}
+                grouped.setdefault(str(row.get("equipment_id")), []).append((d.id, row))
+            for eid, rows in grouped.items():
+                docs[eid] = {"version": -1, "intervals": _entries_from_bookings(rows)}
+
+        out: dict[str, dict[str, Any]] = {}
+        for eid in equipment_ids:
+            doc = docs.get(eid) or {"version": -1, "intervals": []}
+            index = cls._index(eid, doc) if doc.get("version", -1) >= 0 else _index_for(doc["intervals"])
+            status_by_id = {e.get("booking_id"): e.get("status") for e in doc.get("intervals") or []}
+            busy = [
+                {"start": s.isoformat(), "end": e.isoformat(), "status": status_by_id.get(bid)}
+                for s, e, bid in index.overlapping(start, end)
+            ]
+            out[eid] = {"available": not busy, "busy": busy}
+        return out
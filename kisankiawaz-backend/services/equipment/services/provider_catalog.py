@@ -0,0 +1,239 @@
+"""In-memory, indexed catalog of ``ref_equipment_providers``.
+
+The rental-rate routes used to stream up to 20k provider documents and filter
+them in Python on every request. The catalog loads the reference set once
+into compact ``__slots__`` records, keeps hash indexes on the normalized
+filter columns plus a trigram index for substring search, and refreshes
+incrementally from the ``_ingested_at`` watermark.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Iterable, Optional
+
+from shared.core.constants import MongoCollections
+from shared.db.mongodb import FieldFilter, get_async_db
+
+logger = logging.getLogger("kisankiawaz.equipment.provider_catalog")
+
+_REFRESH_SECONDS = float(os.getenv("EQUIPMENT_CATALOG_REFRESH_SECONDS", "60"))
+_FULL_RELOAD_SECONDS = float(os.getenv("EQUIPMENT_CATALOG_FULL_RELOAD_SECONDS", "1800"))
+_NGRAM = 3
+
+
+def _norm(value: Any) -> str:
+    return str(value or "").strip().lower()
+
+
+def _ngrams(text: str) -> set[str]:
+    return {text[i:i + _NGRAM] for i in range(len(text) - _NGRAM + 1)}
+
+
+class ProviderRecord:
+    """One provider listing with its normalized filter columns."""
+
+    __slots__ = ("doc_id", "seq", "row", "state", "district", "category", "name", "provider", "source_type")
+
+    def __init__(self, doc_id: str, seq: int, row: dict[str, Any]) -> None:
+        self.doc_id = doc_id
+        self.seq = seq
+        self.row = row
+        self.state = _norm(row.get("state"))
+        self.district = _norm(row.get("district") or row.get("city"))
+        self.category = _norm(row.get("category"))
+        self.name = _norm(row.get("name"))
+        self.provider = _norm(row.get("provider_name"))
+        self.source_type = _norm(row.get("source_type"))
+
+    def matches_search(self, q: str) -> bool:
+        return q in self.name or q in self.provider or q in self.category or q in self.district
+
+
+class ProviderCatalog:
+    """Process-wide provider catalog (classmethod singleton, like QdrantService)."""
+
+    _records: dict[str, ProviderRecord] = {}
+    _by_state: dict[str, set[str]] = {}
+    _by_district: dict[str, set[str]] = {}
+    _by_category: dict[str, set[str]] = {}
+    _by_source_type: dict[str, set[str]] = {}
+    _by_ngram: dict[str, set[str]] = {}
+    _seq = 0
+    _watermark = ""
+    _loaded_at = 0.0
+    _checked_at = 0.0
+    _lock: Optional[asyncio.Lock] = None
+
+    # ── index maintenance ────────────────────────────────────────
+
+    @classmethod
+    def _reset(cls) -> None:
+        cls._records = {}
+        cls._by_state = {}
+        cls._by_district = {}
+        cls._by_category = {}
+        cls._by_source_type = {}
+        cls._by_ngram = {}
+        cls._seq = 0
+        cls._watermark = ""
+
+    @classmethod
+    def _index_pairs(cls, rec: ProviderRecord) -> Iterable[tuple[dict[str, set[str]], str]]:
+        yield cls._by_state, rec.state
+        yield cls._by_district, rec.district
+        yield cls._by_category, rec.category
+        yield cls._by_source_type, rec.source_type
+        grams: set[str] = set()
+        for text in (rec.name, rec.provider, rec.category, rec.district):
+            grams |= _ngrams(text)
+        for gram in grams:
+            yield cls._by_ngram, gram
+
+    @classmethod
+    def _remove(cls, doc_id: str) -> Optional[ProviderRecord]:
+        rec = cls._records.pop(doc_id, None)
+        if rec is None:
+            return None
+        for index, key in cls._index_pairs(rec):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del index[key]
+        return rec
+
+    @classmethod
+    def _upsert(cls, doc_id: str, row: dict[str, Any]) -> None:
+        previous = cls._remove(doc_id)
+        if row.get("is_active") is False:
+            return
+        if previous is not None:
+            seq = previous.seq
+        else:
+            cls._seq += 1
+            seq = cls._seq
+        rec = ProviderRecord(doc_id, seq, row)
+        cls._records[doc_id] = rec
+        for index, key in cls._index_pairs(rec):
+            index.setdefault(key, set()).add(doc_id)
+
+    @classmethod
+    def _apply(cls, snapshots: Iterable[Any]) -> int:
+        count = 0
+        for snap in snapshots:
+            row = snap.to_dict() or {}
+            ingested = str(row.get("_ingested_at") or "")
+            if ingested > cls._watermark:
+                cls._watermark = ingested
+            cls._upsert(str(row.get("rental_id") or snap.id), row)
+            count += 1
+        return count
+
+    # ── loading ──────────────────────────────────────────────────
+
+    @classmethod
+    def invalidate(cls) -> None:
+        """Force a full reload on the next read (e.g. after a replace-seed)."""
+        cls._loaded_at = 0.0
+        cls._checked_at = 0.0
+
+    @classmethod
+    async def ensure_loaded(cls, db=None) -> None:
+        now = time.monotonic()
+        if cls._loaded_at and now - cls._checked_at < _REFRESH_SECONDS:
+            return
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            now = time.monotonic()
+            if cls._loaded_at and now - cls._checked_at < _REFRESH_SECONDS:
+                return
+            col = (db or get_async_db()).collection(MongoCollections.REF_EQUIPMENT_PROVIDERS)
+            try:
+                if not cls._loaded_at or now - cls._loaded_at >= _FULL_RELOAD_SECONDS:
+                    snapshots = [d async for d in col.stream()]
+                    cls._reset()
+                    cls._apply(snapshots)
+                    cls._loaded_at = now
+                    logger.info(f"Loaded {len(cls._records)} equipment providers into catalog")
+                else:
+                    snapshots = [
+                        d
+                        async for d in col.where(
+                            filter=FieldFilter("_ingested_at", ">", cls._watermark)
+                        ).stream()
+                    ]
+                    cls._apply(snapshots)
+            except Exception as exc:
+                if not cls._loaded_at:
+                    raise
+                logger.warning(f"Equipment catalog refresh failed, serving last snapshot: {exc}")
+            cls._checked_at = now
+
+    # ── queries ──────────────────────────────────────────────────
+
+    @classmethod
+    def _candidates(cls, q: str, **filters: str) -> Optional[set[str]]:
+        """Intersect index posting sets; ``None`` means "no index constraint"."""
+        indexes = {
+            "state": cls._by_state,
+            "district": cls._by_district,
+            "category": cls._by_category,
+            "source_type": cls._by_source_type,
+        }
+        sets: list[set[str]] = []
+        for field, value in filters.items():
+            if value:
+                sets.append(indexes[field].get(value, set()))
+        if len(q) >= _NGRAM:
+            sets.extend(cls._by_ngram.get(gram, set()) for gram in _ngrams(q))
+        if not sets:
+            return None
+        sets.sort(key=len)
+        out = set(sets[0])
+        for other in sets[1:]:
+            out &= other
+            if not out:
+                break
+        return out
+
+    @classmethod
+    def query(
+        cls,
+        *,
+        state: Optional[str] = None,
+        district: Optional[str] = None,
+        category: Optional[str] = None,
+        equipment_name: Optional[str] = None,
+        search: Optional[str] = None,
+        source_type: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """Rows matching the filters, in ingestion order."""
+        equip = _norm(equipment_name)
+        q = _norm(search)
+        # The n-gram index covers name/provider/category/district, so it can
+        # narrow either substring filter; records are verified below.
+        ngram_key = q if len(q) >= len(equip) else equip
+        ids = cls._candidates(
+            ngram_key,
+            state=_norm(state),
+            district=_norm(district),
+            category=_norm(category),
+            source_type=_norm(source_type),
+        )
+        records = cls._records.values() if ids is None else (cls._records[i] for i in ids)
+        matched = [
+            rec
+            for rec in records
+            if (not equip or equip in rec.name) and (not q or rec.matches_search(q))
+        ]
+        matched.sort(key=lambda rec: rec.seq)
+        return [rec.row for rec in matched]
+
+    @classmethod
+    def size(cls) -> int:
+        return len(cls._records)
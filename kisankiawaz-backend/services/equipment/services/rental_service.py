@@ -8,6 +8,8 @@ from shared.db.mongodb import FieldFilter
 from shared.core.constants import MongoCollections
 from shared.errors import not_found, bad_request, unauthorized, ErrorCode
 
+from services.booking_calendar import BookingCalendar, parse_booking_time
+
 
 class RentalService:
     """Static methods for rental management operations."""
@@ -62,6 +64,8 @@ class RentalService:
             raise bad_request("start_date and end_date must be valid ISO date-time strings")
         if end_dt < start_dt:
             raise bad_request("end_date cannot be before start_date")
+        slot_start = parse_booking_time(start_date)
+        slot_end = parse_booking_time(end_date, inclusive_end=True)
 
         # Verify equipment exists
         equip_doc = await db.collection(MongoCollections.EQUIPMENT).document(equipment_id).get()
@@ -115,7 +119,13 @@ class RentalService:
             "created_at": now,
             "updated_at": now,
         }
-        await db.collection(MongoCollections.EQUIPMENT_BOOKINGS).document(rental_id).set(doc)
+        # Reserve the slot first: the calendar write is the atomic double-booking guard.
+        await BookingCalendar.reserve(db, equipment_id, rental_id, slot_start, slot_end)
+        try:
+            await db.collection(MongoCollections.EQUIPMENT_BOOKINGS).document(rental_id).set(doc)
+        except Exception:
+            await BookingCalendar.release(db, equipment_id, rental_id)
+            raise
 
         doc["id"] = rental_id
         return doc
@@ -164,6 +174,7 @@ class RentalService:
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         await ref.update(update)
+        await BookingCalendar.mark_status(db, data.get("equipment_id"), rental_id, "approved")
 
         updated = await ref.get()
         result = updated.to_dict()
@@ -184,6 +195,7 @@ class RentalService:
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         await ref.update(update)
+        await BookingCalendar.release(db, data.get("equipment_id"), rental_id)
 
         updated = await ref.get()
         result = updated.to_dict()
@@ -205,6 +217,7 @@ class RentalService:
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         await ref.update(update)
+        await BookingCalendar.release(db, data.get("equipment_id"), rental_id)
 
         updated = await ref.get()
         result = updated.to_dict()
@@ -233,6 +246,7 @@ class RentalService:
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         await ref.update(update)
+        await BookingCalendar.release(db, data.get("equipment_id"), rental_id)
 
         updated = await ref.get()
         result = updated.to_dict()
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 
 from shared.core.constants import MongoCollections
 from shared.errors import not_found, conflict, ErrorCode
+from shared.services.district_centroids import invalidate_user_coordinates
 
 
 class FarmerService:
@@ -92,6 +93,7 @@ class FarmerService:
             result["id"] = updated.id
             result["saved_documents"] = result.get("saved_documents", [])
             result["profile_exists"] = True
+            await invalidate_user_coordinates(user_id)
             return result
 
         profile_id = str(uuid.uuid4())
@@ -105,6 +107,7 @@ class FarmerService:
             "updated_at": now,
         }
         await db.collection(MongoCollections.FARMER_PROFILES).document(profile_id).set(doc)
+        await invalidate_user_coordinates(user_id)
 
         doc["id"] = profile_id
         doc["profile_exists"] = True
@@ -126,6 +129,7 @@ class FarmerService:
 
         data["updated_at"] = datetime.now(timezone.utc).isoformat()
         await db.collection(MongoCollections.FARMER_PROFILES).document(docs[0].id).update(data)
+        await invalidate_user_coordinates(user_id)
 
         updated = await db.collection(MongoCollections.FARMER_PROFILES).document(docs[0].id).get()
         result = updated.to_dict()
@@ -157,6 +161,7 @@ class FarmerService:
 
         data["updated_at"] = datetime.now(timezone.utc).isoformat()
         await db.collection(MongoCollections.FARMER_PROFILES).document(docs[0].id).update(data)
+        await invalidate_user_coordinates(user_id)
 
         updated = await db.collection(MongoCollections.FARMER_PROFILES).document(docs[0].id).get()
         result = updated.to_dict()
@@ -179,6 +184,7 @@ class FarmerService:
         if not docs:
             raise not_found("Farmer profile not found")
         await db.collection(MongoCollections.FARMER_PROFILES).document(docs[0].id).delete()
+        await invalidate_user_coordinates(user_id)
 
     # ── Dashboard ────────────────────────────────────────────────
 
@@ -7,12 +7,13 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from shared.core.config import get_settings
-from shared.db.mongodb import init_mongodb, close_mongodb
+from shared.db.mongodb import init_mongodb, close_mongodb, get_async_db
 from shared.db.redis import get_redis, close_redis
 from shared.errors import AppError
 from shared.errors.handlers import global_exception_handler
 from shared.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware, RateLimiterMiddleware
 from routes import router as api_router
+from services.geo_service import GeoService
 from loguru import logger
 
 
@@ -20,6 +21,7 @@ from loguru import logger
 async def lifespan(app: FastAPI):
     init_mongodb()
     await get_redis()
+    GeoService.warm_village_index(get_async_db())
     logger.info("Geo service started")
     yield
     await close_redis()
@@ -1,100 +1,67 @@
 """Geo business logic."""
 
-from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
 from shared.core.constants import MongoCollections, Qdrant
+from shared.services.geo_search_index import INDEX_PATH, GeoIndexRegistry, GeoSearchIndex, write_index
 from shared.services.qdrant_service import QdrantService
 from shared.errors import not_found, ErrorCode
 
+logger = logging.getLogger("kisankiawaz.geo.service")
+
+# After a failed build from PIN master, requests use the Qdrant fallback for this long before retrying.
+INDEX_BUILD_RETRY_SECONDS = float(os.getenv("GEO_SEARCH_INDEX_BUILD_RETRY_SECONDS", "300"))
+
 
 class GeoService:
 
+    _build_task: Optional[asyncio.Task] = None
+    _build_failed_at: float = 0.0
+
     @staticmethod
     def _normalize_text(value: str) -> str:
         return " ".join(str(value or "").strip().lower().split())
 
     @staticmethod
-    def _tokenize_text(value: str) -> List[str]:
-        return [token for token in GeoService._normalize_text(value).split(" ") if token]
+    async def _build_village_index(db) -> None:
+        try:
+            rows = [doc.to_dict() or {} async for doc in db.collection(MongoCollections.REF_PIN_MASTER).stream()]
+            size = await asyncio.to_thread(write_index, INDEX_PATH, rows)
+        except Exception as exc:
+            GeoService._build_failed_at = time.monotonic()
+            logger.warning(f"Geo search index build failed: {exc}")
+            return
+        GeoService._build_failed_at = 0.0
+        logger.info(f"Built geo search index from {len(rows)} PIN master rows ({size} bytes)")
+        GeoIndexRegistry.reset()
 
     @staticmethod
-    def _match_score(haystack: str, normalized_query: str, tokens: List[str]) -> float:
-        if not haystack or not normalized_query:
-            return 0.0
-
-        score = 0.0
-        if normalized_query in haystack:
-            score += 4.0
-
-        token_hits = 0
-        for token in tokens:
-            if token in haystack:
-                token_hits += 1
-                score += 1.0
-            if haystack.startswith(token):
-                score += 0.25
-
-        if tokens and token_hits == len(tokens):
-            score += 1.0
-        elif token_hits > 0:
-            score += 0.3
-
-        return score
+    def warm_village_index(db) -> Optional[asyncio.Task]:
+        """Build the village/PIN index from PIN master in the background if no offline file exists.
+
+        Called at startup; a build that is already running or failed within
+        ``INDEX_BUILD_RETRY_SECONDS`` is not started again.
+        """
+        if GeoIndexRegistry.get(INDEX_PATH) is not None:
+            return None
+        task = GeoService._build_task
+        if task is not None and not task.done():
+            return task
+        if GeoService._build_failed_at and time.monotonic() - GeoService._build_failed_at < INDEX_BUILD_RETRY_SECONDS:
+            return None
+        GeoService._build_task = asyncio.create_task(GeoService._build_village_index(db))
+        return GeoService._build_task
 
     @staticmethod
-    async def _search_village_firestore(db, query: str, state: Optional[str], limit: int) -> List[Dict]:
-        """Fallback village search against PIN master when vector search is empty."""
-        normalized_query = GeoService._normalize_text(query)
-        if not normalized_query:
-            return []
-
-        query_tokens = GeoService._tokenize_text(normalized_query)
-        normalized_state = GeoService._normalize_text(state or "")
-
-        query_ref = db.collection(MongoCollections.REF_PIN_MASTER)
-
-        items = []
-        seen = set()
-        scanned = 0
-        max_scan = 12000 if state else 20000
-
-        async for doc in query_ref.stream():
-            scanned += 1
-            if scanned > max_scan:
-                break
-
-            data = doc.to_dict() or {}
-            village_name = data.get("village_name") or data.get("village") or data.get("office_name") or ""
-            subdistrict_name = data.get("subdistrict_name") or data.get("taluk") or ""
-            district_name = data.get("district_name", "")
-            state_name = data.get("state_name", "")
-            pincode = data.get("pincode", "")
-
-            if normalized_state:
-                state_haystack = GeoService._normalize_text(state_name)
-                if normalized_state not in state_haystack and state_haystack not in normalized_state:
-                    continue
-
-            haystack = GeoService._normalize_text(" ".join([village_name, subdistrict_name, district_name, state_name, str(pincode)]))
-            match_score = GeoService._match_score(haystack, normalized_query, query_tokens)
-            if match_score <= 0:
-                continue
-
-            dedupe_key = (GeoService._normalize_text(village_name), str(pincode))
-            if dedupe_key in seen:
-                continue
-            seen.add(dedupe_key)
-
-            items.append({
-                "village_name": village_name,
-                "district_name": district_name,
-                "state_name": state_name,
-                "pincode": pincode,
-                "source": "firestore_fallback",
-                "score": round(match_score, 4),
-            })
-
-        items.sort(key=lambda item: (item.get("score", 0), item.get("village_name", "")), reverse=True)
-        return items[:limit]
+    def _village_index(db) -> Optional[GeoSearchIndex]:
+        """Mapped village/PIN index, or None while it is missing (never built on the request path)."""
+        index = GeoIndexRegistry.get(INDEX_PATH)
+        if index is None:
+            GeoService.warm_village_index(db)
+        return index
 
     @staticmethod
     async def lookup_pincode(db, pincode: str) -> dict:
@@ -119,18 +86,25 @@ class GeoService:
 
     @staticmethod
     async def search_village(db, query: str, state: Optional[str] = None, limit: int = 10) -> dict:
-        """Fuzzy village search using Qdrant with Firestore fallback."""
+        """Village/PIN autocomplete from the mapped index, with Qdrant as a semantic fallback."""
         normalized_query = GeoService._normalize_text(query)
         if not normalized_query:
             return {"query": query, "results": [], "total": 0}
 
+        index = GeoService._village_index(db)
+        if index is not None:
+            # A state filter is never dropped: villages elsewhere are not an answer.
+            items = index.search(normalized_query, state, limit)
+            if items:
+                return {"query": query, "results": items, "total": len(items)}
+
+        # Semantic lookup only when the lexical index is missing or finds nothing.
         filter_payload = {}
         if state:
             filter_payload["state_name"] = state
 
         items = []
         seen = set()
-
         try:
             results = QdrantService.search(
                 collection=Qdrant.GEO_LOCATION_INDEX,
@@ -158,20 +132,6 @@ class GeoService:
         except Exception:
             pass
 
-        if len(items) < limit:
-            fallback_items = await GeoService._search_village_firestore(db, normalized_query, state, limit)
-            for item in fallback_items:
-                dedupe_key = (GeoService._normalize_text(item.get("village_name", "")), str(item.get("pincode", "")))
-                if dedupe_key in seen:
-                    continue
-                seen.add(dedupe_key)
-                items.append(item)
-                if len(items) >= limit:
-                    break
-
-        if not items and state:
-            items = await GeoService._search_village_firestore(db, normalized_query, None, limit)
-
         return {"query": query, "results": items[:limit], "total": len(items[:limit])}
 
     @staticmethod
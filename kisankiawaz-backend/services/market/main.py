@@ -1,22 +1,33 @@
 """Market service – FastAPI entry point (port 8004)."""
 
+import asyncio
 import sys
 
 sys.path.insert(0, "/app")
 
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from shared.core.config import get_settings
-from shared.db.mongodb import init_mongodb, close_mongodb
+from shared.db.mongodb import init_mongodb, close_mongodb, get_async_db
 from shared.db.redis import get_redis, close_redis
 from shared.errors import AppError, HttpStatus
 from shared.errors.handlers import global_exception_handler
 from shared.middleware import RequestLoggingMiddleware, SecurityHeadersMiddleware, RateLimiterMiddleware
 
 from routes import router as api_router
+from services.document_sessions import DocumentSessionStore
+from services.extraction_jobs import close_extraction_pool, extraction_stats
+from services.weather_service import (
+    WEATHER_TILE_PREFETCH_ENABLED,
+    provider_stats,
+    run_weather_tile_prefetcher,
+    soil_sample_stats,
+    weather_tile_stats,
+)
+from shared.patterns.provider_client import ProviderPool
 
 
 @asynccontextmanager
@@ -24,7 +35,18 @@ async def lifespan(app: FastAPI):
     """Startup / shutdown lifecycle."""
     init_mongodb()
     await get_redis()
+    prefetcher = (
+        asyncio.create_task(run_weather_tile_prefetcher(get_async_db()))
+        if WEATHER_TILE_PREFETCH_ENABLED
+        else None
+    )
     yield
+    if prefetcher is not None:
+        prefetcher.cancel()
+        with suppress(asyncio.CancelledError):
+            await prefetcher
+    await close_extraction_pool()
+    await ProviderPool.aclose_all()
     await close_redis()
     close_mongodb()
 
@@ -60,3 +82,16 @@ app.include_router(api_router, prefix="/api/v1/market")
 async def health():
     """Liveness probe."""
     return {"status": "healthy", "service": "market"}
+
+
+@app.get("/health/providers", status_code=HttpStatus.OK)
+async def provider_health():
+    """Circuit state and latency histograms for weather/soil upstreams, plus cache and job-queue counters."""
+    return {
+        "service": "market",
+        "providers": provider_stats(),
+        "weather_tiles": weather_tile_stats(),
+        "soil_samples": soil_sample_stats(),
+        "document_extraction": extraction_stats(),
+        "document_sessions": DocumentSessionStore.stats(),
+    }
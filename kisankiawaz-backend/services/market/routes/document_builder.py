@@ -8,8 +8,8 @@ import asyncio
 from typing import Optional
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
 
 from shared.auth.deps import get_current_user
@@ -263,6 +263,7 @@ async def submit_answers(
 async def extract_from_base64(
     session_id: str,
     body: ExtractRequest,
+    wait: bool = Query(default=True, description="If false, queue the extraction and return its job id"),
     user: dict = Depends(get_current_user),
 ):
     """Extract fields from a base64-encoded document (alternative to file upload)."""
@@ -289,10 +290,20 @@ async def extract_from_base64(
         session_id=session_id,
         file_content=file_bytes,
         filename=body.filename,
+        wait=wait,
     )
     return result
 
 
+@router.get("/extract-jobs/{job_id}", status_code=HttpStatus.OK)
+async def get_extraction_job(
+    job_id: str,
+    user: dict = Depends(get_current_user),
+):
+    """Poll a queued document extraction (state, and the result once completed)."""
+    return await service.get_extraction_job(job_id)
+
+
 @router.get("/sessions/{session_id}", status_code=HttpStatus.OK)
 async def get_session(
     session_id: str,
@@ -325,6 +336,7 @@ async def list_sessions(
 @router.get("/sessions/{session_id}/download", status_code=HttpStatus.OK)
 async def download_document(
     session_id: str,
+    request: Request,
     user: dict = Depends(get_current_user),
 ):
     """Download the generated application form for a completed session."""
@@ -336,13 +348,25 @@ async def download_document(
             ErrorCode.RESOURCE_NOT_FOUND,
             "Document not ready. Complete all required fields first.",
         )
+    # Artifacts are content-addressed, so the hash is a strong validator.
+    headers = {"ETag": result["etag"], "Cache-Control": "private, no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), result["etag"]):
+        return Response(status_code=304, headers=headers)
     return FileResponse(
         path=result["filepath"],
         filename=result.get("filename") or f"application_{session_id}.html",
-        media_type="text/html",
+        media_type=result.get("media_type") or "text/html",
+        headers=headers,
     )
 
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
 # ── Bulk Scheme Seed ─────────────────────────────────────────────
 
 @router.post("/seed-schemes", status_code=HttpStatus.CREATED)
@@ -394,7 +418,7 @@ _download_all_status: dict = {
 }
 
 
-async def _execute_download_all(force: bool, reset_existing: bool) -> dict:
+async def _execute_download_all(force: bool, reset_existing: bool, resume: bool = True) -> dict:
     db = get_async_db()
     schemes = await _load_db_schemes(db)
     source = "db"
@@ -407,7 +431,7 @@ async def _execute_download_all(force: bool, reset_existing: bool) -> dict:
     if reset_existing:
         reset_info = downloader.reset_storage()
 
-    result = await downloader.download_all_schemes(force=force, schemes=schemes)
+    result = await downloader.download_all_schemes(force=force, schemes=schemes, resume=resume)
     result["scheme_source"] = source
     result["input_scheme_count"] = len(schemes)
     if reset_info is not None:
@@ -415,7 +439,7 @@ async def _execute_download_all(force: bool, reset_existing: bool) -> dict:
     return result
 
 
-async def _run_download_all_in_background(force: bool, reset_existing: bool) -> None:
+async def _run_download_all_in_background(force: bool, reset_existing: bool, resume: bool = True) -> None:
     global _download_all_status
     _download_all_status = {
         "state": "running",
@@ -425,7 +449,7 @@ async def _run_download_all_in_background(force: bool, reset_existing: bool) ->
         "error": None,
     }
     try:
-        result = await _execute_download_all(force=force, reset_existing=reset_existing)
+        result = await _execute_download_all(force=force, reset_existing=reset_existing, resume=resume)
         _download_all_status = {
             "state": "completed",
             "started_at": _download_all_status.get("started_at"),
@@ -466,13 +490,14 @@ async def download_all_scheme_documents(
     force: bool = Query(default=False, description="Force re-download even if cached"),
     reset_existing: bool = Query(default=False, description="Delete existing stored docs before downloading"),
     wait: bool = Query(default=False, description="If false, start in background and return immediately"),
+    resume: bool = Query(default=True, description="Continue an interrupted bulk sync instead of starting over"),
     user: dict = Depends(get_current_user),
 ):
     """Download documents for all DB schemes (built-in list used only as fallback)."""
     global _download_all_task
 
     if wait:
-        result = await _execute_download_all(force=force, reset_existing=reset_existing)
+        result = await _execute_download_all(force=force, reset_existing=reset_existing, resume=resume)
         return result
 
     if _download_all_task is not None and not _download_all_task.done():
@@ -483,7 +508,7 @@ async def download_all_scheme_documents(
         }
 
     _download_all_task = asyncio.create_task(
-        _run_download_all_in_background(force=force, reset_existing=reset_existing)
+        _run_download_all_in_background(force=force, reset_existing=reset_existing, resume=resume)
     )
     return {
         "state": "started",
@@ -502,6 +527,7 @@ async def get_download_all_status(
     return {
         "running": running,
         "status": _download_all_status,
+        "job": downloader.download_job_progress(),
     }
 
 
@@ -585,7 +611,9 @@ async def extract_from_text_endpoint(
     
     try:
         from services.langextract_service import extract_from_text
-        result = extract_from_text(
+        # LangExtract makes blocking Gemini calls; keep them off the event loop.
+        result = await asyncio.to_thread(
+            extract_from_text,
             text=text,
             target_fields=body.target_fields,
             document_type=body.document_type,
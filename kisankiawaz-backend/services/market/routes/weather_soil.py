@@ -66,7 +66,7 @@ async def weather_soil_composition(
     try:
         db = get_async_db()
         resolved = await resolve_coordinates(db=db, user=user, lat=lat, lon=lon)
-        payload = await get_soil_composition(lat=resolved.lat, lon=resolved.lon)
+        payload = await get_soil_composition(lat=resolved.lat, lon=resolved.lon, db=db)
         payload["location"] = {
             "lat": resolved.lat,
             "lon": resolved.lon,
@@ -0,0 +1,86 @@
+"""
+Content-addressed store for generated document builder artifacts.
+
+Generated application forms used to be written as
+``application_<session[:8]>_<date>.html`` and found again by listing the
+output directory and matching a session-id prefix. Artifacts are now stored
+once per content hash under ``objects/<aa>/<sha256><ext>``; the session keeps
+the returned reference (hash, size, media type, download name), so serving a
+download is a single stat of a known path and the hash doubles as a strong
+ETag. Identical documents share one file.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import datetime, timezone
+from typing import Dict, Optional, Union
+
+DOCUMENT_ARTIFACT_DIR = os.getenv("DOCUMENT_ARTIFACT_DIR", "/tmp/generated_documents")
+
+
+class ArtifactStore:
+    """Immutable files addressed by their sha256."""
+
+    def __init__(self, base_dir: Optional[str] = None):
+        self.base_dir = base_dir or DOCUMENT_ARTIFACT_DIR
+
+    def _path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.base_dir, "objects", sha256[:2], f"{sha256}{ext}")
+
+    def path_for(self, ref: Dict) -> str:
+        return self._path(str(ref.get("sha256", "")), str(ref.get("ext", "")))
+
+    def put(
+        self,
+        content: Union[str, bytes],
+        ext: str = ".html",
+        media_type: str = "text/html",
+        filename: str = "",
+    ) -> Dict:
+        """Store ``content`` (once per hash) and return its reference."""
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        sha256 = hashlib.sha256(data).hexdigest()
+        path = self._path(sha256, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        return {
+            "sha256": sha256,
+            "size": len(data),
+            "ext": ext,
+            "media_type": media_type,
+            "filename": filename or f"{sha256[:12]}{ext}",
+            "stored_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def exists(self, ref: Optional[Dict]) -> bool:
+        return bool(ref and ref.get("sha256")) and os.path.isfile(self.path_for(ref))
+
+    def read_text(self, ref: Optional[Dict]) -> Optional[str]:
+        if not self.exists(ref):
+            return None
+        with open(self.path_for(ref), "r", encoding="utf-8") as f:
+            return f.read()
+
+    @staticmethod
+    def etag(ref: Dict) -> str:
+        return f'"{ref["sha256"]}"'
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
@@ -8,26 +8,86 @@ Interactive form-filling system that:
 5. Supports document upload and extraction (OCR via Gemini)
 """
 
+import asyncio
 import uuid
+import functools
 import os
 import json
 import logging
 import html
 import re
+from collections import OrderedDict
 from datetime import datetime, timezone
 from typing import Dict, Any, List, Optional, Tuple
 
 from shared.core.constants import MongoCollections
 from shared.errors import not_found, bad_request
 from shared.services.api_key_allocator import get_api_key_allocator
+from services.document_artifacts import get_artifact_store
+from services.document_sessions import DocumentSessionStore
+from services.extraction_jobs import content_key, get_extraction_pool
 from services.scheme_document_downloader import SchemeDocumentDownloader
 
 logger = logging.getLogger(__name__)
 
+FORM_TEMPLATE_CACHE_SIZE = int(os.getenv("DOCUMENT_FORM_TEMPLATE_CACHE_SIZE", "128"))
+# Distinct lookup shapes (which fields are filled) remembered per template.
+FORM_TEMPLATE_PLAN_CACHE_SIZE = 32
+_SLOT_MARK = "\x00kk-slot\x00"
+
+
+class _FormSlot:
+    """One fillable control of a compiled form: its span, hints and prebuilt markup."""
+
+    __slots__ = ("start", "end", "source", "kind", "hints", "head", "tail", "options", "variants", "rendered")
+
+    def __init__(self, start: int, end: int, source: str, kind: str, hints: List[str]):
+        self.start = start
+        self.end = end
+        self.source = source
+        self.kind = kind
+        self.hints = hints
+        self.head = ""
+        self.tail = ""
+        self.options: List[str] = []
+        self.variants: Dict[bool, str] = {}
+        self.rendered: Dict[int, str] = {}
+
+
+class CompiledFormTemplate:
+    """An official HTML form parsed once; filling it splices values into its slots."""
+
+    def __init__(self, source: str, slots: List[_FormSlot]):
+        self.source = source
+        self.slots = slots
+        self._plans: "OrderedDict[tuple, List[Tuple[_FormSlot, str]]]" = OrderedDict()
+
+    def plan(self, lookup: Dict[str, Tuple[str, str, int]]) -> List[Tuple[_FormSlot, str]]:
+        """(slot, lookup key) pairs for every slot a lookup of this shape fills."""
+        signature = tuple((token, entry[1]) for token, entry in lookup.items())
+        plan = self._plans.get(signature)
+        if plan is None:
+            plan = []
+            for slot in self.slots:
+                token = DocumentBuilderService._resolve_autofill_token(slot.hints, lookup)
+                if token:
+                    plan.append((slot, token))
+            self._plans[signature] = plan
+            while len(self._plans) > FORM_TEMPLATE_PLAN_CACHE_SIZE:
+                self._plans.popitem(last=False)
+        return plan
+
 
 class DocumentBuilderService:
     """Manages interactive document building workflow."""
 
+    _CONTROL_RX = re.compile(
+        r"<input\b[^>]*>|<textarea\b[^>]*>.*?</textarea>|<select\b[^>]*>.*?</select>",
+        flags=re.IGNORECASE | re.DOTALL,
+    )
+    _FORM_TEMPLATES: "OrderedDict[str, Tuple[Tuple[int, int], CompiledFormTemplate]]" = OrderedDict()
+    _DOWNLOADER: Optional[SchemeDocumentDownloader] = None
+
     _SKIP_INPUT_TYPES = {
         "hidden",
         "submit",
@@ -190,7 +250,9 @@ class DocumentBuilderService:
         return ""
 
     @staticmethod
+    @functools.lru_cache(maxsize=8192)
     def _compact_token(value: str) -> str:
+        # Aliases, labels and option texts repeat across fills, so this is memoized.
         return re.sub(r"[^a-z0-9]", "", (value or "").lower())
 
     @staticmethod
@@ -395,7 +457,7 @@ class DocumentBuilderService:
         return lookup
 
     @staticmethod
-    def _resolve_autofill_value(hints: List[str], lookup: Dict[str, Tuple[str, str, int]]) -> Tuple[str, str]:
+    def _compact_hints(hints: List[str]) -> List[str]:
         compact_hints = []
         seen = set()
         for hint in hints:
@@ -403,11 +465,14 @@ class DocumentBuilderService:
             if token and token not in seen:
                 compact_hints.append(token)
                 seen.add(token)
+        return compact_hints
 
+    @staticmethod
+    def _resolve_autofill_token(compact_hints: List[str], lookup: Dict[str, Tuple[str, str, int]]) -> str:
+        """Lookup key matched by the first hint (exact, then longest-key substring), or ""."""
         for hint in compact_hints:
             if hint in lookup:
-                value, canonical_field, _ = lookup[hint]
-                return value, canonical_field
+                return hint
 
         lookup_keys = sorted(lookup.keys(), key=len, reverse=True)
         for hint in compact_hints:
@@ -417,10 +482,19 @@ class DocumentBuilderService:
                 if len(key) < 5:
                     continue
                 if key in hint or hint in key:
-                    value, canonical_field, _ = lookup[key]
-                    return value, canonical_field
+                    return key
 
-        return "", ""
+        return ""
+
+    @staticmethod
+    def _resolve_autofill_value(hints: List[str], lookup: Dict[str, Tuple[str, str, int]]) -> Tuple[str, str]:
+        token = DocumentBuilderService._resolve_autofill_token(
+            DocumentBuilderService._compact_hints(hints), lookup
+        )
+        if not token:
+            return "", ""
+        value, canonical_field, _ = lookup[token]
+        return value, canonical_field
 
     @staticmethod
     def _parse_attrs(tag_html: str) -> Dict[str, str]:
@@ -550,21 +624,9 @@ class DocumentBuilderService:
         return ""
 
     @staticmethod
-    def _fill_single_control(
-        control_html: str,
-        lookup: Dict[str, Tuple[str, str, int]],
-        label_hint: str,
-        option_hint: str,
-    ) -> Tuple[str, str]:
-        lower = control_html.lower().lstrip()
-
-        if lower.startswith("<input"):
-            attrs = DocumentBuilderService._parse_attrs(control_html)
-            input_type = (attrs.get("type") or "text").lower()
-            if input_type in DocumentBuilderService._SKIP_INPUT_TYPES:
-                return control_html, ""
-
-            hints = [
+    def _control_hints(attrs: Dict[str, str], label_hint: str) -> List[str]:
+        return DocumentBuilderService._compact_hints(
+            [
                 attrs.get("name", ""),
                 attrs.get("id", ""),
                 attrs.get("placeholder", ""),
@@ -574,84 +636,102 @@ class DocumentBuilderService:
                 attrs.get("data-field", ""),
                 label_hint,
             ]
-            target_value, canonical_field = DocumentBuilderService._resolve_autofill_value(hints, lookup)
-            if not target_value:
-                return control_html, ""
-
-            if input_type in {"radio", "checkbox"}:
-                option_candidates = [attrs.get("value", ""), option_hint]
-                should_check = any(
-                    DocumentBuilderService._values_match(target_value, candidate)
-                    for candidate in option_candidates
-                    if candidate
-                )
-                if not option_candidates or all(not x for x in option_candidates):
-                    should_check = target_value.lower() in {"true", "yes", "1", "checked"}
-
-                updated = DocumentBuilderService._set_boolean_attr(control_html, "checked", should_check)
-                if should_check and updated != control_html:
-                    return updated, canonical_field
-                return updated, ""
-
-            coerced = DocumentBuilderService._coerce_for_input_type(target_value, input_type)
-            updated = DocumentBuilderService._set_attr(control_html, "value", coerced)
-            if updated != control_html:
-                return updated, canonical_field
-            return control_html, ""
+        )
 
-        if lower.startswith("<textarea"):
-            attrs = DocumentBuilderService._parse_attrs(control_html)
-            hints = [
-                attrs.get("name", ""),
-                attrs.get("id", ""),
-                attrs.get("placeholder", ""),
-                attrs.get("aria-label", ""),
-                attrs.get("title", ""),
-                attrs.get("data-label", ""),
-                attrs.get("data-field", ""),
-                label_hint,
-            ]
-            target_value, canonical_field = DocumentBuilderService._resolve_autofill_value(hints, lookup)
-            if not target_value:
-                return control_html, ""
-
-            match = re.match(r"(<textarea\b[^>]*>)(.*?)(</textarea>)", control_html, flags=re.IGNORECASE | re.DOTALL)
-            if not match:
-                return control_html, ""
-            opening, _, closing = match.groups()
-            updated = f"{opening}{html.escape(target_value)}{closing}"
-            if updated != control_html:
-                return updated, canonical_field
-            return control_html, ""
-
-        if lower.startswith("<select"):
+    @staticmethod
+    def _compile_form_template(html_source: str) -> "CompiledFormTemplate":
+        """Parse every fillable control of an official form once into a reusable slot list."""
+        slots: List[_FormSlot] = []
+        for match in DocumentBuilderService._CONTROL_RX.finditer(html_source):
+            control_html = match.group(0)
+            start, end = match.start(), match.end()
+            lower = control_html.lower().lstrip()
             attrs = DocumentBuilderService._parse_attrs(control_html)
-            hints = [
-                attrs.get("name", ""),
-                attrs.get("id", ""),
-                attrs.get("placeholder", ""),
-                attrs.get("aria-label", ""),
-                attrs.get("title", ""),
-                attrs.get("data-label", ""),
-                attrs.get("data-field", ""),
-                label_hint,
-            ]
-            target_value, canonical_field = DocumentBuilderService._resolve_autofill_value(hints, lookup)
-            if not target_value:
-                return control_html, ""
+            label_hint = DocumentBuilderService._extract_nearby_label(html_source, start)
 
-            updated, changed = DocumentBuilderService._fill_select_control(control_html, target_value)
-            if changed:
-                return updated, canonical_field
-            return control_html, ""
+            if lower.startswith("<input"):
+                input_type = (attrs.get("type") or "text").lower()
+                if input_type in DocumentBuilderService._SKIP_INPUT_TYPES:
+                    continue
+                slot = _FormSlot(start, end, control_html, input_type,
+                                 DocumentBuilderService._control_hints(attrs, label_hint))
+                if input_type in {"radio", "checkbox"}:
+                    option_hint_match = re.match(r"\s*([^<]{1,80})", html_source[end:end + 100])
+                    option_hint = option_hint_match.group(1).strip() if option_hint_match else ""
+                    slot.options = [c for c in (attrs.get("value", ""), option_hint) if c]
+                    slot.variants = {
+                        True: DocumentBuilderService._set_boolean_attr(control_html, "checked", True),
+                        False: DocumentBuilderService._set_boolean_attr(control_html, "checked", False),
+                    }
+                else:
+                    marked = DocumentBuilderService._set_attr(control_html, "value", _SLOT_MARK)
+                    if _SLOT_MARK not in marked:
+                        continue
+                    slot.head, slot.tail = marked.split(_SLOT_MARK, 1)
+                slots.append(slot)
 
-        return control_html, ""
+            elif lower.startswith("<textarea"):
+                parts = re.match(r"(<textarea\b[^>]*>)(.*?)(</textarea>)", control_html, flags=re.IGNORECASE | re.DOTALL)
+                if not parts:
+                    continue
+                slot = _FormSlot(start, end, control_html, "textarea",
+                                 DocumentBuilderService._control_hints(attrs, label_hint))
+                slot.head, slot.tail = parts.group(1), parts.group(3)
+                slots.append(slot)
+
+            elif lower.startswith("<select"):
+                slot = _FormSlot(start, end, control_html, "select",
+                                 DocumentBuilderService._control_hints(attrs, label_hint))
+                parts = re.match(r"(<select\b[^>]*>)(.*?)(</select>)", control_html, flags=re.IGNORECASE | re.DOTALL)
+                if parts:
+                    option_rx = re.compile(r"(<option\b[^>]*>)(.*?)(</option>)", flags=re.IGNORECASE | re.DOTALL)
+                    slot.options = [
+                        DocumentBuilderService._parse_attrs(option.group(1)).get("value")
+                        or DocumentBuilderService._strip_html_tags(option.group(2))
+                        for option in option_rx.finditer(parts.group(2))
+                    ]
+                if slot.options:
+                    slots.append(slot)
+
+        return CompiledFormTemplate(html_source, slots)
+
+    @staticmethod
+    def _render_slot(slot: "_FormSlot", value: str) -> Tuple[Optional[str], bool]:
+        """Replacement markup for ``slot`` (None when unchanged) and whether it counts as filled."""
+        if slot.kind in {"radio", "checkbox"}:
+            if slot.options:
+                should_check = any(DocumentBuilderService._values_match(value, option) for option in slot.options)
+            else:
+                should_check = value.lower() in {"true", "yes", "1", "checked"}
+            updated = slot.variants[should_check]
+            changed = updated != slot.source
+            return (updated if changed else None), (should_check and changed)
+
+        if slot.kind == "select":
+            for idx, option in enumerate(slot.options):
+                if DocumentBuilderService._values_match(value, option):
+                    rendered = slot.rendered.get(idx)
+                    if rendered is None:
+                        rendered, _ = DocumentBuilderService._fill_select_control(slot.source, value)
+                        slot.rendered[idx] = rendered
+                    return rendered, True
+            return None, False
+
+        if slot.kind == "textarea":
+            updated = f"{slot.head}{html.escape(value)}{slot.tail}"
+        else:
+            coerced = DocumentBuilderService._coerce_for_input_type(value, slot.kind)
+            updated = f"{slot.head}{html.escape(coerced, quote=True)}{slot.tail}"
+        if updated == slot.source:
+            return None, False
+        return updated, True
 
     @staticmethod
     def _fill_html_controls(
         html_source: str,
         fields: Dict[str, Any],
         form_fields: Optional[List[dict]] = None,
+        template: Optional["CompiledFormTemplate"] = None,
     ) -> Tuple[str, Dict[str, Any]]:
         lookup = DocumentBuilderService._build_autofill_lookup(fields, form_fields=form_fields)
         if not lookup:
@@ -661,43 +741,71 @@ class DocumentBuilderService:
                 "matched_fields_count": 0,
             }
 
-        control_rx = re.compile(
-            r"<input\b[^>]*>|<textarea\b[^>]*>.*?</textarea>|<select\b[^>]*>.*?</select>",
-            flags=re.IGNORECASE | re.DOTALL,
-        )
+        if template is None:
+            template = DocumentBuilderService._compile_form_template(html_source)
+        source = template.source
 
+        pieces: List[str] = []
+        cursor = 0
         matched_fields = set()
         filled_controls = 0
-
-        def replace_control(match: re.Match) -> str:
-            nonlocal filled_controls
-            control_html = match.group(0)
-            start = match.start()
-            end = match.end()
-            label_hint = DocumentBuilderService._extract_nearby_label(html_source, start)
-
-            lookahead = html_source[end:end + 100]
-            option_hint_match = re.match(r"\s*([^<]{1,80})", lookahead)
-            option_hint = option_hint_match.group(1).strip() if option_hint_match else ""
-
-            updated, used_field = DocumentBuilderService._fill_single_control(
-                control_html=control_html,
-                lookup=lookup,
-                label_hint=label_hint,
-                option_hint=option_hint,
-            )
-            if used_field:
+        for slot, token in template.plan(lookup):
+            value, canonical_field, _ = lookup[token]
+            updated, filled = DocumentBuilderService._render_slot(slot, value)
+            if updated is None:
+                continue
+            pieces.append(source[cursor:slot.start])
+            pieces.append(updated)
+            cursor = slot.end
+            if filled:
                 filled_controls += 1
-                matched_fields.add(used_field)
-            return updated
+                matched_fields.add(canonical_field)
+        pieces.append(source[cursor:])
 
-        filled_html = control_rx.sub(replace_control, html_source)
-        return filled_html, {
+        return "".join(pieces), {
             "filled_controls": filled_controls,
             "matched_fields": sorted(matched_fields),
             "matched_fields_count": len(matched_fields),
         }
 
+    @staticmethod
+    def _load_form_template(path: str) -> Optional["CompiledFormTemplate"]:
+        """Compiled template for the HTML form at ``path``, cached by (path, mtime, size)."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cache = DocumentBuilderService._FORM_TEMPLATES
+        cached = cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            cache.move_to_end(path)
+            return cached[1]
+
+        try:
+            with open(path, "r", encoding="utf-8", errors="ignore") as fp:
+                source_html = fp.read()
+        except Exception:
+            return None
+        low = source_html.lower()
+        if "<input" not in low and "<select" not in low and "<textarea" not in low:
+            template = CompiledFormTemplate(source_html, [])
+        else:
+            template = DocumentBuilderService._compile_form_template(source_html)
+
+        cache[path] = (stamp, template)
+        cache.move_to_end(path)
+        while len(cache) > FORM_TEMPLATE_CACHE_SIZE:
+            cache.popitem(last=False)
+        return template
+
+    @staticmethod
+    def _scheme_downloader() -> SchemeDocumentDownloader:
+        """Shared downloader; its document index is read live, so one instance is enough."""
+        if DocumentBuilderService._DOWNLOADER is None:
+            DocumentBuilderService._DOWNLOADER = SchemeDocumentDownloader()
+        return DocumentBuilderService._DOWNLOADER
+
     @staticmethod
     def _score_scheme_html_document(doc: Dict[str, Any]) -> int:
         filename = DocumentBuilderService._clean_text(doc.get("filename"))
@@ -727,7 +835,7 @@ class DocumentBuilderService:
         form_fields: Optional[List[dict]] = None,
         preferred_document_name: str = "",
     ) -> Tuple[Optional[str], Dict[str, Any]]:
-        downloader = SchemeDocumentDownloader()
+        downloader = DocumentBuilderService._scheme_downloader()
 
         docs: List[Dict[str, Any]] = []
         for key in [scheme_short_name, scheme_name]:
@@ -774,20 +882,15 @@ class DocumentBuilderService:
         best_result = None
         best_rank = (-1, -1, -999)
         for score, path, doc, preferred_hit in html_candidates:
-            try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as fp:
-                    source_html = fp.read()
-            except Exception:
-                continue
-
-            low = source_html.lower()
-            if "<input" not in low and "<select" not in low and "<textarea" not in low:
+            template = DocumentBuilderService._load_form_template(path)
+            if template is None or not template.slots:
                 continue
 
             filled_html, stats = DocumentBuilderService._fill_html_controls(
-                html_source=source_html,
+                html_source=template.source,
                 fields=fields,
                 form_fields=form_fields,
+                template=template,
             )
 
             rank = (
@@ -960,7 +1063,7 @@ class DocumentBuilderService:
             "updated_at": datetime.now(timezone.utc).isoformat(),
         }
         
-        await db.collection("document_builder_sessions").document(session_id).set(session_data)
+        await DocumentSessionStore.create(db, session_id, session_data)
 
         return {
             "session_id": session_id,
@@ -983,14 +1086,11 @@ class DocumentBuilderService:
         """
         Submit answers for current batch, get next batch or mark complete.
         """
-        session_ref = db.collection("document_builder_sessions").document(session_id)
-        session_doc = await session_ref.get()
-        
-        if not session_doc.exists:
+        session = await DocumentSessionStore.get(db, session_id)
+
+        if session is None:
             raise not_found("Document builder session not found")
-        
-        session = session_doc.to_dict()
-        
+
         # Validate and store answers
         form_fields = session.get("form_fields", [])
         filled = session.get("filled_fields", {})
@@ -1061,6 +1161,7 @@ class DocumentBuilderService:
             )
             document_url = doc_result.get("download_url", "")
             document_html = doc_result.get("document_html", "")
+            document_artifact = doc_result.get("artifact")
             session_status = "completed"
         else:
             session_status = "in_progress"
@@ -1077,12 +1178,14 @@ class DocumentBuilderService:
             payload.update(
                 {
                     "document_url": document_url,
-                    "document_html": document_html,
+                    # The HTML lives in the artifact store; the session only keeps its reference.
+                    "document_html": "",
+                    "document_artifact": document_artifact,
                     "generated_at": datetime.now(timezone.utc).isoformat(),
                 }
             )
 
-        await session_ref.update(payload)
+        await DocumentSessionStore.update(db, session_id, session, payload)
         
         return {
             "session_id": session_id,
@@ -1101,188 +1204,247 @@ class DocumentBuilderService:
 
     @staticmethod
     async def extract_from_document(
-        db, session_id: str, file_content: bytes, filename: str
+        db, session_id: str, file_content: bytes, filename: str, wait: bool = True
     ) -> dict:
         """
         Process an uploaded document (PDF/image) and extract fields using
         LangExtract (primary) with Gemini OCR fallback.
+
+        The work runs as a job on the extraction pool, off the event loop.
+        With ``wait=False`` the queued job record is returned at once and the
+        result is polled with ``get_extraction_job``.
         """
-        session_ref = db.collection("document_builder_sessions").document(session_id)
-        session_doc = await session_ref.get()
-        
-        if not session_doc.exists:
+        if await DocumentSessionStore.get(db, session_id) is None:
             raise not_found("Document builder session not found")
-        
-        session = session_doc.to_dict()
+
+        async def work() -> dict:
+            return await DocumentBuilderService._run_extraction_job(db, session_id, file_content, filename)
+
+        pool = get_extraction_pool()
+        meta = {"kind": "document_extraction", "session_id": session_id, "filename": filename}
+        if not wait:
+            return await pool.submit(work, **meta)
+        return await pool.run(work, **meta)
+
+    @staticmethod
+    async def get_extraction_job(job_id: str) -> dict:
+        job = await get_extraction_pool().status(job_id)
+        if job is None:
+            raise not_found("Extraction job not found")
+        return job
+
+    @staticmethod
+    async def _run_extraction_job(db, session_id: str, file_content: bytes, filename: str) -> dict:
+        session = await DocumentSessionStore.get(db, session_id)
+
+        if session is None:
+            raise not_found("Document builder session not found")
+
         form_fields = session.get("form_fields", [])
         field_names = [f["field"] for f in form_fields]
-        
+
         # Save uploaded file
         upload_dir = "/tmp/doc_uploads"
         os.makedirs(upload_dir, exist_ok=True)
         file_path = os.path.join(upload_dir, f"{session_id}_{filename}")
-        
+
         with open(file_path, "wb") as f:
             f.write(file_content)
-        
-        extracted_fields = {}
-        extraction_method = "none"
-        
-        # ── PRIMARY: Try LangExtract ──────────────────────────
-        try:
-            from services.langextract_service import extract_from_file, detect_document_type
-            
-            # Detect document type from filename / content
-            ext = filename.lower().rsplit(".", 1)[-1] if "." in filename else ""
-            
-            # Read a sample for type detection
-            try:
-                with open(file_path, "r", encoding="utf-8", errors="ignore") as f_sample:
-                    sample_text = f_sample.read(5000)
-                doc_type = detect_document_type(sample_text)
-            except Exception:
-                doc_type = "auto"
-            
-            langextract_result = extract_from_file(
-                file_path=file_path,
-                target_fields=field_names,
-                document_type=doc_type,
-            )
-            
-            if langextract_result.get("fields"):
-                extracted_fields = langextract_result["fields"]
-                extraction_method = "langextract"
-                logger.info(
-                    f"LangExtract extracted {len(extracted_fields)} fields "
-                    f"from {filename} (type={doc_type})"
-                )
-        except ImportError:
-            logger.warning("langextract not available, falling back to Gemini OCR")
-        except Exception as e:
-            logger.warning(f"LangExtract failed: {e}, falling back to Gemini OCR")
-        
-        # ── FALLBACK: Gemini multimodal OCR ───────────────────
-        if not extracted_fields:
-            try:
-                import google.generativeai as genai
-                from shared.core.config import get_settings
-                
-                settings = get_settings()
-                allocator = get_api_key_allocator()
-                lease = None
-                selected_key = settings.GEMINI_API_KEY
-                if allocator.has_provider("gemini"):
-                    lease = allocator.acquire("gemini")
-                    selected_key = lease.key
-                if not selected_key:
-                    raise ValueError("Gemini API key is not configured")
-
-                genai.configure(api_key=selected_key)
-                
-                model = genai.GenerativeModel("gemini-2.5-flash")
-                
-                ext = filename.lower().split(".")[-1]
-                
-                if ext in ["jpg", "jpeg", "png", "bmp", "webp"]:
-                    import base64
-                    b64_content = base64.b64encode(file_content).decode()
-                    mime_type = f"image/{ext}" if ext != "jpg" else "image/jpeg"
-                    
-                    prompt = f"""Extract the following fields from this document image. Return ONLY a valid JSON object.
-Fields to extract: {json.dumps(field_names)}
 
-For each field you find, include it in the JSON. If a field is not visible, omit it.
-Example format: {{"farmer_name": "Ram Kumar", "aadhaar_number": "1234-5678-9012"}}
-
-IMPORTANT: Return ONLY the JSON, no markdown, no explanation."""
-
-                    response = model.generate_content([
-                        {"mime_type": mime_type, "data": b64_content},
-                        prompt
-                    ])
-                    
-                elif ext == "pdf":
-                    prompt = f"""Analyze this document and extract the following fields. Return ONLY a valid JSON object.
-Fields to extract: {json.dumps(field_names)}
-
-Document content (as text):
-{file_content[:10000].decode('utf-8', errors='ignore')}
+        extraction, cache_hit = await get_extraction_pool().cached(
+            content_key(file_content, field_names),
+            lambda: DocumentBuilderService._extract_fields(file_path, file_content, filename, field_names),
+        )
 
-For each field you find, include it in the JSON. If a field is not found, omit it.
-Return ONLY the JSON, no markdown, no explanation."""
+        if extraction.get("method") == "unsupported":
+            return {"extracted_fields": {}, "message": f"Unsupported file type: {extraction.get('file_type')}"}
+        if extraction.get("method") == "failed":
+            return {
+                "extracted_fields": {},
+                "message": f"Could not extract fields from document: {extraction.get('error')}",
+                "file_saved": file_path,
+                "extraction_method": "failed",
+            }
+        extracted_fields = extraction.get("fields") or {}
+        extraction_method = extraction.get("method", "none")
 
-                    response = model.generate_content(prompt)
-                else:
-                    return {"extracted_fields": {}, "message": f"Unsupported file type: {ext}"}
-                
-                response_text = response.text.strip()
-                if response_text.startswith("```"):
-                    response_text = response_text.split("```")[1]
-                    if response_text.startswith("json"):
-                        response_text = response_text[4:]
-                
-                extracted_fields = json.loads(response_text)
-                extraction_method = "gemini_ocr"
-                if lease:
-                    allocator.report_success(lease)
-                
-            except Exception as e:
-                if "lease" in locals() and lease is not None:
-                    err_str = str(e).lower()
-                    if "429" in err_str or "resource_exhausted" in err_str or "quota" in err_str:
-                        allocator.report_rate_limited(lease, str(e))
-                    else:
-                        allocator.report_error(lease, str(e))
-                logger.error(f"Gemini OCR extraction also failed: {e}")
-                return {
-                    "extracted_fields": {},
-                    "message": f"Could not extract fields from document: {str(e)}",
-                    "file_saved": file_path,
-                    "extraction_method": "failed",
-                }
-        
-        # Merge extracted fields with existing
-        filled = session.get("filled_fields", {})
+        # Extraction can take a while; answers submitted meanwhile must survive,
+        # so merge into the current copy from Mongo rather than the one read above.
+        session = await DocumentSessionStore.get(db, session_id, fresh=True)
+        if session is None:
+            raise not_found("Document builder session not found")
+        filled = dict(session.get("filled_fields") or {})
         newly_filled = {}
         for key, val in extracted_fields.items():
             if key in field_names and val and str(val).strip():
                 if key not in filled or not filled[key]:
                     filled[key] = str(val)
                     newly_filled[key] = str(val)
-        
+
         # Update session
-        uploaded_docs = session.get("uploaded_documents", [])
+        uploaded_docs = list(session.get("uploaded_documents") or [])
         uploaded_docs.append({
             "filename": filename,
             "path": file_path,
             "extracted_fields": list(newly_filled.keys()),
             "uploaded_at": datetime.now(timezone.utc).isoformat(),
         })
-        
-        await session_ref.update({
+
+        await DocumentSessionStore.update(db, session_id, session, {
             "filled_fields": filled,
             "uploaded_documents": uploaded_docs,
             "updated_at": datetime.now(timezone.utc).isoformat(),
         })
-        
+
         return {
             "extracted_fields": newly_filled,
             "total_extracted": len(newly_filled),
             "all_fields": filled,
             "message": f"Extracted {len(newly_filled)} fields from {filename}",
             "extraction_method": extraction_method,
+            "cache_hit": cache_hit,
         }
 
+    @staticmethod
+    async def _extract_fields(
+        file_path: str, file_content: bytes, filename: str, field_names: List[str]
+    ) -> dict:
+        """Text extraction in the worker pool, then LangExtract; Gemini OCR as fallback."""
+        # ── PRIMARY: Try LangExtract ──────────────────────────
+        try:
+            from services.langextract_service import (
+                detect_document_type,
+                extract_from_text,
+                ocr_image_with_gemini,
+                read_document_text_async,
+            )
+
+            text_info = await read_document_text_async(
+                file_path, field_names, get_extraction_pool().run_cpu
+            )
+            text = text_info["text"]
+            if text_info["needs_vision"]:
+                text = await asyncio.to_thread(ocr_image_with_gemini, file_path)
+
+            if text.strip():
+                doc_type = detect_document_type(text[:5000])
+                langextract_result = await asyncio.to_thread(
+                    extract_from_text, text, field_names, doc_type
+                )
+                if langextract_result.get("fields"):
+                    logger.info(
+                        f"LangExtract extracted {len(langextract_result['fields'])} fields "
+                        f"from {filename} (type={doc_type}, pages "
+                        f"{text_info.get('pages_read', 1)}/{text_info.get('page_count', 1)})"
+                    )
+                    return {
+                        "fields": langextract_result["fields"],
+                        "method": "langextract",
+                        "document_type": doc_type,
+                    }
+        except ImportError:
+            logger.warning("langextract not available, falling back to Gemini OCR")
+        except Exception as e:
+            logger.warning(f"LangExtract failed: {e}, falling back to Gemini OCR")
+
+        # ── FALLBACK: Gemini multimodal OCR ───────────────────
+        try:
+            return await asyncio.to_thread(
+                DocumentBuilderService._gemini_extract_fields, file_content, filename, field_names
+            )
+        except Exception as e:
+            logger.error(f"Gemini OCR extraction also failed: {e}")
+            return {"fields": {}, "method": "failed", "error": str(e)}
+
+    @staticmethod
+    def _gemini_extract_fields(file_content: bytes, filename: str, field_names: List[str]) -> dict:
+        """Ask Gemini for the fields directly from the image or PDF text (blocking)."""
+        import google.generativeai as genai
+        from shared.core.config import get_settings
+
+        settings = get_settings()
+        allocator = get_api_key_allocator()
+        lease = None
+        try:
+            selected_key = settings.GEMINI_API_KEY
+            if allocator.has_provider("gemini"):
+                lease = allocator.acquire("gemini")
+                selected_key = lease.key
+            if not selected_key:
+                raise ValueError("Gemini API key is not configured")
+
+            genai.configure(api_key=selected_key)
+
+            model = genai.GenerativeModel("gemini-2.5-flash")
+
+            ext = filename.lower().split(".")[-1]
+
+            if ext in ["jpg", "jpeg", "png", "bmp", "webp"]:
+                import base64
+                b64_content = base64.b64encode(file_content).decode()
+                mime_type = f"image/{ext}" if ext != "jpg" else "image/jpeg"
+
+                prompt = f"""Extract the following fields from this document image. Return ONLY a valid JSON object.
+Fields to extract: {json.dumps(field_names)}
+
+For each field you find, include it in the JSON. If a field is not visible, omit it.
+Example format: {{"farmer_name": "Ram Kumar", "aadhaar_number": "1234-5678-9012"}}
+
+IMPORTANT: Return ONLY the JSON, no markdown, no explanation."""
+
+                response = model.generate_content([
+                    {"mime_type": mime_type, "data": b64_content},
+                    prompt
+                ])
+
+            elif ext == "pdf":
+                prompt = f"""Analyze this document and extract the following fields. Return ONLY a valid JSON object.
+Fields to extract: {json.dumps(field_names)}
+
+Document content (as text):
+{file_content[:10000].decode('utf-8', errors='ignore')}
+
+For each field you find, include it in the JSON. If a field is not found, omit it.
+Return ONLY the JSON, no markdown, no explanation."""
+
+                response = model.generate_content(prompt)
+            else:
+                if lease:
+                    allocator.report_success(lease)
+                return {"fields": {}, "method": "unsupported", "file_type": ext}
+
+            response_text = response.text.strip()
+            if response_text.startswith("```"):
+                response_text = response_text.split("```")[1]
+                if response_text.startswith("json"):
+                    response_text = response_text[4:]
+
+            extracted_fields = json.loads(response_text)
+            if lease:
+                allocator.report_success(lease)
+            return {"fields": extracted_fields, "method": "gemini_ocr"}
+
+        except Exception as e:
+            if lease is not None:
+                err_str = str(e).lower()
+                if "429" in err_str or "resource_exhausted" in err_str or "quota" in err_str:
+                    allocator.report_rate_limited(lease, str(e))
+                else:
+                    allocator.report_error(lease, str(e))
+            raise
+
     # ── Get Session Status ───────────────────────────────────────
 
     @staticmethod
     async def get_session(db, session_id: str) -> dict:
         """Get document builder session details."""
-        doc = await db.collection("document_builder_sessions").document(session_id).get()
-        if not doc.exists:
+        session = await DocumentSessionStore.get(db, session_id)
+        if session is None:
             raise not_found("Session not found")
-        result = doc.to_dict()
-        result["id"] = doc.id
+        result = dict(session)
+        result["id"] = session_id
+        if not result.get("document_html") and result.get("document_artifact"):
+            result["document_html"] = get_artifact_store().read_text(result["document_artifact"]) or ""
         return result
 
     @staticmethod
@@ -1293,13 +1455,11 @@ Return ONLY the JSON, no markdown, no explanation."""
         preferred_document_name: str = "",
     ) -> dict:
         """Generate (or regenerate) a document for a session and persist references."""
-        session_ref = db.collection("document_builder_sessions").document(session_id)
-        session_doc = await session_ref.get()
+        session = await DocumentSessionStore.get(db, session_id)
 
-        if not session_doc.exists:
+        if session is None:
             raise not_found("Session not found")
 
-        session = session_doc.to_dict()
         doc_result = await DocumentBuilderService._generate_document(
             session_id=session_id,
             scheme_name=session.get("scheme_name", ""),
@@ -1313,15 +1473,19 @@ Return ONLY the JSON, no markdown, no explanation."""
             preferred_document_name=(preferred_document_name or "").strip(),
         )
 
-        await session_ref.update(
+        await DocumentSessionStore.update(
+            db,
+            session_id,
+            session,
             {
                 "status": "completed",
                 "preferred_format": (preferred_format or "html").lower(),
                 "document_url": doc_result.get("download_url", ""),
-                "document_html": doc_result.get("document_html", ""),
+                "document_html": "",
+                "document_artifact": doc_result.get("artifact"),
                 "generated_at": datetime.now(timezone.utc).isoformat(),
                 "updated_at": datetime.now(timezone.utc).isoformat(),
-            }
+            },
         )
 
         return {
@@ -1382,9 +1546,6 @@ Return ONLY the JSON, no markdown, no explanation."""
         preferred_document_name: str = "",
     ) -> dict:
         """Generate a prefilled official HTML form when possible; fallback to assist sheet."""
-        output_dir = "/tmp/generated_documents"
-        os.makedirs(output_dir, exist_ok=True)
-
         combined_fields = dict(autofill_context or {})
         combined_fields.update(filled_fields or {})
 
@@ -1416,14 +1577,13 @@ Return ONLY the JSON, no markdown, no explanation."""
             )
         
         filename = f"application_{session_id[:8]}_{datetime.now().strftime('%Y%m%d')}.html"
-        filepath = os.path.join(output_dir, filename)
-        
-        with open(filepath, "w", encoding="utf-8") as f:
-            f.write(html_content)
-        
+        store = get_artifact_store()
+        artifact = store.put(html_content, ext=".html", media_type="text/html", filename=filename)
+
         return {
             "filename": filename,
-            "filepath": filepath,
+            "filepath": store.path_for(artifact),
+            "artifact": artifact,
             "format": (preferred_format or "html").lower(),
             "document_html": html_content,
             "download_url": f"/api/v1/market/document-builder/sessions/{session_id}/download",
@@ -1546,39 +1706,33 @@ Return ONLY the JSON, no markdown, no explanation."""
 
     @staticmethod
     async def get_document_file(db, session_id: str) -> dict:
-        """Get the generated document file path for download."""
-        output_dir = "/tmp/generated_documents"
-        
-        # Check if file exists
-        for fname in os.listdir(output_dir) if os.path.exists(output_dir) else []:
-            if session_id[:8] in fname:
-                return {
-                    "filepath": os.path.join(output_dir, fname),
-                    "filename": fname,
-                    "exists": True,
-                }
-        
-        # Try to regenerate
-        session_doc = await db.collection("document_builder_sessions").document(session_id).get()
-        if not session_doc.exists:
+        """Get the generated document file for download (regenerated if the artifact is gone)."""
+        session = await DocumentSessionStore.get(db, session_id)
+        if session is None:
             raise not_found("Session not found")
-        
-        session = session_doc.to_dict()
-        result = await DocumentBuilderService._generate_document(
-            session_id=session_id,
-            scheme_name=session.get("scheme_name", ""),
-            filled_fields=session.get("filled_fields", {}) or {},
-            scheme_short_name=session.get("scheme_short_name", ""),
-            application_url=session.get("application_url", ""),
-            form_download_urls=session.get("form_download_urls", []),
-            form_fields=session.get("form_fields", []),
-            autofill_context=session.get("autofill_context", {}),
-            preferred_format=session.get("preferred_format", "html"),
-        )
-        
+
+        store = get_artifact_store()
+        artifact = session.get("document_artifact")
+        if not store.exists(artifact):
+            result = await DocumentBuilderService._generate_document(
+                session_id=session_id,
+                scheme_name=session.get("scheme_name", ""),
+                filled_fields=session.get("filled_fields", {}) or {},
+                scheme_short_name=session.get("scheme_short_name", ""),
+                application_url=session.get("application_url", ""),
+                form_download_urls=session.get("form_download_urls", []),
+                form_fields=session.get("form_fields", []),
+                autofill_context=session.get("autofill_context", {}),
+                preferred_format=session.get("preferred_format", "html"),
+            )
+            artifact = result["artifact"]
+            await DocumentSessionStore.update(db, session_id, session, {"document_artifact": artifact})
+
         return {
-            "filepath": result["filepath"],
-            "filename": result["filename"],
+            "filepath": store.path_for(artifact),
+            "filename": artifact.get("filename") or f"application_{session_id}.html",
+            "media_type": artifact.get("media_type") or "text/html",
+            "etag": store.etag(artifact),
+            "size": artifact.get("size", 0),
             "exists": True,
         }
-
@@ -0,0 +1,68 @@
+"""
+Document builder sessions behind a Redis write-through cache.
+
+A form-filling session is read on every answer, upload and download, and
+written on most of them. Reads are now served from Redis
+(``DOCUMENT_SESSION_TTL``) and fall back to ``document_builder_sessions`` in
+Mongo. Every update goes to Mongo first and then drops the cached copy; the
+next read re-caches what Mongo holds. Caching the writer's merged view
+instead would let two concurrent writers leave whichever view landed last
+in the cache, missing the other's fields.
+"""
+
+from typing import Any, Dict, Optional
+
+from shared.cache.market_cache import DOCUMENT_SESSION_TTL, cache_delete, cache_get, cache_set
+from shared.core.constants import MongoCollections
+
+_NAMESPACE = "doc_session"
+
+
+class DocumentSessionStore:
+    """Mongo-backed session documents with a Redis hot path."""
+
+    counters = {"cache_hit": 0, "cache_miss": 0, "writes": 0}
+
+    @staticmethod
+    def _ref(db, session_id: str):
+        return db.collection(MongoCollections.DOCUMENT_BUILDER_SESSIONS).document(session_id)
+
+    @classmethod
+    async def get(cls, db, session_id: str, fresh: bool = False) -> Optional[Dict[str, Any]]:
+        """Cached session, or the Mongo copy when ``fresh`` (re-caching it either way on a read)."""
+        if not fresh:
+            cached = await cache_get(_NAMESPACE, session_id)
+            if isinstance(cached, dict):
+                cls.counters["cache_hit"] += 1
+                return cached
+            cls.counters["cache_miss"] += 1
+        snap = await cls._ref(db, session_id).get()
+        if not snap.exists:
+            return None
+        session = snap.to_dict() or {}
+        await cache_set(_NAMESPACE, session, session_id, ttl=DOCUMENT_SESSION_TTL)
+        return session
+
+    @classmethod
+    async def create(cls, db, session_id: str, data: Dict[str, Any]) -> None:
+        await cls._ref(db, session_id).set(data)
+        cls.counters["writes"] += 1
+        await cache_set(_NAMESPACE, data, session_id, ttl=DOCUMENT_SESSION_TTL)
+
+    @classmethod
+    async def update(
+        cls, db, session_id: str, session: Dict[str, Any], changes: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Apply ``changes`` in Mongo and drop the cached copy; returns ``session`` with them merged in."""
+        await cls._ref(db, session_id).update(changes)
+        cls.counters["writes"] += 1
+        await cache_delete(_NAMESPACE, session_id)
+        return {**session, **changes}
+
+    @staticmethod
+    async def invalidate(session_id: str) -> None:
+        await cache_delete(_NAMESPACE, session_id)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {"ttl_seconds": DOCUMENT_SESSION_TTL, **cls.counters}
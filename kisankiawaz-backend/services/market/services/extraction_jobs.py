@@ -0,0 +1,314 @@
+"""
+Bounded, off-event-loop job pool for document upload extraction.
+
+Pulling fields out of an uploaded Aadhaar, passbook or land record means
+pdfplumber page loops and tesseract OCR (CPU-bound) followed by blocking
+LangExtract/Gemini calls. Run inline, they stalled the market service's event
+loop for seconds per upload. Jobs submitted here run with bounded
+concurrency: local text extraction goes to a process pool and the blocking
+network calls to threads.
+
+Extraction results are cached under a hash of the file content and the
+requested fields, so re-uploading the same document is answered without
+any OCR or model call. Each job's state is kept in process and mirrored to
+Redis so clients can poll ``/document-builder/extract-jobs/{job_id}`` from
+any replica; ``stats()`` reports queue depth and throughput counters.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from shared.db.redis import get_redis
+from shared.errors import service_unavailable
+
+logger = logging.getLogger("kisankiawaz.extraction_jobs")
+
+EXTRACTION_PROCESS_WORKERS = int(os.getenv("EXTRACTION_PROCESS_WORKERS", "2"))
+EXTRACTION_MAX_CONCURRENCY = int(os.getenv("EXTRACTION_MAX_CONCURRENCY", "4"))
+EXTRACTION_QUEUE_LIMIT = int(os.getenv("EXTRACTION_QUEUE_LIMIT", "32"))
+EXTRACTION_CACHE_ENTRIES = int(os.getenv("EXTRACTION_CACHE_ENTRIES", "256"))
+EXTRACTION_CACHE_TTL_SECONDS = int(os.getenv("EXTRACTION_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+EXTRACTION_JOB_TTL_SECONDS = int(os.getenv("EXTRACTION_JOB_TTL_SECONDS", "3600"))
+EXTRACTION_JOBS_KEPT = 1000
+
+_CACHE_PREFIX = "extract:result"
+_JOB_PREFIX = "extract:job"
+
+
+def content_key(content: bytes, fields: Iterable[str]) -> str:
+    """Cache key for extracting ``fields`` from a file with this exact content."""
+    digest = hashlib.sha256(content).hexdigest()
+    fields_digest = hashlib.sha1(",".join(sorted(set(fields))).encode("utf-8")).hexdigest()[:12]
+    return f"{digest}:{fields_digest}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class ExtractionJobPool:
+    """Runs extraction jobs with bounded concurrency and caches their results."""
+
+    def __init__(
+        self,
+        process_workers: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        queue_limit: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        redis_factory: Callable[[], Awaitable[Any]] = get_redis,
+    ):
+        self.process_workers = max(1, process_workers or EXTRACTION_PROCESS_WORKERS)
+        self.max_concurrency = max(1, max_concurrency or EXTRACTION_MAX_CONCURRENCY)
+        self.queue_limit = max(1, queue_limit or EXTRACTION_QUEUE_LIMIT)
+        self._executor = executor
+        self._redis_factory = redis_factory
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._durations_ms: deque = deque(maxlen=256)
+        self._queued = 0
+        self._running = 0
+        self.counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "cache_hit": 0,
+            "cache_miss": 0,
+        }
+
+    # ── CPU work ──────────────────────────────────────────────────
+
+    def executor(self) -> Executor:
+        if self._executor is None:
+            try:
+                self._executor = ProcessPoolExecutor(max_workers=self.process_workers)
+            except (OSError, NotImplementedError) as exc:
+                logger.warning(f"Process pool unavailable ({exc}); extraction runs in threads")
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.process_workers, thread_name_prefix="extraction"
+                )
+        return self._executor
+
+    async def run_cpu(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a picklable, module-level ``fn(*args)`` in the worker pool."""
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor(), fn, *args)
+        except BrokenProcessPool:
+            # A crashed worker (e.g. a tesseract segfault) poisons the pool; start a fresh one next time.
+            self._executor = None
+            raise
+
+    # ── Result cache ──────────────────────────────────────────────
+
+    async def _redis(self):
+        try:
+            return await self._redis_factory()
+        except Exception as exc:
+            logger.debug(f"Extraction cache Redis unavailable: {exc}")
+            return None
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > EXTRACTION_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
+
+    async def cached(
+        self, key: str, compute: Callable[[], Awaitable[Dict[str, Any]]]
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Return ``(result, cache_hit)``; only results with extracted fields are stored."""
+        result = self._cache.get(key)
+        if result is None:
+            redis = await self._redis()
+            if redis is not None:
+                try:
+                    raw = await redis.get(f"{_CACHE_PREFIX}:{key}")
+                    result = json.loads(raw) if raw else None
+                except Exception as exc:
+                    logger.debug(f"Extraction cache read failed: {exc}")
+            if isinstance(result, dict):
+                self._remember(key, result)
+        if isinstance(result, dict):
+            self._cache.move_to_end(key)
+            self.counters["cache_hit"] += 1
+            return result, True
+
+        self.counters["cache_miss"] += 1
+        result = await compute()
+        if result.get("fields"):
+            self._remember(key, result)
+            redis = await self._redis()
+            if redis is not None:
+                try:
+                    await redis.set(
+                        f"{_CACHE_PREFIX}:{key}",
+                        json.dumps(result, ensure_ascii=False),
+                        ex=EXTRACTION_CACHE_TTL_SECONDS,
+                    )
+                except Exception as exc:
+                    logger.debug(f"Extraction cache write failed: {exc}")
+        return result, False
+
+    # ── Jobs ──────────────────────────────────────────────────────
+
+    async def _publish(self, job: Dict[str, Any]) -> None:
+        redis = await self._redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                f"{_JOB_PREFIX}:{job['job_id']}",
+                json.dumps(job, ensure_ascii=False, default=str),
+                ex=EXTRACTION_JOB_TTL_SECONDS,
+            )
+        except Exception as exc:
+            logger.debug(f"Extraction job publish failed: {exc}")
+
+    async def submit(self, work: Callable[[], Awaitable[Dict[str, Any]]], **meta: Any) -> Dict[str, Any]:
+        """Queue ``work`` and return the job record immediately."""
+        if self._queued >= self.queue_limit:
+            self.counters["rejected"] += 1
+            raise service_unavailable("Document extraction is busy, please retry shortly")
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "state": "queued",
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            **meta,
+        }
+        self._jobs[job["job_id"]] = job
+        while len(self._jobs) > EXTRACTION_JOBS_KEPT:
+            self._jobs.popitem(last=False)
+        self._queued += 1
+        self.counters["submitted"] += 1
+
+        task = asyncio.create_task(self._run(job, work))
+        self._tasks[job["job_id"]] = task
+        task.add_done_callback(lambda done, job_id=job["job_id"]: self._forget(job_id, done))
+        await self._publish(job)
+        return dict(job)
+
+    def _forget(self, job_id: str, task: asyncio.Task) -> None:
+        self._tasks.pop(job_id, None)
+        if not task.cancelled():
+            # Failures are recorded on the job; mark them retrieved for fire-and-forget jobs.
+            task.exception()
+
+    async def _run(self, job: Dict[str, Any], work: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        dequeued = False
+        try:
+            async with self._slots:
+                self._queued -= 1
+                dequeued = True
+                self._running += 1
+                job.update(state="running", started_at=_now())
+                await self._publish(job)
+                started = time.perf_counter()
+                try:
+                    job["result"] = await work()
+                    job["state"] = "completed"
+                    self.counters["completed"] += 1
+                except Exception as exc:
+                    job["state"] = "failed"
+                    job["error"] = str(exc)
+                    self.counters["failed"] += 1
+                    logger.warning(f"Extraction job {job['job_id']} failed: {exc}")
+                    raise
+                finally:
+                    self._running -= 1
+                    self._durations_ms.append((time.perf_counter() - started) * 1000)
+                    job["finished_at"] = _now()
+                    await self._publish(job)
+        finally:
+            if not dequeued:
+                self._queued -= 1
+        return job["result"]
+
+    async def run(self, work: Callable[[], Awaitable[Dict[str, Any]]], **meta: Any) -> Dict[str, Any]:
+        """Submit ``work`` and wait for its result (errors are re-raised)."""
+        job = await self.submit(work, **meta)
+        task = self._tasks.get(job["job_id"])
+        if task is None:
+            return self._jobs[job["job_id"]]["result"]
+        return await asyncio.shield(task)
+
+    async def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return dict(job)
+        redis = await self._redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(f"{_JOB_PREFIX}:{job_id}")
+            return json.loads(raw) if raw else None
+        except Exception as exc:
+            logger.debug(f"Extraction job lookup failed: {exc}")
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        durations = sorted(self._durations_ms)
+
+        def pct(q: float) -> Optional[float]:
+            if not durations:
+                return None
+            return round(durations[min(len(durations) - 1, int(len(durations) * q))], 1)
+
+        return {
+            "queue_depth": self._queued,
+            "running": self._running,
+            "max_concurrency": self.max_concurrency,
+            "queue_limit": self.queue_limit,
+            "process_workers": self.process_workers,
+            "cache_entries": len(self._cache),
+            "duration_ms_p50": pct(0.5),
+            "duration_ms_p95": pct(0.95),
+            **self.counters,
+        }
+
+    async def aclose(self) -> None:
+        for task in list(self._tasks.values()):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+_pool: Optional[ExtractionJobPool] = None
+
+
+def get_extraction_pool() -> ExtractionJobPool:
+    global _pool
+    if _pool is None:
+        _pool = ExtractionJobPool()
+    return _pool
+
+
+async def close_extraction_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
+
+
+def extraction_stats() -> Dict[str, Any]:
+    return get_extraction_pool().stats()
@@ -6,10 +6,15 @@ source-grounded, visual extraction using Gemini models.
 """
 
 import os
+import re
 import json
+import asyncio
+import hashlib
 import logging
 import tempfile
-from typing import Dict, List, Optional, Any
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from shared.services.api_key_allocator import get_api_key_allocator
 
 logger = logging.getLogger(__name__)
@@ -296,6 +301,374 @@ def extract_from_text(
         }
 
 
+IMAGE_EXTS = ("jpg", "jpeg", "png", "bmp", "webp", "tiff")
+
+# Pages handed to one worker call, and worker calls in flight per document.
+PDF_PAGE_BATCH = max(1, int(os.getenv("PDF_PAGE_BATCH", "2")))
+PDF_PAGE_PARALLELISM = max(1, int(os.getenv("PDF_PAGE_PARALLELISM", "4")))
+DOCUMENT_TEXT_CACHE_DIR = os.getenv("DOCUMENT_TEXT_CACHE_DIR", "/tmp/doc_text_cache")
+# Page text of identity and land documents is personal data: it lives no longer than
+# the other document data (24h, as the extraction cache) and the directory is bounded.
+DOCUMENT_TEXT_CACHE_TTL_SECONDS = int(os.getenv("DOCUMENT_TEXT_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+DOCUMENT_TEXT_CACHE_MAX_BYTES = int(os.getenv("DOCUMENT_TEXT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+_TEXT_CACHE_PURGE_INTERVAL_SECONDS = 600
+
+
+def _labelled(*labels: str) -> "re.Pattern[str]":
+    """``Label: value`` on one line, e.g. ``Village: Rampur`` or ``नाम / Name - Asha``."""
+    return re.compile(
+        r"(?:%s)\s*(?:name|no\.?|number)?\s*[:\-]\s*([^\n,;:|]{2,80})" % "|".join(labels),
+        re.IGNORECASE,
+    )
+
+
+# Target fields that can be recognised in raw page text. Extraction stops reading
+# pages once every requested field has a match; fields without a pattern here
+# always need the whole document.
+FIELD_PATTERNS: Dict[str, "re.Pattern[str]"] = {
+    "aadhaar_number": re.compile(r"(?<!\d)([2-9]\d{3}[\s-]?\d{4}[\s-]?\d{4})(?!\d)"),
+    "mobile_number": re.compile(r"(?<!\d)(?:\+91[\s-]?)?([6-9]\d{9})(?!\d)"),
+    "ifsc_code": re.compile(r"\b([A-Z]{4}0[A-Z0-9]{6})\b"),
+    "bank_account_number": re.compile(
+        r"(?:a/c|account)\s*(?:no\.?|number)?\s*[:\-]?\s*(\d{9,18})(?!\d)", re.IGNORECASE
+    ),
+    "date_of_birth": re.compile(
+        r"(?:dob|date of birth|जन्म तिथि)[^\d\n]{0,20}(\d{1,2}[/.-]\d{1,2}[/.-]\d{4})", re.IGNORECASE
+    ),
+    "pincode": re.compile(r"(?<!\d)([1-9]\d{5})(?!\d)"),
+    "khasra_number": re.compile(r"khasra\s*(?:no\.?|number)?\s*[:\-]?\s*(\d[\d/,\s]*\d|\d)", re.IGNORECASE),
+    "survey_number": re.compile(r"survey\s*(?:no\.?|number)\s*[:\-]?\s*([\w/-]+)", re.IGNORECASE),
+    "land_area_acres": re.compile(r"(\d+(?:\.\d+)?)\s*acres?\b", re.IGNORECASE),
+    "land_area_hectares": re.compile(r"(\d+(?:\.\d+)?)\s*(?:hectares?|ha)\b", re.IGNORECASE),
+    "farmer_name": _labelled("farmer", "applicant", "owner", "account holder", "name", "नाम"),
+    "father_name": _labelled(r"father['’]?s", "s/o", "पिता"),
+    "village": _labelled("village", "gram", "ग्राम", "गांव"),
+    "district": _labelled("district", "dist", "जिला"),
+    "state": _labelled("state", "राज्य"),
+    "block": _labelled("block", "ब्लॉक"),
+    "tehsil": _labelled("tehsil", "तहसील"),
+    "taluka": _labelled("taluka", "taluk"),
+    "bank_name": re.compile(r"^\s*((?:[A-Z][A-Za-z&.]*\s+){0,4}Bank(?:\s+of\s+[A-Z][a-z]+)?)\s*$", re.MULTILINE),
+}
+
+
+def match_fields(text: str, fields: Optional[List[str]] = None) -> Dict[str, str]:
+    """First regex match in ``text`` for each requested field that has a pattern."""
+    found: Dict[str, str] = {}
+    for field in fields if fields is not None else FIELD_PATTERNS:
+        pattern = FIELD_PATTERNS.get(field)
+        if pattern is None:
+            continue
+        match = pattern.search(text or "")
+        if match:
+            found[field] = match.group(1).strip()
+    return found
+
+
+def fields_complete(found: Dict[str, str], fields: Optional[List[str]]) -> bool:
+    """True once every requested field is matched (never when none were requested)."""
+    return bool(fields) and all(field in found for field in fields)
+
+
+def _file_ext(file_path: str) -> str:
+    return file_path.lower().rsplit(".", 1)[-1] if "." in file_path else ""
+
+
+def file_digest(file_path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+# ── Text layer cache (per document hash) ─────────────────────────
+
+
+def _text_cache_path(digest: str) -> str:
+    return os.path.join(DOCUMENT_TEXT_CACHE_DIR, digest[:2], f"{digest}.json")
+
+
+def load_text_cache(digest: str) -> Dict[str, Any]:
+    """Page texts / OCR passes already computed for a document with this hash."""
+    path = _text_cache_path(digest)
+    try:
+        if time.time() - os.path.getmtime(path) > DOCUMENT_TEXT_CACHE_TTL_SECONDS:
+            os.remove(path)
+            return {}
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def store_text_cache(digest: str, data: Dict[str, Any]) -> None:
+    path = _text_cache_path(digest)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.debug(f"Document text cache write failed: {exc}")
+    _maybe_purge_text_cache()
+
+
+_purge_lock = threading.Lock()
+_last_purge = 0.0
+
+
+def purge_text_cache(now: Optional[float] = None) -> int:
+    """Delete expired entries, then the oldest ones while over the size cap; returns files removed."""
+    now = time.time() if now is None else now
+    entries = []
+    for root, _dirs, files in os.walk(DOCUMENT_TEXT_CACHE_DIR):
+        for name in files:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in entries:
+        if now - mtime <= DOCUMENT_TEXT_CACHE_TTL_SECONDS and total <= DOCUMENT_TEXT_CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"Purged {removed} document text cache entries")
+    return removed
+
+
+def _maybe_purge_text_cache() -> None:
+    global _last_purge
+    now = time.time()
+    if now - _last_purge < _TEXT_CACHE_PURGE_INTERVAL_SECONDS or not _purge_lock.acquire(blocking=False):
+        return
+    try:
+        _last_purge = now
+        purge_text_cache(now)
+    finally:
+        _purge_lock.release()
+
+
+# ── PDF pages ────────────────────────────────────────────────────
+
+
+def pdf_outline(file_path: str) -> Dict[str, Any]:
+    """Hash, page count and cached page texts of a PDF (cheap; no text extraction)."""
+    digest = file_digest(file_path)
+    cached = load_text_cache(digest)
+    try:
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            page_count = len(pdf.pages)
+    except ImportError:
+        try:
+            from PyPDF2 import PdfReader
+            page_count = len(PdfReader(file_path).pages)
+        except ImportError:
+            page_count = 1
+    return {"digest": digest, "page_count": page_count, "pages": cached.get("pages") or {}}
+
+
+def read_pdf_pages(file_path: str, page_numbers: List[int]) -> List[Any]:
+    """``[(page_number, text), ...]`` for the given 0-based pages (runs in a worker process)."""
+    try:
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            return [(n, pdf.pages[n].extract_text() or "") for n in page_numbers]
+    except ImportError:
+        pass
+    try:
+        from PyPDF2 import PdfReader
+        reader = PdfReader(file_path)
+        return [(n, reader.pages[n].extract_text() or "") for n in page_numbers]
+    except ImportError:
+        # Fall back to reading raw bytes
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        return [(0, raw.decode("utf-8", errors="ignore"))] if 0 in page_numbers else []
+
+
+def _page_batches(page_count: int, skip: Any = ()) -> List[List[int]]:
+    todo = [n for n in range(page_count) if str(n) not in skip]
+    return [todo[i:i + PDF_PAGE_BATCH] for i in range(0, len(todo), PDF_PAGE_BATCH)]
+
+
+def _pdf_result(outline: Dict[str, Any], pages: Dict[str, str], found: Dict[str, str]) -> Dict[str, Any]:
+    ordered = sorted(pages, key=int)
+    return {
+        "text": "\n".join(pages[n] for n in ordered),
+        "method": "pdf_text",
+        "needs_vision": False,
+        "matches": found,
+        "page_count": outline["page_count"],
+        "pages_read": len(ordered),
+        "early_exit": len(ordered) < outline["page_count"],
+        "digest": outline["digest"],
+    }
+
+
+# ── Images ───────────────────────────────────────────────────────
+
+
+def _ocr_image(file_path: str, target_fields: Optional[List[str]]) -> Dict[str, Any]:
+    import pytesseract
+    from PIL import Image
+
+    digest = file_digest(file_path)
+    cached = load_text_cache(digest)
+    passes: Dict[str, str] = dict(cached.get("ocr") or {})
+    # An English-only pass is much cheaper than eng+hin; it is enough when every
+    # requested field is pattern-matchable (numbers, IFSC, labelled values).
+    langs = ["eng", "eng+hin"] if target_fields and all(f in FIELD_PATTERNS for f in target_fields) else ["eng+hin"]
+    img = None
+    text, found = "", {}
+    for lang in langs:
+        if lang not in passes:
+            if img is None:
+                img = Image.open(file_path)
+            passes[lang] = pytesseract.image_to_string(img, lang=lang)
+        text = passes[lang]
+        found = match_fields(text, target_fields)
+        if fields_complete(found, target_fields):
+            break
+    if passes != cached.get("ocr"):
+        store_text_cache(digest, {**cached, "ocr": passes})
+    return {"text": text, "method": "tesseract", "needs_vision": False, "matches": found, "digest": digest}
+
+
+def read_document_text(file_path: str, target_fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Convert a PDF, image or text file to plain text with local tools only.
+
+    This is the CPU-heavy part of extraction (pdfplumber, tesseract) and is
+    safe to run in a worker process. PDF pages are read in order until every
+    field in ``target_fields`` has matched its ``FIELD_PATTERNS`` entry; page
+    texts and OCR passes are cached per document hash. ``needs_vision`` is set
+    for images when no local OCR engine is installed, so the caller can fall
+    back to Gemini.
+    """
+    ext = _file_ext(file_path)
+
+    if ext == "pdf":
+        outline = pdf_outline(file_path)
+        pages: Dict[str, str] = dict(outline["pages"])
+        found = match_fields("\n".join(pages.values()), target_fields)
+        for batch in _page_batches(outline["page_count"], skip=pages):
+            if fields_complete(found, target_fields):
+                break
+            for n, page_text in read_pdf_pages(file_path, batch):
+                pages[str(n)] = page_text
+            found = match_fields("\n".join(pages[k] for k in sorted(pages, key=int)), target_fields)
+        if pages != outline["pages"]:
+            store_text_cache(outline["digest"], {**load_text_cache(outline["digest"]), "pages": pages})
+        return _pdf_result(outline, pages, found)
+
+    if ext in IMAGE_EXTS:
+        try:
+            return _ocr_image(file_path, target_fields)
+        except ImportError:
+            return {"text": "", "method": "none", "needs_vision": True, "matches": {}}
+
+    # Assume text file
+    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    return {"text": text, "method": "plain_text", "needs_vision": False, "matches": match_fields(text, target_fields)}
+
+
+async def read_document_text_async(
+    file_path: str,
+    target_fields: Optional[List[str]],
+    run_cpu: Callable[..., Awaitable[Any]],
+) -> Dict[str, Any]:
+    """
+    ``read_document_text`` with PDF pages spread over worker processes.
+
+    Up to ``PDF_PAGE_PARALLELISM`` batches of ``PDF_PAGE_BATCH`` pages are in
+    flight through ``run_cpu``; target-field patterns are checked as each
+    batch completes, and batches not yet started are cancelled once every
+    requested field has matched.
+    """
+    if _file_ext(file_path) != "pdf":
+        return await run_cpu(read_document_text, file_path, target_fields)
+
+    outline = await run_cpu(pdf_outline, file_path)
+    pages: Dict[str, str] = dict(outline["pages"])
+    found = match_fields("\n".join(pages.values()), target_fields)
+    batches = _page_batches(outline["page_count"], skip=pages)
+    in_flight: set = set()
+    try:
+        while (batches or in_flight) and not fields_complete(found, target_fields):
+            while batches and len(in_flight) < PDF_PAGE_PARALLELISM:
+                in_flight.add(asyncio.ensure_future(run_cpu(read_pdf_pages, file_path, batches.pop(0))))
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                for n, page_text in task.result():
+                    pages[str(n)] = page_text
+            found = match_fields("\n".join(pages[k] for k in sorted(pages, key=int)), target_fields)
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    if pages != outline["pages"]:
+        cached = {**load_text_cache(outline["digest"]), "pages": pages}
+        await asyncio.to_thread(store_text_cache, outline["digest"], cached)
+    return _pdf_result(outline, pages, found)
+
+
+def ocr_image_with_gemini(file_path: str) -> str:
+    """Extract the text of an image with Gemini vision (blocking network call)."""
+    allocator = get_api_key_allocator()
+    lease = None
+    try:
+        import google.generativeai as genai
+        import base64
+
+        selected_key = os.environ.get("LANGEXTRACT_API_KEY", "")
+        if allocator.has_provider("gemini"):
+            lease = allocator.acquire("gemini")
+            selected_key = lease.key
+        if not selected_key:
+            raise ValueError("Gemini key not configured for OCR fallback")
+
+        genai.configure(api_key=selected_key)
+        model = genai.GenerativeModel("gemini-2.5-flash")
+
+        ext = _file_ext(file_path)
+        with open(file_path, "rb") as f:
+            image_bytes = f.read()
+        b64 = base64.b64encode(image_bytes).decode()
+        mime = f"image/{ext}" if ext != "jpg" else "image/jpeg"
+
+        response = model.generate_content([
+            {"mime_type": mime, "data": b64},
+            "Extract ALL text from this document image. Return the text exactly as it appears."
+        ])
+        if lease:
+            allocator.report_success(lease)
+        return response.text
+    except Exception as e:
+        if lease is not None:
+            err_str = str(e).lower()
+            if "429" in err_str or "resource_exhausted" in err_str or "quota" in err_str:
+                allocator.report_rate_limited(lease, str(e))
+            else:
+                allocator.report_error(lease, str(e))
+        logger.error(f"Image OCR failed: {e}")
+        return ""
+
+
 def extract_from_file(
     file_path: str,
     target_fields: List[str] = None,
@@ -308,80 +681,11 @@ def extract_from_file(
     For PDFs and images, first converts to text using available tools,
     then runs LangExtract on the text.
     """
-    ext = file_path.lower().rsplit(".", 1)[-1] if "." in file_path else ""
-
-    # Read text content based on file type
-    text = ""
-
-    if ext == "pdf":
-        # Try PyPDF2 / pdfplumber
-        try:
-            import pdfplumber
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-        except ImportError:
-            try:
-                from PyPDF2 import PdfReader
-                reader = PdfReader(file_path)
-                for page in reader.pages:
-                    text += page.extract_text() or ""
-            except ImportError:
-                # Fall back to reading raw bytes
-                with open(file_path, "rb") as f:
-                    raw = f.read()
-                text = raw.decode("utf-8", errors="ignore")
-
-    elif ext in ("jpg", "jpeg", "png", "bmp", "webp", "tiff"):
-        # OCR with pytesseract or just pass to Gemini via LangExtract
-        try:
-            import pytesseract
-            from PIL import Image
-            img = Image.open(file_path)
-            text = pytesseract.image_to_string(img, lang="eng+hin")
-        except ImportError:
-            # Use Gemini vision to extract text
-            try:
-                import google.generativeai as genai
-                import base64
-
-                selected_key = os.environ.get("LANGEXTRACT_API_KEY", "")
-                lease = None
-                if allocator.has_provider("gemini"):
-                    lease = allocator.acquire("gemini")
-                    selected_key = lease.key
-                if not selected_key:
-                    raise ValueError("Gemini key not configured for OCR fallback")
-
-                genai.configure(api_key=selected_key)
-                model = genai.GenerativeModel("gemini-2.5-flash")
-
-                with open(file_path, "rb") as f:
-                    image_bytes = f.read()
-                b64 = base64.b64encode(image_bytes).decode()
-                mime = f"image/{ext}" if ext != "jpg" else "image/jpeg"
-
-                response = model.generate_content([
-                    {"mime_type": mime, "data": b64},
-                    "Extract ALL text from this document image. Return the text exactly as it appears."
-                ])
-                text = response.text
-                if lease:
-                    allocator.report_success(lease)
-            except Exception as e:
-                if "lease" in locals() and lease is not None:
-                    err_str = str(e).lower()
-                    if "429" in err_str or "resource_exhausted" in err_str or "quota" in err_str:
-                        allocator.report_rate_limited(lease, str(e))
-                    else:
-                        allocator.report_error(lease, str(e))
-                logger.error(f"Image OCR failed: {e}")
-                text = ""
-
-    else:
-        # Assume text file
-        with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-            text = f.read()
+    text_info = read_document_text(file_path, target_fields)
+    text = text_info["text"]
+    if text_info["needs_vision"]:
+        # OCR with Gemini vision when tesseract is not installed
+        text = ocr_image_with_gemini(file_path)
 
     if not text.strip():
         return {"fields": {}, "error": "Could not extract text from file", "method": "langextract"}
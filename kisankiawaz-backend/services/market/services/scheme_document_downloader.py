@@ -9,6 +9,7 @@ import json
 import logging
 import hashlib
 import asyncio
+import contextlib
 import re
 import shutil
 from datetime import datetime, timezone
@@ -17,6 +18,15 @@ from urllib.parse import urljoin, urlparse
 
 import httpx
 
+from services.scheme_document_index import (
+    FILLABLE_TOKENS,
+    HTML_EXTS,
+    SchemeDocumentIndex,
+    describe_file,
+    html_is_fillable,
+    scheme_token,
+)
+
 logger = logging.getLogger(__name__)
 
 def _resolve_scheme_docs_dir() -> str:
@@ -119,6 +129,54 @@ PM_KISAN_FORCED_HTML_FILENAME = (
     .lower()
 )
 
+CACHED_DOWNLOAD_STATUSES = {"already_downloaded", "not_modified"}
+
+MANIFEST_FILENAME = "manifest.json"
+INDEX_FILENAME = "manifest_index.sqlite3"
+
+# Bulk download engine: total in-flight requests, requests per host and the
+# minimum gap between two requests to the same host.
+SCHEME_DOWNLOAD_WORKERS = max(1, int(os.getenv("SCHEME_DOWNLOAD_WORKERS", "8")))
+SCHEME_DOWNLOAD_PER_HOST = max(1, int(os.getenv("SCHEME_DOWNLOAD_PER_HOST", "2")))
+SCHEME_DOWNLOAD_HOST_DELAY_SECONDS = float(os.getenv("SCHEME_DOWNLOAD_HOST_DELAY_SECONDS", "0.25"))
+SCHEME_DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+DOWNLOAD_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 KisanKiAwaaz/1.0"
+
+# Keys ``SchemeDocumentIndex.get`` adds on top of the stored manifest entry.
+_INDEX_ONLY_FIELDS = {"exists", "doc_id", "autofill_possible", "sha256"}
+
+
+class DownloadLimiter:
+    """Global worker pool plus per-host concurrency and pacing for one download run."""
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        per_host: Optional[int] = None,
+        host_delay: Optional[float] = None,
+    ):
+        self.per_host = per_host or SCHEME_DOWNLOAD_PER_HOST
+        self.host_delay = SCHEME_DOWNLOAD_HOST_DELAY_SECONDS if host_delay is None else host_delay
+        self._workers = asyncio.Semaphore(workers or SCHEME_DOWNLOAD_WORKERS)
+        self._hosts: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url: str):
+        host = (urlparse(url).hostname or "").lower()
+        host_slots = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        # Take the host slot first so a slow host never holds global workers while it waits.
+        async with host_slots:
+            loop = asyncio.get_running_loop()
+            start_at = max(loop.time(), self._next_start.get(host, 0.0))
+            self._next_start[host] = start_at + self.host_delay
+            delay = start_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._workers:
+                yield
+
 
 class SchemeDocumentDownloader:
     """Downloads and manages government scheme documents for farmers."""
@@ -133,9 +191,13 @@ class SchemeDocumentDownloader:
             if os.path.isdir(alt_seed):
                 self.seed_dir = alt_seed
         os.makedirs(self.base_dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.base_dir, MANIFEST_FILENAME)
+        self.index = SchemeDocumentIndex(os.path.join(self.base_dir, INDEX_FILENAME))
+        if self.index.get_meta("built_at") is None:
+            self.rebuild_index()
+        else:
+            self.reconcile_index()
         self._sync_pm_kisan_seed_doc()
-        self.manifest_path = os.path.join(self.base_dir, "manifest.json")
-        self.manifest = self._load_manifest()
 
     def _file_hash(self, path: str) -> str:
         hasher = hashlib.md5()
@@ -175,20 +237,45 @@ class SchemeDocumentDownloader:
 
         if should_copy:
             shutil.copy2(source_path, target_path)
+            self.index.upsert_local(target_path, describe_file(target_path))
             logger.info("Synced PM-KISAN seed form to %s", target_path)
 
     def _load_manifest(self) -> dict:
-        """Load download manifest tracking all downloaded files."""
+        """Load the legacy JSON manifest (only read to (re)build the index)."""
         if os.path.exists(self.manifest_path):
             with open(self.manifest_path, "r") as f:
                 return json.load(f)
         return {"documents": {}, "last_updated": None}
 
+    def rebuild_index(self) -> Dict[str, int]:
+        """Re-derive the document index from manifest.json and the scheme directories."""
+        manifest = self._load_manifest()
+        stats = self.index.rebuild(self.base_dir, manifest.get("documents", {}) or {})
+        if manifest.get("last_updated"):
+            self.index.set_meta("last_updated", str(manifest["last_updated"]))
+        logger.info("Indexed %(documents)d manifest documents and %(local_files)d local forms", stats)
+        return stats
+
+    def reconcile_index(self) -> Dict[str, int]:
+        """Pick up files added, replaced or deleted in the scheme directories while the service was down."""
+        stats = self.index.reconcile(self.base_dir)
+        if any(stats.values()):
+            logger.info(
+                "Reconciled document index: %(documents)d documents, %(local_files)d local forms, "
+                "%(removed)d removed files",
+                stats,
+            )
+        return stats
+
     def _save_manifest(self):
-        """Persist manifest to disk."""
-        self.manifest["last_updated"] = datetime.now(timezone.utc).isoformat()
-        with open(self.manifest_path, "w") as f:
-            json.dump(self.manifest, f, indent=2)
+        """Export the index as manifest.json for tooling that still reads it."""
+        last_updated = datetime.now(timezone.utc).isoformat()
+        self.index.set_meta("last_updated", last_updated)
+        payload = {"documents": self.index.export_manifest(), "last_updated": last_updated}
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        os.replace(tmp_path, self.manifest_path)
 
     def _safe_filename(self, name: str) -> str:
         """Convert scheme name to safe filename."""
@@ -223,57 +310,29 @@ class SchemeDocumentDownloader:
         if self._is_pm_kisan_scheme(raw):
             candidates.update({"pm-kisan", "pmkisan", "pm_kisan", "pm kisan"})
 
-        out = []
-        for candidate in candidates:
-            path = os.path.join(self.base_dir, candidate)
-            if os.path.isdir(path):
-                out.append(path)
-        return out
+        return sorted(candidates)
 
     def _scan_local_fillable_html_docs(self, scheme_name: str) -> List[Dict]:
+        """Fillable HTML files sitting in the scheme's directories, from the index."""
         docs: List[Dict] = []
-        seen_paths = set()
-
-        for scheme_dir in self._local_scheme_dir_candidates(scheme_name):
-            for entry in os.listdir(scheme_dir):
-                path = os.path.join(scheme_dir, entry)
-                if not os.path.isfile(path):
-                    continue
-
-                ext = os.path.splitext(entry.lower())[1]
-                if ext not in {".html", ".htm", ".aspx", ".jsp", ".php", ".do"}:
-                    continue
-
-                if path in seen_paths:
-                    continue
-
-                autofill_possible = self._is_fillable_html_doc(
-                    local_path=path,
-                    filename=entry,
-                    content_type="text/html",
-                )
-                if not autofill_possible:
-                    continue
-
-                stat = os.stat(path)
-                doc_id = hashlib.md5(path.encode("utf-8")).hexdigest()[:12]
-                docs.append(
-                    {
-                        "scheme": scheme_name,
-                        "name": os.path.splitext(entry)[0],
-                        "filename": entry,
-                        "local_path": path,
-                        "size": int(stat.st_size),
-                        "content_type": "text/html",
-                        "source": "local_seed",
-                        "is_form_candidate": True,
-                        "exists": True,
-                        "doc_id": doc_id,
-                        "autofill_possible": True,
-                    }
-                )
-                seen_paths.add(path)
-
+        for row in self.index.local_fillable(self._local_scheme_dir_candidates(scheme_name)):
+            path = row["path"]
+            entry = row["filename"]
+            docs.append(
+                {
+                    "scheme": scheme_name,
+                    "name": os.path.splitext(entry)[0],
+                    "filename": entry,
+                    "local_path": path,
+                    "size": int(row["size"]),
+                    "content_type": "text/html",
+                    "source": "local_seed",
+                    "is_form_candidate": True,
+                    "exists": True,
+                    "doc_id": hashlib.md5(path.encode("utf-8")).hexdigest()[:12],
+                    "autofill_possible": True,
+                }
+            )
         return docs
 
     def reset_storage(self) -> dict:
@@ -284,6 +343,9 @@ class SchemeDocumentDownloader:
         if os.path.isdir(self.base_dir):
             for entry in os.listdir(self.base_dir):
                 path = os.path.join(self.base_dir, entry)
+                if entry.startswith(INDEX_FILENAME):
+                    # The open index (and its WAL files) is cleared below instead.
+                    continue
 
                 # Manifest is recreated from scratch after cleanup.
                 if os.path.isfile(path):
@@ -298,7 +360,8 @@ class SchemeDocumentDownloader:
                     shutil.rmtree(path, ignore_errors=True)
                     removed_dirs += 1
 
-        self.manifest = {"documents": {}, "last_updated": None}
+        self.index.clear()
+        self.index.set_meta("built_at", datetime.now(timezone.utc).isoformat())
         self._save_manifest()
 
         return {
@@ -355,6 +418,7 @@ class SchemeDocumentDownloader:
         self,
         client: httpx.AsyncClient,
         application_url: str,
+        limiter: Optional["DownloadLimiter"] = None,
     ) -> List[Dict[str, str]]:
         app_url = self._normalize_url(application_url)
         if not app_url:
@@ -370,7 +434,11 @@ class SchemeDocumentDownloader:
 
         discovered: List[Dict[str, str]] = []
         try:
-            response = await client.get(app_url)
+            if limiter is None:
+                response = await client.get(app_url)
+            else:
+                async with limiter.slot(app_url):
+                    response = await client.get(app_url)
             if response.status_code >= 400:
                 return []
 
@@ -432,13 +500,6 @@ class SchemeDocumentDownloader:
             return ".html"
         return ".bin"
 
-    def _html_has_fillable_controls(self, content: bytes) -> bool:
-        """Detect whether an HTML payload looks like a form page we can autofill."""
-        if not content:
-            return False
-        text = content.decode("utf-8", errors="ignore").lower()
-        return any(token in text for token in ("<form", "<input", "<select", "<textarea"))
-
     def _is_downloadable_payload(self, content_type: str, url: str) -> bool:
         low_ct = (content_type or "").lower()
         low_url = (url or "").lower()
@@ -455,21 +516,6 @@ class SchemeDocumentDownloader:
             return self._looks_like_form_link(url)
         return False
 
-    def _is_fillable_html_doc(self, local_path: str, filename: str, content_type: str) -> bool:
-        """Return True only for HTML-like docs that contain fillable controls."""
-        ext = os.path.splitext((filename or "").lower())[1]
-        low_ct = (content_type or "").lower()
-        if ext not in {".html", ".htm", ".aspx", ".jsp", ".php", ".do"} and "html" not in low_ct:
-            return False
-        if not local_path or not os.path.exists(local_path):
-            return False
-        try:
-            with open(local_path, "rb") as f:
-                raw = f.read()
-            return self._html_has_fillable_controls(raw)
-        except Exception:
-            return False
-
     def _iter_seed_links(self, scheme: dict) -> List[Dict[str, str]]:
         seeds: List[Dict[str, str]] = []
         for form_info in scheme.get("form_download_urls", []) or []:
@@ -504,174 +550,263 @@ class SchemeDocumentDownloader:
             )
         return seeds
 
-    async def download_scheme_documents(
-        self, scheme: dict, force: bool = False
-    ) -> Dict:
-        """
-        Download all available documents for a single scheme.
-        
-        Returns dict with download status for each URL.
-        """
-        scheme_name = scheme.get("short_name", scheme.get("name", "unknown"))
-        scheme_dir = os.path.join(self.base_dir, self._safe_filename(scheme_name))
-        os.makedirs(scheme_dir, exist_ok=True)
-
-        results = []
-
-        async with httpx.AsyncClient(
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
             timeout=30,
             follow_redirects=True,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 KisanKiAwaaz/1.0"
-            },
-        ) as client:
-            candidates: Dict[str, Dict[str, str]] = {}
-
-            for item in self._iter_seed_links(scheme):
-                normalized = self._normalize_url(item.get("url", ""))
-                if not normalized:
-                    continue
-                candidates.setdefault(
-                    normalized,
-                    {
-                        "name": item.get("name", "Official Form"),
-                        "url": normalized,
-                        "source": item.get("source", "scheme_catalog"),
-                    },
-                )
-
-            app_url = str(scheme.get("application_url") or "").strip()
-            discovered = await self._discover_links_from_application_page(client, app_url)
-            for item in discovered:
-                normalized = self._normalize_url(item.get("url", ""))
-                if not normalized:
-                    continue
-                candidates.setdefault(
-                    normalized,
-                    {
-                        "name": item.get("name", "Discovered Form Link"),
-                        "url": normalized,
-                        "source": item.get("source", "application_page_discovery"),
-                    },
-                )
-
-            for entry in candidates.values():
-                url = entry.get("url", "")
-                name = entry.get("name", "document")
-                source = entry.get("source", "unknown")
+            headers={"User-Agent": DOWNLOAD_USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=SCHEME_DOWNLOAD_WORKERS,
+                max_keepalive_connections=SCHEME_DOWNLOAD_WORKERS,
+            ),
+        )
 
-                if not url:
-                    results.append({"name": name, "url": url, "status": "invalid_url", "source": source})
+    async def _stream_to_file(self, response: httpx.Response, part_path: str, scan_html: bool) -> Dict:
+        """Write ``response`` to ``part_path`` chunk by chunk, hashing and scanning for form controls."""
+        hasher = hashlib.sha256()
+        size = 0
+        fillable = False
+        tail = b""
+        overlap = max(len(token) for token in FILLABLE_TOKENS) - 1
+        with open(part_path, "wb") as f:
+            async for chunk in response.aiter_bytes(SCHEME_DOWNLOAD_CHUNK_BYTES):
+                if not chunk:
                     continue
+                f.write(chunk)
+                hasher.update(chunk)
+                size += len(chunk)
+                if scan_html and not fillable:
+                    window = tail + chunk.lower()
+                    fillable = html_is_fillable(window)
+                    tail = window[-overlap:]
+        return {"present": True, "size": size, "sha256": hasher.hexdigest(), "fillable": fillable}
+
+    def _conditional_headers(self, existing: Optional[Dict]) -> Dict[str, str]:
+        # A 304 is only useful with the copy still on disk; otherwise fetch the body again.
+        if not existing or not existing.get("exists") or not os.path.exists(existing.get("local_path", "")):
+            return {}
+        headers = {}
+        if existing.get("etag"):
+            headers["If-None-Match"] = str(existing["etag"])
+        if existing.get("last_modified"):
+            headers["If-Modified-Since"] = str(existing["last_modified"])
+        return headers
+
+    async def _download_candidate(
+        self,
+        client: httpx.AsyncClient,
+        limiter: "DownloadLimiter",
+        entry: Dict[str, str],
+        scheme_name: str,
+        scheme_dir: str,
+        force: bool,
+    ) -> Dict:
+        url = entry.get("url", "")
+        name = entry.get("name", "document")
+        source = entry.get("source", "unknown")
 
-                # Check if already downloaded
-                url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
-                if url_hash in self.manifest.get("documents", {}) and not force:
-                    existing = self.manifest["documents"][url_hash]
-                    if os.path.exists(existing.get("local_path", "")):
-                        results.append({
+        if not url:
+            return {"name": name, "url": url, "status": "invalid_url", "source": source}
+
+        url_hash = hashlib.md5(url.encode()).hexdigest()[:12]
+        existing = self.index.get(url_hash)
+        if existing is not None and not force and os.path.exists(existing.get("local_path", "")):
+            return {
+                "name": name,
+                "url": url,
+                "status": "already_downloaded",
+                "source": existing.get("source") or source,
+                "local_path": existing["local_path"],
+                "size": existing.get("size", 0),
+            }
+
+        part_path = ""
+        conditional = self._conditional_headers(existing)
+        try:
+            async with limiter.slot(url):
+                async with client.stream("GET", url, headers=conditional) as response:
+                    if response.status_code == 304 and conditional:
+                        stored = {k: v for k, v in existing.items() if k not in _INDEX_ONLY_FIELDS}
+                        stored["checked_at"] = datetime.now(timezone.utc).isoformat()
+                        self.index.upsert(url_hash, stored, {
+                            "present": True,
+                            "size": existing.get("size", 0),
+                            "sha256": existing.get("sha256", ""),
+                            "fillable": existing.get("autofill_possible", False),
+                        })
+                        return {
                             "name": name,
                             "url": url,
-                            "status": "already_downloaded",
-                            "source": existing.get("source") or source,
+                            "status": "not_modified",
+                            "source": source,
                             "local_path": existing["local_path"],
                             "size": existing.get("size", 0),
-                        })
-                        continue
+                        }
 
-                # Download
-                try:
-                    response = await client.get(url)
-                    
                     if response.status_code >= 400:
                         status = f"http_{response.status_code}"
                         if source == "application_url":
                             # App portals frequently rate-limit/geo-gate automation. Do not count this as hard failure.
                             status = "application_portal_unavailable"
-                        results.append({
+                        return {
                             "name": name,
                             "url": url,
                             "status": status,
                             "source": source,
                             "is_webpage": True,
-                        })
-                        continue
+                        }
 
                     content_type = response.headers.get("content-type", "")
                     final_url = str(response.url)
 
                     if not self._is_downloadable_payload(content_type, final_url):
-                        results.append(
-                            {
-                                "name": name,
-                                "url": url,
-                                "final_url": final_url,
-                                "status": "not_downloadable_payload",
-                                "source": source,
-                                "content_type": content_type,
-                            }
-                        )
-                        continue
-
-                    content = response.content
+                        return {
+                            "name": name,
+                            "url": url,
+                            "final_url": final_url,
+                            "status": "not_downloadable_payload",
+                            "source": source,
+                            "content_type": content_type,
+                        }
 
                     ext = self._candidate_file_extension(final_url, content_type)
+                    filename = f"{self._safe_filename(name)}{ext}"
+                    filepath = os.path.join(scheme_dir, filename)
+                    part_path = f"{filepath}.{url_hash}.part"
+                    facts = await self._stream_to_file(response, part_path, scan_html=ext in HTML_EXTS)
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+
+            if ext in {".html", ".htm"} and not facts["fillable"]:
+                return {
+                    "name": name,
+                    "url": url,
+                    "final_url": final_url,
+                    "status": "html_without_form_controls",
+                    "source": source,
+                    "content_type": content_type,
+                }
 
-                    if ext in {".html", ".htm"} and not self._html_has_fillable_controls(content):
-                        results.append(
-                            {
-                                "name": name,
-                                "url": url,
-                                "final_url": final_url,
-                                "status": "html_without_form_controls",
-                                "source": source,
-                                "content_type": content_type,
-                            }
-                        )
-                        continue
+            os.replace(part_path, filepath)
+            part_path = ""
+            file_size = facts["size"]
+            now = datetime.now(timezone.utc).isoformat()
+
+            self.index.upsert(url_hash, {
+                "scheme": scheme_name,
+                "name": name,
+                "url": url,
+                "final_url": final_url,
+                "source": source,
+                "local_path": filepath,
+                "filename": filename,
+                "size": file_size,
+                "content_type": content_type,
+                "is_form_candidate": self._looks_like_form_link(final_url, name),
+                "etag": etag,
+                "last_modified": last_modified,
+                "downloaded_at": now,
+                "checked_at": now,
+            }, facts)
+            if ext in HTML_EXTS:
+                self.index.upsert_local(filepath, facts)
+
+            logger.info(f"Downloaded: {name} ({file_size:,d} bytes) -> {filepath}")
+            return {
+                "name": name,
+                "url": url,
+                "final_url": final_url,
+                "status": "downloaded",
+                "source": source,
+                "local_path": filepath,
+                "size": file_size,
+                "content_type": content_type,
+            }
+
+        except httpx.TimeoutException:
+            return {"name": name, "url": url, "status": "timeout", "source": source}
+        except Exception as e:
+            return {"name": name, "url": url, "status": "error", "source": source, "error": str(e)}
+        finally:
+            if part_path:
+                try:
+                    os.remove(part_path)
+                except OSError:
+                    pass
 
-                    safe_name = self._safe_filename(name)
-                    filename = f"{safe_name}{ext}"
-                    filepath = os.path.join(scheme_dir, filename)
+    async def download_scheme_documents(
+        self,
+        scheme: dict,
+        force: bool = False,
+        client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional["DownloadLimiter"] = None,
+        save_manifest: bool = True,
+    ) -> Dict:
+        """
+        Download all available documents for a single scheme.
 
-                    with open(filepath, "wb") as f:
-                        f.write(content)
+        Candidate URLs are fetched concurrently through ``limiter`` (a fresh one
+        when not given); ``download_all_schemes`` passes its shared client and
+        limiter so every scheme of a bulk run draws from the same pools.
 
-                    file_size = len(content)
+        Returns dict with download status for each URL.
+        """
+        if client is None:
+            async with self._new_client() as own_client:
+                return await self.download_scheme_documents(
+                    scheme,
+                    force=force,
+                    client=own_client,
+                    limiter=limiter,
+                    save_manifest=save_manifest,
+                )
+        limiter = limiter or DownloadLimiter()
 
-                    # Update manifest
-                    self.manifest["documents"][url_hash] = {
-                        "scheme": scheme_name,
-                        "name": name,
-                        "url": url,
-                        "final_url": final_url,
-                        "source": source,
-                        "local_path": filepath,
-                        "filename": filename,
-                        "size": file_size,
-                        "content_type": content_type,
-                        "is_form_candidate": self._looks_like_form_link(final_url, name),
-                        "downloaded_at": datetime.now(timezone.utc).isoformat(),
-                    }
+        scheme_name = scheme.get("short_name", scheme.get("name", "unknown"))
+        scheme_dir = os.path.join(self.base_dir, self._safe_filename(scheme_name))
+        os.makedirs(scheme_dir, exist_ok=True)
 
-                    results.append({
-                        "name": name,
-                        "url": url,
-                        "final_url": final_url,
-                        "status": "downloaded",
-                        "source": source,
-                        "local_path": filepath,
-                        "size": file_size,
-                        "content_type": content_type,
-                    })
-                    logger.info(f"Downloaded: {name} ({file_size:,d} bytes) -> {filepath}")
-
-                except httpx.TimeoutException:
-                    results.append({"name": name, "url": url, "status": "timeout", "source": source})
-                except Exception as e:
-                    results.append({"name": name, "url": url, "status": "error", "source": source, "error": str(e)})
+        candidates: Dict[str, Dict[str, str]] = {}
 
-        self._save_manifest()
+        for item in self._iter_seed_links(scheme):
+            normalized = self._normalize_url(item.get("url", ""))
+            if not normalized:
+                continue
+            candidates.setdefault(
+                normalized,
+                {
+                    "name": item.get("name", "Official Form"),
+                    "url": normalized,
+                    "source": item.get("source", "scheme_catalog"),
+                },
+            )
+
+        app_url = str(scheme.get("application_url") or "").strip()
+        discovered = await self._discover_links_from_application_page(client, app_url, limiter=limiter)
+        for item in discovered:
+            normalized = self._normalize_url(item.get("url", ""))
+            if not normalized:
+                continue
+            candidates.setdefault(
+                normalized,
+                {
+                    "name": item.get("name", "Discovered Form Link"),
+                    "url": normalized,
+                    "source": item.get("source", "application_page_discovery"),
+                },
+            )
+
+        results = list(
+            await asyncio.gather(
+                *(
+                    self._download_candidate(client, limiter, entry, scheme_name, scheme_dir, force)
+                    for entry in candidates.values()
+                )
+            )
+        )
+
+        if save_manifest:
+            self._save_manifest()
 
         skipped_count = len([
             r for r in results if r.get("status") in NON_FATAL_DOWNLOAD_STATUSES
@@ -679,7 +814,7 @@ class SchemeDocumentDownloader:
         failed_count = len([
             r
             for r in results
-            if r.get("status") not in ("downloaded", "already_downloaded")
+            if r.get("status") not in CACHED_DOWNLOAD_STATUSES | {"downloaded"}
             and r.get("status") not in NON_FATAL_DOWNLOAD_STATUSES
         ])
 
@@ -689,7 +824,7 @@ class SchemeDocumentDownloader:
             "downloads": results,
             "discovered_count": len([r for r in results if r.get("source") == "application_page_discovery"]),
             "success_count": len([r for r in results if r["status"] == "downloaded"]),
-            "cached_count": len([r for r in results if r["status"] == "already_downloaded"]),
+            "cached_count": len([r for r in results if r["status"] in CACHED_DOWNLOAD_STATUSES]),
             "skipped_count": skipped_count,
             "failed_count": failed_count,
         }
@@ -698,33 +833,64 @@ class SchemeDocumentDownloader:
         self,
         force: bool = False,
         schemes: Optional[List[dict]] = None,
+        resume: bool = True,
     ) -> Dict:
-        """Download documents for all provided schemes (or built-in fallback)."""
-        from services.government_schemes_data import get_all_schemes
-
-        all_schemes = schemes if schemes is not None else get_all_schemes()
-        results = []
-        total_downloaded = 0
-        total_cached = 0
-        total_skipped = 0
-        total_failed = 0
-        total_size = 0
+        """Download documents for all provided schemes (or built-in fallback).
 
-        for scheme in all_schemes:
-            result = await self.download_scheme_documents(scheme, force=force)
-            results.append(result)
-            total_downloaded += result["success_count"]
-            total_cached += result["cached_count"]
-            total_skipped += result.get("skipped_count", 0)
-            total_failed += result["failed_count"]
-            
-            for dl in result["downloads"]:
-                if dl.get("size"):
-                    total_size += dl["size"]
+        Schemes run concurrently over one shared client and limiter. Progress is
+        journaled per scheme in the index; with ``resume`` an interrupted run
+        with the same ``force`` picks up where it stopped, reusing the stored
+        results of schemes it had already finished.
+        """
+        if schemes is None:
+            from services.government_schemes_data import get_all_schemes
+
+            schemes = get_all_schemes()
+        all_schemes = schemes
+        keys = [
+            scheme_token(str(scheme.get("short_name", scheme.get("name", "unknown"))))
+            for scheme in all_schemes
+        ]
+        job = self.index.open_job(keys, force=force, resume=resume)
+        job_id = job["job_id"]
+        finished: Dict[str, Dict] = dict(job["done"])
+        resumed_keys = set(finished)
+        if job["resumed"]:
+            logger.info("Resuming scheme download job %s (%d schemes already done)", job_id, len(finished))
+
+        pending: Dict[str, dict] = {}
+        for key, scheme in zip(keys, all_schemes):
+            if key not in finished:
+                pending.setdefault(key, scheme)
+
+        limiter = DownloadLimiter()
+        scheme_slots = asyncio.Semaphore(SCHEME_DOWNLOAD_WORKERS)
+
+        async def _run(key: str, scheme: dict) -> None:
+            async with scheme_slots:
+                result = await self.download_scheme_documents(
+                    scheme, force=force, client=client, limiter=limiter, save_manifest=False
+                )
+            self.index.finish_job_item(job_id, key, result)
+            finished[key] = result
 
-        self._save_manifest()
+        try:
+            async with self._new_client() as client:
+                await asyncio.gather(*(_run(key, scheme) for key, scheme in pending.items()))
+        finally:
+            self._save_manifest()
+        self.index.finish_job(job_id)
+
+        results = [finished[key] for key in keys]
+        total_downloaded = sum(result["success_count"] for result in results)
+        total_cached = sum(result["cached_count"] for result in results)
+        total_skipped = sum(result.get("skipped_count", 0) for result in results)
+        total_failed = sum(result["failed_count"] for result in results)
+        total_size = sum(dl["size"] for result in results for dl in result["downloads"] if dl.get("size"))
 
         return {
+            "job_id": job_id,
+            "resumed_schemes": len(resumed_keys),
             "total_schemes": len(all_schemes),
             "total_downloaded": total_downloaded,
             "total_cached": total_cached,
@@ -736,6 +902,10 @@ class SchemeDocumentDownloader:
             "base_dir": self.base_dir,
         }
 
+    def download_job_progress(self) -> Optional[Dict]:
+        """Journal progress of the most recent bulk download job."""
+        return self.index.job_progress()
+
     def get_scheme_documents(self, scheme_name: str) -> List[Dict]:
         """List all downloaded documents for a scheme."""
         requested = (scheme_name or "").strip()
@@ -743,27 +913,9 @@ class SchemeDocumentDownloader:
 
         results = []
         seen_paths = set()
-        for doc_id, doc_info in self.manifest.get("documents", {}).items():
-            doc_scheme = str(doc_info.get("scheme", ""))
-            if self._normalize_scheme_token(doc_scheme) != requested_token:
-                continue
-
-            local_path = doc_info.get("local_path", "")
-            exists = os.path.exists(local_path)
-            autofill_possible = self._is_fillable_html_doc(
-                local_path=local_path,
-                filename=doc_info.get("filename", ""),
-                content_type=doc_info.get("content_type", ""),
-            )
-            results.append(
-                {
-                    **doc_info,
-                    "exists": exists,
-                    "doc_id": doc_id,
-                    "autofill_possible": autofill_possible,
-                }
-            )
-            seen_paths.add(local_path)
+        for doc in self.index.documents_for(requested_token):
+            results.append(doc)
+            seen_paths.add(doc.get("local_path", ""))
 
         # Fallback: include fillable HTML files present locally even if manifest keys drifted.
         for doc in self._scan_local_fillable_html_docs(requested):
@@ -819,16 +971,8 @@ class SchemeDocumentDownloader:
         by_scheme = {}
         total_size = 0
 
-        scheme_names = set()
-        for doc_info in self.manifest.get("documents", {}).values():
-            scheme = str(doc_info.get("scheme", "")).strip()
-            if scheme:
-                scheme_names.add(scheme)
-
-        for entry in os.listdir(self.base_dir):
-            path = os.path.join(self.base_dir, entry)
-            if os.path.isdir(path):
-                scheme_names.add(entry)
+        scheme_names = {scheme.strip() for scheme in self.index.schemes() if scheme.strip()}
+        scheme_names.update(self.index.local_dirs())
 
         for scheme in sorted(scheme_names):
             docs = self.get_scheme_documents(scheme)
@@ -860,7 +1004,7 @@ class SchemeDocumentDownloader:
             "total_size_bytes": total_size,
             "total_size_mb": round(total_size / (1024 * 1024), 2),
             "by_scheme": by_scheme,
-            "last_updated": self.manifest.get("last_updated"),
+            "last_updated": self.index.get_meta("last_updated"),
         }
 
     def get_document_path(self, scheme_name: str, doc_name: str = None) -> Optional[str]:
@@ -914,7 +1058,7 @@ async def main():
         status = "OK" if fail == 0 else f"{fail} FAIL"
         print(f"  {sname:20s}: {succ} downloaded, {cached} cached, {status}")
         for dl in sr["downloads"]:
-            icon = "✓" if dl["status"] in ("downloaded", "already_downloaded") else "✗"
+            icon = "✓" if dl["status"] == "downloaded" or dl["status"] in CACHED_DOWNLOAD_STATUSES else "✗"
             size_str = f" ({dl.get('size', 0):,d} bytes)" if dl.get("size") else ""
             print(f"    {icon} {dl['name']}: {dl['status']}{size_str}")
 
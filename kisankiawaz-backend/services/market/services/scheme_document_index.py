@@ -0,0 +1,414 @@
+"""
+SQLite index of downloaded scheme documents.
+
+`SchemeDocumentDownloader` used to answer every listing by walking the whole
+manifest, stat-ing and re-reading each HTML file to decide fillability, then
+listing and reading the scheme directories again. This index stores, per
+document, the manifest entry together with size, content hash and
+fillability computed once when the file is written, keyed by the normalized
+scheme token. Loose form files found in scheme directories (bundled seeds,
+manually copied forms) are indexed by directory name.
+
+Files added, replaced or deleted on disk while the service was down (a
+restored volume, a form copied in by hand) are picked up at startup by
+comparing the scheme directories' listing and mtimes with the one recorded
+at the last reconcile; only files that differ are read again.
+
+Each write is its own transaction, so concurrent downloads and readers in
+other workers never see a half-written manifest.
+
+Bulk refreshes also keep a small job journal here (one row per scheme of the
+run), so a refresh interrupted by a restart resumes with the schemes that
+were not finished yet.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+HTML_EXTS = {".html", ".htm", ".aspx", ".jsp", ".php", ".do"}
+FILLABLE_TOKENS = (b"<form", b"<input", b"<select", b"<textarea")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id TEXT PRIMARY KEY,
+    scheme_token TEXT NOT NULL,
+    scheme TEXT NOT NULL,
+    local_path TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    sha256 TEXT NOT NULL DEFAULT '',
+    fillable INTEGER NOT NULL DEFAULT 0,
+    present INTEGER NOT NULL DEFAULT 0,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_scheme_token ON documents (scheme_token);
+CREATE TABLE IF NOT EXISTS local_files (
+    path TEXT PRIMARY KEY,
+    dir_name TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0,
+    sha256 TEXT NOT NULL DEFAULT '',
+    fillable INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS local_files_dir ON local_files (dir_name);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS download_jobs (
+    job_id TEXT PRIMARY KEY,
+    force INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT
+);
+CREATE TABLE IF NOT EXISTS download_job_items (
+    job_id TEXT NOT NULL,
+    scheme_key TEXT NOT NULL,
+    done INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    PRIMARY KEY (job_id, scheme_key)
+);
+"""
+
+
+def scheme_token(value: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "", (value or "").strip().lower())
+
+
+def html_is_fillable(content: bytes) -> bool:
+    """Same test the downloader applies to HTML payloads (case-insensitive)."""
+    low = (content or b"").lower()
+    return any(token in low for token in FILLABLE_TOKENS)
+
+
+def describe_file(path: str, filename: str = "", content_type: str = "") -> Dict:
+    """Size, sha256 and fillability of a file on disk (zeroed when it is missing)."""
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+    except OSError:
+        return {"present": False, "size": 0, "sha256": "", "fillable": False}
+    ext = os.path.splitext((filename or path).lower())[1]
+    is_html = ext in HTML_EXTS or "html" in (content_type or "").lower()
+    return {
+        "present": True,
+        "size": len(content),
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "fillable": is_html and html_is_fillable(content),
+    }
+
+
+def directory_listing(base_dir: str) -> Dict[str, List[int]]:
+    """``{path: [size, mtime_ns]}`` for the files in the scheme directories under ``base_dir``."""
+    listing: Dict[str, List[int]] = {}
+    if not os.path.isdir(base_dir):
+        return listing
+    for dir_entry in os.scandir(base_dir):
+        if not dir_entry.is_dir():
+            continue
+        for file_entry in os.scandir(dir_entry.path):
+            if not file_entry.is_file() or file_entry.name.endswith(".part"):
+                continue
+            stat = file_entry.stat()
+            listing[file_entry.path] = [stat.st_size, stat.st_mtime_ns]
+    return listing
+
+
+class SchemeDocumentIndex:
+    """Scheme token -> documents map persisted in a small SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── meta ──────────────────────────────────────────────────────
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    # ── downloaded documents ──────────────────────────────────────
+
+    def upsert(self, doc_id: str, entry: Dict, facts: Dict) -> None:
+        """Store one manifest entry with its precomputed file facts."""
+        scheme = str(entry.get("scheme", ""))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents "
+                "(doc_id, scheme_token, scheme, local_path, size, sha256, fillable, present, entry) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    doc_id,
+                    scheme_token(scheme),
+                    scheme,
+                    str(entry.get("local_path", "")),
+                    int((facts.get("size") if facts.get("present") else entry.get("size")) or 0),
+                    str(facts.get("sha256") or ""),
+                    int(bool(facts.get("fillable"))),
+                    int(bool(facts.get("present"))),
+                    json.dumps(entry, ensure_ascii=False),
+                ),
+            )
+
+    @staticmethod
+    def _document(row: sqlite3.Row) -> Dict:
+        entry = json.loads(row["entry"])
+        return {
+            **entry,
+            "size": row["size"],
+            "exists": bool(row["present"]),
+            "doc_id": row["doc_id"],
+            "autofill_possible": bool(row["fillable"]),
+            "sha256": row["sha256"],
+        }
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM documents WHERE doc_id = ?", (doc_id,)).fetchone()
+        return self._document(row) if row else None
+
+    def documents_for(self, token: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM documents WHERE scheme_token = ? ORDER BY rowid", (token,)
+            ).fetchall()
+        return [self._document(row) for row in rows]
+
+    def schemes(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT scheme FROM documents").fetchall()
+        return [row["scheme"] for row in rows if row["scheme"]]
+
+    def export_manifest(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_id, entry FROM documents ORDER BY rowid").fetchall()
+        return {row["doc_id"]: json.loads(row["entry"]) for row in rows}
+
+    # ── loose files in scheme directories ─────────────────────────
+
+    def upsert_local(self, path: str, facts: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO local_files (path, dir_name, filename, size, sha256, fillable) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    path,
+                    os.path.basename(os.path.dirname(path)),
+                    os.path.basename(path),
+                    int(facts.get("size") or 0),
+                    str(facts.get("sha256") or ""),
+                    int(bool(facts.get("fillable"))),
+                ),
+            )
+
+    def local_fillable(self, dir_names: Iterable[str]) -> List[Dict]:
+        names = sorted(set(dir_names))
+        if not names:
+            return []
+        marks = ",".join("?" for _ in names)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM local_files WHERE fillable = 1 AND dir_name IN ({marks}) ORDER BY path",
+                names,
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_local(self, paths: Iterable[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM local_files WHERE path = ?", [(path,) for path in paths])
+
+    def local_dirs(self) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT dir_name FROM local_files").fetchall()
+        return [row["dir_name"] for row in rows]
+
+    # ── bulk download journal ─────────────────────────────────────
+
+    def open_job(self, scheme_keys: Iterable[str], force: bool, resume: bool = True) -> Dict:
+        """Start a bulk download job, or reopen the latest unfinished one with the same ``force``.
+
+        Returns ``{"job_id", "resumed", "done"}`` where ``done`` maps the scheme
+        keys already finished by the reopened job to their stored results.
+        """
+        keys = list(dict.fromkeys(scheme_keys))
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = None
+                if resume:
+                    row = self._conn.execute(
+                        "SELECT job_id FROM download_jobs WHERE state = 'running' AND force = ? "
+                        "ORDER BY started_at DESC LIMIT 1",
+                        (int(bool(force)),),
+                    ).fetchone()
+                # Anything else still marked running was interrupted and will not be resumed.
+                self._conn.execute(
+                    "UPDATE download_jobs SET state = 'abandoned', finished_at = ? "
+                    "WHERE state = 'running' AND job_id != ?",
+                    (now, row["job_id"] if row else ""),
+                )
+                job_id = row["job_id"] if row else uuid.uuid4().hex
+                if row is None:
+                    self._conn.execute(
+                        "INSERT INTO download_jobs (job_id, force, state, started_at) VALUES (?, ?, 'running', ?)",
+                        (job_id, int(bool(force)), now),
+                    )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO download_job_items (job_id, scheme_key) VALUES (?, ?)",
+                    [(job_id, key) for key in keys],
+                )
+                done_rows = self._conn.execute(
+                    "SELECT scheme_key, result FROM download_job_items WHERE job_id = ? AND done = 1",
+                    (job_id,),
+                ).fetchall()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        wanted = set(keys)
+        done = {r["scheme_key"]: json.loads(r["result"]) for r in done_rows if r["scheme_key"] in wanted}
+        return {"job_id": job_id, "resumed": row is not None, "done": done}
+
+    def finish_job_item(self, job_id: str, scheme_key: str, result: Dict) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE download_job_items SET done = 1, result = ? WHERE job_id = ? AND scheme_key = ?",
+                (json.dumps(result, ensure_ascii=False), job_id, scheme_key),
+            )
+
+    def finish_job(self, job_id: str, state: str = "completed") -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE download_jobs SET state = ?, finished_at = ? WHERE job_id = ?",
+                (state, datetime.now(timezone.utc).isoformat(), job_id),
+            )
+
+    def job_progress(self, job_id: Optional[str] = None) -> Optional[Dict]:
+        """Done/total counts of ``job_id`` (default: the most recent job)."""
+        with self._lock:
+            if job_id is None:
+                row = self._conn.execute(
+                    "SELECT * FROM download_jobs ORDER BY started_at DESC LIMIT 1"
+                ).fetchone()
+            else:
+                row = self._conn.execute("SELECT * FROM download_jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            counts = self._conn.execute(
+                "SELECT COUNT(*) AS total, COALESCE(SUM(done), 0) AS done FROM download_job_items WHERE job_id = ?",
+                (row["job_id"],),
+            ).fetchone()
+        return {**dict(row), "force": bool(row["force"]), "total": counts["total"], "done": counts["done"]}
+
+    # ── maintenance ───────────────────────────────────────────────
+
+    def clear(self, jobs: bool = True) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM documents")
+                self._conn.execute("DELETE FROM local_files")
+                self._conn.execute("DELETE FROM meta")
+                if jobs:
+                    self._conn.execute("DELETE FROM download_job_items")
+                    self._conn.execute("DELETE FROM download_jobs")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def rebuild(self, base_dir: str, manifest_documents: Dict[str, Dict]) -> Dict[str, int]:
+        """Re-derive the index from manifest entries and the scheme directories on disk."""
+        self.clear(jobs=False)
+        for doc_id, entry in manifest_documents.items():
+            facts = describe_file(
+                str(entry.get("local_path", "")),
+                filename=str(entry.get("filename", "")),
+                content_type=str(entry.get("content_type", "")),
+            )
+            self.upsert(doc_id, entry, facts)
+
+        local_count = 0
+        if os.path.isdir(base_dir):
+            for dir_name in sorted(os.listdir(base_dir)):
+                scheme_dir = os.path.join(base_dir, dir_name)
+                if not os.path.isdir(scheme_dir):
+                    continue
+                for filename in sorted(os.listdir(scheme_dir)):
+                    path = os.path.join(scheme_dir, filename)
+                    if not os.path.isfile(path) or os.path.splitext(filename.lower())[1] not in HTML_EXTS:
+                        continue
+                    self.upsert_local(path, describe_file(path, filename=filename, content_type="text/html"))
+                    local_count += 1
+
+        self.set_meta("built_at", datetime.now(timezone.utc).isoformat())
+        self.set_meta("listing", json.dumps(directory_listing(base_dir)))
+        return {"documents": len(manifest_documents), "local_files": local_count}
+
+    def reconcile(self, base_dir: str) -> Dict[str, int]:
+        """Re-describe files changed, added or removed under ``base_dir`` since the last listing."""
+        listing = directory_listing(base_dir)
+        previous = json.loads(self.get_meta("listing") or "{}")
+        changed = {path for path, stat in listing.items() if previous.get(path) != stat}
+        removed = set(previous) - set(listing)
+        if not changed and not removed:
+            return {"documents": 0, "local_files": 0, "removed": 0}
+
+        touched = changed | removed
+        with self._lock:
+            rows = self._conn.execute("SELECT doc_id, local_path, entry FROM documents").fetchall()
+        documents = 0
+        for row in rows:
+            if row["local_path"] not in touched:
+                continue
+            entry = json.loads(row["entry"])
+            facts = describe_file(
+                row["local_path"],
+                filename=str(entry.get("filename", "")),
+                content_type=str(entry.get("content_type", "")),
+            )
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE documents SET size = ?, sha256 = ?, fillable = ?, present = ? WHERE doc_id = ?",
+                    (
+                        int((facts["size"] if facts["present"] else entry.get("size")) or 0),
+                        facts["sha256"],
+                        int(facts["fillable"]),
+                        int(facts["present"]),
+                        row["doc_id"],
+                    ),
+                )
+            documents += 1
+
+        local_count = 0
+        for path in sorted(changed):
+            filename = os.path.basename(path)
+            if os.path.splitext(filename.lower())[1] in HTML_EXTS:
+                self.upsert_local(path, describe_file(path, filename=filename, content_type="text/html"))
+                local_count += 1
+        self.delete_local(removed)
+
+        self.set_meta("listing", json.dumps(listing))
+        return {"documents": documents, "local_files": local_count, "removed": len(removed)}
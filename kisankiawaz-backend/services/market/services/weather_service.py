@@ -8,17 +8,32 @@ from __future__ import annotations
 import asyncio
 import io
 import json
+import logging
 import os
-from dataclasses import dataclass
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 from typing import Any, Dict, Optional
 
-import httpx
+import numpy as np
 
 from shared.core.constants import MongoCollections
 from shared.db.redis import get_redis
+from shared.patterns.provider_client import ProviderClient, ProviderPool
+from shared.services.soil_samples import SoilSampleStore, missing_layers
+from shared.services.tile_cache import GridTile, TileCache
+from shared.services.district_centroids import (
+    CentroidTable,
+    district_id,
+    get_cached_user_coordinates,
+    pincode_id,
+    set_cached_user_coordinates,
+    state_id,
+)
 
+logger = logging.getLogger("kisankiawaz.market.weather")
 
 IST = ZoneInfo("Asia/Kolkata")
 
@@ -111,7 +126,44 @@ SOIL_LAST_GOOD_CACHE_TTL_SECONDS = int(
     os.getenv("SOIL_LAST_GOOD_CACHE_TTL_SECONDS", str(180 * 24 * 60 * 60))
 )
 
+# At most this many SoilGrids WCS coverage requests in flight per process.
+SOIL_WCS_MAX_CONCURRENCY = int(os.getenv("SOIL_WCS_MAX_CONCURRENCY", "6"))
+PROVIDER_FAILURE_THRESHOLD = int(os.getenv("WEATHER_PROVIDER_FAILURE_THRESHOLD", "5"))
+PROVIDER_RECOVERY_SECONDS = float(os.getenv("WEATHER_PROVIDER_RECOVERY_SECONDS", "30"))
+
+PROVIDER_BY_URL = {
+    OPEN_METEO_FORECAST_URL: "open_meteo",
+    OPEN_METEO_GEO_URL: "open_meteo_geocoding",
+    OPEN_METEO_AIR_URL: "open_meteo_air",
+    NASA_POWER_URL: "nasa_power",
+    SOILGRIDS_URL: "soilgrids_rest",
+    SOILGRIDS_WCS_URL: "soilgrids_wcs",
+}
+PROVIDER_OPTIONS: dict[str, dict[str, Any]] = {
+    name: {
+        "failure_threshold": PROVIDER_FAILURE_THRESHOLD,
+        "recovery_timeout": PROVIDER_RECOVERY_SECONDS,
+    }
+    for name in (*PROVIDER_BY_URL.values(), "other")
+}
+PROVIDER_OPTIONS["soilgrids_wcs"].update(
+    max_concurrency=SOIL_WCS_MAX_CONCURRENCY,
+    max_connections=SOIL_WCS_MAX_CONCURRENCY,
+)
+
 FULL_CACHE_TTL_SECONDS = int(os.getenv("WEATHER_FULL_CACHE_TTL_SECONDS", "3600"))
+# Weather tiles: grid size, how long an expired tile is still served while it
+# refreshes, how long it is kept as a fallback, and the hot-tile prefetcher.
+WEATHER_TILE_STEP_DEG = float(os.getenv("WEATHER_TILE_STEP_DEG", "0.05"))
+WEATHER_TILE_REVALIDATE_SECONDS = int(
+    os.getenv("WEATHER_TILE_REVALIDATE_SECONDS", str(2 * FULL_CACHE_TTL_SECONDS))
+)
+WEATHER_TILE_MAX_STALE_SECONDS = int(os.getenv("WEATHER_TILE_MAX_STALE_SECONDS", str(12 * 60 * 60)))
+WEATHER_TILE_PREFETCH_ENABLED = os.getenv("WEATHER_TILE_PREFETCH_ENABLED", "1") == "1"
+WEATHER_TILE_PREFETCH_TOP = int(os.getenv("WEATHER_TILE_PREFETCH_TOP", "200"))
+WEATHER_TILE_PREFETCH_INTERVAL_SECONDS = int(os.getenv("WEATHER_TILE_PREFETCH_INTERVAL_SECONDS", "600"))
+WEATHER_TILE_PREFETCH_CONCURRENCY = int(os.getenv("WEATHER_TILE_PREFETCH_CONCURRENCY", "4"))
+WEATHER_TILE_HOT_SET_SECONDS = int(os.getenv("WEATHER_TILE_HOT_SET_SECONDS", "1800"))
 SOIL_CACHE_TTL_SECONDS = int(
     os.getenv("SOIL_COMPOSITION_CACHE_TTL_SECONDS", str(30 * 24 * 60 * 60))
 )
@@ -190,12 +242,21 @@ def _find_closest_time_index(times: list[str]) -> int:
     if not times:
         return 0
     now = datetime.now(IST)
+    # Open-Meteo returns naive local timestamps; those parse in one vectorized pass.
+    if all(isinstance(t, str) and len(t) <= 19 for t in times):
+        try:
+            stamps = np.array(times, dtype="datetime64[s]")
+        except ValueError:
+            stamps = None
+        if stamps is not None:
+            local_now = np.datetime64(now.replace(tzinfo=None), "s")
+            return int(np.argmin(np.abs(stamps - local_now)))
     best_i = 0
     best_diff = timedelta(days=3650)
     for idx, t in enumerate(times):
         try:
             dt = datetime.fromisoformat(t)
-        except ValueError:
+        except (TypeError, ValueError):
             continue
         diff = abs(now - dt.replace(tzinfo=IST) if dt.tzinfo is None else now - dt.astimezone(IST))
         if diff < best_diff:
@@ -204,6 +265,36 @@ def _find_closest_time_index(times: list[str]) -> int:
     return best_i
 
 
+def _column(container: dict, key: str) -> np.ndarray:
+    """``container[key]`` as float64, with missing or non-numeric entries as NaN."""
+    values = _safe_list_values(container, key)
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.array([_to_float(v) for v in values], dtype=np.float64)
+
+
+def _window(column: np.ndarray, start: int, length: int, fill: float) -> np.ndarray:
+    """``length`` values from ``start``, padding past the end and NaN gaps with ``fill``."""
+    out = np.full(max(length, 0), fill, dtype=np.float64)
+    chunk = column[max(start, 0) : max(start, 0) + length]
+    out[: len(chunk)] = np.where(np.isnan(chunk), fill, chunk)
+    return out
+
+
+def _scalar(column: np.ndarray, idx: int) -> Optional[float]:
+    if 0 <= idx < len(column) and not np.isnan(column[idx]):
+        return float(column[idx])
+    return None
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return int((np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)).max())
+
+
 def _window_text(start_iso: Optional[str], end_iso: Optional[str]) -> str:
     if not start_iso or not end_iso:
         return "No clear window"
@@ -217,18 +308,31 @@ def _window_text(start_iso: Optional[str], end_iso: Optional[str]) -> str:
         return f"{start_iso} to {end_iso}"
 
 
+def _provider(url: str) -> ProviderClient:
+    """Pooled client (with its own circuit breaker) for the upstream serving *url*."""
+    name = PROVIDER_BY_URL.get(url, "other")
+    return ProviderPool.get(name, **PROVIDER_OPTIONS.get(name, {}))
+
+
 async def _http_json(url: str, params: Dict[str, Any], timeout: float = 30.0) -> Dict[str, Any]:
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    return await _provider(url).get_json(url, params=params, timeout=timeout)
 
 
 async def _http_bytes(url: str, params: Dict[str, Any], timeout: float = 30.0) -> bytes:
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        response = await client.get(url, params=params)
-        response.raise_for_status()
-        return response.content
+    return await _provider(url).get_bytes(url, params=params, timeout=timeout)
+
+
+def provider_stats() -> Dict[str, Any]:
+    """Circuit state and latency histogram per weather/soil provider."""
+    return ProviderPool.stats()
+
+
+def weather_tile_stats() -> Dict[str, Any]:
+    return WEATHER_TILES.stats()
+
+
+def soil_sample_stats() -> Dict[str, Any]:
+    return SoilSampleStore.stats()
 
 
 async def _cache_get_json(key: str) -> Optional[Dict[str, Any]]:
@@ -450,6 +554,13 @@ async def resolve_coordinates(
     if not user_id:
         raise ValueError("Unable to resolve coordinates: missing user identity")
 
+    cached = await get_cached_user_coordinates(user_id)
+    if cached:
+        try:
+            return CoordinateResolution(**cached)
+        except TypeError:
+            pass
+
     profile_q = (
         db.collection(MongoCollections.FARMER_PROFILES)
         .where("user_id", "==", user_id)
@@ -475,6 +586,56 @@ async def resolve_coordinates(
     if not state and not district and not pincode:
         raise ValueError("Farm location is incomplete in profile. Add state/district to continue.")
 
+    await CentroidTable.ensure_loaded(db)
+    keys: list[tuple[str, str]] = []
+    if state and district:
+        keys.append((district_id(state, district), "district"))
+    if pincode:
+        keys.append((pincode_id(pincode), "pincode"))
+    if state and not district:
+        keys.append((state_id(state), "state"))
+
+    coords: Optional[tuple[float, float]] = None
+    source = ""
+    for key, _ in keys:
+        hit = CentroidTable.lookup(key)
+        if hit is not None:
+            coords, source = (hit[0], hit[1]), hit[2]
+            break
+
+    if coords is None:
+        coords, source = await _resolve_live(db, state=state, district=district, pincode=pincode)
+        if coords is None:
+            raise ValueError(
+                "Could not resolve district coordinates from reference data. "
+                "Please update profile location or pass lat/lon explicitly."
+            )
+        if source.startswith("profile_state_"):
+            # A state-level fallback must never be stored as the district's or PIN's centroid.
+            await CentroidTable.remember(db, state_id(state), "state", coords[0], coords[1], source)
+        elif keys:
+            await CentroidTable.remember(db, keys[0][0], keys[0][1], coords[0], coords[1], source)
+
+    label_parts = [x for x in [district, state] if x]
+    resolution = CoordinateResolution(
+        lat=coords[0],
+        lon=coords[1],
+        source=source,
+        state=state,
+        district=district,
+        location_label=", ".join(label_parts) if label_parts else "Profile location",
+    )
+    await set_cached_user_coordinates(user_id, asdict(resolution))
+    return resolution
+
+
+async def _resolve_live(
+    db,
+    state: Optional[str],
+    district: Optional[str],
+    pincode: Optional[str],
+) -> tuple[Optional[tuple[float, float]], str]:
+    """Reference-data queries and geocoding for locations missing from the centroid table."""
     coords = await _coords_from_mandi_directory(db=db, state=state, district=district)
     if coords is not None and not _is_india_bounds(coords[0], coords[1]):
         coords = None
@@ -503,109 +664,82 @@ async def resolve_coordinates(
         if coords is not None:
             source = "profile_state_geocode"
 
-    if coords is None:
-        raise ValueError(
-            "Could not resolve district coordinates from reference data. "
-            "Please update profile location or pass lat/lon explicitly."
-        )
-
-    label_parts = [x for x in [district, state] if x]
-    return CoordinateResolution(
-        lat=coords[0],
-        lon=coords[1],
-        source=source,
-        state=state,
-        district=district,
-        location_label=", ".join(label_parts) if label_parts else "Profile location",
-    )
+    return coords, source
 
 
-def _build_farm_decisions(hourly: dict, daily: dict, current: dict) -> dict:
+def _build_farm_decisions(hourly: dict, daily: dict, current: dict, idx: Optional[int] = None) -> dict:
     times = _safe_list_values(hourly, "time")
-    idx = _find_closest_time_index(times)
-
-    precip_prob = _safe_list_values(hourly, "precipitation_probability")
-    precip = _safe_list_values(hourly, "precipitation")
-    wind = _safe_list_values(hourly, "wind_speed_10m")
-    temp = _safe_list_values(hourly, "temperature_2m")
-    humidity = _safe_list_values(hourly, "relative_humidity_2m")
-    soil_m0 = _safe_list_values(hourly, "soil_moisture_0_1cm")
-    soil_m39 = _safe_list_values(hourly, "soil_moisture_3_9cm")
-    soil_t6 = _safe_list_values(hourly, "soil_temperature_6cm")
+    if idx is None:
+        idx = _find_closest_time_index(times)
+    n_hours = len(times)
+
+    precip_prob = _column(hourly, "precipitation_probability")
+    wind = _column(hourly, "wind_speed_10m")
+    temp = _column(hourly, "temperature_2m")
+    humidity = _column(hourly, "relative_humidity_2m")
+    soil_m0 = _column(hourly, "soil_moisture_0_1cm")
+    soil_m39 = _column(hourly, "soil_moisture_3_9cm")
+    soil_t6 = _column(hourly, "soil_temperature_6cm")
 
     daily_dates = _safe_list_values(daily, "time")
-    d_et0 = _safe_list_values(daily, "et0_fao_evapotranspiration")
-    d_precip = _safe_list_values(daily, "precipitation_sum")
-    d_tmax = _safe_list_values(daily, "temperature_2m_max")
-    d_tmin = _safe_list_values(daily, "temperature_2m_min")
+    d_et0 = _column(daily, "et0_fao_evapotranspiration")
+    d_precip = _column(daily, "precipitation_sum")
+    d_tmax = _column(daily, "temperature_2m_max")
+    d_tmin = _column(daily, "temperature_2m_min")
 
     today = datetime.now(IST).date().isoformat()
     d_idx = daily_dates.index(today) if today in daily_dates else 0
 
-    et0_today = _to_float(_value_at(d_et0, d_idx)) or 0.0
-    precip_today = _to_float(_value_at(d_precip, d_idx)) or 0.0
+    et0_today = _scalar(d_et0, d_idx) or 0.0
+    precip_today = _scalar(d_precip, d_idx) or 0.0
     deficit = round(et0_today - precip_today, 1)
 
-    next3_prob = [
-        _to_float(_value_at(precip_prob, idx + i)) or 0.0
-        for i in range(3)
-    ]
-    precip_prob_next3h = max(next3_prob) if next3_prob else 100.0
+    # Rain risk: highest precipitation probability over the next three hours.
+    precip_prob_next3h = float(_window(precip_prob, idx, 3, 0.0).max())
 
     wind_now = _to_float(current.get("wind_speed"))
     if wind_now is None:
-        wind_now = _to_float(_value_at(wind, idx)) or 0.0
+        wind_now = _scalar(wind, idx) or 0.0
 
     spray_good_now = wind_now < 3.0 and precip_prob_next3h < 20.0
 
+    # Spray window: first pair of consecutive calm, dry hours in the next 24h.
     next_good_window = None
-    scan_len = min(len(times), idx + 24)
-    for i in range(idx, max(idx, scan_len - 1)):
-        w0 = _to_float(_value_at(wind, i)) or 99.0
-        w1 = _to_float(_value_at(wind, i + 1)) or 99.0
-        p0 = _to_float(_value_at(precip_prob, i)) or 100.0
-        p1 = _to_float(_value_at(precip_prob, i + 1)) or 100.0
-        if w0 < 3.0 and w1 < 3.0 and p0 < 20.0 and p1 < 20.0:
-            if i + 1 < len(times):
-                next_good_window = {
-                    "start": _value_at(times, i),
-                    "end": _value_at(times, i + 1),
-                    "label": _window_text(_value_at(times, i), _value_at(times, i + 1)),
-                }
-            break
-
-    surface_moisture = _to_float(_value_at(soil_m0, idx))
+    scan = max(0, min(n_hours, idx + 24) - idx)
+    calm_dry = (_window(wind, idx, scan, 99.0) < 3.0) & (_window(precip_prob, idx, scan, 100.0) < 20.0)
+    pairs = np.flatnonzero(calm_dry[:-1] & calm_dry[1:]) if scan > 1 else np.empty(0, dtype=np.intp)
+    if pairs.size:
+        i = idx + int(pairs[0])
+        next_good_window = {
+            "start": times[i],
+            "end": times[i + 1],
+            "label": _window_text(times[i], times[i + 1]),
+        }
+
+    surface_moisture = _scalar(soil_m0, idx)
     field_ok = (surface_moisture is not None) and (surface_moisture < 0.35)
 
-    tmax_today = _to_float(_value_at(d_tmax, d_idx)) or 0.0
-    hot_24h = [(_to_float(_value_at(temp, i)) or 0.0) for i in range(idx, min(idx + 24, len(temp)))]
-    consecutive_hot_hours = 0
-    best_run = 0
-    for t in hot_24h:
-        if t > 35.0:
-            consecutive_hot_hours += 1
-            best_run = max(best_run, consecutive_hot_hours)
-        else:
-            consecutive_hot_hours = 0
+    # Heat stress: longest run of hours above 35 C in the next 24h.
+    tmax_today = _scalar(d_tmax, d_idx) or 0.0
+    hot_len = max(0, min(idx + 24, len(temp)) - idx)
+    best_run = _longest_run(_window(temp, idx, hot_len, 0.0) > 35.0)
 
-    precip_next_3_days = sum((_to_float(_value_at(d_precip, d_idx + i)) or 0.0) for i in range(3))
-    humidity_next_3_days = [(_to_float(_value_at(humidity, i)) or 0.0) for i in range(idx, min(idx + 72, len(humidity)))]
-    max_humidity_3day = max(humidity_next_3_days) if humidity_next_3_days else 100.0
+    precip_next_3_days = float(_window(d_precip, d_idx, 3, 0.0).sum())
+    humidity_len = max(0, min(idx + 72, len(humidity)) - idx)
+    max_humidity_3day = float(_window(humidity, idx, humidity_len, 0.0).max()) if humidity_len else 100.0
     harvest_good = precip_next_3_days < 5.0 and max_humidity_3day < 75.0
 
-    min_temp_7d = min((_to_float(_value_at(d_tmin, i)) or 99.0) for i in range(d_idx, min(d_idx + 7, len(d_tmin))))
+    week_len = max(0, min(d_idx + 7, len(d_tmin)) - d_idx)
+    week_tmin = _window(d_tmin, d_idx, week_len, 99.0)
+    min_temp_7d = float(week_tmin.min()) if week_len else 99.0
     frost_alert = min_temp_7d < 4.0
 
     frost_when = None
     if frost_alert:
-        for i in range(d_idx, min(d_idx + 7, len(d_tmin))):
-            v = _to_float(_value_at(d_tmin, i))
-            if v is not None and v == min_temp_7d:
-                frost_when = _value_at(daily_dates, i)
-                break
+        frost_when = _value_at(daily_dates, d_idx + int(np.argmin(week_tmin)))
 
-    soil_t6_now = _to_float(_value_at(soil_t6, idx))
-    soil_m39_now = _to_float(_value_at(soil_m39, idx))
+    soil_t6_now = _scalar(soil_t6, idx)
+    soil_m39_now = _scalar(soil_m39, idx)
     soil_temp_ok = (soil_t6_now is not None) and (soil_t6_now > 15.0)
     soil_m_ok = (soil_m39_now is not None) and (0.15 < soil_m39_now < 0.35)
 
@@ -750,14 +884,8 @@ def _extract_nasa_latest(nasa_payload: dict) -> dict:
     }
 
 
-async def get_full_weather_data(lat: float, lon: float) -> Dict[str, Any]:
-    lat_r = _round_coord(lat)
-    lon_r = _round_coord(lon)
-    cache_key = f"weather:full:v2:{lat_r}:{lon_r}"
-    cached = await _cache_get_json(cache_key)
-    if cached:
-        return cached
-
+async def _fetch_full_weather(lat: float, lon: float) -> Dict[str, Any]:
+    """Call the forecast, NASA POWER and air-quality upstreams for one point."""
     weather_params = {
         "latitude": lat,
         "longitude": lon,
@@ -793,29 +921,22 @@ async def get_full_weather_data(lat: float, lon: float) -> Dict[str, Any]:
     nasa_payload: dict[str, Any] = {}
     air_payload: dict[str, Any] = {}
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            weather_task = client.get(OPEN_METEO_FORECAST_URL, params=weather_params)
-            nasa_task = client.get(NASA_POWER_URL, params=nasa_params)
-            air_task = client.get(OPEN_METEO_AIR_URL, params=air_params)
-            weather_resp, nasa_resp, air_resp = await asyncio.gather(
-                weather_task,
-                nasa_task,
-                air_task,
-                return_exceptions=True,
-            )
+        weather_resp, nasa_resp, air_resp = await asyncio.gather(
+            _http_json(OPEN_METEO_FORECAST_URL, weather_params),
+            _http_json(NASA_POWER_URL, nasa_params),
+            _http_json(OPEN_METEO_AIR_URL, air_params),
+            return_exceptions=True,
+        )
 
-            if isinstance(weather_resp, Exception):
-                raise weather_resp
-            weather_resp.raise_for_status()
-            weather_payload = weather_resp.json()
+        if isinstance(weather_resp, Exception):
+            raise weather_resp
+        weather_payload = weather_resp
 
-            if not isinstance(nasa_resp, Exception):
-                nasa_resp.raise_for_status()
-                nasa_payload = nasa_resp.json()
+        if not isinstance(nasa_resp, Exception):
+            nasa_payload = nasa_resp
 
-            if not isinstance(air_resp, Exception):
-                air_resp.raise_for_status()
-                air_payload = air_resp.json()
+        if not isinstance(air_resp, Exception):
+            air_payload = air_resp
     except Exception as exc:
         raise ValueError(f"Failed to fetch weather intelligence data: {exc}") from exc
 
@@ -826,39 +947,30 @@ async def get_full_weather_data(lat: float, lon: float) -> Dict[str, Any]:
     times = _safe_list_values(hourly, "time")
     idx = _find_closest_time_index(times)
 
-    current_weather_code = _to_float(current_raw.get("weather_code"))
-    if current_weather_code is None:
-        current_weather_code = _to_float(_value_at(_safe_list_values(hourly, "weather_code"), idx))
+    def now_value(field: str) -> Optional[float]:
+        value = _to_float(current_raw.get(field))
+        return value if value is not None else _to_float(_value_at(_safe_list_values(hourly, field), idx))
+
+    current_weather_code = now_value("weather_code")
 
     current = {
-        "temp": _to_float(current_raw.get("temperature_2m"))
-        or _to_float(_value_at(_safe_list_values(hourly, "temperature_2m"), idx)),
-        "apparent_temp": _to_float(current_raw.get("apparent_temperature"))
-        or _to_float(_value_at(_safe_list_values(hourly, "apparent_temperature"), idx)),
-        "humidity": _to_float(current_raw.get("relative_humidity_2m"))
-        or _to_float(_value_at(_safe_list_values(hourly, "relative_humidity_2m"), idx)),
-        "wind_speed": _to_float(current_raw.get("wind_speed_10m"))
-        or _to_float(_value_at(_safe_list_values(hourly, "wind_speed_10m"), idx)),
-        "wind_direction": _to_float(current_raw.get("wind_direction_10m"))
-        or _to_float(_value_at(_safe_list_values(hourly, "wind_direction_10m"), idx)),
-        "wind_gust": _to_float(current_raw.get("wind_gusts_10m"))
-        or _to_float(_value_at(_safe_list_values(hourly, "wind_gusts_10m"), idx)),
-        "uv_index": _to_float(current_raw.get("uv_index"))
-        or _to_float(_value_at(_safe_list_values(hourly, "uv_index"), idx)),
+        "temp": now_value("temperature_2m"),
+        "apparent_temp": now_value("apparent_temperature"),
+        "humidity": now_value("relative_humidity_2m"),
+        "wind_speed": now_value("wind_speed_10m"),
+        "wind_direction": now_value("wind_direction_10m"),
+        "wind_gust": now_value("wind_gusts_10m"),
+        "uv_index": now_value("uv_index"),
         "weather_code": int(current_weather_code) if current_weather_code is not None else None,
         "condition": _weather_text(int(current_weather_code)) if current_weather_code is not None else "Unknown",
-        "dew_point": _to_float(current_raw.get("dew_point_2m"))
-        or _to_float(_value_at(_safe_list_values(hourly, "dew_point_2m"), idx)),
-        "visibility": _to_float(current_raw.get("visibility"))
-        or _to_float(_value_at(_safe_list_values(hourly, "visibility"), idx)),
-        "soil_temperature_6cm": _to_float(current_raw.get("soil_temperature_6cm"))
-        or _to_float(_value_at(_safe_list_values(hourly, "soil_temperature_6cm"), idx)),
-        "soil_moisture_3_9cm": _to_float(current_raw.get("soil_moisture_3_9cm"))
-        or _to_float(_value_at(_safe_list_values(hourly, "soil_moisture_3_9cm"), idx)),
+        "dew_point": now_value("dew_point_2m"),
+        "visibility": now_value("visibility"),
+        "soil_temperature_6cm": now_value("soil_temperature_6cm"),
+        "soil_moisture_3_9cm": now_value("soil_moisture_3_9cm"),
         "time": current_raw.get("time") or _value_at(times, idx),
     }
 
-    decisions = _build_farm_decisions(hourly=hourly, daily=daily, current=current)
+    decisions = _build_farm_decisions(hourly=hourly, daily=daily, current=current, idx=idx)
     nasa_latest = _extract_nasa_latest(nasa_payload or {})
 
     payload = {
@@ -873,11 +985,84 @@ async def get_full_weather_data(lat: float, lon: float) -> Dict[str, Any]:
         "farm_decisions": decisions,
         "cached_at": datetime.now(IST).isoformat(),
     }
-
-    await _cache_set_json(cache_key, payload, FULL_CACHE_TTL_SECONDS)
     return payload
 
 
+WEATHER_TILES = TileCache(
+    "weather:tile:v1",
+    _fetch_full_weather,
+    step_deg=WEATHER_TILE_STEP_DEG,
+    fresh_seconds=FULL_CACHE_TTL_SECONDS,
+    revalidate_seconds=WEATHER_TILE_REVALIDATE_SECONDS,
+    max_stale_seconds=WEATHER_TILE_MAX_STALE_SECONDS,
+)
+
+
+async def get_full_weather_data(lat: float, lon: float) -> Dict[str, Any]:
+    """Weather for the grid tile containing ``(lat, lon)``; see :class:`TileCache`."""
+    payload, tile = await WEATHER_TILES.get(lat, lon)
+    return {**payload, "lat": lat, "lon": lon, "tile": tile}
+
+
+async def hot_weather_tiles(db, limit: int = WEATHER_TILE_PREFETCH_TOP) -> list[GridTile]:
+    """Tiles holding the most farmer profiles, located via the centroid table."""
+    await CentroidTable.ensure_loaded(db)
+    counts: Counter[GridTile] = Counter()
+    async for doc in db.collection(MongoCollections.FARMER_PROFILES).stream():
+        profile = doc.to_dict() or {}
+        state, district = profile.get("state"), profile.get("district")
+        pincode = profile.get("pincode") or profile.get("pin_code") or profile.get("pin")
+        hit = None
+        if state and district:
+            hit = CentroidTable.lookup(district_id(state, district))
+        if hit is None and pincode:
+            hit = CentroidTable.lookup(pincode_id(pincode))
+        if hit is None and state:
+            hit = CentroidTable.lookup(state_id(state))
+        if hit is not None:
+            counts[WEATHER_TILES.tile(hit[0], hit[1])] += 1
+    return [tile for tile, _ in counts.most_common(limit)]
+
+
+async def prefetch_weather_tiles(db, tiles: Optional[list[GridTile]] = None) -> Dict[str, int]:
+    """Refresh hot tiles that are missing or close to expiry."""
+    if tiles is None:
+        tiles = await hot_weather_tiles(db)
+    due = [tile for tile in tiles if WEATHER_TILES.needs_refresh(await WEATHER_TILES.read(tile))]
+    semaphore = asyncio.Semaphore(WEATHER_TILE_PREFETCH_CONCURRENCY)
+
+    async def _refresh(tile: GridTile) -> bool:
+        async with semaphore:
+            try:
+                await WEATHER_TILES.refresh(tile)
+                return True
+            except Exception as exc:
+                logger.warning(f"Weather tile prefetch failed for {tile.key}: {exc}")
+                return False
+
+    results = await asyncio.gather(*(_refresh(tile) for tile in due))
+    return {"hot": len(tiles), "refreshed": sum(results), "failed": len(results) - sum(results)}
+
+
+async def run_weather_tile_prefetcher(db) -> None:
+    """Background loop started by the market service; one replica prefetches per cycle."""
+    hot: list[GridTile] = []
+    hot_at = 0.0
+    while True:
+        try:
+            redis = await get_redis()
+            if await redis.set("weather:tile:prefetch:lock", "1", ex=max(WEATHER_TILE_PREFETCH_INTERVAL_SECONDS - 5, 5), nx=True):
+                if not hot or time.monotonic() - hot_at >= WEATHER_TILE_HOT_SET_SECONDS:
+                    hot, hot_at = await hot_weather_tiles(db), time.monotonic()
+                summary = await prefetch_weather_tiles(db, hot)
+                logger.info(f"Weather tile prefetch: {summary}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning(f"Weather tile prefetch cycle failed: {exc}")
+        await asyncio.sleep(WEATHER_TILE_PREFETCH_INTERVAL_SECONDS)
+
+
 def _safe_divide(value: Optional[float], divisor: Optional[float]) -> Optional[float]:
     if value is None or divisor in (None, 0):
         return None
@@ -1061,27 +1246,21 @@ async def _fetch_soilgrids_wcs_layer_value(
     return _normalize_wcs_value(property_name, value)
 
 
-async def _fetch_soilgrids_via_wcs(lat: float, lon: float) -> dict[str, dict[str, Optional[float]]]:
-    task_defs: list[tuple[str, str]] = []
-    tasks: list[asyncio.Future] = []
-
-    for property_name in SOIL_PROPERTY_LIST:
-        for depth_label in SOIL_DEPTH_LIST:
-            task_defs.append((property_name, depth_label))
-            tasks.append(
-                asyncio.create_task(
-                    _fetch_soilgrids_wcs_layer_value(
-                        lat=lat,
-                        lon=lon,
-                        property_name=property_name,
-                        depth_label=depth_label,
-                    )
-                )
-            )
+async def _fetch_soilgrids_via_wcs(
+    lat: float,
+    lon: float,
+    layers: Optional[list[tuple[str, str]]] = None,
+) -> dict[str, dict[str, Optional[float]]]:
+    """Sample each (property, depth) coverage concurrently; the pooled WCS client caps requests in flight."""
+    task_defs = layers or [(p, d) for p in SOIL_PROPERTY_LIST for d in SOIL_DEPTH_LIST]
+    tasks = [
+        _fetch_soilgrids_wcs_layer_value(lat=lat, lon=lon, property_name=p, depth_label=d)
+        for p, d in task_defs
+    ]
 
     results = await asyncio.gather(*tasks, return_exceptions=True)
     parsed: dict[str, dict[str, Optional[float]]] = {
-        property_name: {} for property_name in SOIL_PROPERTY_LIST
+        property_name: {} for property_name, _ in task_defs
     }
 
     for (property_name, depth_label), result in zip(task_defs, results):
@@ -1143,7 +1322,7 @@ def _compose_soil_composition_result(
     }
 
 
-async def get_soil_composition(lat: float, lon: float) -> Dict[str, Any]:
+async def get_soil_composition(lat: float, lon: float, db=None) -> Dict[str, Any]:
     lat_r = _round_coord(lat)
     lon_r = _round_coord(lon)
     cache_key = f"weather:soilgrids:v1:{lat_r}:{lon_r}"
@@ -1152,9 +1331,27 @@ async def get_soil_composition(lat: float, lon: float) -> Dict[str, Any]:
     if cached:
         return cached
 
+    tile = SoilSampleStore.tile(lat, lon)
+    sample = await SoilSampleStore.get(db, tile)
+    if sample is not None:
+        gaps = missing_layers(sample["layers"], SOIL_PROPERTY_LIST, SOIL_DEPTH_LIST)
+        if gaps and SoilSampleStore.retry_due(sample):
+            refill = await _fetch_soilgrids_via_wcs(lat=tile.lat, lon=tile.lon, layers=gaps)
+            sample = await SoilSampleStore.put(db, tile, refill, "soilgrids-wcs", previous=sample)
+        result = _compose_soil_composition_result(
+            lat=lat,
+            lon=lon,
+            parsed=sample["layers"],
+            provider=str(sample.get("provider") or "soilgrids"),
+        )
+        result["sample"] = {"cell": tile.key, "sampled_at": sample.get("sampled_at")}
+        await _cache_set_json(cache_key, result, SOIL_CACHE_TTL_SECONDS)
+        return result
+
+    # Sample at the cell centre so the stored values stand for the whole cell.
     params = {
-        "lon": lon,
-        "lat": lat,
+        "lon": tile.lon,
+        "lat": tile.lat,
         "property": SOIL_PROPERTIES,
         "depth": SOIL_DEPTHS,
         "value": "mean",
@@ -1174,7 +1371,7 @@ async def get_soil_composition(lat: float, lon: float) -> Dict[str, Any]:
         errors.append(f"SoilGrids REST error: {exc}")
 
     if parsed is None:
-        wcs_parsed = await _fetch_soilgrids_via_wcs(lat=lat, lon=lon)
+        wcs_parsed = await _fetch_soilgrids_via_wcs(lat=tile.lat, lon=tile.lon)
         if _has_any_soil_metric(wcs_parsed):
             parsed = wcs_parsed
             provider_used = "soilgrids-wcs"
@@ -1182,12 +1379,14 @@ async def get_soil_composition(lat: float, lon: float) -> Dict[str, Any]:
             errors.append("SoilGrids WCS returned empty layers")
 
     if parsed is not None:
+        sample = await SoilSampleStore.put(db, tile, parsed, provider_used)
         result = _compose_soil_composition_result(
             lat=lat,
             lon=lon,
-            parsed=parsed,
+            parsed=sample["layers"],
             provider=provider_used,
         )
+        result["sample"] = {"cell": tile.key, "sampled_at": sample["sampled_at"]}
         await _cache_set_json(cache_key, result, SOIL_CACHE_TTL_SECONDS)
         await _cache_set_json(last_good_key, result, SOIL_LAST_GOOD_CACHE_TTL_SECONDS)
         return result
@@ -4,6 +4,7 @@ import re
 import os
 import time
 from shared.auth.deps import get_current_user
+from shared.core.config import get_settings
 from shared.patterns.service_client import ServiceClient
 from services.stt_service import STTService
 from services.tts_service import TTSService
@@ -1293,7 +1294,12 @@ def _normalize_voice_agent_result(chat_data: dict, fallback_session_id: str | No
 
 
 async def _query_agent_fast(token: str, transcript: str, chat_lang: str, session_id: str | None):
+    # Voice turns are admitted ahead of text chat by the agent's LLM gateway,
+    # which only honours the priority header alongside the internal service token.
     headers = {"Authorization": f"Bearer {token}"}
+    internal_token = get_settings().INTERNAL_SERVICE_TOKEN
+    if internal_token:
+        headers.update({"X-Service-Token": internal_token, "X-Request-Priority": "voice"})
     prepare_payload = {
         "message": transcript,
         "language": chat_lang,
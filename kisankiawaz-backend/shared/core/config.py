@@ -39,6 +39,12 @@ class Settings(BaseSettings):
     # ── Qdrant ──────────────────────────────────────────────────
     QDRANT_HOST: str = Field(default="localhost", description="Qdrant host")
     QDRANT_PORT: int = Field(default=6333, description="Qdrant gRPC port")
+    QDRANT_EMBED_BATCH_SIZE: int = Field(default=64, description="Texts per embedding batch during index rebuilds")
+    QDRANT_UPSERT_BATCH_SIZE: int = Field(default=256, description="Points per upsert request during index rebuilds")
+    QDRANT_UPSERT_WORKERS: int = Field(default=4, description="Parallel upsert workers during index rebuilds")
+    QDRANT_SCALAR_QUANTIZATION: bool = Field(default=False, description="Create large collections with int8 scalar quantization")
+    QDRANT_QUANTIZATION_OVERSAMPLING: float = Field(default=2.0, description="Oversampling factor for quantized search rescoring")
+    QDRANT_SEARCH_HNSW_EF: int = Field(default=0, description="Default hnsw_ef per query (0 = collection default)")
 
     # ── Redis ───────────────────────────────────────────────────
     REDIS_URL: str = Field(default="redis://localhost:6379/0", description="Redis DSN")
@@ -51,6 +57,10 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = Field(default="HS256", description="JWT algorithm")
     JWT_EXPIRE_MINUTES: int = Field(default=60, description="Access-token TTL in minutes")
     JWT_REFRESH_EXPIRE_DAYS: int = Field(default=7, description="Refresh-token TTL in days")
+    INTERNAL_SERVICE_TOKEN: str = Field(
+        default="",
+        description="Shared secret identifying service-to-service calls (empty disables trusted internal headers)",
+    )
 
     # ── Inter-service URLs (ports 8001-8012) ─────────────────────
     AUTH_SERVICE_URL: str = Field(default="http://localhost:8001", description="Auth service")
@@ -16,6 +16,7 @@ class MongoCollections:
     MARKET_PRICES: str = "market_prices"
     EQUIPMENT: str = "equipment"
     EQUIPMENT_BOOKINGS: str = "equipment_bookings"
+    EQUIPMENT_BOOKING_CALENDARS: str = "equipment_booking_calendars"
     GOVERNMENT_SCHEMES: str = "government_schemes"
     CALENDAR_EVENTS: str = "calendar_events"
     DOCUMENTS: str = "documents"
@@ -57,6 +58,9 @@ class MongoCollections:
     REF_PIN_MASTER: str = "ref_pin_master"
     REF_DATA_INGESTION_META: str = "ref_data_ingestion_meta"
     REF_EQUIPMENT_RATE_HISTORY: str = "ref_equipment_rate_history"
+    REF_EQUIPMENT_RATE_HISTORY_AGG: str = "ref_equipment_rate_history_agg"
+    REF_DISTRICT_CENTROIDS: str = "ref_district_centroids"
+    REF_SOIL_SAMPLES: str = "ref_soil_samples"
 
     # ── Admin data ──
     ADMIN_USERS: str = "admin_users"
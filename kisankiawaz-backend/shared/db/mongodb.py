@@ -17,7 +17,13 @@ from typing import Any, AsyncIterator, Iterator, Optional
 import certifi
 from pymongo import MongoClient
 from pymongo.collection import Collection
-from pymongo.errors import AutoReconnect, ConnectionFailure, NetworkTimeout, ServerSelectionTimeoutError
+from pymongo.errors import (
+    AutoReconnect,
+    ConnectionFailure,
+    DuplicateKeyError,
+    NetworkTimeout,
+    ServerSelectionTimeoutError,
+)
 
 from shared.core.config import get_settings
 
@@ -36,6 +42,10 @@ _RETRYABLE_ERRORS = (
 )
 
 
+class DocumentAlreadyExists(Exception):
+    """Raised by ``create()`` when the target document id is already taken."""
+
+
 def _retry_sync(operation_name: str, func, *args, **kwargs):
     max_attempts = 6
     base_sleep = 0.2
@@ -302,6 +312,32 @@ class SyncDocumentReference:
             upsert=True,
         )
 
+    def create(self, data: dict[str, Any]) -> None:
+        """Insert the document, failing with DocumentAlreadyExists if the id is taken."""
+        payload = dict(data)
+        payload.pop("id", None)
+        try:
+            _retry_sync(
+                operation_name=f"create {self._collection_name}/{self.id}",
+                func=self._collection().insert_one,
+                document={"_id": self.id, **payload},
+            )
+        except DuplicateKeyError as exc:
+            raise DocumentAlreadyExists(f"{self._collection_name}/{self.id}") from exc
+
+    def update_if(self, expected: dict[str, Any], data: dict[str, Any]) -> bool:
+        """Conditional update: apply ``data`` only while the stored fields equal ``expected``."""
+        payload = dict(data)
+        payload.pop("id", None)
+        res = _retry_sync(
+            operation_name=f"update-if {self._collection_name}/{self.id}",
+            func=self._collection().update_one,
+            filter={"_id": self.id, **expected},
+            update={"$set": payload},
+            upsert=False,
+        )
+        return res.matched_count == 1
+
     def update(self, data: dict[str, Any]) -> None:
         payload = dict(data)
         payload.pop("id", None)
@@ -455,6 +491,12 @@ class AsyncDocumentReference:
     async def set(self, data: dict[str, Any], merge: bool = False) -> None:
         await asyncio.to_thread(self._sync_document.set, data, merge)
 
+    async def create(self, data: dict[str, Any]) -> None:
+        await asyncio.to_thread(self._sync_document.create, data)
+
+    async def update_if(self, expected: dict[str, Any], data: dict[str, Any]) -> bool:
+        return await asyncio.to_thread(self._sync_document.update_if, expected, data)
+
     async def update(self, data: dict[str, Any]) -> None:
         await asyncio.to_thread(self._sync_document.update, data)
 
@@ -77,6 +77,9 @@ class ErrorCode(str, Enum):
     GEO_PINCODE_NOT_FOUND = "GEO_PINCODE_NOT_FOUND"
     GEO_LOCATION_NOT_FOUND = "GEO_LOCATION_NOT_FOUND"
 
+    # Equipment
+    EQUIPMENT_BOOKING_CONFLICT = "EQUIPMENT_BOOKING_CONFLICT"
+
     # Admin
     ADMIN_USER_EXISTS = "ADMIN_USER_EXISTS"
     ADMIN_UNAUTHORIZED = "ADMIN_UNAUTHORIZED"
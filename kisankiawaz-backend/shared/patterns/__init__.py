@@ -1,7 +1,9 @@
-"""Reusable patterns: Bloom filter, circuit breaker, and service client."""
+"""Reusable patterns: Bloom filter, circuit breaker, service and provider clients, LLM gateway."""
 
 from shared.patterns.bloom_filter import BloomFilter, get_phone_bloom, get_session_bloom
 from shared.patterns.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+from shared.patterns.llm_gateway import LlmGateway, LlmGatewayShed, get_llm_gateway
+from shared.patterns.provider_client import LatencyHistogram, ProviderClient, ProviderPool
 from shared.patterns.service_client import ServiceClient
 
 __all__ = [
@@ -10,5 +12,11 @@ __all__ = [
     "get_session_bloom",
     "CircuitBreaker",
     "CircuitBreakerOpen",
+    "LatencyHistogram",
+    "LlmGateway",
+    "LlmGatewayShed",
+    "get_llm_gateway",
+    "ProviderClient",
+    "ProviderPool",
     "ServiceClient",
 ]
@@ -0,0 +1,384 @@
+"""Admission control in front of LLM providers.
+
+Every model call goes through a per-provider lane that combines:
+
+* a token bucket whose rate is ``<rpm per key> x <configured keys>``, so a
+  burst cannot spend more requests than the key pool can absorb;
+* an AIMD concurrency limit: +1 per window of successful calls, halved
+  (at most once per latency target) on a 429/capacity error or a call
+  slower than ``LLM_GATEWAY_LATENCY_TARGET_SECONDS``;
+* a priority queue (voice > chat > background, earliest deadline first
+  within a class). Waiters sit in the queue instead of sleeping and
+  re-polling, and are woken when a slot, a token and a cooled-down key are
+  all available;
+* deadline-aware shedding: a request whose estimated queue wait already
+  exceeds its deadline, or that is evicted from a full queue by a higher
+  priority, fails fast with :class:`LlmGatewayShed`.
+
+``stats()`` reports queue wait histograms and shed rates per priority.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from shared.patterns.provider_client import LatencyHistogram
+
+PRIORITIES = {"voice": 0, "chat": 1, "background": 2}
+DEFAULT_RPM_PER_KEY = {"gemini": 15.0, "groq": 30.0}
+QUEUE_WAIT_BUCKETS_MS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+LLM_GATEWAY_MAX_QUEUE = max(1, int(os.getenv("LLM_GATEWAY_MAX_QUEUE", "200")))
+LLM_GATEWAY_INITIAL_LIMIT = max(1, int(os.getenv("LLM_GATEWAY_INITIAL_LIMIT", "4")))
+LLM_GATEWAY_MAX_LIMIT_PER_KEY = max(1, int(os.getenv("LLM_GATEWAY_MAX_LIMIT_PER_KEY", "8")))
+LLM_GATEWAY_LATENCY_TARGET_SECONDS = max(1.0, float(os.getenv("LLM_GATEWAY_LATENCY_TARGET_SECONDS", "20")))
+LLM_GATEWAY_BURST_PER_KEY = max(1.0, float(os.getenv("LLM_GATEWAY_BURST_PER_KEY", "3")))
+# Longest a request of each class may wait for admission before it is shed.
+LLM_GATEWAY_MAX_WAIT_SECONDS = {
+    "voice": max(0.5, float(os.getenv("LLM_GATEWAY_VOICE_MAX_WAIT_SECONDS", "8"))),
+    "chat": max(0.5, float(os.getenv("LLM_GATEWAY_CHAT_MAX_WAIT_SECONDS", "30"))),
+    "background": max(0.5, float(os.getenv("LLM_GATEWAY_BACKGROUND_MAX_WAIT_SECONDS", "120"))),
+}
+
+
+def _rpm_per_key(provider: str) -> float:
+    raw = os.getenv(f"LLM_GATEWAY_{provider.upper()}_RPM_PER_KEY")
+    return max(0.1, float(raw)) if raw else DEFAULT_RPM_PER_KEY.get(provider, 15.0)
+
+
+class LlmGatewayShed(Exception):
+    """Raised when a request is refused admission instead of being queued."""
+
+    def __init__(self, provider: str, priority: str, reason: str, retry_after: float) -> None:
+        super().__init__(f"{provider} {priority} request shed: {reason}")
+        self.provider = provider
+        self.priority = priority
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at ``rate`` tokens/second."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, count: float = 1.0) -> float:
+        """Seconds until ``count`` tokens are available (0 when they are now)."""
+        self._refill()
+        return max(0.0, (count - self.tokens) / self.rate)
+
+    def take(self) -> bool:
+        self._refill()
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class AimdLimit:
+    """Additive-increase / multiplicative-decrease concurrency limit."""
+
+    def __init__(
+        self,
+        initial: float,
+        minimum: float,
+        maximum: float,
+        latency_target: float,
+        backoff: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.limit = min(maximum, max(minimum, initial))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._clock = clock
+        self._last_decrease = float("-inf")
+        self.decreases = 0
+
+    def on_success(self, latency: float) -> None:
+        if latency > self.latency_target:
+            self.on_overload()
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_overload(self) -> None:
+        # Calls already in flight when the limit dropped report their own 429s;
+        # decrease at most once per latency window so one event halves it once.
+        now = self._clock()
+        if now - self._last_decrease < self.latency_target:
+            return
+        self._last_decrease = now
+        reduced = max(self.minimum, self.limit * self.backoff)
+        if reduced < self.limit:
+            self.decreases += 1
+        self.limit = reduced
+
+    @property
+    def current(self) -> int:
+        return max(1, int(self.limit))
+
+
+class _Waiter:
+    __slots__ = ("priority", "deadline", "enqueued", "future", "done")
+
+    def __init__(self, priority: str, deadline: float, future: asyncio.Future) -> None:
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.future = future
+        self.done = False
+
+
+class _Lane:
+    """Admission state for one provider."""
+
+    def __init__(
+        self,
+        provider: str,
+        keys: int,
+        ready_in: Callable[[str], float],
+        max_queue: int,
+    ) -> None:
+        keys = max(1, keys)
+        self.provider = provider
+        self.bucket = TokenBucket(rate=keys * _rpm_per_key(provider) / 60.0, burst=keys * LLM_GATEWAY_BURST_PER_KEY)
+        self.limit = AimdLimit(
+            initial=min(LLM_GATEWAY_INITIAL_LIMIT, keys * LLM_GATEWAY_MAX_LIMIT_PER_KEY),
+            minimum=1,
+            maximum=keys * LLM_GATEWAY_MAX_LIMIT_PER_KEY,
+            latency_target=LLM_GATEWAY_LATENCY_TARGET_SECONDS,
+        )
+        self.max_queue = max_queue
+        self._ready_in = ready_in
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency = LatencyHistogram()
+        self.queue_wait = {p: LatencyHistogram(QUEUE_WAIT_BUCKETS_MS) for p in PRIORITIES}
+        self.admitted = {p: 0 for p in PRIORITIES}
+        self.shed = {p: 0 for p in PRIORITIES}
+        self.shed_reasons: Dict[str, int] = {}
+        self.overloads = 0
+
+    # ── admission ──────────────────────────────────────────────
+
+    def _estimate_wait(self, priority: str) -> float:
+        rank = PRIORITIES[priority]
+        ahead = sum(1 for entry in self._queue if not entry[-1].done and entry[0] <= rank)
+        token_wait = self.bucket.wait_for(ahead + 1)
+        slot_wait = 0.0
+        if self.in_flight + ahead >= self.limit.current:
+            avg_ms = (self.latency.sum_ms / self.latency.total) if self.latency.total else 0.0
+            slot_wait = (ahead + 1) / self.limit.current * avg_ms / 1000.0
+        return max(token_wait, slot_wait, self._ready_in(self.provider))
+
+    def _shed(self, priority: str, reason: str, retry_after: float) -> LlmGatewayShed:
+        self.shed[priority] += 1
+        self.shed_reasons[reason] = self.shed_reasons.get(reason, 0) + 1
+        return LlmGatewayShed(self.provider, priority, reason, round(max(1.0, retry_after), 1))
+
+    def _evict_for(self, rank: int) -> bool:
+        """Shed the newest waiter of the lowest class below ``rank``; False if none."""
+        victim = None
+        for entry in self._queue:
+            waiter = entry[-1]
+            if waiter.done or entry[0] <= rank:
+                continue
+            if victim is None or (entry[0], waiter.enqueued) > (victim[0], victim[-1].enqueued):
+                victim = entry
+        if victim is None:
+            return False
+        waiter = victim[-1]
+        waiter.done = True
+        self.waiting -= 1
+        waiter.future.set_exception(self._shed(waiter.priority, "evicted", self._estimate_wait(waiter.priority)))
+        return True
+
+    async def acquire(self, priority: str, timeout: float) -> float:
+        """Wait for admission; returns the time spent queued in seconds."""
+        rank = PRIORITIES[priority]
+        estimate = self._estimate_wait(priority)
+        if estimate > timeout:
+            raise self._shed(priority, "deadline", estimate)
+        if self.waiting >= self.max_queue and not self._evict_for(rank):
+            raise self._shed(priority, "queue_full", estimate)
+
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(priority, time.monotonic() + timeout, loop.create_future())
+        heapq.heappush(self._queue, (rank, waiter.deadline, next(self._seq), waiter))
+        self.waiting += 1
+        self._pump()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=max(0.0, waiter.deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            if not waiter.done:
+                waiter.done = True
+                self.waiting -= 1
+                raise self._shed(priority, "deadline", self._estimate_wait(priority)) from None
+            if waiter.future.exception() is not None:
+                raise waiter.future.exception() from None
+        except asyncio.CancelledError:
+            if waiter.done and waiter.future.done() and not waiter.future.exception():
+                self.release(ok=None)  # admitted just before the caller gave up
+            elif not waiter.done:
+                waiter.done = True
+                self.waiting -= 1
+            raise
+        queued = time.monotonic() - waiter.enqueued
+        self.admitted[priority] += 1
+        self.queue_wait[priority].observe(queued * 1000)
+        return queued
+
+    def _pump(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            waiter = self._queue[0][-1]
+            if waiter.done:
+                heapq.heappop(self._queue)
+                continue
+            if self.in_flight >= self.limit.current:
+                return  # woken again by release()
+            wait = max(self.bucket.wait_for(1.0), self._ready_in(self.provider))
+            if wait > 0 or not self.bucket.take():
+                self._timer = asyncio.get_running_loop().call_later(max(wait, 0.01), self._pump)
+                return
+            heapq.heappop(self._queue)
+            waiter.done = True
+            self.waiting -= 1
+            self.in_flight += 1
+            waiter.future.set_result(None)
+
+    def release(self, ok: Optional[bool], latency: float = 0.0) -> None:
+        """Return a slot. ``ok`` False marks an overload (429/capacity), None no signal."""
+        self.in_flight = max(0, self.in_flight - 1)
+        if ok is True:
+            self.limit.on_success(latency)
+        elif ok is False:
+            self.overloads += 1
+            self.limit.on_overload()
+        if ok is not None:
+            self.latency.observe(latency * 1000, ok=ok)
+        self._pump()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "concurrency_limit": round(self.limit.limit, 2),
+            "limit_decreases": self.limit.decreases,
+            "tokens_available": round(self.bucket.tokens, 2),
+            "tokens_per_minute": round(self.bucket.rate * 60, 1),
+            "overloads": self.overloads,
+            "latency": self.latency.snapshot(),
+            "shed_reasons": dict(self.shed_reasons),
+            "priorities": {
+                p: {
+                    "admitted": self.admitted[p],
+                    "shed": self.shed[p],
+                    "shed_rate": round(self.shed[p] / (self.admitted[p] + self.shed[p]), 4)
+                    if self.admitted[p] + self.shed[p]
+                    else 0.0,
+                    "queue_wait": self.queue_wait[p].snapshot(),
+                }
+                for p in PRIORITIES
+            },
+        }
+
+
+class LlmGateway:
+    """Per-provider lanes sized from the configured key pool."""
+
+    def __init__(
+        self,
+        key_count: Callable[[str], int],
+        ready_in: Callable[[str], float] = lambda _provider: 0.0,
+        max_queue: int = LLM_GATEWAY_MAX_QUEUE,
+    ) -> None:
+        self._key_count = key_count
+        self._ready_in = ready_in
+        self._max_queue = max_queue
+        self._lanes: Dict[str, _Lane] = {}
+
+    def lane(self, provider: str) -> _Lane:
+        lane = self._lanes.get(provider)
+        if lane is None:
+            lane = _Lane(provider, self._key_count(provider), self._ready_in, self._max_queue)
+            self._lanes[provider] = lane
+        return lane
+
+    @staticmethod
+    def _priority(priority: Optional[str]) -> str:
+        return priority if priority in PRIORITIES else "chat"
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        priority: Optional[str] = "chat",
+        timeout: Optional[float] = None,
+        is_overload: Callable[[BaseException], bool] = lambda _exc: False,
+    ) -> AsyncIterator[float]:
+        """Hold one admitted call for the body of the ``async with``; yields the queue wait."""
+        priority = self._priority(priority)
+        max_wait = LLM_GATEWAY_MAX_WAIT_SECONDS[priority]
+        lane = self.lane(provider)
+        queued = await lane.acquire(priority, min(max_wait, timeout) if timeout is not None else max_wait)
+        started = time.monotonic()
+        try:
+            yield queued
+        except BaseException as exc:
+            if isinstance(exc, asyncio.CancelledError):
+                lane.release(ok=None)
+            else:
+                lane.release(ok=False if is_overload(exc) else None, latency=time.monotonic() - started)
+            raise
+        lane.release(ok=True, latency=time.monotonic() - started)
+
+    async def run(
+        self,
+        provider: str,
+        call: Callable[[], Awaitable[Any]],
+        *,
+        priority: Optional[str] = "chat",
+        timeout: Optional[float] = None,
+        is_overload: Callable[[BaseException], bool] = lambda _exc: False,
+    ) -> Any:
+        async with self.slot(provider, priority=priority, timeout=timeout, is_overload=is_overload):
+            return await call()
+
+    def stats(self) -> Dict[str, Any]:
+        return {provider: lane.stats() for provider, lane in self._lanes.items()}
+
+
+_gateway: Optional[LlmGateway] = None
+
+
+def get_llm_gateway() -> LlmGateway:
+    global _gateway
+    if _gateway is None:
+        from shared.services.api_key_allocator import get_api_key_allocator
+
+        allocator = get_api_key_allocator()
+        _gateway = LlmGateway(key_count=allocator.key_count, ready_in=allocator.ready_in)
+    return _gateway
@@ -0,0 +1,186 @@
+"""Pooled HTTP clients for third-party data providers.
+
+Each provider (Open-Meteo, NASA POWER, SoilGrids, ...) gets one long-lived
+``httpx.AsyncClient`` with keep-alive (HTTP/2 when ``h2`` is installed), a
+:class:`CircuitBreaker` so a failing upstream is skipped instead of tying up
+workers, a concurrency cap for fan-out calls, and a latency histogram.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import time
+from bisect import bisect_left
+from typing import Any, Optional
+
+import httpx
+
+from shared.patterns.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended.
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class UpstreamServerError(Exception):
+    """A provider answered with a 5xx status (counted against its breaker)."""
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with approximate percentiles."""
+
+    def __init__(self, buckets_ms: tuple[int, ...] = LATENCY_BUCKETS_MS) -> None:
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.total = 0
+        self.errors = 0
+        self.sum_ms = 0.0
+
+    def observe(self, elapsed_ms: float, ok: bool = True) -> None:
+        self.counts[bisect_left(self.buckets_ms, elapsed_ms)] += 1
+        self.total += 1
+        self.sum_ms += elapsed_ms
+        if not ok:
+            self.errors += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the *fraction* quantile (None if open-ended)."""
+        if not self.total:
+            return None
+        rank = fraction * self.total
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return float(self.buckets_ms[i]) if i < len(self.buckets_ms) else None
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.total,
+            "errors": self.errors,
+            "avg_ms": round(self.sum_ms / self.total, 1) if self.total else None,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {
+                **{f"le_{b}": c for b, c in zip(self.buckets_ms, self.counts)},
+                "gt_last": self.counts[-1],
+            },
+        }
+
+
+class ProviderClient:
+    """One upstream provider: pooled client, breaker, concurrency cap and metrics."""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        max_concurrency: Optional[int] = None,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.name = name
+        self.transport = transport
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.latency = LatencyHistogram()
+        self.rejected = 0
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            # A client's connections belong to the loop that opened them.
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                http2=_HTTP2,
+                transport=self.transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+            self._loop = loop
+        return self._client
+
+    async def get(self, url: str, params: Optional[dict[str, Any]] = None, timeout: Optional[float] = None) -> httpx.Response:
+        """GET through the breaker; raises ``httpx.HTTPStatusError`` for any non-2xx answer."""
+        client = self._ensure_client()
+
+        async def _do() -> httpx.Response:
+            started = time.perf_counter()
+            ok = False
+            try:
+                response = await client.get(url, params=params, timeout=timeout or self.timeout)
+                ok = response.status_code < 500
+                if not ok:
+                    raise UpstreamServerError(f"{self.name} returned HTTP {response.status_code}")
+                return response
+            finally:
+                self.latency.observe((time.perf_counter() - started) * 1000.0, ok)
+
+        try:
+            if self._semaphore is None:
+                response = await self.breaker.call(_do)
+            else:
+                async with self._semaphore:
+                    response = await self.breaker.call(_do)
+        except CircuitBreakerOpen:
+            self.rejected += 1
+            raise
+        response.raise_for_status()
+        return response
+
+    async def get_json(self, url: str, params: Optional[dict[str, Any]] = None, timeout: Optional[float] = None) -> Any:
+        return (await self.get(url, params=params, timeout=timeout)).json()
+
+    async def get_bytes(self, url: str, params: Optional[dict[str, Any]] = None, timeout: Optional[float] = None) -> bytes:
+        return (await self.get(url, params=params, timeout=timeout)).content
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "circuit": self.breaker.state,
+            "http2": _HTTP2,
+            "max_concurrency": self.max_concurrency,
+            "rejected_while_open": self.rejected,
+            "latency": self.latency.snapshot(),
+        }
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ProviderPool:
+    """Process-wide registry of :class:`ProviderClient` instances by name."""
+
+    _clients: dict[str, ProviderClient] = {}
+
+    @classmethod
+    def get(cls, name: str, **options: Any) -> ProviderClient:
+        client = cls._clients.get(name)
+        if client is None:
+            client = ProviderClient(name, **options)
+            cls._clients[name] = client
+        return client
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, Any]]:
+        return {name: client.stats() for name, client in sorted(cls._clients.items())}
+
+    @classmethod
+    async def aclose_all(cls) -> None:
+        for client in list(cls._clients.values()):
+            await client.aclose()
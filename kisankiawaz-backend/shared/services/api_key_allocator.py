@@ -1,14 +1,119 @@
-"""Dynamic API key allocator with activity/load tracking and cooldown backoff."""
+"""Dynamic API key allocator with activity/load tracking and cooldown backoff.
+
+Key health is shared across processes through Redis: one hash per provider
+holds every key's counters, rate-limit streak and cooldown, one sorted set per
+key holds its open leases scored by their deadline, and two Lua scripts
+pick/release keys atomically, so every uvicorn worker and service sees the
+same load and cooldowns. A lease whose process died is dropped once its own
+deadline passes. Per-minute hashes record requests and 429s per key for the
+status endpoint.
+
+The Redis calls are blocking; async code calls the allocator through
+``asyncio.to_thread``.
+
+Each process also keeps its own view of the pool: ready keys in a heap
+ordered by load and cooling keys in a heap ordered by cooldown expiry. It
+mirrors the cooldowns Redis reports and takes over allocation whenever Redis
+is unreachable (``API_KEY_ALLOCATOR_BACKEND=local`` disables the shared
+backend entirely).
+"""
 
 from __future__ import annotations
 
+import hashlib
+import heapq
+import itertools
+import logging
+import os
 import threading
 import time
+import uuid
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 from shared.core.config import get_settings
 
+logger = logging.getLogger("kisankiawaz.api_key_allocator")
+
+_BACKEND = os.getenv("API_KEY_ALLOCATOR_BACKEND", "redis").strip().lower()
+_REDIS_TIMEOUT_SECONDS = float(os.getenv("API_KEY_ALLOCATOR_REDIS_TIMEOUT_SECONDS", "0.25"))
+_REDIS_RETRY_SECONDS = float(os.getenv("API_KEY_ALLOCATOR_REDIS_RETRY_SECONDS", "30"))
+# A lease not released within this long was leaked by a dead process and stops counting as load.
+_LEASE_STALE_SECONDS = int(os.getenv("API_KEY_ALLOCATOR_LEASE_STALE_SECONDS", "600"))
+_STATS_TTL_SECONDS = 180
+_KEY_PREFIX = "kkawaz:apikeys"
+
+# KEYS[1] provider state hash, KEYS[2] current-minute stats hash, KEYS[3..] lease
+# sets of the slots in ARGV order. ARGV[1] now, ARGV[2] lease ttl, ARGV[3] stats
+# ttl, ARGV[4] lease id, ARGV[5..] key slots.
+# Drops expired leases, picks the ready key with the fewest open leases then
+# fewest total requests (or, if all are cooling, the one that recovers first)
+# and adds the lease to it. Returns {slot, {cooling_slot, cooldown_until, ...}}.
+_ACQUIRE_LUA = """
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local best, best_index, best_active, best_total
+local soonest, soonest_index, soonest_until
+local cooling = {}
+for i = 5, #ARGV do
+  local slot = ARGV[i]
+  redis.call('ZREMRANGEBYSCORE', KEYS[i - 2], '-inf', now)
+  local active = tonumber(redis.call('ZCARD', KEYS[i - 2]))
+  local state = redis.call('HMGET', KEYS[1], slot .. ':cooldown', slot .. ':total')
+  local cooldown = tonumber(state[1] or '0')
+  local total = tonumber(state[2] or '0')
+  if cooldown > now then
+    table.insert(cooling, slot)
+    table.insert(cooling, tostring(cooldown))
+    if soonest == nil or cooldown < soonest_until then
+      soonest, soonest_index, soonest_until = slot, i, cooldown
+    end
+  elseif best == nil or active < best_active or (active == best_active and total < best_total) then
+    best, best_index, best_active, best_total = slot, i, active, total
+  end
+end
+local chosen, index = best, best_index
+if chosen == nil then
+  chosen, index = soonest, soonest_index
+end
+redis.call('ZADD', KEYS[index - 2], now + ttl, ARGV[4])
+redis.call('EXPIRE', KEYS[index - 2], math.ceil(ttl))
+redis.call('HINCRBY', KEYS[1], chosen .. ':total', 1)
+redis.call('HSET', KEYS[1], chosen .. ':used', ARGV[1])
+redis.call('HINCRBY', KEYS[2], chosen .. ':requests', 1)
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return {chosen, cooling}
+"""
+
+# KEYS[1], KEYS[2] as above, KEYS[3] the slot's lease set. ARGV[1] slot,
+# ARGV[2] outcome (ok|error|rate_limited), ARGV[3] now, ARGV[4] base cooldown,
+# ARGV[5] max cooldown, ARGV[6] error cooldown, ARGV[7] stats ttl,
+# ARGV[8] last error, ARGV[9] lease id.
+# Returns the key's cooldown_until after the release.
+_RELEASE_LUA = """
+local slot, outcome, now = ARGV[1], ARGV[2], tonumber(ARGV[3])
+redis.call('ZREM', KEYS[3], ARGV[9])
+local cooldown = tonumber(redis.call('HGET', KEYS[1], slot .. ':cooldown') or '0')
+if outcome == 'ok' then
+  redis.call('HINCRBY', KEYS[1], slot .. ':success', 1)
+  redis.call('HSET', KEYS[1], slot .. ':streak', 0, slot .. ':cooldown', 0, slot .. ':last_error', '')
+  return '0'
+end
+redis.call('HINCRBY', KEYS[1], slot .. ':errors', 1)
+if outcome == 'rate_limited' then
+  redis.call('HINCRBY', KEYS[1], slot .. ':rate_limited', 1)
+  local streak = tonumber(redis.call('HINCRBY', KEYS[1], slot .. ':streak', 1))
+  local backoff = math.min(tonumber(ARGV[5]), tonumber(ARGV[4]) * 2 ^ (streak - 1))
+  cooldown = math.max(cooldown, now + backoff)
+  redis.call('HINCRBY', KEYS[2], slot .. ':rate_limited', 1)
+  redis.call('EXPIRE', KEYS[2], ARGV[7])
+else
+  cooldown = math.max(cooldown, now + tonumber(ARGV[6]))
+end
+redis.call('HSET', KEYS[1], slot .. ':cooldown', tostring(cooldown), slot .. ':last_error', ARGV[8])
+return tostring(cooldown)
+"""
+
 
 @dataclass
 class KeyState:
@@ -23,6 +128,9 @@ class KeyState:
     cooldown_until: float = 0.0
     last_used_at: float = 0.0
     last_error: str = ""
+    # Stable id shared across processes (independent of key order in the env).
+    slot: str = ""
+    version: int = 0
 
 
 @dataclass
@@ -31,126 +139,337 @@ class KeyLease:
     key_id: str
     key: str
     acquired_at: float = field(default_factory=time.time)
+    # Member of the key's shared lease set; empty for leases handed out locally.
+    lease_id: str = ""
+
+
+class _KeyPool:
+    """One provider's keys: a load-ordered ready heap and an expiry-ordered cooling heap.
+
+    Heap entries are invalidated lazily via ``KeyState.version`` and dropped
+    when they surface, so selection and updates are O(log n).
+    """
+
+    def __init__(self, provider: str, keys: List[str]) -> None:
+        self.states: List[KeyState] = [
+            KeyState(key_id=f"{provider}-{idx}", key=key, slot=hashlib.sha256(key.encode("utf-8")).hexdigest()[:16])
+            for idx, key in enumerate(keys, start=1)
+        ]
+        self.by_id: Dict[str, KeyState] = {s.key_id: s for s in self.states}
+        self.by_slot: Dict[str, KeyState] = {s.slot: s for s in self.states}
+        self._seq = itertools.count()
+        self._ready: List[tuple] = []
+        self._cooling: List[tuple] = []
+        for state in self.states:
+            self.touch(state, 0.0)
+
+    def touch(self, state: KeyState, now: float) -> None:
+        """Re-file ``state`` after any change to its load or cooldown."""
+        state.version += 1
+        if state.cooldown_until > now:
+            heapq.heappush(self._cooling, (state.cooldown_until, next(self._seq), state.key_id, state.version))
+        else:
+            heapq.heappush(
+                self._ready,
+                (state.active_requests, state.total_requests, state.last_used_at, next(self._seq), state.key_id, state.version),
+            )
+        if len(self._ready) + len(self._cooling) > 4 * len(self.states) + 8:
+            self._compact(now)
+
+    def _compact(self, now: float) -> None:
+        self._ready, self._cooling = [], []
+        for state in self.states:
+            state.version -= 1
+            self.touch(state, now)
+
+    def _current(self, entry: tuple) -> Optional[KeyState]:
+        state = self.by_id[entry[-2]]
+        return state if state.version == entry[-1] else None
+
+    def pick(self, now: float) -> KeyState:
+        while self._cooling and self._cooling[0][0] <= now:
+            state = self._current(heapq.heappop(self._cooling))
+            if state is not None:
+                self.touch(state, now)
+        while self._ready:
+            state = self._current(self._ready[0])
+            if state is not None:
+                return state
+            heapq.heappop(self._ready)
+        while True:
+            state = self._current(self._cooling[0])
+            if state is not None:
+                return state
+            heapq.heappop(self._cooling)
+
+
+class RedisKeyState:
+    """Cross-process key health kept in Redis and mutated only through Lua."""
+
+    def __init__(self, client=None) -> None:
+        self._client = client
+        self._acquire = None
+        self._release = None
+        self._retry_at = 0.0
+
+    def _scripts(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(
+                get_settings().REDIS_URL,
+                decode_responses=True,
+                socket_timeout=_REDIS_TIMEOUT_SECONDS,
+                socket_connect_timeout=_REDIS_TIMEOUT_SECONDS,
+            )
+        if self._acquire is None:
+            self._acquire = self._client.register_script(_ACQUIRE_LUA)
+            self._release = self._client.register_script(_RELEASE_LUA)
+        return self._acquire, self._release
+
+    @property
+    def available(self) -> bool:
+        return time.time() >= self._retry_at
+
+    def _failed(self, exc: Exception) -> None:
+        self._retry_at = time.time() + _REDIS_RETRY_SECONDS
+        logger.warning("Shared key state unavailable, allocating locally for %.0fs: %s", _REDIS_RETRY_SECONDS, exc)
+
+    @staticmethod
+    def _keys(provider: str, now: float) -> List[str]:
+        return [f"{_KEY_PREFIX}:{provider}", f"{_KEY_PREFIX}:{provider}:m:{int(now // 60)}"]
+
+    @staticmethod
+    def _lease_key(provider: str, slot: str) -> str:
+        return f"{_KEY_PREFIX}:{provider}:leases:{slot}"
+
+    def acquire(
+        self, provider: str, slots: List[str], now: float, lease_id: str
+    ) -> Optional[Tuple[str, Dict[str, float]]]:
+        if not self.available:
+            return None
+        try:
+            acquire, _ = self._scripts()
+            chosen, cooling = acquire(
+                keys=[*self._keys(provider, now), *(self._lease_key(provider, slot) for slot in slots)],
+                args=[now, _LEASE_STALE_SECONDS, _STATS_TTL_SECONDS, lease_id, *slots],
+            )
+        except Exception as exc:  # noqa: BLE001
+            self._failed(exc)
+            return None
+        return chosen, {cooling[i]: float(cooling[i + 1]) for i in range(0, len(cooling), 2)}
+
+    def release(
+        self, provider: str, slot: str, lease_id: str, outcome: str, error: str, now: float
+    ) -> Optional[float]:
+        if not self.available:
+            return None
+        settings = get_settings()
+        try:
+            _, release = self._scripts()
+            cooldown = release(
+                keys=[*self._keys(provider, now), self._lease_key(provider, slot)],
+                args=[
+                    slot,
+                    outcome,
+                    now,
+                    settings.key_base_cooldown_seconds,
+                    settings.key_max_cooldown_seconds,
+                    settings.key_error_cooldown_seconds,
+                    _STATS_TTL_SECONDS,
+                    error,
+                    lease_id,
+                ],
+            )
+        except Exception as exc:  # noqa: BLE001
+            self._failed(exc)
+            return None
+        return float(cooldown)
+
+    def read(self, provider: str, slots: List[str], now: float) -> Optional[Dict[str, Dict[str, str]]]:
+        """Return ``{"state": {...}, "minute": {...}, "active": {slot: n}}`` for ``snapshot``."""
+        if not self.available:
+            return None
+        try:
+            self._scripts()
+            state_key, minute_key = self._keys(provider, now)
+            pipe = self._client.pipeline(transaction=False)
+            pipe.hgetall(state_key)
+            pipe.hgetall(minute_key)
+            for slot in slots:
+                pipe.zcount(self._lease_key(provider, slot), now, "+inf")
+            state, minute, *active = pipe.execute()
+        except Exception as exc:  # noqa: BLE001
+            self._failed(exc)
+            return None
+        return {"state": state or {}, "minute": minute or {}, "active": dict(zip(slots, active))}
 
 
 class ApiKeyAllocator:
     """Tracks provider key pools and allocates the least-loaded healthy key."""
 
-    def __init__(self) -> None:
+    def __init__(self, shared: Optional[RedisKeyState] = None, use_shared: Optional[bool] = None) -> None:
         self._lock = threading.Lock()
         self._settings = get_settings()
-        self._pools: Dict[str, List[KeyState]] = {
-            "gemini": self._build_pool("gemini", self._settings.gemini_api_keys_list),
-            "groq": self._build_pool("groq", self._settings.groq_api_keys_list),
+        self._pools: Dict[str, _KeyPool] = {
+            "gemini": _KeyPool("gemini", self._settings.gemini_api_keys_list),
+            "groq": _KeyPool("groq", self._settings.groq_api_keys_list),
         }
-
-    @staticmethod
-    def _build_pool(provider: str, keys: List[str]) -> List[KeyState]:
-        pool: List[KeyState] = []
-        for idx, key in enumerate(keys, start=1):
-            pool.append(KeyState(key_id=f"{provider}-{idx}", key=key))
-        return pool
+        if use_shared is None:
+            use_shared = shared is not None or _BACKEND == "redis"
+        self._shared = (shared or RedisKeyState()) if use_shared else None
 
     def has_provider(self, provider: str) -> bool:
+        pool = self._pools.get(provider)
+        return bool(pool and pool.states)
+
+    def key_count(self, provider: str) -> int:
+        pool = self._pools.get(provider)
+        return len(pool.states) if pool else 0
+
+    def ready_in(self, provider: str) -> float:
+        """Seconds until some key of ``provider`` is out of cooldown (0 if one is ready)."""
+        pool = self._pools.get(provider)
+        if not pool or not pool.states:
+            return 0.0
+        now = time.time()
         with self._lock:
-            return len(self._pools.get(provider, [])) > 0
+            return max(0.0, pool.pick(now).cooldown_until - now)
 
     def acquire(self, provider: str) -> KeyLease:
         now = time.time()
+        pool = self._pools.get(provider)
+        if not pool or not pool.states:
+            raise RuntimeError(f"No API keys configured for provider={provider}")
+
+        lease_id = uuid.uuid4().hex
+        shared = self._shared.acquire(provider, [s.slot for s in pool.states], now, lease_id) if self._shared else None
         with self._lock:
-            pool = self._pools.get(provider, [])
-            if not pool:
-                raise RuntimeError(f"No API keys configured for provider={provider}")
-
-            ready = [k for k in pool if k.cooldown_until <= now]
-            candidates = ready if ready else pool
-
-            candidates.sort(
-                key=lambda k: (
-                    k.active_requests,
-                    k.total_requests,
-                    k.cooldown_until if k.cooldown_until > now else 0,
-                    k.last_used_at,
-                )
-            )
-            selected = candidates[0]
+            if shared is not None:
+                chosen, cooling = shared
+                for state in pool.states:
+                    cooldown = cooling.get(state.slot, 0.0)
+                    if cooldown != state.cooldown_until and (cooldown > now or state.cooldown_until > now):
+                        state.cooldown_until = cooldown
+                        pool.touch(state, now)
+                selected = pool.by_slot.get(chosen) or pool.pick(now)
+            else:
+                selected = pool.pick(now)
             selected.active_requests += 1
             selected.total_requests += 1
             selected.last_used_at = now
-            return KeyLease(provider=provider, key_id=selected.key_id, key=selected.key)
+            pool.touch(selected, now)
+            return KeyLease(
+                provider=provider,
+                key_id=selected.key_id,
+                key=selected.key,
+                lease_id=lease_id if shared is not None else "",
+            )
 
-    def report_success(self, lease: KeyLease) -> None:
+    def _release(self, lease: KeyLease, outcome: str, error: str) -> None:
+        now = time.time()
+        pool = self._pools.get(lease.provider)
+        state = pool.by_id.get(lease.key_id) if pool else None
+        if not state:
+            return
+        error = (error or "").strip()[:500]
         with self._lock:
-            state = self._find_state(lease)
-            if not state:
-                return
             state.active_requests = max(0, state.active_requests - 1)
-            state.success_count += 1
-            state.consecutive_rate_limits = 0
-            state.cooldown_until = 0.0
-            state.last_error = ""
+            if outcome == "ok":
+                state.success_count += 1
+                state.consecutive_rate_limits = 0
+                state.cooldown_until = 0.0
+                state.last_error = ""
+            elif outcome == "rate_limited":
+                state.error_count += 1
+                state.rate_limit_count += 1
+                state.consecutive_rate_limits += 1
+                backoff = min(
+                    self._settings.key_max_cooldown_seconds,
+                    self._settings.key_base_cooldown_seconds * (2 ** max(0, state.consecutive_rate_limits - 1)),
+                )
+                state.cooldown_until = max(state.cooldown_until, now + backoff)
+                state.last_error = error
+            else:
+                state.error_count += 1
+                state.last_error = error
+                state.cooldown_until = max(state.cooldown_until, now + self._settings.key_error_cooldown_seconds)
+            pool.touch(state, now)
+
+        cooldown = (
+            self._shared.release(lease.provider, state.slot, lease.lease_id, outcome, error, now)
+            if self._shared
+            else None
+        )
+        if cooldown is not None and cooldown != state.cooldown_until:
+            # Another replica's streak may have pushed the shared cooldown further out.
+            with self._lock:
+                state.cooldown_until = cooldown
+                pool.touch(state, now)
+
+    def report_success(self, lease: KeyLease) -> None:
+        self._release(lease, "ok", "")
 
     def report_error(self, lease: KeyLease, error: str) -> None:
-        with self._lock:
-            state = self._find_state(lease)
-            if not state:
-                return
-            state.active_requests = max(0, state.active_requests - 1)
-            state.error_count += 1
-            state.last_error = (error or "").strip()[:500]
-            state.cooldown_until = max(state.cooldown_until, time.time() + self._settings.key_error_cooldown_seconds)
+        self._release(lease, "error", error)
 
     def report_rate_limited(self, lease: KeyLease, error: str = "") -> None:
-        now = time.time()
-        with self._lock:
-            state = self._find_state(lease)
-            if not state:
-                return
-            state.active_requests = max(0, state.active_requests - 1)
-            state.error_count += 1
-            state.rate_limit_count += 1
-            state.consecutive_rate_limits += 1
-            backoff = min(
-                self._settings.key_max_cooldown_seconds,
-                self._settings.key_base_cooldown_seconds * (2 ** max(0, state.consecutive_rate_limits - 1)),
-            )
-            state.cooldown_until = max(state.cooldown_until, now + backoff)
-            state.last_error = (error or "rate_limited").strip()[:500]
+        self._release(lease, "rate_limited", error or "rate_limited")
 
     def snapshot(self) -> dict:
         now = time.time()
-        with self._lock:
-            out: dict = {
-                "generated_at_epoch": now,
-                "providers": {},
-            }
-            for provider, pool in self._pools.items():
-                out["providers"][provider] = {
-                    "configured_keys": len(pool),
-                    "keys": [
-                        {
-                            "key_id": k.key_id,
-                            "active_requests": k.active_requests,
-                            "total_requests": k.total_requests,
-                            "success_count": k.success_count,
-                            "error_count": k.error_count,
-                            "rate_limit_count": k.rate_limit_count,
-                            "consecutive_rate_limits": k.consecutive_rate_limits,
-                            "cooldown_remaining_seconds": max(0.0, round(k.cooldown_until - now, 2)),
-                            "last_used_at_epoch": k.last_used_at,
-                            "last_error": k.last_error,
-                        }
-                        for k in pool
-                    ],
-                }
-            return out
-
-    def _find_state(self, lease: KeyLease) -> KeyState | None:
-        pool = self._pools.get(lease.provider, [])
-        for item in pool:
-            if item.key_id == lease.key_id:
-                return item
-        return None
+        out: dict = {
+            "generated_at_epoch": now,
+            "backend": "redis" if self._shared and self._shared.available else "local",
+            "providers": {},
+        }
+        for provider, pool in self._pools.items():
+            shared = self._shared.read(provider, [k.slot for k in pool.states], now) if self._shared and pool.states else None
+            keys = []
+            with self._lock:
+                for k in pool.states:
+                    entry = {
+                        "key_id": k.key_id,
+                        "active_requests": k.active_requests,
+                        "total_requests": k.total_requests,
+                        "success_count": k.success_count,
+                        "error_count": k.error_count,
+                        "rate_limit_count": k.rate_limit_count,
+                        "consecutive_rate_limits": k.consecutive_rate_limits,
+                        "cooldown_remaining_seconds": max(0.0, round(k.cooldown_until - now, 2)),
+                        "last_used_at_epoch": k.last_used_at,
+                        "last_error": k.last_error,
+                        "requests_last_minute": None,
+                        "rate_limited_last_minute": None,
+                    }
+                    if shared is not None:
+                        entry.update(_shared_entry(shared, k.slot, now))
+                    total = entry["total_requests"]
+                    entry["rate_limit_ratio"] = round(entry["rate_limit_count"] / total, 4) if total else 0.0
+                    keys.append(entry)
+            out["providers"][provider] = {"configured_keys": len(pool.states), "keys": keys}
+        return out
+
+
+def _shared_entry(shared: Dict[str, Dict[str, str]], slot: str, now: float) -> dict:
+    state, minute = shared["state"], shared["minute"]
+
+    def num(source: Dict[str, str], name: str) -> float:
+        return float(source.get(f"{slot}:{name}") or 0)
+
+    return {
+        "active_requests": int(shared["active"].get(slot) or 0),
+        "total_requests": int(num(state, "total")),
+        "success_count": int(num(state, "success")),
+        "error_count": int(num(state, "errors")),
+        "rate_limit_count": int(num(state, "rate_limited")),
+        "consecutive_rate_limits": int(num(state, "streak")),
+        "cooldown_remaining_seconds": max(0.0, round(num(state, "cooldown") - now, 2)),
+        "last_used_at_epoch": num(state, "used"),
+        "last_error": state.get(f"{slot}:last_error", ""),
+        "requests_last_minute": int(num(minute, "requests")),
+        "rate_limited_last_minute": int(num(minute, "rate_limited")),
+    }
 
 
 _allocator_singleton: ApiKeyAllocator | None = None
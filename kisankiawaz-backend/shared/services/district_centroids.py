@@ -0,0 +1,209 @@
+"""District, PIN and state centroid table for weather coordinate resolution.
+
+``resolve_coordinates`` used to average up to 500 mandi-directory and
+PIN-master rows per request (trying every state/district field spelling)
+and then geocode up to six strings serially. ``ref_district_centroids``
+stores those averages once, keyed by normalized ``(state, district)``,
+pincode and state, each with the resolution ``source`` label the live
+strategy would have produced:
+
+* ``scripts/build_district_centroids.py`` builds it offline from the
+  reference collections;
+* the market service mirrors it in memory (``updated_at`` watermark refresh)
+  and writes back any coordinates it still has to resolve live, so every
+  district is resolved the slow way at most once.
+
+A farmer's resolved coordinates are also cached per user and dropped by
+the farmer service whenever the profile is written.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from shared.cache.market_cache import cache_delete, cache_get, cache_set
+from shared.core.constants import MongoCollections
+
+logger = logging.getLogger("kisankiawaz.district_centroids")
+
+_REFRESH_SECONDS = float(os.getenv("DISTRICT_CENTROID_REFRESH_SECONDS", "300"))
+USER_COORDS_CACHE_NS = "weather_user_coords"
+USER_COORDS_CACHE_TTL = int(os.getenv("WEATHER_USER_COORDS_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+SOURCE_DISTRICT_MANDI = "profile_district_mandi"
+SOURCE_DISTRICT_PIN = "profile_district_pin_master"
+SOURCE_STATE_MANDI = "profile_state_mandi"
+
+_LAT_KEYS = ("latitude", "lat", "center_lat", "geo_lat", "lat_dd")
+_LON_KEYS = ("longitude", "lon", "lng", "center_lon", "geo_lon", "lon_dd")
+
+
+def normalize(value: Any) -> str:
+    return " ".join(str(value or "").strip().lower().split())
+
+
+def district_id(state: Any, district: Any) -> str:
+    return f"district:{normalize(state).replace(' ', '-')}:{normalize(district).replace(' ', '-')}"
+
+
+def pincode_id(pincode: Any) -> str:
+    return f"pincode:{str(pincode or '').strip()}"
+
+
+def state_id(state: Any) -> str:
+    return f"state:{normalize(state).replace(' ', '-')}"
+
+
+def _coord(row: dict[str, Any], keys: tuple[str, ...]) -> Optional[float]:
+    for key in keys:
+        try:
+            return float(row[key])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+def _in_india(lat: float, lon: float) -> bool:
+    return 6.0 <= lat <= 38.5 and 68.0 <= lon <= 98.0
+
+
+class _Mean:
+    __slots__ = ("lat", "lon", "n")
+
+    def __init__(self) -> None:
+        self.lat = self.lon = 0.0
+        self.n = 0
+
+    def add(self, lat: float, lon: float) -> None:
+        self.lat += lat
+        self.lon += lon
+        self.n += 1
+
+
+def compute_centroids(
+    mandi_rows: Iterable[dict[str, Any]],
+    pin_rows: Iterable[dict[str, Any]],
+) -> dict[str, dict[str, Any]]:
+    """Centroid documents keyed by id, preferring mandi averages over PIN master."""
+    groups: dict[str, tuple[dict[str, Any], _Mean]] = {}
+
+    def _add(doc_id: str, base: dict[str, Any], lat: float, lon: float) -> None:
+        groups.setdefault(doc_id, (base, _Mean()))[1].add(lat, lon)
+
+    for row in mandi_rows:
+        lat, lon = _coord(row, _LAT_KEYS), _coord(row, _LON_KEYS)
+        state, district = row.get("state"), row.get("district")
+        if lat is None or lon is None or not normalize(state):
+            continue
+        if normalize(district):
+            _add(f"mandi|{district_id(state, district)}", {"kind": "district", "source": SOURCE_DISTRICT_MANDI}, lat, lon)
+        _add(f"mandi|{state_id(state)}", {"kind": "state", "source": SOURCE_STATE_MANDI}, lat, lon)
+
+    for row in pin_rows:
+        lat, lon = _coord(row, _LAT_KEYS), _coord(row, _LON_KEYS)
+        if lat is None or lon is None:
+            continue
+        state = row.get("state_name") or row.get("state")
+        district = row.get("district_name") or row.get("district")
+        pincode = str(row.get("pincode") or row.get("pin_code") or row.get("pin") or "").strip()
+        if normalize(state) and normalize(district):
+            _add(f"pin|{district_id(state, district)}", {"kind": "district", "source": SOURCE_DISTRICT_PIN}, lat, lon)
+        if pincode:
+            _add(f"pin|{pincode_id(pincode)}", {"kind": "pincode", "source": SOURCE_DISTRICT_PIN}, lat, lon)
+
+    now = datetime.now(timezone.utc).isoformat()
+    docs: dict[str, dict[str, Any]] = {}
+    # Mandi groups sort first, so a PIN-master district average only fills gaps.
+    for key in sorted(groups, key=lambda k: not k.startswith("mandi|")):
+        base, mean = groups[key]
+        doc_id = key.split("|", 1)[1]
+        lat, lon = mean.lat / mean.n, mean.lon / mean.n
+        if doc_id in docs or not _in_india(lat, lon):
+            continue
+        docs[doc_id] = {**base, "lat": round(lat, 6), "lon": round(lon, 6), "sample_size": mean.n, "updated_at": now}
+    return docs
+
+
+class CentroidTable:
+    """In-memory mirror of ``ref_district_centroids``."""
+
+    _entries: dict[str, tuple[float, float, str]] = {}
+    _watermark = ""
+    _checked_at = 0.0
+    _loaded = False
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._entries = {}
+        cls._watermark = ""
+        cls._checked_at = 0.0
+        cls._loaded = False
+
+    @classmethod
+    def _apply(cls, doc_id: str, row: dict[str, Any]) -> None:
+        try:
+            cls._entries[doc_id] = (float(row["lat"]), float(row["lon"]), str(row.get("source") or ""))
+        except (KeyError, TypeError, ValueError):
+            return
+        stamp = str(row.get("updated_at") or "")
+        if stamp > cls._watermark:
+            cls._watermark = stamp
+
+    @classmethod
+    async def ensure_loaded(cls, db) -> None:
+        if time.monotonic() - cls._checked_at < _REFRESH_SECONDS:
+            return
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+        async with cls._lock:
+            if time.monotonic() - cls._checked_at < _REFRESH_SECONDS:
+                return
+            collection = db.collection(MongoCollections.REF_DISTRICT_CENTROIDS)
+            try:
+                query = collection.where("updated_at", ">", cls._watermark) if cls._loaded else collection
+                async for doc in query.stream():
+                    cls._apply(doc.id, doc.to_dict() or {})
+                cls._loaded = True
+            except Exception as exc:
+                logger.warning(f"District centroid refresh failed: {exc}")
+            cls._checked_at = time.monotonic()
+
+    @classmethod
+    def lookup(cls, doc_id: str) -> Optional[tuple[float, float, str]]:
+        return cls._entries.get(doc_id)
+
+    @classmethod
+    async def remember(cls, db, doc_id: str, kind: str, lat: float, lon: float, source: str) -> None:
+        """Record a live-resolved centroid so later requests hit the table."""
+        row = {
+            "kind": kind,
+            "lat": round(float(lat), 6),
+            "lon": round(float(lon), 6),
+            "source": source,
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+        cls._entries[doc_id] = (row["lat"], row["lon"], source)
+        try:
+            await db.collection(MongoCollections.REF_DISTRICT_CENTROIDS).document(doc_id).set(row, merge=True)
+        except Exception as exc:
+            logger.warning(f"Could not persist centroid {doc_id}: {exc}")
+
+
+async def get_cached_user_coordinates(user_id: str) -> Optional[dict[str, Any]]:
+    cached = await cache_get(USER_COORDS_CACHE_NS, user_id)
+    return cached if isinstance(cached, dict) else None
+
+
+async def set_cached_user_coordinates(user_id: str, resolution: dict[str, Any]) -> None:
+    await cache_set(USER_COORDS_CACHE_NS, resolution, user_id, ttl=USER_COORDS_CACHE_TTL)
+
+
+async def invalidate_user_coordinates(user_id: str) -> None:
+    """Called by profile writers so the next weather request re-resolves the farm location."""
+    await cache_delete(USER_COORDS_CACHE_NS, user_id)
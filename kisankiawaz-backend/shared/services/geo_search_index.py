@@ -0,0 +1,354 @@
+"""Memory-mapped village/PIN search index built offline from ``ref_pin_master``.
+
+Village autocomplete used to stream up to 20,000 PIN master documents per
+query and score each one in Python. This module compiles the collection into
+one compact file (``scripts/build_geo_search_index.py``) that the geo service
+memory-maps, so a lookup is a few binary searches over shared pages.
+
+File layout (native little-endian u32, read via ``memoryview.cast``)::
+
+    magic (8) | header length (u32) | header JSON
+    records    utf-8 "village\\tsubdistrict\\tdistrict\\tstate\\tpincode" rows
+    offsets    u32[n + 1] byte offsets of each record inside ``records``
+    grams      (crc32 of gram, postings start, postings count) u32 triples, sorted
+    postings   u32 record ids, ascending per gram
+
+Records are sorted by state, so a state partition is a contiguous id range
+and every postings list can be sliced to it with ``bisect``. Grams are
+character trigrams of each word with a ``$`` word-start marker, which gives
+prefix autocomplete and tolerates roughly one typo per five characters.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+logger = logging.getLogger("kisankiawaz.geo.search_index")
+
+MAGIC = b"KKGEOIX1"
+INDEX_PATH = os.getenv(
+    "GEO_SEARCH_INDEX_PATH",
+    str(Path(__file__).resolve().parents[2] / "data" / "geo_search_index.bin"),
+)
+# How often a running process checks whether the file was rebuilt.
+_RELOAD_CHECK_SECONDS = float(os.getenv("GEO_SEARCH_INDEX_RELOAD_SECONDS", "60"))
+
+
+def normalize(value: Any) -> str:
+    return " ".join(str(value or "").strip().lower().split())
+
+
+def word_grams(word: str) -> list[str]:
+    padded = f"${word}"
+    if len(padded) <= 3:
+        return [padded]
+    return [padded[i : i + 3] for i in range(len(padded) - 2)]
+
+
+def text_grams(text: str) -> set[str]:
+    grams: set[str] = set()
+    for word in normalize(text).split(" "):
+        if word:
+            grams.update(word_grams(word))
+    return grams
+
+
+def _village_grams(village: str) -> set[str]:
+    """``^``-marked word-start grams of the village name, used to favour village hits."""
+    return {f"^{word[:2]}" for word in normalize(village).split(" ") if word}
+
+
+def _gram_hash(gram: str) -> int:
+    return zlib.crc32(gram.encode("utf-8"))
+
+
+def _typo_budget(word: str) -> int:
+    if word.isdigit() or len(word) < 5:
+        return 0
+    return 1 if len(word) < 9 else 2
+
+
+def pin_record(data: dict[str, Any]) -> tuple[str, str, str, str, str]:
+    """The five indexed fields of a ``ref_pin_master`` document."""
+    village = data.get("village_name") or data.get("village") or data.get("office_name") or ""
+    subdistrict = data.get("subdistrict_name") or data.get("taluk") or ""
+    return tuple(  # type: ignore[return-value]
+        str(v or "").replace("\t", " ").replace("\n", " ").strip()
+        for v in (village, subdistrict, data.get("district_name", ""), data.get("state_name", ""), data.get("pincode", ""))
+    )
+
+
+def build_index_bytes(rows: Iterable[dict[str, Any]]) -> bytes:
+    """Serialize PIN master rows into the on-disk index format."""
+    records: dict[tuple[str, str], tuple[str, str, str, str, str]] = {}
+    for row in rows:
+        rec = pin_record(row)
+        if not rec[0] and not rec[4]:
+            continue
+        records.setdefault((normalize(rec[0]), rec[4]), rec)
+    ordered = sorted(records.values(), key=lambda r: (normalize(r[3]), normalize(r[0]), r[4]))
+
+    blob = bytearray()
+    offsets = [0]
+    postings: dict[int, list[int]] = {}
+    states: dict[str, dict[str, Any]] = {}
+    for rid, rec in enumerate(ordered):
+        blob += "\t".join(rec).encode("utf-8")
+        offsets.append(len(blob))
+        state_key = normalize(rec[3])
+        part = states.setdefault(state_key, {"name": rec[3], "start": rid, "end": rid})
+        part["end"] = rid + 1
+        for gram in text_grams(" ".join(rec)) | _village_grams(rec[0]):
+            postings.setdefault(_gram_hash(gram), []).append(rid)
+
+    # Keep every u32 section 4-byte aligned inside the mapping.
+    blob += b"\0" * (-len(blob) % 4)
+    gram_table = bytearray()
+    posting_blob = bytearray()
+    cursor = 0
+    for gram_hash in sorted(postings):
+        ids = postings[gram_hash]
+        gram_table += struct.pack("<III", gram_hash, cursor, len(ids))
+        posting_blob += struct.pack(f"<{len(ids)}I", *ids)
+        cursor += len(ids)
+
+    header = json.dumps(
+        {
+            "version": 1,
+            "built_at": time.time(),
+            "records": len(ordered),
+            "grams": len(postings),
+            "states": states,
+            "sections": {
+                "records": len(blob),
+                "offsets": len(offsets) * 4,
+                "grams": len(gram_table),
+                "postings": len(posting_blob),
+            },
+        },
+        separators=(",", ":"),
+    ).encode("utf-8")
+    header += b" " * (-(len(MAGIC) + 4 + len(header)) % 4)
+    return b"".join(
+        [
+            MAGIC,
+            struct.pack("<I", len(header)),
+            header,
+            bytes(blob),
+            struct.pack(f"<{len(offsets)}I", *offsets),
+            bytes(gram_table),
+            bytes(posting_blob),
+        ]
+    )
+
+
+def write_index(path: str, rows: Iterable[dict[str, Any]]) -> int:
+    """Build and atomically replace the index file; returns its size in bytes."""
+    data = build_index_bytes(rows)
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # A private temp file per writer: every worker may build the index at startup.
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, prefix=target.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return len(data)
+
+
+def _match_score(haystack: str, query: str, tokens: list[str]) -> float:
+    score = 0.0
+    if query in haystack:
+        score += 4.0
+    hits = 0
+    for token in tokens:
+        if token in haystack:
+            hits += 1
+            score += 1.0
+        if haystack.startswith(token):
+            score += 0.25
+    if tokens and hits == len(tokens):
+        score += 1.0
+    elif hits:
+        score += 0.3
+    return score
+
+
+def _fuzzy_bonus(words: list[str], tokens: list[str]) -> float:
+    """Partial credit for query tokens that only match a record word approximately."""
+    bonus = 0.0
+    for token in tokens:
+        if any(token in w for w in words):
+            continue
+        best = max((SequenceMatcher(None, token, w[: len(token) + 2]).ratio() for w in words), default=0.0)
+        if best >= 0.75:
+            bonus += best
+    return bonus
+
+
+class GeoSearchIndex:
+    """Read-only view over one memory-mapped index file."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        st = os.fstat(self._file.fileno())
+        self.stamp = (st.st_ino, st.st_mtime_ns)
+        if self._mm[:8] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a geo search index")
+        (header_len,) = struct.unpack_from("<I", self._mm, 8)
+        start = 12 + header_len
+        self.header = json.loads(self._mm[12:start].decode("utf-8"))
+        sections = self.header["sections"]
+        view = memoryview(self._mm)
+        self._records = view[start : start + sections["records"]]
+        start += sections["records"]
+        self._offsets = view[start : start + sections["offsets"]].cast("I")
+        start += sections["offsets"]
+        self._gram_table = view[start : start + sections["grams"]].cast("I")
+        self._gram_hashes = self._gram_table[0::3]
+        start += sections["grams"]
+        self._postings = view[start : start + sections["postings"]].cast("I")
+        self.states: dict[str, dict[str, Any]] = self.header.get("states", {})
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+        except BufferError:
+            # Section views are still exported; the mapping goes away with them.
+            pass
+        self._file.close()
+
+    def __len__(self) -> int:
+        return int(self.header.get("records", 0))
+
+    def record(self, rid: int) -> tuple[str, ...]:
+        return tuple(bytes(self._records[self._offsets[rid] : self._offsets[rid + 1]]).decode("utf-8").split("\t"))
+
+    def _postings_in(self, gram: str, part_lo: int, part_hi: int) -> memoryview:
+        """Ascending record ids for *gram*, limited to the ``[part_lo, part_hi)`` partition."""
+        gram_hash = _gram_hash(gram)
+        i = bisect_left(self._gram_hashes, gram_hash)
+        if i == len(self._gram_hashes) or self._gram_hashes[i] != gram_hash:
+            return self._postings[0:0]
+        lo = self._gram_table[3 * i + 1]
+        hi = lo + self._gram_table[3 * i + 2]
+        lo = bisect_left(self._postings, part_lo, lo, hi)
+        hi = bisect_left(self._postings, part_hi, lo, hi)
+        return self._postings[lo:hi]
+
+    def _partition(self, state: Optional[str]) -> Optional[tuple[int, int]]:
+        key = normalize(state)
+        if not key:
+            return 0, len(self)
+        part = self.states.get(key)
+        if part is None:
+            part = next((p for k, p in self.states.items() if key in k or k in key), None)
+        return (part["start"], part["end"]) if part else None
+
+    def search(self, query: str, state: Optional[str] = None, limit: int = 10) -> list[dict[str, Any]]:
+        normalized_query = normalize(query)
+        tokens = [t for t in normalized_query.split(" ") if t]
+        partition = self._partition(state)
+        if not tokens or partition is None or not len(self):
+            return []
+        part_lo, part_hi = partition
+
+        grams = sorted({g for t in tokens for g in word_grams(t)})
+        counts: Counter[int] = Counter()
+        for gram in grams:
+            counts.update(self._postings_in(gram, part_lo, part_hi))
+        village_hits: Counter[int] = Counter()
+        for gram in _village_grams(tokens[0]):
+            village_hits.update(self._postings_in(gram, part_lo, part_hi))
+
+        # Each edit touches at most three grams, so a record within the typo
+        # budget shares at least ``threshold`` grams with the query.
+        threshold = max(1, len(grams) - 3 * sum(_typo_budget(t) for t in tokens))
+        candidates = heapq.nsmallest(
+            max(limit * 20, 200),
+            ((-hits - village_hits[rid], rid) for rid, hits in counts.items() if hits >= threshold),
+        )
+
+        items = []
+        for rank, rid in candidates:
+            village, subdistrict, district, state_name, pincode = self.record(rid)
+            haystack = normalize(" ".join((village, subdistrict, district, state_name, pincode)))
+            score = _match_score(haystack, normalized_query, tokens)
+            score += _fuzzy_bonus(haystack.split(" "), tokens) - rank / len(grams)
+            if normalize(village).startswith(tokens[0]):
+                score += 0.5
+            items.append(
+                {
+                    "village_name": village,
+                    "district_name": district,
+                    "state_name": state_name,
+                    "pincode": pincode,
+                    "source": "pin_index",
+                    "score": round(score, 4),
+                }
+            )
+        items.sort(key=lambda item: (-item["score"], item["village_name"]))
+        return items[:limit]
+
+
+class GeoIndexRegistry:
+    """Process-wide handle on the current index file, swapped when it is rebuilt."""
+
+    _index: Optional[GeoSearchIndex] = None
+    _checked_at = 0.0
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, path: str = INDEX_PATH) -> Optional[GeoSearchIndex]:
+        now = time.monotonic()
+        index = cls._index
+        if index is not None and index.path == path and now - cls._checked_at < _RELOAD_CHECK_SECONDS:
+            return index
+        with cls._lock:
+            cls._checked_at = now
+            try:
+                st = os.stat(path)
+            except OSError:
+                return cls._index if cls._index is not None and cls._index.path == path else None
+            if cls._index is not None and cls._index.path == path and cls._index.stamp == (st.st_ino, st.st_mtime_ns):
+                return cls._index
+            try:
+                fresh = GeoSearchIndex(path)
+            except Exception as exc:
+                logger.warning(f"Could not open geo search index {path}: {exc}")
+                return cls._index
+            # Old mappings are left to the garbage collector: a concurrent search may still hold them.
+            cls._index = fresh
+            logger.info(f"Loaded geo search index {path} ({len(fresh)} records)")
+            return fresh
+
+    @classmethod
+    def reset(cls) -> None:
+        with cls._lock:
+            cls._index = None
+            cls._checked_at = 0.0
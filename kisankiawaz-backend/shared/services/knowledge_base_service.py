@@ -4,14 +4,33 @@ Continuously embeds government schemes, mandi data, equipment info,
 and farming knowledge into Qdrant for the chatbot and agentic systems.
 """
 
+import hashlib
+import json
 import uuid
 import logging
 import warnings
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Payload fields that change on every write and must not affect the content hash.
+_VOLATILE_PAYLOAD_KEYS = {"updated_at", "content_hash", "source_id"}
+# Marks points written by this indexer; other writers share the payload types.
+_SYNC_SOURCE = "kb_sync"
+
+
+def _stable_point_id(prefix: str, value: str) -> str:
+    digest = hashlib.sha256(f"{prefix}:{value}".encode("utf-8")).hexdigest()
+    # Qdrant point IDs must be uint64 or UUID strings.
+    return str(uuid.UUID(digest[:32]))
+
+
+def _content_hash(payload: Dict[str, Any]) -> str:
+    stable = {k: v for k, v in payload.items() if k not in _VOLATILE_PAYLOAD_KEYS}
+    raw = json.dumps(stable, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
 
 class KnowledgeBaseService:
     """Manages Qdrant knowledge base: embedding, search, and maintenance."""
@@ -37,6 +56,9 @@ class KnowledgeBaseService:
     def _embed_text(self, text: str) -> List[float]:
         return next(self._get_model().embed([text])).tolist()
 
+    def _embed_texts(self, texts: List[str]) -> List[List[float]]:
+        return [v.tolist() for v in self._get_model().embed(texts)]
+
     def _get_qdrant(self):
         if self._qdrant is None:
             from qdrant_client import QdrantClient
@@ -69,11 +91,100 @@ class KnowledgeBaseService:
         if collection_name in existing:
             client.delete_collection(collection_name=collection_name)
 
+    def _existing_hashes(self, collection_name: str, types: List[str]) -> Dict[str, Optional[str]]:
+        """Return ``point_id -> content_hash`` for this indexer's points of the given payload types."""
+        from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue
+
+        client = self._get_qdrant()
+        scroll_filter = Filter(must=[
+            FieldCondition(key="type", match=MatchAny(any=types)),
+            FieldCondition(key="source", match=MatchValue(value=_SYNC_SOURCE)),
+        ])
+        existing: Dict[str, Optional[str]] = {}
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                scroll_filter=scroll_filter,
+                limit=512,
+                offset=offset,
+                with_payload=["content_hash"],
+                with_vectors=False,
+            )
+            for point in points:
+                existing[str(point.id)] = (point.payload or {}).get("content_hash")
+            if offset is None:
+                return existing
+
+    def _sync_points(
+        self,
+        collection_name: str,
+        documents: List[Tuple[str, Dict[str, Any]]],
+        types: List[str],
+        batch_size: int = 64,
+        complete: bool = True,
+    ) -> Dict[str, int]:
+        """Incrementally sync ``(source_id, payload)`` documents into a collection.
+
+        Point ids are derived from the source id and each payload carries a
+        content hash, so only new or changed documents are embedded. Only
+        points marked as written by this indexer are considered: those whose
+        source is missing from ``documents`` are deleted when ``complete``
+        says the documents are the whole set, not a partial batch. Points of
+        the same types written elsewhere (mandi fetcher, equipment seeding)
+        are never touched.
+        """
+        from qdrant_client.models import PointIdsList, PointStruct
+
+        client = self._get_qdrant()
+        self._ensure_collection(collection_name)
+        existing = self._existing_hashes(collection_name, types)
+
+        wanted: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for source_id, payload in documents:
+            point_id = _stable_point_id(collection_name, source_id)
+            payload = dict(payload, source_id=source_id, source=_SYNC_SOURCE)
+            payload["content_hash"] = _content_hash(payload)
+            wanted[point_id] = (source_id, payload)
+
+        changed = [
+            (point_id, payload)
+            for point_id, (_, payload) in wanted.items()
+            if existing.get(point_id) != payload["content_hash"]
+        ]
+        stale = [point_id for point_id in existing if complete and point_id not in wanted]
+
+        now = datetime.now(timezone.utc).isoformat()
+        for i in range(0, len(changed), batch_size):
+            batch = changed[i:i + batch_size]
+            vectors = self._embed_texts([payload["text"] for _, payload in batch])
+            client.upsert(
+                collection_name=collection_name,
+                points=[
+                    PointStruct(id=point_id, vector=vector, payload={**payload, "updated_at": now})
+                    for (point_id, payload), vector in zip(batch, vectors)
+                ],
+            )
+
+        for i in range(0, len(stale), 512):
+            client.delete(
+                collection_name=collection_name,
+                points_selector=PointIdsList(points=stale[i:i + 512]),
+            )
+
+        stats = {
+            "embedded": len(wanted),
+            "reembedded": len(changed),
+            "unchanged": len(wanted) - len(changed),
+            "deleted": len(stale),
+        }
+        logger.info(f"Synced {collection_name} ({', '.join(types)}): {stats}")
+        return stats
+
     # ── Embed Government Schemes ─────────────────────────────────
 
     async def embed_all_schemes(self) -> dict:
         """Embed all 28+ government schemes into scheme_knowledge collection."""
-        from qdrant_client.models import PointStruct
         from shared.core.constants import Qdrant
 
         try:
@@ -88,12 +199,8 @@ class KnowledgeBaseService:
                 logger.error("Cannot import government_schemes_data")
                 return {"embedded": 0, "error": "Module not found"}
 
-        model = self._get_model()
-        client = self._get_qdrant()
-        self._ensure_collection(Qdrant.SCHEME_KNOWLEDGE)
-
         schemes = get_all_schemes()
-        points = []
+        documents: List[Tuple[str, Dict[str, Any]]] = []
 
         for scheme in schemes:
             # English text
@@ -114,64 +221,46 @@ class KnowledgeBaseService:
                 f"आवश्यक दस्तावेज: {', '.join(scheme.get('required_documents', [])[:3])}."
             )
 
-            vector = self._embed_text(text_en)
-            points.append(PointStruct(
-                id=uuid.uuid4().hex,
-                vector=vector,
-                payload={
-                    "text": text_en,
-                    "text_hi": text_hi,
-                    "scheme_name": scheme["name"],
-                    "short_name": scheme.get("short_name", ""),
-                    "category": scheme.get("category", ""),
-                    "state": scheme.get("state", "All"),
-                    "benefits": scheme.get("benefits", []),
-                    "required_documents": scheme.get("required_documents", []),
-                    "eligibility": scheme.get("eligibility", []),
-                    "application_url": scheme.get("application_url", ""),
-                    "helpline": scheme.get("helpline", ""),
-                    "type": "government_scheme",
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                },
-            ))
+            documents.append((f"scheme:{scheme['name']}", {
+                "text": text_en,
+                "text_hi": text_hi,
+                "scheme_name": scheme["name"],
+                "short_name": scheme.get("short_name", ""),
+                "category": scheme.get("category", ""),
+                "state": scheme.get("state", "All"),
+                "benefits": scheme.get("benefits", []),
+                "required_documents": scheme.get("required_documents", []),
+                "eligibility": scheme.get("eligibility", []),
+                "application_url": scheme.get("application_url", ""),
+                "helpline": scheme.get("helpline", ""),
+                "type": "government_scheme",
+            }))
 
             # Also embed individual benefits for granular search
             for benefit in scheme.get("benefits", []):
                 benefit_text = f"Under {scheme['name']}: {benefit}"
-                vec = self._embed_text(benefit_text)
-                points.append(PointStruct(
-                    id=uuid.uuid4().hex,
-                    vector=vec,
-                    payload={
-                        "text": benefit_text,
-                        "scheme_name": scheme["name"],
-                        "type": "scheme_benefit",
-                        "updated_at": datetime.now(timezone.utc).isoformat(),
-                    },
-                ))
-
-        if points:
-            # Upsert in batches
-            batch_size = 100
-            for i in range(0, len(points), batch_size):
-                client.upsert(
-                    collection_name=Qdrant.SCHEME_KNOWLEDGE,
-                    points=points[i:i + batch_size],
-                )
+                documents.append((f"scheme_benefit:{scheme['name']}:{benefit}", {
+                    "text": benefit_text,
+                    "scheme_name": scheme["name"],
+                    "type": "scheme_benefit",
+                }))
 
-        logger.info(f"Embedded {len(points)} scheme knowledge points")
-        return {"embedded": len(points), "schemes": len(schemes)}
+        stats = self._sync_points(
+            Qdrant.SCHEME_KNOWLEDGE,
+            documents,
+            types=["government_scheme", "scheme_benefit"],
+        )
+        return {**stats, "schemes": len(schemes)}
 
     # ── Embed Market Prices ──────────────────────────────────────
 
-    async def embed_market_prices(self, prices: List[Dict]) -> dict:
-        """Embed market prices into market_knowledge collection."""
-        from qdrant_client.models import PointStruct
-        from shared.core.constants import Qdrant
+    async def embed_market_prices(self, prices: List[Dict], complete: bool = False) -> dict:
+        """Embed market prices into market_knowledge collection.
 
-        model = self._get_model()
-        client = self._get_qdrant()
-        self._ensure_collection(Qdrant.MARKET_KNOWLEDGE)
+        ``prices`` is usually a partial read of the price table, so commodities
+        missing from it keep their points unless ``complete`` is set.
+        """
+        from shared.core.constants import Qdrant
 
         # Group by commodity
         commodity_data = {}
@@ -185,7 +274,7 @@ class KnowledgeBaseService:
             commodity_data[crop]["states"].add(p.get("state", ""))
             commodity_data[crop]["mandis"].add(p.get("mandi_name", p.get("market", "")))
 
-        points = []
+        documents: List[Tuple[str, Dict[str, Any]]] = []
         for crop, data in commodity_data.items():
             valid_prices = [pr for pr in data["prices"] if pr and pr > 0]
             if not valid_prices:
@@ -199,31 +288,21 @@ class KnowledgeBaseService:
                 f"Available in {len(data['mandis'])} mandis across {len(data['states'])} states."
             )
 
-            vector = self._embed_text(text)
-            points.append(PointStruct(
-                id=uuid.uuid4().hex,
-                vector=vector,
-                payload={
-                    "text": text,
-                    "commodity": crop,
-                    "avg_price": avg,
-                    "min_price": mn,
-                    "max_price": mx,
-                    "type": "market_price",
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                },
-            ))
-
-        if points:
-            client.upsert(collection_name=Qdrant.MARKET_KNOWLEDGE, points=points)
-
-        return {"embedded": len(points)}
+            documents.append((f"market_price:{crop}", {
+                "text": text,
+                "commodity": crop,
+                "avg_price": avg,
+                "min_price": mn,
+                "max_price": mx,
+                "type": "market_price",
+            }))
+
+        return self._sync_points(Qdrant.MARKET_KNOWLEDGE, documents, types=["market_price"], complete=complete)
 
     # ── Embed Equipment Data ─────────────────────────────────────
 
     async def embed_equipment(self) -> dict:
         """Embed all equipment rental data into farming_general collection."""
-        from qdrant_client.models import PointStruct
         from shared.core.constants import Qdrant
 
         try:
@@ -239,12 +318,8 @@ class KnowledgeBaseService:
                 logger.error("Cannot import equipment_rental_data")
                 return {"embedded": 0, "error": "Module not found"}
 
-        model = self._get_model()
-        client = self._get_qdrant()
-        self._ensure_collection(Qdrant.FARMING_GENERAL)
-
         equipment = get_all_equipment()
-        points = []
+        documents: List[Tuple[str, Dict[str, Any]]] = []
 
         for equip in equipment:
             rates = equip.get("rental_rates", {})
@@ -261,23 +336,14 @@ class KnowledgeBaseService:
                 f"Availability: {equip.get('availability', 'N/A')}."
             )
 
-            vector = self._embed_text(text)
-            points.append(PointStruct(
-                id=uuid.uuid4().hex,
-                vector=vector,
-                payload={
-                    "text": text,
-                    "equipment_name": equip["name"],
-                    "category": equip.get("category", ""),
-                    "type": "equipment_rental",
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                },
-            ))
-
-        if points:
-            client.upsert(collection_name=Qdrant.FARMING_GENERAL, points=points)
+            documents.append((f"equipment:{equip['name']}", {
+                "text": text,
+                "equipment_name": equip["name"],
+                "category": equip.get("category", ""),
+                "type": "equipment_rental",
+            }))
 
-        return {"embedded": len(points)}
+        return self._sync_points(Qdrant.FARMING_GENERAL, documents, types=["equipment_rental"])
 
     # ── Semantic Search ──────────────────────────────────────────
 
@@ -339,8 +405,11 @@ class KnowledgeBaseService:
     async def full_rebuild(self, db=None, strict: bool = False) -> dict:
         """Full knowledge base rebuild.
 
-        When strict=True, collections are reset first and any failure triggers cleanup
-        so the system does not remain in a partially indexed state.
+        By default the rebuild is incremental: only new or changed documents are
+        re-embedded and points whose source disappeared are removed, so a
+        no-change run costs a scroll per collection. When strict=True,
+        collections are reset first and any failure triggers cleanup so the
+        system does not remain in a partially indexed state.
         """
         from shared.core.constants import Qdrant
 
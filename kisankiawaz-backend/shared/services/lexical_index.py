@@ -0,0 +1,311 @@
+"""In-memory BM25 index, exact-name lookup and reciprocal rank fusion.
+
+Dense multilingual embeddings are weak on acronyms and exact product names
+("PM-KISAN", "KCC", "rotavator"). This module provides a small lexical index
+that complements Qdrant: exact-name hits are answered from a dict, everything
+else is ranked with BM25 and can be fused with vector results through
+reciprocal rank fusion (RRF).
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("kisankiawaz.lexical_index")
+
+_TOKEN_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_KEY_RE = re.compile(r"[\W_]+", re.UNICODE)
+_STOPWORDS = {
+    "a", "an", "the", "of", "for", "and", "or", "in", "on", "to", "is", "are",
+    "what", "how", "me", "my", "i", "about", "with", "under", "near", "ka", "ki", "ke",
+}
+# Words that decorate a name query without changing which entity is meant.
+_NAME_FILLERS = _STOPWORDS | {
+    "scheme", "schemes", "yojana", "details", "detail", "info", "information",
+    "eligibility", "eligible", "apply", "benefit", "benefits", "documents",
+    "rent", "rental", "rentals", "hire", "price", "rate", "rates", "machine",
+    "equipment", "available", "book", "booking", "tell", "show", "batao",
+}
+
+
+def normalize_key(text: Any) -> str:
+    """Collapse text to a lowercase alphanumeric key ("PM-KISAN" -> "pmkisan")."""
+    value = unicodedata.normalize("NFKC", str(text or "")).lower()
+    return _KEY_RE.sub("", value)
+
+
+def tokenize(text: Any) -> List[str]:
+    """Lowercase word tokens plus joined forms of hyphenated/dotted words."""
+    value = unicodedata.normalize("NFKC", str(text or "")).lower()
+    tokens: List[str] = []
+    for chunk in value.split():
+        parts = _TOKEN_RE.findall(chunk)
+        tokens.extend(p for p in parts if p not in _STOPWORDS)
+        if len(parts) > 1:
+            tokens.append("".join(parts))
+    return tokens
+
+
+def name_query_key(query: str) -> str:
+    """Key for an exact-name lookup: the query with filler words removed."""
+    value = unicodedata.normalize("NFKC", str(query or "")).lower()
+    kept = [w for w in value.split() if normalize_key(w) not in _NAME_FILLERS]
+    return normalize_key(" ".join(kept))
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[str]:
+    """Fuse several ranked id lists; ids ranked high in any list float up."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return [doc_id for doc_id, _ in sorted(scores.items(), key=lambda kv: kv[1], reverse=True)]
+
+
+class BM25Index:
+    """Incrementally updatable BM25 (Okapi) index over string document ids."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._doc_tokens: Dict[str, Dict[str, int]] = {}
+        self._doc_len: Dict[str, int] = {}
+        self._total_len = 0
+        self._names: Dict[str, set] = defaultdict(set)
+        self._doc_names: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._doc_len)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._doc_len
+
+    def copy(self) -> "BM25Index":
+        """Independent copy to mutate while readers keep using this one."""
+        clone = BM25Index(self.k1, self.b)
+        clone._postings = defaultdict(dict, {t: dict(p) for t, p in self._postings.items()})
+        clone._doc_tokens = dict(self._doc_tokens)
+        clone._doc_len = dict(self._doc_len)
+        clone._total_len = self._total_len
+        clone._names = defaultdict(set, {k: set(ids) for k, ids in self._names.items()})
+        clone._doc_names = dict(self._doc_names)
+        return clone
+
+    # ── mutation ─────────────────────────────────────────────────
+
+    def upsert(self, doc_id: str, text: str, names: Iterable[str] = ()) -> None:
+        """Index *text* (and exact *names*) under *doc_id*, replacing any prior version."""
+        self.remove(doc_id)
+        counts: Dict[str, int] = defaultdict(int)
+        for token in tokenize(text):
+            counts[token] += 1
+        for token, tf in counts.items():
+            self._postings[token][doc_id] = tf
+        self._doc_tokens[doc_id] = dict(counts)
+        length = sum(counts.values())
+        self._doc_len[doc_id] = length
+        self._total_len += length
+
+        keys = [k for k in {normalize_key(n) for n in names} if k]
+        for key in keys:
+            self._names[key].add(doc_id)
+        self._doc_names[doc_id] = keys
+
+    def remove(self, doc_id: str) -> None:
+        tokens = self._doc_tokens.pop(doc_id, None)
+        if tokens is None:
+            return
+        for token in tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self._postings[token]
+        self._total_len -= self._doc_len.pop(doc_id, 0)
+        for key in self._doc_names.pop(doc_id, []):
+            ids = self._names.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del self._names[key]
+
+    # ── queries ──────────────────────────────────────────────────
+
+    def exact(self, query: str) -> List[str]:
+        """Ids whose declared name/acronym equals the query (fillers ignored)."""
+        key = name_query_key(query)
+        if not key:
+            return []
+        hits = self._names.get(key) or self._names.get(normalize_key(query))
+        return sorted(hits) if hits else []
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        accept: Optional[Callable[[str], bool]] = None,
+    ) -> List[Tuple[str, float]]:
+        """Return ``(doc_id, score)`` pairs ranked by BM25."""
+        n_docs = len(self._doc_len)
+        if not n_docs:
+            return []
+        query_tokens = tokenize(query)
+        words = list(query_tokens)
+        # Adjacent-word compounds let "pm kisan" match a document's "pmkisan".
+        words.extend(a + b for a, b in zip(query_tokens, query_tokens[1:]))
+        avgdl = self._total_len / n_docs if n_docs else 1.0
+
+        scores: Dict[str, float] = defaultdict(float)
+        for token in set(words):
+            posting = self._postings.get(token)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                norm = self.k1 * (1 - self.b + self.b * self._doc_len[doc_id] / avgdl)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        if accept is not None:
+            ranked = [item for item in ranked if accept(item[0])]
+        return ranked[:limit]
+
+
+class CorpusGeneration:
+    """One published state of a :class:`RefCorpus`; never mutated once published."""
+
+    __slots__ = ("index", "rows", "version")
+
+    def __init__(self, index: BM25Index, rows: Dict[str, Dict[str, Any]], version: int) -> None:
+        self.index = index
+        self.rows = rows
+        self.version = version
+
+
+class RefCorpus:
+    """A Mongo reference collection mirrored in memory with a BM25 index.
+
+    The first access loads every document. Later accesses re-read only rows
+    whose ``_ingested_at`` is newer than the last seen watermark (at most every
+    ``refresh_seconds``) and do a full reload every ``full_reload_seconds`` to
+    drop rows that were deleted at the source.
+
+    Refreshes build a new :class:`CorpusGeneration` off to the side (a copy
+    for incremental changes, a fresh index for full reloads) and publish it
+    with a single assignment, so lock-free readers always see a complete,
+    consistent index/rows pair. Hold on to the generation returned by
+    :meth:`ensure_fresh` for the duration of a request.
+    """
+
+    def __init__(
+        self,
+        collection_name: str,
+        doc_id: Callable[[str, Dict[str, Any]], str],
+        text: Callable[[Dict[str, Any]], str],
+        names: Callable[[Dict[str, Any]], Iterable[str]],
+        include: Callable[[Dict[str, Any]], bool] = lambda row: True,
+        refresh_seconds: float = 60.0,
+        full_reload_seconds: float = 1800.0,
+        db_factory: Optional[Callable[[], Any]] = None,
+    ) -> None:
+        self.collection_name = collection_name
+        self._doc_id = doc_id
+        self._text = text
+        self._names = names
+        self._include = include
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_seconds = full_reload_seconds
+        self._db_factory = db_factory
+        self._lock = threading.Lock()
+        self._current = CorpusGeneration(BM25Index(), {}, 0)
+        self._watermark = ""
+        self._checked_at = 0.0
+        self._loaded_at = 0.0
+
+    @property
+    def index(self) -> BM25Index:
+        return self._current.index
+
+    @property
+    def rows(self) -> Dict[str, Dict[str, Any]]:
+        return self._current.rows
+
+    @property
+    def version(self) -> int:
+        return self._current.version
+
+    def _db(self):
+        if self._db_factory is not None:
+            return self._db_factory()
+        from shared.db.mongodb import get_db
+
+        return get_db()
+
+    def _apply(
+        self,
+        snapshots: Iterable[Any],
+        index: BM25Index,
+        rows: Dict[str, Dict[str, Any]],
+        watermark: str,
+    ) -> Tuple[int, str]:
+        """Apply *snapshots* to the unpublished *index*/*rows*; return (changed, new watermark)."""
+        changed = 0
+        for snap in snapshots:
+            row = snap.to_dict() or {}
+            doc_id = self._doc_id(snap.id, row)
+            ingested = str(row.get("_ingested_at") or "")
+            if ingested > watermark:
+                watermark = ingested
+            if not self._include(row):
+                if doc_id in rows:
+                    rows.pop(doc_id, None)
+                    index.remove(doc_id)
+                    changed += 1
+                continue
+            rows[doc_id] = row
+            index.upsert(doc_id, self._text(row), self._names(row))
+            changed += 1
+        return changed, watermark
+
+    def ensure_fresh(self) -> CorpusGeneration:
+        """Load or incrementally refresh the corpus; cheap when recently checked."""
+        now = time.monotonic()
+        if self._loaded_at and now - self._checked_at < self.refresh_seconds:
+            return self._current
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded_at and now - self._checked_at < self.refresh_seconds:
+                return self._current
+            current = self._current
+            try:
+                collection = self._db().collection(self.collection_name)
+                if not self._loaded_at or now - self._loaded_at >= self.full_reload_seconds:
+                    index, rows = BM25Index(), {}
+                    changed, watermark = self._apply(collection.stream(), index, rows, "")
+                    self._watermark = watermark
+                    self._current = CorpusGeneration(index, rows, current.version + (1 if changed else 0))
+                    self._loaded_at = now
+                    logger.info(f"Loaded {len(rows)} {self.collection_name} rows into lexical index")
+                else:
+                    snapshots = list(collection.where("_ingested_at", ">", self._watermark).stream())
+                    if snapshots:
+                        index, rows = current.index.copy(), dict(current.rows)
+                        changed, watermark = self._apply(snapshots, index, rows, self._watermark)
+                        self._watermark = watermark
+                        if changed:
+                            self._current = CorpusGeneration(index, rows, current.version + 1)
+            except Exception as exc:
+                if not self._loaded_at:
+                    raise
+                # Keep serving the last good generation; retry after the refresh interval.
+                logger.warning(f"Lexical index refresh failed for {self.collection_name}: {exc}")
+            self._checked_at = now
+        return self._current
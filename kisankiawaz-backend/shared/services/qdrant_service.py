@@ -1,7 +1,12 @@
 """Shared Qdrant vector search / upsert service using multilingual embeddings."""
 
 import logging
-from typing import List, Optional, Dict, Any
+import time
+from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from shared.core.config import get_settings
 from shared.core.constants import Qdrant as QdrantCollections
@@ -11,6 +16,95 @@ logger = logging.getLogger("kisankiawaz.qdrant_service")
 # Multilingual model for Hindi + English support
 _MODEL_NAME = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
 _VECTOR_DIM = QdrantCollections.VECTOR_DIM  # 768
+# Back-off before retrying payload indexes that failed to build (old server, permissions).
+_INDEX_RETRY_SECONDS = 600.0
+
+
+@dataclass(frozen=True)
+class CollectionSpec:
+    """Provisioning profile for a Qdrant collection.
+
+    ``payload_indexes`` maps payload field -> schema type name
+    (``keyword``, ``bool``, ``integer`` ...). ``large`` collections keep
+    original vectors on disk and, when QDRANT_SCALAR_QUANTIZATION is on, an
+    int8 copy in RAM that is rescored against the originals at query time.
+    """
+
+    payload_indexes: Dict[str, str] = field(default_factory=dict)
+    large: bool = False
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+
+
+COLLECTION_SPECS: Dict[str, CollectionSpec] = {
+    QdrantCollections.SCHEMES_SEMANTIC: CollectionSpec(
+        payload_indexes={
+            "scheme_id": "keyword",
+            "ministry": "keyword",
+            "beneficiary_state": "keyword",
+            "categories": "keyword",
+            "source": "keyword",
+        },
+    ),
+    QdrantCollections.SCHEMES_FAQ: CollectionSpec(payload_indexes={"scheme_id": "keyword"}),
+    QdrantCollections.MANDI_PRICE_INTELLIGENCE: CollectionSpec(
+        payload_indexes={
+            "commodity": "keyword",
+            "state": "keyword",
+            "district": "keyword",
+            "market": "keyword",
+            "trend": "keyword",
+        },
+        large=True,
+    ),
+    QdrantCollections.CROP_ADVISORY_KB: CollectionSpec(
+        payload_indexes={
+            "topic": "keyword",
+            "crop": "keyword",
+            "state": "keyword",
+            "source": "keyword",
+            "language": "keyword",
+        },
+    ),
+    QdrantCollections.GEO_LOCATION_INDEX: CollectionSpec(
+        payload_indexes={
+            "pincode": "keyword",
+            "district_name": "keyword",
+            "state_name": "keyword",
+            "source": "keyword",
+        },
+        large=True,
+    ),
+    QdrantCollections.EQUIPMENT_SEMANTIC: CollectionSpec(
+        payload_indexes={
+            "equipment_id": "keyword",
+            "state": "keyword",
+            "district": "keyword",
+            "category": "keyword",
+            "source": "keyword",
+            "is_active": "bool",
+        },
+        large=True,
+    ),
+    QdrantCollections.SCHEME_KNOWLEDGE: CollectionSpec(
+        payload_indexes={"type": "keyword", "state": "keyword", "category": "keyword"},
+    ),
+    QdrantCollections.MARKET_KNOWLEDGE: CollectionSpec(
+        payload_indexes={"type": "keyword", "commodity": "keyword"},
+    ),
+    QdrantCollections.FARMING_GENERAL: CollectionSpec(
+        payload_indexes={"type": "keyword", "category": "keyword"},
+    ),
+    QdrantCollections.CROP_KNOWLEDGE: CollectionSpec(
+        payload_indexes={"type": "keyword", "crop": "keyword", "state": "keyword"},
+    ),
+}
+
+
+def get_collection_spec(collection_name: str) -> CollectionSpec:
+    """Return the spec for a collection, resolving rebuild shadow names."""
+    base = collection_name.split("__", 1)[0]
+    return COLLECTION_SPECS.get(base, CollectionSpec())
 
 
 class QdrantService:
@@ -23,6 +117,10 @@ class QdrantService:
 
     _model = None
     _client = None
+    _indexed_collections: set = set()
+    # collection -> monotonic time before which failed index creation is not retried
+    _index_retry_at: Dict[str, float] = {}
+    _quantized_collections: Dict[str, bool] = {}
 
     @classmethod
     def _init(cls) -> None:
@@ -49,18 +147,139 @@ class QdrantService:
         cls._init()
         return cls._client
 
+    @classmethod
+    def _collection_names(cls) -> set:
+        """Return the names of concrete collections (aliases excluded)."""
+        cls._init()
+        return {c.name for c in cls._client.get_collections().collections}
+
+    @classmethod
+    def _alias_targets(cls) -> Dict[str, str]:
+        """Return a mapping of alias name -> concrete collection name."""
+        cls._init()
+        try:
+            aliases = cls._client.get_aliases().aliases
+        except Exception as exc:
+            logger.debug(f"Could not list Qdrant aliases: {exc}")
+            return {}
+        return {a.alias_name: a.collection_name for a in aliases}
+
     @classmethod
     def ensure_collection(cls, collection_name: str) -> None:
-        """Create a collection if it does not already exist."""
+        """Create a collection if it does not already exist (as a collection or alias).
+
+        New collections are provisioned from :data:`COLLECTION_SPECS`: HNSW
+        parameters, on-disk vectors and optional int8 quantization for large
+        collections, and the declared payload indexes.
+        """
         cls._init()
-        from qdrant_client.models import VectorParams, Distance
-        existing = [c.name for c in cls._client.get_collections().collections]
+        from qdrant_client.models import (
+            Distance,
+            HnswConfigDiff,
+            ScalarQuantization,
+            ScalarQuantizationConfig,
+            ScalarType,
+            VectorParams,
+        )
+        existing = cls._collection_names() | set(cls._alias_targets())
         if collection_name not in existing:
+            spec = get_collection_spec(collection_name)
+            quantization = None
+            if spec.large and get_settings().QDRANT_SCALAR_QUANTIZATION:
+                quantization = ScalarQuantization(
+                    scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+                )
             cls._client.create_collection(
                 collection_name=collection_name,
-                vectors_config=VectorParams(size=_VECTOR_DIM, distance=Distance.COSINE),
+                vectors_config=VectorParams(size=_VECTOR_DIM, distance=Distance.COSINE, on_disk=spec.large),
+                hnsw_config=HnswConfigDiff(m=spec.hnsw_m, ef_construct=spec.hnsw_ef_construct),
+                quantization_config=quantization,
             )
             logger.info(f"Created Qdrant collection: {collection_name}")
+        cls.ensure_payload_indexes(collection_name)
+
+    @classmethod
+    def _collection_info(cls, collection_name: str):
+        """Return collection info, or None when it cannot be read."""
+        try:
+            return cls._client.get_collection(collection_name=collection_name)
+        except Exception as exc:
+            logger.debug(f"Could not read Qdrant collection info for {collection_name}: {exc}")
+            return None
+
+    @classmethod
+    def ensure_payload_indexes(cls, collection_name: str, force: bool = False) -> List[str]:
+        """Create any declared payload index missing from *collection_name*.
+
+        Called when collections are provisioned or rebuilt, never on the search
+        path. Returns the fields created. A collection is skipped on later calls
+        once every declared index exists; after a failed creation it is retried
+        no sooner than ``_INDEX_RETRY_SECONDS`` later unless *force* is set.
+        """
+        cls._init()
+        if collection_name in cls._indexed_collections:
+            return []
+        if not force and time.monotonic() < cls._index_retry_at.get(collection_name, 0.0):
+            return []
+        spec = get_collection_spec(collection_name)
+        info = cls._collection_info(collection_name)
+        if info is None:
+            return []
+
+        from qdrant_client.models import PayloadSchemaType
+
+        present = set((getattr(info, "payload_schema", None) or {}).keys())
+        created: List[str] = []
+        failed: List[str] = []
+        for field_name, schema in spec.payload_indexes.items():
+            if field_name in present:
+                continue
+            try:
+                cls._client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=PayloadSchemaType(schema),
+                    wait=True,
+                )
+                created.append(field_name)
+            except Exception as exc:
+                failed.append(field_name)
+                logger.warning(f"Payload index {collection_name}.{field_name} not created: {exc}")
+        if created:
+            logger.info(f"Created payload indexes on {collection_name}: {created}")
+        if failed:
+            cls._index_retry_at[collection_name] = time.monotonic() + _INDEX_RETRY_SECONDS
+        else:
+            cls._indexed_collections.add(collection_name)
+            cls._index_retry_at.pop(collection_name, None)
+        return created
+
+    @classmethod
+    def _is_quantized(cls, collection_name: str) -> bool:
+        cached = cls._quantized_collections.get(collection_name)
+        if cached is not None:
+            return cached
+        info = cls._collection_info(collection_name)
+        quantized = bool(info is not None and getattr(info.config, "quantization_config", None))
+        cls._quantized_collections[collection_name] = quantized
+        return quantized
+
+    @classmethod
+    def _search_params(cls, collection_name: str, hnsw_ef: Optional[int] = None, exact: bool = False):
+        """Build per-query search params (hnsw_ef, quantization rescoring)."""
+        from qdrant_client.models import QuantizationSearchParams, SearchParams
+
+        settings = get_settings()
+        ef = hnsw_ef if hnsw_ef is not None else settings.QDRANT_SEARCH_HNSW_EF
+        quantization = None
+        if not exact and cls._is_quantized(collection_name):
+            quantization = QuantizationSearchParams(
+                rescore=True,
+                oversampling=max(1.0, settings.QDRANT_QUANTIZATION_OVERSAMPLING),
+            )
+        if not ef and not exact and quantization is None:
+            return None
+        return SearchParams(hnsw_ef=ef or None, exact=exact, quantization=quantization)
 
     @classmethod
     def embed_text(cls, text: str) -> List[float]:
@@ -81,16 +300,29 @@ class QdrantService:
         query_text: str,
         limit: int = 10,
         filter_payload: Optional[Dict[str, Any]] = None,
+        hnsw_ef: Optional[int] = None,
+        exact: bool = False,
+        query_vector: Optional[List[float]] = None,
     ) -> List:
-        """Semantic search: embed query, search Qdrant, return scored points."""
+        """Semantic search: embed query, search Qdrant, return scored points.
+
+        ``hnsw_ef`` trades latency for recall per query (defaults to
+        QDRANT_SEARCH_HNSW_EF); ``exact`` forces a brute-force scan, which is
+        what the recall benchmark uses as ground truth. Filtered fields are
+        backed by the declared payload indexes created at provisioning.
+        """
         cls._init()
         from qdrant_client.models import Filter, FieldCondition, MatchValue, MatchAny
 
-        vector = cls.embed_text(query_text)
+        vector = query_vector if query_vector is not None else cls.embed_text(query_text)
 
         # Build Qdrant filter from payload dict
         qdrant_filter = None
         if filter_payload:
+            declared = get_collection_spec(collection).payload_indexes
+            unindexed = [key for key in filter_payload if key not in declared]
+            if unindexed:
+                logger.debug(f"Filtering {collection} on unindexed payload fields: {unindexed}")
             conditions = []
             for key, value in filter_payload.items():
                 if isinstance(value, list):
@@ -101,12 +333,14 @@ class QdrantService:
 
         # qdrant-client renamed `search` to `query_points` in newer versions.
         # Keep compatibility with both client APIs.
+        search_params = cls._search_params(collection, hnsw_ef=hnsw_ef, exact=exact)
         if hasattr(cls._client, "search"):
             return cls._client.search(
                 collection_name=collection,
                 query_vector=vector,
                 limit=limit,
                 query_filter=qdrant_filter,
+                search_params=search_params,
             )
 
         queried = cls._client.query_points(
@@ -114,6 +348,7 @@ class QdrantService:
             query=vector,
             limit=limit,
             query_filter=qdrant_filter,
+            search_params=search_params,
         )
         return list(getattr(queried, "points", []) or [])
 
@@ -128,15 +363,153 @@ class QdrantService:
 
     @classmethod
     def delete_collection(cls, collection_name: str) -> None:
-        """Delete a Qdrant collection if it exists."""
+        """Delete a Qdrant collection if it exists.
+
+        When *collection_name* is an alias, the alias and the collection it
+        points to are both removed.
+        """
         cls._init()
-        existing = [c.name for c in cls._client.get_collections().collections]
-        if collection_name in existing:
+        target = cls._alias_targets().get(collection_name)
+        if target:
+            from qdrant_client.models import DeleteAlias, DeleteAliasOperation
+            cls._client.update_collection_aliases(
+                change_aliases_operations=[
+                    DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=collection_name)),
+                ]
+            )
+            collection_name = target
+        if collection_name in cls._collection_names():
             cls._client.delete_collection(collection_name=collection_name)
             logger.info(f"Deleted Qdrant collection: {collection_name}")
+        cls._forget(collection_name)
+
+    @classmethod
+    def _forget(cls, *collection_names: str) -> None:
+        """Drop cached per-collection provisioning state."""
+        for name in collection_names:
+            cls._indexed_collections.discard(name)
+            cls._quantized_collections.pop(name, None)
 
     @classmethod
     def recreate_collection(cls, collection_name: str) -> None:
         """Delete and re-create a collection (for full rebuild)."""
         cls.delete_collection(collection_name)
         cls.ensure_collection(collection_name)
+
+    # ── Zero-downtime rebuild ────────────────────────────────────
+
+    @classmethod
+    def switch_alias(cls, alias_name: str, collection_name: str) -> Optional[str]:
+        """Atomically point *alias_name* at *collection_name*.
+
+        Returns the collection the alias previously pointed to, if any. A
+        concrete collection still occupying the alias name (from before
+        aliases were introduced) is dropped first; that one-time migration is
+        the only moment the name is briefly unresolvable.
+        """
+        cls._init()
+        from qdrant_client.models import (
+            CreateAlias,
+            CreateAliasOperation,
+            DeleteAlias,
+            DeleteAliasOperation,
+        )
+
+        previous = cls._alias_targets().get(alias_name)
+        if previous is None and alias_name in cls._collection_names():
+            logger.warning(f"Migrating concrete collection '{alias_name}' to an alias")
+            cls._client.delete_collection(collection_name=alias_name)
+
+        operations = []
+        if previous is not None:
+            operations.append(DeleteAliasOperation(delete_alias=DeleteAlias(alias_name=alias_name)))
+        operations.append(
+            CreateAliasOperation(
+                create_alias=CreateAlias(collection_name=collection_name, alias_name=alias_name)
+            )
+        )
+        cls._client.update_collection_aliases(change_aliases_operations=operations)
+        cls._forget(alias_name)
+        logger.info(f"Alias {alias_name} -> {collection_name} (was {previous})")
+        return previous
+
+    @staticmethod
+    def _chunked(items: Iterable, size: int) -> Iterator[list]:
+        iterator = iter(items)
+        while True:
+            chunk = list(islice(iterator, size))
+            if not chunk:
+                return
+            yield chunk
+
+    @classmethod
+    def rebuild_collection(
+        cls,
+        alias_name: str,
+        documents: Iterable[Tuple[str, str, Dict[str, Any]]],
+        embed_batch_size: Optional[int] = None,
+        upsert_batch_size: Optional[int] = None,
+        upsert_workers: Optional[int] = None,
+    ) -> int:
+        """Rebuild *alias_name* from a stream of ``(point_id, text, payload)``.
+
+        Documents are embedded in batches via :meth:`embed_batch` and upserted
+        in chunks by a small thread pool into a fresh shadow collection. Only
+        once every point is written is the alias switched over, so readers keep
+        hitting the previous generation for the whole rebuild. On failure the
+        shadow collection is dropped and the alias is left untouched.
+        """
+        cls._init()
+        from qdrant_client.models import PointStruct
+
+        settings = get_settings()
+        embed_batch_size = max(1, embed_batch_size or settings.QDRANT_EMBED_BATCH_SIZE)
+        upsert_batch_size = max(1, upsert_batch_size or settings.QDRANT_UPSERT_BATCH_SIZE)
+        upsert_workers = max(1, upsert_workers or settings.QDRANT_UPSERT_WORKERS)
+
+        shadow = f"{alias_name}__{datetime.now(timezone.utc):%Y%m%d%H%M%S%f}"
+        cls.ensure_collection(shadow)
+
+        def _upsert(chunk: List) -> int:
+            cls._client.upsert(collection_name=shadow, points=chunk, wait=True)
+            return len(chunk)
+
+        total = 0
+        try:
+            with ThreadPoolExecutor(max_workers=upsert_workers, thread_name_prefix="qdrant-upsert") as pool:
+                pending: set = set()
+                buffer: List = []
+
+                def _drain(limit: int) -> None:
+                    nonlocal pending
+                    while len(pending) > limit:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+
+                for batch in cls._chunked(documents, embed_batch_size):
+                    vectors = cls.embed_batch([text for _, text, _ in batch])
+                    for (point_id, _, payload), vector in zip(batch, vectors):
+                        buffer.append(PointStruct(id=point_id, vector=vector, payload=payload))
+                    while len(buffer) >= upsert_batch_size:
+                        chunk, buffer = buffer[:upsert_batch_size], buffer[upsert_batch_size:]
+                        pending.add(pool.submit(_upsert, chunk))
+                        total += len(chunk)
+                        # Bound in-flight chunks so memory stays flat for large sources.
+                        _drain(upsert_workers * 2)
+                if buffer:
+                    pending.add(pool.submit(_upsert, buffer))
+                    total += len(buffer)
+                _drain(0)
+        except Exception:
+            logger.exception(f"Rebuild of {alias_name} failed; dropping shadow {shadow}")
+            cls._client.delete_collection(collection_name=shadow)
+            raise
+
+        previous = cls.switch_alias(alias_name, shadow)
+        if previous and previous != shadow:
+            cls._client.delete_collection(collection_name=previous)
+            cls._forget(previous)
+            logger.info(f"Dropped previous generation {previous}")
+        logger.info(f"Rebuilt {alias_name}: {total} points via {shadow}")
+        return total
@@ -0,0 +1,252 @@
+"""Materialized equipment rate-history aggregates.
+
+``ref_equipment_rate_history`` holds one row per provider, equipment and
+month. The rate-history endpoint only ever needs per-period averages for one
+equipment (optionally one state), so this module maintains
+``ref_equipment_rate_history_agg`` with one document per
+(normalized equipment key, state key, period) carrying sums, counts and the
+sample size. A ``state_key`` of ``_all`` holds the cross-state bucket.
+
+Writers call :func:`sync_rate_history_aggregates` (scripts) or its async
+twin after bulk loads, which only rewrites buckets whose values changed, and
+:func:`apply_rate_history_entry_async` after a single admin edit. Deployments
+that predate the table are backfilled once at equipment service startup by
+:func:`backfill_rate_history_aggregates`.
+"""
+
+from __future__ import annotations
+
+import re
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from shared.core.constants import MongoCollections
+from shared.db.redis import get_redis
+
+ALL_STATES = "_all"
+_BACKFILL_LOCK_KEY = "equipment:rate_history_agg:backfill:lock"
+_BACKFILL_LOCK_SECONDS = 900
+_METRICS = ("rate_daily", "rate_hourly", "rate_per_acre")
+_NUMERIC_FIELDS = tuple(f"{m}_{s}" for m in _METRICS for s in ("sum", "count")) + ("sample_size",)
+
+
+def equipment_key(value: Any) -> str:
+    return re.sub(r"[^a-z0-9]+", " ", str(value or "").strip().lower()).strip()
+
+
+def state_key(value: Any) -> str:
+    return str(value or "").strip().lower() or ALL_STATES
+
+
+def aggregate_doc_id(ekey: str, skey: str, period: str) -> str:
+    return f"{ekey.replace(' ', '-')}--{skey.replace(' ', '-')}--{period}"
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).strip())
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _contributions(row: dict[str, Any]) -> list[tuple[str, dict[str, Any], dict[str, float]]]:
+    """Buckets a source row feeds (its own state and ``_all``) with the deltas it adds."""
+    ekey = equipment_key(row.get("equipment_name"))
+    period = str(row.get("period") or "").strip()
+    if not ekey or not period:
+        return []
+
+    deltas: dict[str, float] = {"sample_size": 1}
+    for metric in _METRICS:
+        value = _to_float(row.get(metric))
+        if value > 0:
+            deltas[f"{metric}_sum"] = value
+            deltas[f"{metric}_count"] = 1
+
+    out = []
+    row_state = str(row.get("state") or "").strip()
+    targets = [(ALL_STATES, "")]
+    if row_state:
+        targets.insert(0, (state_key(row_state), row_state))
+    for skey, state in targets:
+        base = {
+            "equipment_key": ekey,
+            "equipment_name": row.get("equipment_name"),
+            "category": row.get("category"),
+            "state_key": skey,
+            "state": state,
+            "period": period,
+        }
+        out.append((aggregate_doc_id(ekey, skey, period), base, deltas))
+    return out
+
+
+def _add(doc: dict[str, Any], deltas: dict[str, float], sign: int = 1) -> None:
+    for field, delta in deltas.items():
+        doc[field] = round(doc.get(field, 0) + sign * delta, 4)
+
+
+def compute_aggregates(rows: Iterable[dict[str, Any]]) -> dict[str, dict[str, Any]]:
+    """Aggregate documents (keyed by doc id) for a set of source rows."""
+    docs: dict[str, dict[str, Any]] = {}
+    for row in rows:
+        for doc_id, base, deltas in _contributions(row):
+            doc = docs.get(doc_id)
+            if doc is None:
+                doc = {**base, **{f: 0 for f in _NUMERIC_FIELDS}}
+                docs[doc_id] = doc
+            _add(doc, deltas)
+    return docs
+
+
+def _same_numbers(a: dict[str, Any], b: dict[str, Any]) -> bool:
+    return all(abs(_to_float(a.get(f)) - _to_float(b.get(f))) < 1e-6 for f in _NUMERIC_FIELDS)
+
+
+def plan_aggregate_sync(
+    source_rows: Iterable[dict[str, Any]],
+    existing: dict[str, dict[str, Any]],
+    equipment_keys: Optional[set[str]] = None,
+) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    """Diff fresh aggregates against stored ones; returns ``(upserts, deletes)``.
+
+    When *equipment_keys* is given only those keys are considered, so a
+    partial import leaves every other bucket untouched.
+    """
+    if equipment_keys is not None:
+        source_rows = (r for r in source_rows if equipment_key(r.get("equipment_name")) in equipment_keys)
+        existing = {k: v for k, v in existing.items() if v.get("equipment_key") in equipment_keys}
+    fresh = compute_aggregates(source_rows)
+    now = datetime.now(timezone.utc).isoformat()
+    upserts = {
+        doc_id: {**doc, "updated_at": now}
+        for doc_id, doc in fresh.items()
+        if doc_id not in existing or not _same_numbers(doc, existing[doc_id])
+    }
+    deletes = [doc_id for doc_id in existing if doc_id not in fresh]
+    return upserts, deletes
+
+
+def sync_rate_history_aggregates(db, equipment_keys: Optional[set[str]] = None) -> dict[str, int]:
+    """Bring the aggregate collection in line with the source rows (sync client)."""
+    source = (d.to_dict() or {} for d in db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY).stream())
+    agg = db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY_AGG)
+    existing = {d.id: d.to_dict() or {} for d in agg.stream()}
+    upserts, deletes = plan_aggregate_sync(source, existing, equipment_keys)
+
+    batch = db.batch()
+    pending = 0
+    for doc_id, doc in upserts.items():
+        batch.set(agg.document(doc_id), doc)
+        pending += 1
+        if pending >= 350:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    for doc_id in deletes:
+        batch.delete(agg.document(doc_id))
+        pending += 1
+        if pending >= 350:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+    if pending:
+        batch.commit()
+    return {"upserted": len(upserts), "deleted": len(deletes), "unchanged": len(existing) - len(deletes)}
+
+
+async def sync_rate_history_aggregates_async(db, equipment_keys: Optional[set[str]] = None) -> dict[str, int]:
+    """Async-client twin of :func:`sync_rate_history_aggregates`."""
+    source = [d.to_dict() or {} async for d in db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY).stream()]
+    agg = db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY_AGG)
+    existing = {d.id: d.to_dict() or {} async for d in agg.stream()}
+    upserts, deletes = plan_aggregate_sync(source, existing, equipment_keys)
+    for doc_id, doc in upserts.items():
+        await agg.document(doc_id).set(doc)
+    for doc_id in deletes:
+        await agg.document(doc_id).delete()
+    return {"upserted": len(upserts), "deleted": len(deletes), "unchanged": len(existing) - len(deletes)}
+
+
+async def backfill_rate_history_aggregates(db) -> Optional[dict[str, int]]:
+    """Materialize the aggregate table once when it is empty; None when there was nothing to do.
+
+    Every worker of every replica calls this at startup, so a Redis ``SET NX``
+    lock lets exactly one of them run the full sync.
+    """
+    agg = db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY_AGG)
+    if [d async for d in agg.limit(1).stream()]:
+        return None
+    redis = await get_redis()
+    if not await redis.set(_BACKFILL_LOCK_KEY, "1", ex=_BACKFILL_LOCK_SECONDS, nx=True):
+        return None
+    try:
+        return await sync_rate_history_aggregates_async(db)
+    finally:
+        await redis.delete(_BACKFILL_LOCK_KEY)
+
+async def apply_rate_history_entry_async(
+    db,
+    previous: Optional[dict[str, Any]],
+    current: Optional[dict[str, Any]],
+) -> None:
+    """Move one source row's contribution from *previous* to *current*."""
+    agg = db.collection(MongoCollections.REF_EQUIPMENT_RATE_HISTORY_AGG)
+    changes: dict[str, tuple[dict[str, Any], list[tuple[int, dict[str, float]]]]] = {}
+    for sign, row in ((-1, previous), (1, current)):
+        for doc_id, base, deltas in _contributions(row or {}):
+            changes.setdefault(doc_id, (base, []))[1].append((sign, deltas))
+
+    now = datetime.now(timezone.utc).isoformat()
+    for doc_id, (base, updates) in changes.items():
+        ref = agg.document(doc_id)
+        snap = await ref.get()
+        doc = (snap.to_dict() if snap.exists else None) or {**base, **{f: 0 for f in _NUMERIC_FIELDS}}
+        for sign, deltas in updates:
+            _add(doc, deltas, sign)
+        if doc.get("sample_size", 0) <= 0:
+            await ref.delete()
+        else:
+            doc["updated_at"] = now
+            await ref.set(doc)
+
+
+def history_rows(docs: Iterable[dict[str, Any]], equipment_name: str, state: Optional[str]) -> list[dict[str, Any]]:
+    """Combine aggregate documents into per-period rows for the API, oldest first."""
+    buckets: dict[str, dict[str, Any]] = {}
+    for doc in docs:
+        period = str(doc.get("period") or "").strip()
+        if not period:
+            continue
+        bucket = buckets.setdefault(
+            period,
+            {
+                "equipment_name": doc.get("equipment_name") or equipment_name,
+                "category": doc.get("category"),
+                **{f: 0.0 for f in _NUMERIC_FIELDS},
+            },
+        )
+        for field in _NUMERIC_FIELDS:
+            bucket[field] += _to_float(doc.get(field))
+
+    rows = []
+    for period in sorted(buckets):
+        b = buckets[period]
+        rows.append(
+            {
+                "equipment_name": b["equipment_name"],
+                "category": b["category"],
+                "state": state if state else "All states",
+                "period": period,
+                **{
+                    metric: round(b[f"{metric}_sum"] / b[f"{metric}_count"], 2) if b[f"{metric}_count"] else None
+                    for metric in _METRICS
+                },
+                "source_note": "Monthly aggregated from seeded provider-level history",
+                "created_at": None,
+                "sample_size": int(b["sample_size"]),
+            }
+        )
+    return rows
@@ -0,0 +1,162 @@
+"""Versioned in-process catalogs of schemes and equipment providers.
+
+Agent scheme tools used to stream up to 500 ``ref_farmer_schemes`` (or
+``ref_equipment_providers``) documents per call. Both collections are small
+reference sets, so they are mirrored in memory by :class:`RefCorpus` (BM25
+token index, exact name map, ``_ingested_at`` watermark refresh) and the
+scheme side is compiled into an immutable :class:`SchemeSnapshot` holding an
+acronym index, per-state membership bitmaps over ``beneficiary_state`` and
+precomputed lowercase haystacks. A snapshot is rebuilt only when the corpus
+version moves, so a tool call is a dictionary/bitmask lookup.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Optional
+
+from shared.core.constants import MongoCollections
+from shared.services.lexical_index import CorpusGeneration, RefCorpus, normalize_key
+
+_ACRONYM_SKIP = {"of", "for", "and", "the", "in", "to", "a", "an"}
+
+
+def _text_list(value: Any) -> list[str]:
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    text = str(value or "").strip()
+    return [text] if text else []
+
+
+def title_acronym(title: str) -> str:
+    """Initials of a multi-word title ("Pradhan Mantri Fasal Bima Yojana" -> "pmfby")."""
+    words = [w for w in re.findall(r"[^\W_]+", str(title or "").lower()) if w not in _ACRONYM_SKIP]
+    return "".join(w[0] for w in words) if len(words) >= 3 else ""
+
+
+def _scheme_doc_id(doc_id: str, row: dict) -> str:
+    return str(row.get("scheme_id") or doc_id)
+
+
+def _scheme_acronyms(row: dict) -> list[str]:
+    return [a for a in (str(row.get("acronym") or ""), title_acronym(str(row.get("title") or ""))) if a]
+
+
+def _scheme_names(row: dict) -> list[str]:
+    return [str(row.get("title") or ""), str(row.get("scheme_id") or ""), *_scheme_acronyms(row)]
+
+
+def _scheme_text(row: dict) -> str:
+    parts = [
+        row.get("title", ""),
+        row.get("title", ""),
+        " ".join(_scheme_acronyms(row)),
+        str(row.get("scheme_id", "")).replace("_", " "),
+        row.get("ministry", ""),
+        row.get("summary", ""),
+        " ".join(_text_list(row.get("tags"))),
+        " ".join(_text_list(row.get("categories"))),
+    ]
+    return " ".join(str(p or "") for p in parts)
+
+
+def _equipment_doc_id(doc_id: str, row: dict) -> str:
+    return str(row.get("rental_id") or doc_id)
+
+
+def _equipment_names(row: dict) -> list[str]:
+    return [str(row.get("name") or ""), str(row.get("category") or "")]
+
+
+def _equipment_text(row: dict) -> str:
+    parts = [row.get("name", ""), row.get("name", ""), row.get("category", ""), row.get("provider_name", "")]
+    return " ".join(str(p or "") for p in parts)
+
+
+SCHEME_CORPUS = RefCorpus(
+    MongoCollections.REF_FARMER_SCHEMES,
+    doc_id=_scheme_doc_id,
+    text=_scheme_text,
+    names=_scheme_names,
+)
+EQUIPMENT_CORPUS = RefCorpus(
+    MongoCollections.REF_EQUIPMENT_PROVIDERS,
+    doc_id=_equipment_doc_id,
+    text=_equipment_text,
+    names=_equipment_names,
+    include=lambda row: row.get("is_active") is True,
+)
+
+
+class SchemeSnapshot:
+    """Immutable lookup structures compiled from one corpus version."""
+
+    __slots__ = ("version", "rows", "position", "state_bits", "open_bits", "acronyms", "haystacks", "name_texts")
+
+    def __init__(self, version: int, rows: dict[str, dict[str, Any]]) -> None:
+        self.version = version
+        self.rows = rows
+        self.position: dict[str, int] = {}
+        self.state_bits: dict[str, int] = {}
+        # Schemes open to every state ("All" or no state listed).
+        self.open_bits = 0
+        self.acronyms: dict[str, list[str]] = {}
+        self.haystacks: dict[str, str] = {}
+        self.name_texts: dict[str, str] = {}
+
+        for pos, (doc_id, row) in enumerate(rows.items()):
+            self.position[doc_id] = pos
+            bit = 1 << pos
+            states = [s.lower() for s in _text_list(row.get("beneficiary_state"))]
+            if not states or "all" in states:
+                self.open_bits |= bit
+            for state in states:
+                self.state_bits[state] = self.state_bits.get(state, 0) | bit
+            for acronym in _scheme_acronyms(row):
+                self.acronyms.setdefault(normalize_key(acronym), []).append(doc_id)
+            title = str(row.get("title", "") or "")
+            self.haystacks[doc_id] = (
+                f"{title} {row.get('summary', '') or ''} {' '.join(_text_list(row.get('tags')))}".lower()
+            )
+            self.name_texts[doc_id] = f"{title} {row.get('scheme_id', '') or ''}".lower()
+
+    def state_mask(self, state: str) -> int:
+        return self.open_bits | self.state_bits.get(str(state or "").strip().lower(), 0)
+
+    def in_mask(self, doc_id: str, mask: int) -> bool:
+        pos = self.position.get(doc_id)
+        return pos is not None and bool(mask >> pos & 1)
+
+    def by_acronym(self, text: str) -> list[str]:
+        return list(self.acronyms.get(normalize_key(text), []))
+
+    def best_name_match(self, name: str) -> Optional[str]:
+        """Same scoring ``check_scheme_eligibility`` used over Mongo rows, on precomputed text."""
+        q = str(name or "").strip().lower()
+        tokens = [t for t in q.split() if len(t) > 2][:5]
+        best, best_score = None, 0
+        for doc_id, text in self.name_texts.items():
+            score = (3 if q and q in text else 0) + sum(1 for t in tokens if t in text)
+            if score > best_score:
+                best, best_score = doc_id, score
+        return best
+
+
+class SchemeCatalog:
+    """Process-wide access point for the scheme corpus and its compiled snapshot."""
+
+    _snapshot: Optional[SchemeSnapshot] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls) -> tuple[CorpusGeneration, SchemeSnapshot]:
+        corpus = SCHEME_CORPUS.ensure_fresh()
+        snapshot = cls._snapshot
+        if snapshot is None or snapshot.version != corpus.version:
+            with cls._lock:
+                snapshot = cls._snapshot
+                if snapshot is None or snapshot.version != corpus.version:
+                    snapshot = SchemeSnapshot(corpus.version, dict(corpus.rows))
+                    cls._snapshot = snapshot
+        return corpus, snapshot
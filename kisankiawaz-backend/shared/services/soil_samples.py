@@ -0,0 +1,134 @@
+"""Durable, grid-keyed store of decoded SoilGrids samples.
+
+Soil composition is effectively static, yet every Redis expiry used to send
+``get_soil_composition`` back to SoilGrids (and, when the REST API is down,
+to 27 single-pixel WCS coverages). Samples are now kept per grid cell in
+``ref_soil_samples`` with their per-property/per-depth values and mirrored in
+a bounded in-process LRU, so any coordinate inside an already sampled cell
+is answered without touching the network.
+
+A sample with layers still missing (some WCS coverages failed) is served as
+is and only those layers are re-requested, at most once per
+``SOIL_SAMPLE_RETRY_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+from shared.core.constants import MongoCollections
+from shared.services.tile_cache import GridTile, snap_to_grid
+
+logger = logging.getLogger("kisankiawaz.soil_samples")
+
+SOIL_SAMPLE_GRID_DEG = float(os.getenv("SOIL_SAMPLE_GRID_DEG", "0.05"))
+SOIL_SAMPLE_MEMORY_ENTRIES = int(os.getenv("SOIL_SAMPLE_MEMORY_ENTRIES", "20000"))
+SOIL_SAMPLE_RETRY_SECONDS = int(os.getenv("SOIL_SAMPLE_RETRY_SECONDS", str(24 * 60 * 60)))
+
+Layers = dict[str, dict[str, Optional[float]]]
+
+
+def missing_layers(layers: Layers, properties: Iterable[str], depths: Iterable[str]) -> list[tuple[str, str]]:
+    depth_list = list(depths)
+    return [
+        (prop, depth)
+        for prop in properties
+        for depth in depth_list
+        if (layers.get(prop) or {}).get(depth) is None
+    ]
+
+
+def merge_layers(base: Layers, update: Layers) -> Layers:
+    """``base`` with every non-null value of ``update`` laid over it."""
+    merged = {prop: dict(by_depth) for prop, by_depth in base.items()}
+    for prop, by_depth in update.items():
+        target = merged.setdefault(prop, {})
+        for depth, value in (by_depth or {}).items():
+            if value is not None or depth not in target:
+                target[depth] = value
+    return merged
+
+
+class SoilSampleStore:
+    """``ref_soil_samples`` behind a process-local LRU."""
+
+    _memory: "OrderedDict[str, dict[str, Any]]" = OrderedDict()
+    counters = {"memory_hit": 0, "store_hit": 0, "miss": 0, "written": 0}
+
+    @classmethod
+    def reset(cls) -> None:
+        cls._memory = OrderedDict()
+        cls.counters = {key: 0 for key in cls.counters}
+
+    @staticmethod
+    def tile(lat: float, lon: float) -> GridTile:
+        return snap_to_grid(lat, lon, SOIL_SAMPLE_GRID_DEG)
+
+    @classmethod
+    def _remember(cls, key: str, sample: dict[str, Any]) -> None:
+        cls._memory[key] = sample
+        cls._memory.move_to_end(key)
+        while len(cls._memory) > SOIL_SAMPLE_MEMORY_ENTRIES:
+            cls._memory.popitem(last=False)
+
+    @classmethod
+    async def get(cls, db, tile: GridTile) -> Optional[dict[str, Any]]:
+        sample = cls._memory.get(tile.key)
+        if sample is not None:
+            cls._memory.move_to_end(tile.key)
+            cls.counters["memory_hit"] += 1
+            return sample
+        if db is not None:
+            try:
+                snap = await db.collection(MongoCollections.REF_SOIL_SAMPLES).document(tile.key).get()
+                if snap.exists:
+                    sample = snap.to_dict()
+            except Exception as exc:
+                logger.warning(f"Soil sample read failed for {tile.key}: {exc}")
+        if isinstance(sample, dict) and isinstance(sample.get("layers"), dict):
+            cls._remember(tile.key, sample)
+            cls.counters["store_hit"] += 1
+            return sample
+        cls.counters["miss"] += 1
+        return None
+
+    @classmethod
+    async def put(
+        cls,
+        db,
+        tile: GridTile,
+        layers: Layers,
+        provider: str,
+        previous: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """Store ``layers`` for ``tile`` (merged over ``previous``) and return the sample."""
+        sample = {
+            "lat": tile.lat,
+            "lon": tile.lon,
+            "grid_deg": SOIL_SAMPLE_GRID_DEG,
+            "layers": merge_layers((previous or {}).get("layers") or {}, layers),
+            "provider": (previous or {}).get("provider") or provider,
+            "sampled_at": (previous or {}).get("sampled_at") or datetime.now(timezone.utc).isoformat(),
+            "checked_at": time.time(),
+        }
+        cls._remember(tile.key, sample)
+        if db is not None:
+            try:
+                await db.collection(MongoCollections.REF_SOIL_SAMPLES).document(tile.key).set(sample)
+                cls.counters["written"] += 1
+            except Exception as exc:
+                logger.warning(f"Soil sample write failed for {tile.key}: {exc}")
+        return sample
+
+    @staticmethod
+    def retry_due(sample: dict[str, Any]) -> bool:
+        return time.time() - float(sample.get("checked_at") or 0) >= SOIL_SAMPLE_RETRY_SECONDS
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        return {"grid_deg": SOIL_SAMPLE_GRID_DEG, "memory_entries": len(cls._memory), **cls.counters}
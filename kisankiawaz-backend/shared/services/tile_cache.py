@@ -0,0 +1,198 @@
+"""Grid-snapped, stale-while-revalidate cache for location-keyed upstream data.
+
+Coordinates are snapped to a fixed grid so nearby farmers share one tile, and
+the upstream is called with the tile centre. Each tile is stored in Redis
+with its fetch time and kept well past its freshness window:
+
+* fresh, but close to expiry -> served, and one replica refreshes it in the
+  background (Redis ``SET NX`` lock);
+* expired within ``revalidate_seconds`` -> served immediately while the
+  background refresh runs;
+* older -> fetched synchronously, falling back to the stale copy when the
+  upstream fails;
+* missing -> fetched synchronously, with concurrent callers for the same
+  tile sharing one upstream call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import math
+import time
+from typing import Any, Awaitable, Callable, NamedTuple, Optional
+
+from shared.db.redis import get_redis
+
+logger = logging.getLogger("kisankiawaz.tile_cache")
+
+
+class GridTile(NamedTuple):
+    lat: float
+    lon: float
+    key: str
+
+
+def snap_to_grid(lat: float, lon: float, step_deg: float) -> GridTile:
+    """Centre of the ``step_deg`` grid cell containing ``(lat, lon)``."""
+    step = max(float(step_deg), 1e-4)
+    decimals = max(0, -int(math.floor(math.log10(step))) + 1)
+    # The epsilon keeps points on a grid line (30.9 / 0.05 = 617.999...) in the upper cell.
+    c_lat = round((math.floor(float(lat) / step + 1e-9) + 0.5) * step, decimals)
+    c_lon = round((math.floor(float(lon) / step + 1e-9) + 0.5) * step, decimals)
+    return GridTile(c_lat, c_lon, f"{step:g}:{c_lat}:{c_lon}")
+
+
+class TileCache:
+    """Redis-backed tile cache around an async ``fetch(lat, lon)`` callable."""
+
+    def __init__(
+        self,
+        namespace: str,
+        fetch: Callable[[float, float], Awaitable[dict[str, Any]]],
+        step_deg: float,
+        fresh_seconds: int,
+        revalidate_seconds: int,
+        max_stale_seconds: int,
+        refresh_ahead: float = 0.8,
+        lock_seconds: int = 60,
+        redis_factory: Callable[[], Awaitable[Any]] = get_redis,
+    ) -> None:
+        self.namespace = namespace
+        self.fetch = fetch
+        self.step_deg = step_deg
+        self.fresh_seconds = fresh_seconds
+        self.revalidate_seconds = max(revalidate_seconds, fresh_seconds)
+        self.max_stale_seconds = max(max_stale_seconds, self.revalidate_seconds)
+        self.refresh_ahead = refresh_ahead
+        self.lock_seconds = lock_seconds
+        self._redis_factory = redis_factory
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._background: set[asyncio.Task] = set()
+        self.counters = {
+            "fresh": 0,
+            "stale_served": 0,
+            "stale_on_error": 0,
+            "miss": 0,
+            "sync_fetch": 0,
+            "background_refresh": 0,
+            "refresh_failed": 0,
+        }
+
+    def tile(self, lat: float, lon: float) -> GridTile:
+        return snap_to_grid(lat, lon, self.step_deg)
+
+    def _key(self, tile: GridTile) -> str:
+        return f"{self.namespace}:{tile.key}"
+
+    async def read(self, tile: GridTile) -> Optional[dict[str, Any]]:
+        try:
+            redis = await self._redis_factory()
+            raw = await redis.get(self._key(tile))
+            envelope = json.loads(raw) if raw else None
+        except Exception as exc:
+            logger.debug(f"Tile read failed for {tile.key}: {exc}")
+            return None
+        if not isinstance(envelope, dict) or not isinstance(envelope.get("payload"), dict):
+            return None
+        return envelope
+
+    async def _write(self, tile: GridTile, payload: dict[str, Any]) -> None:
+        envelope = {"fetched_at": time.time(), "payload": payload}
+        try:
+            redis = await self._redis_factory()
+            await redis.set(self._key(tile), json.dumps(envelope, ensure_ascii=False), ex=self.max_stale_seconds)
+        except Exception as exc:
+            logger.debug(f"Tile write failed for {tile.key}: {exc}")
+
+    def age(self, envelope: Optional[dict[str, Any]]) -> float:
+        if not envelope:
+            return math.inf
+        return max(0.0, time.time() - float(envelope.get("fetched_at") or 0))
+
+    def needs_refresh(self, envelope: Optional[dict[str, Any]]) -> bool:
+        return self.age(envelope) >= self.fresh_seconds * self.refresh_ahead
+
+    async def refresh(self, tile: GridTile) -> dict[str, Any]:
+        """Fetch the tile from upstream and store it; concurrent calls share one fetch.
+
+        The fetch runs as its own task, so a caller that is cancelled (client
+        disconnect, request timeout) neither cancels it for the other waiters
+        nor turns their upstream failure into a cancellation.
+        """
+        task = self._inflight.get(tile.key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_and_store(tile))
+            self._inflight[tile.key] = task
+            task.add_done_callback(lambda done, key=tile.key: self._fetch_done(key, done))
+        return await asyncio.shield(task)
+
+    async def _fetch_and_store(self, tile: GridTile) -> dict[str, Any]:
+        payload = await self.fetch(tile.lat, tile.lon)
+        await self._write(tile, payload)
+        return payload
+
+    def _fetch_done(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            self._inflight.pop(key, None)
+        # Mark retrieved so a fetch whose waiters all went away does not log a warning.
+        if not task.cancelled():
+            task.exception()
+
+    async def _claim(self, tile: GridTile) -> bool:
+        try:
+            redis = await self._redis_factory()
+            return bool(await redis.set(f"{self._key(tile)}:lock", "1", ex=self.lock_seconds, nx=True))
+        except Exception:
+            return True
+
+    def _refresh_in_background(self, tile: GridTile) -> None:
+        if tile.key in self._inflight:
+            return
+
+        async def _run() -> None:
+            if not await self._claim(tile):
+                return
+            self.counters["background_refresh"] += 1
+            try:
+                await self.refresh(tile)
+            except Exception as exc:
+                self.counters["refresh_failed"] += 1
+                logger.warning(f"Background refresh of tile {tile.key} failed: {exc}")
+
+        task = asyncio.create_task(_run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def get(self, lat: float, lon: float) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Return ``(payload, meta)`` for the tile containing ``(lat, lon)``."""
+        tile = self.tile(lat, lon)
+        envelope = await self.read(tile)
+        age = self.age(envelope)
+        meta = {"key": tile.key, "lat": tile.lat, "lon": tile.lon, "step_deg": self.step_deg}
+
+        if envelope is not None and age < self.revalidate_seconds:
+            state = "fresh" if age < self.fresh_seconds else "stale"
+            self.counters["fresh" if state == "fresh" else "stale_served"] += 1
+            if self.needs_refresh(envelope):
+                self._refresh_in_background(tile)
+            return envelope["payload"], {**meta, "state": state, "age_seconds": int(age)}
+
+        self.counters["miss" if envelope is None else "sync_fetch"] += 1
+        try:
+            payload = await self.refresh(tile)
+        except Exception:
+            if envelope is None:
+                raise
+            self.counters["stale_on_error"] += 1
+            return envelope["payload"], {**meta, "state": "stale", "age_seconds": int(age)}
+        return payload, {**meta, "state": "fresh", "age_seconds": 0}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "step_deg": self.step_deg,
+            "fresh_seconds": self.fresh_seconds,
+            "inflight": len(self._inflight),
+            **self.counters,
+        }
@@ -243,3 +243,134 @@ def test_embedding_search_uses_market_collection_alias_fallback():
     assert svc.client.calls[0] == QdrantCollections.MANDI_PRICE_INTELLIGENCE
     assert results
     assert results[0]["text"].startswith("Tomato price")
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = 0
+
+    def embed(self, _texts):
+        self.calls += 1
+        yield FakeVector([0.1, 0.2, 0.3])
+
+
+@dataclass
+class FakeCollectionInfo:
+    name: str
+
+
+@dataclass
+class FakeCollections:
+    collections: list[FakeCollectionInfo]
+
+
+@dataclass
+class FakeAliases:
+    aliases: list[Any]
+
+
+class FakeBatchQdrantClient:
+    def __init__(self, existing: list[str]):
+        self.existing = existing
+        self.batch_calls: list[tuple[str, int]] = []
+        self.single_calls: list[str] = []
+        self.listings = 0
+
+    def get_collections(self):
+        self.listings += 1
+        return FakeCollections([FakeCollectionInfo(name) for name in self.existing])
+
+    def get_aliases(self):
+        return FakeAliases([])
+
+    def query_batch_points(self, collection_name: str, requests: list):
+        self.batch_calls.append((collection_name, len(requests)))
+        return [
+            FakeResult(points=[FakePoint(payload={"text": f"{collection_name} hit", "token": "x"}, score=0.8)])
+            for _ in requests
+        ]
+
+    def query_points(self, collection_name: str, query: list[float], limit: int):
+        self.single_calls.append(collection_name)
+        return FakeResult(points=[])
+
+
+def test_search_many_embeds_once_and_primes_tool_searches():
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("fastembed")
+    embedding_module = importlib.import_module("services.agent.services.embedding_service")
+
+    svc = embedding_module.EmbeddingService()
+    svc.client = FakeBatchQdrantClient([QdrantCollections.FARMING_GENERAL, QdrantCollections.CROP_KNOWLEDGE])
+    svc.model = CountingModel()
+
+    grouped = svc.search_many(
+        "wheat rust",
+        {QdrantCollections.FARMING_GENERAL: 5, QdrantCollections.CROP_KNOWLEDGE: 5},
+    )
+
+    assert svc.model.calls == 1
+    assert sorted(c for c, _ in svc.client.batch_calls) == sorted(
+        [QdrantCollections.FARMING_GENERAL, QdrantCollections.CROP_KNOWLEDGE]
+    )
+    assert grouped[QdrantCollections.CROP_KNOWLEDGE][0]["text"] == "crop_knowledge hit"
+    assert "token" not in grouped[QdrantCollections.CROP_KNOWLEDGE][0]["metadata"]
+
+    again = svc.search(QdrantCollections.FARMING_GENERAL, "wheat rust", top_k=5)
+
+    assert again == grouped[QdrantCollections.FARMING_GENERAL]
+    assert svc.model.calls == 1
+    assert svc.client.single_calls == []
+
+
+def test_market_alias_skips_collections_known_missing():
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("fastembed")
+    embedding_module = importlib.import_module("services.agent.services.embedding_service")
+
+    svc = embedding_module.EmbeddingService()
+    svc.client = FakeBatchQdrantClient([QdrantCollections.FARMING_GENERAL])
+    svc.model = CountingModel()
+
+    svc.search(QdrantCollections.MARKET_KNOWLEDGE, "onion rate", top_k=5)
+    svc.search(QdrantCollections.MARKET_KNOWLEDGE, "tomato rate", top_k=5)
+
+    assert svc.client.single_calls == [QdrantCollections.FARMING_GENERAL] * 2
+    assert svc.client.listings == 1
+
+
+class DroppedCollectionQdrantClient(FakeBatchQdrantClient):
+    """Lists a collection that has since been dropped, so only the query finds out."""
+
+    def query_batch_points(self, collection_name: str, requests: list):
+        if collection_name == QdrantCollections.MANDI_PRICE_INTELLIGENCE:
+            self.batch_calls.append((collection_name, len(requests)))
+            raise RuntimeError(f"Collection '{collection_name}' not found")
+        return super().query_batch_points(collection_name, requests)
+
+
+def test_search_many_retries_missing_collections_on_the_next_alias():
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("fastembed")
+    embedding_module = importlib.import_module("services.agent.services.embedding_service")
+
+    svc = embedding_module.EmbeddingService()
+    svc.client = DroppedCollectionQdrantClient(
+        [
+            QdrantCollections.MANDI_PRICE_INTELLIGENCE,
+            QdrantCollections.MARKET_KNOWLEDGE,
+            QdrantCollections.SCHEMES_SEMANTIC,
+        ]
+    )
+    svc.model = CountingModel()
+
+    grouped = svc.search_many(
+        "onion subsidy",
+        {QdrantCollections.MARKET_KNOWLEDGE: 5, QdrantCollections.SCHEMES_SEMANTIC: 20},
+    )
+
+    assert grouped[QdrantCollections.MARKET_KNOWLEDGE][0]["text"] == "market_knowledge hit"
+    assert grouped[QdrantCollections.SCHEMES_SEMANTIC][0]["text"] == "schemes_semantic hit"
+    assert (QdrantCollections.MARKET_KNOWLEDGE, 1) in svc.client.batch_calls
+    assert svc.search(QdrantCollections.MARKET_KNOWLEDGE, "onion subsidy", top_k=5) == grouped[QdrantCollections.MARKET_KNOWLEDGE]
+    assert svc.model.calls == 1 and svc.client.single_calls == []
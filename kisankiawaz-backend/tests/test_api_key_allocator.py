@@ -0,0 +1,138 @@
+"""Unit tests for the heap-backed, Redis-shared API key allocator."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from shared.core.config import Settings
+from shared.services import api_key_allocator as aka
+
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch: pytest.MonkeyPatch) -> Settings:
+    configured = Settings(
+        GEMINI_API_KEYS="gem-a,gem-b,gem-c",
+        GEMINI_API_KEY="",
+        GROQ_API_KEYS="",
+        GROQ_API_KEY="",
+        KEY_BASE_COOLDOWN_SECONDS=20,
+        KEY_MAX_COOLDOWN_SECONDS=300,
+        KEY_ERROR_COOLDOWN_SECONDS=8,
+    )
+    monkeypatch.setattr(aka, "get_settings", lambda: configured)
+    return configured
+
+
+def test_local_pool_spreads_load_and_skips_cooling_keys() -> None:
+    allocator = aka.ApiKeyAllocator(use_shared=False)
+    assert allocator.has_provider("gemini") and not allocator.has_provider("groq")
+    with pytest.raises(RuntimeError):
+        allocator.acquire("groq")
+
+    leases = [allocator.acquire("gemini") for _ in range(3)]
+    assert sorted(lease.key_id for lease in leases) == ["gemini-1", "gemini-2", "gemini-3"]
+
+    allocator.report_rate_limited(leases[0], "429")
+    allocator.report_success(leases[1])
+    allocator.report_success(leases[2])
+    for _ in range(10):
+        lease = allocator.acquire("gemini")
+        assert lease.key_id != leases[0].key_id
+        allocator.report_success(lease)
+
+    keys = {k["key_id"]: k for k in allocator.snapshot()["providers"]["gemini"]["keys"]}
+    assert 19 < keys[leases[0].key_id]["cooldown_remaining_seconds"] <= 20
+    assert keys[leases[0].key_id]["rate_limit_ratio"] == 1.0
+    assert sum(k["active_requests"] for k in keys.values()) == 0
+
+
+def test_all_cooling_falls_back_to_first_recovering_key() -> None:
+    allocator = aka.ApiKeyAllocator(use_shared=False)
+    leases = [allocator.acquire("gemini") for _ in range(3)]
+    allocator.report_rate_limited(leases[0])
+    allocator.report_error(leases[1], "boom")  # 8s error cooldown recovers first
+    allocator.report_rate_limited(leases[2])
+    assert allocator.acquire("gemini").key_id == leases[1].key_id
+
+
+def test_cooldowns_and_counters_are_shared_between_replicas() -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+
+    def replica() -> aka.ApiKeyAllocator:
+        client = fakeredis.FakeRedis(server=server, decode_responses=True)
+        return aka.ApiKeyAllocator(shared=aka.RedisKeyState(client))
+
+    a, b = replica(), replica()
+    first = a.acquire("gemini")
+    second = b.acquire("gemini")
+    # b sees a's in-flight lease and picks a different key.
+    assert first.key_id != second.key_id
+
+    a.report_rate_limited(first, "429 RESOURCE_EXHAUSTED")
+    b.report_success(second)
+    for _ in range(6):
+        lease = b.acquire("gemini")
+        assert lease.key_id != first.key_id
+        b.report_success(lease)
+
+    # The second 429 on the same key (from another replica) doubles the shared backoff.
+    c = replica()
+    retry = aka.KeyLease(provider="gemini", key_id=first.key_id, key=first.key)
+    c.report_rate_limited(retry, "429")
+    snapshot = c.snapshot()
+    assert snapshot["backend"] == "redis"
+    keys = {k["key_id"]: k for k in snapshot["providers"]["gemini"]["keys"]}
+    limited = keys[first.key_id]
+    assert 39 < limited["cooldown_remaining_seconds"] <= 40
+    assert limited["consecutive_rate_limits"] == 2 and limited["rate_limited_last_minute"] == 2
+    assert sum(k["requests_last_minute"] for k in keys.values()) == 8
+    assert sum(k["total_requests"] for k in keys.values()) == 8
+
+
+
+def test_leaked_leases_expire_on_their_own_deadline(monkeypatch: pytest.MonkeyPatch) -> None:
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    clock = {"now": 1_800_000_000.0}
+    monkeypatch.setattr(aka, "_LEASE_STALE_SECONDS", 5)
+    monkeypatch.setattr(aka.time, "time", lambda: clock["now"])
+
+    def replica() -> aka.ApiKeyAllocator:
+        return aka.ApiKeyAllocator(shared=aka.RedisKeyState(fakeredis.FakeRedis(server=server, decode_responses=True)))
+
+    dead = replica()
+    leaked = [dead.acquire("gemini") for _ in range(3)]  # never released
+    assert len({lease.key_id for lease in leaked}) == 3
+
+    live = replica()
+    clock["now"] += 4
+    held = live.acquire("gemini")
+    clock["now"] += 2  # the dead process's leases are past their deadline, held is not
+
+    keys = {k["key_id"]: k for k in live.snapshot()["providers"]["gemini"]["keys"]}
+    assert {key_id: k["active_requests"] for key_id, k in keys.items() if k["active_requests"]} == {held.key_id: 1}
+    assert live.acquire("gemini").key_id != held.key_id
+
+    live.report_success(held)
+    keys = {k["key_id"]: k for k in live.snapshot()["providers"]["gemini"]["keys"]}
+    assert keys[held.key_id]["active_requests"] == 0
+
+
+def test_redis_outage_falls_back_to_local_allocation() -> None:
+    class _DownRedis:
+        def register_script(self, _script):
+            def call(**_kwargs):
+                raise ConnectionError("redis down")
+
+            return call
+
+    shared = aka.RedisKeyState(_DownRedis())
+    allocator = aka.ApiKeyAllocator(shared=shared)
+    started = time.time()
+    lease = allocator.acquire("gemini")
+    allocator.report_success(lease)
+    assert not shared.available and time.time() - started < 1
+    assert allocator.snapshot()["backend"] == "local"
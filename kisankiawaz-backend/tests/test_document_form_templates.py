@@ -0,0 +1,82 @@
+"""Unit tests for compiled official-form templates used by document builder autofill."""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+
+# The service imports its sibling modules from the service root (``/app`` in the image).
+for _name in (
+    "document_artifacts",
+    "document_sessions",
+    "extraction_jobs",
+    "scheme_document_index",
+    "scheme_document_downloader",
+):
+    sys.modules.setdefault(f"services.{_name}", importlib.import_module(f"services.market.services.{_name}"))
+
+from services.market.services.document_builder_service import DocumentBuilderService as DBS  # noqa: E402
+
+FORM = """
+<html><body><form>
+  <h3>Applicant details</h3>
+  <label for="fn">Name of Farmer</label> <input type="text" id="fn" name="applicant">
+  <label>Mobile Number</label><input name="mobile_no" value="old">
+  <label>Date of Birth</label><input type="date" name="dob">
+  <input type="hidden" name="csrf" value="t">
+  <label>Gender</label>
+  <input type="radio" name="gender" value="M"> Male
+  <input type="radio" name="gender" value="F" checked> Female
+  <label>State</label>
+  <select name="state"><option value="">--</option><option>Maharashtra</option><option>Punjab</option></select>
+  <label>Address</label><textarea name="address"></textarea>
+</form></body></html>
+"""
+
+
+def test_compiled_fill_matches_values_and_reuses_plan() -> None:
+    template = DBS._compile_form_template(FORM)
+    assert [slot.kind for slot in template.slots] == ["text", "text", "date", "radio", "radio", "select", "textarea"]
+
+    fields = {
+        "farmer_name": "Asha <Patil>",
+        "mobile_number": "9876543210",
+        "date_of_birth": "12/03/1980",
+        "gender": "Male",
+        "state": "maharashtra",
+        "address": "Khed, Pune",
+    }
+    filled, stats = DBS._fill_html_controls(FORM, fields, template=template)
+
+    assert 'name="applicant" value="Asha &lt;Patil&gt;"' in filled
+    assert 'name="mobile_no" value="9876543210"' in filled
+    assert 'name="dob" value="1980-03-12"' in filled
+    assert 'value="M" checked="checked"' in filled
+    assert 'value="F">' in filled
+    assert '<option selected="selected">Maharashtra</option>' in filled
+    assert "<textarea name=\"address\">Khed, Pune</textarea>" in filled
+    assert 'name="csrf" value="t"' in filled
+    assert stats["matched_fields"] == sorted(fields)
+
+    # A second farmer with the same filled fields reuses the resolved plan.
+    again, _ = DBS._fill_html_controls(FORM, {**fields, "farmer_name": "Ravi"}, template=template)
+    assert len(template._plans) == 1
+    assert 'name="applicant" value="Ravi"' in again
+    assert again.replace("Ravi", "Asha &lt;Patil&gt;") == filled
+
+
+def test_load_form_template_recompiles_when_file_changes(tmp_path) -> None:
+    path = tmp_path / "form.html"
+    path.write_text('<label>Village</label><input name="village">', encoding="utf-8")
+
+    first = DBS._load_form_template(str(path))
+    assert DBS._load_form_template(str(path)) is first
+    assert len(first.slots) == 1
+
+    path.write_text('<label>Village</label><input name="village"><label>District</label><input name="district">', encoding="utf-8")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    second = DBS._load_form_template(str(path))
+    assert second is not first
+    assert len(second.slots) == 2
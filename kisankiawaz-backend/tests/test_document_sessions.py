@@ -0,0 +1,188 @@
+"""Unit tests for the document builder session cache and artifact store."""
+
+from __future__ import annotations
+
+import importlib
+import os
+import sys
+
+import pytest
+
+from shared.cache import market_cache
+
+# The service imports its sibling modules from the service root (``/app`` in the image).
+for _name in (
+    "document_artifacts",
+    "document_sessions",
+    "extraction_jobs",
+    "scheme_document_index",
+    "scheme_document_downloader",
+):
+    sys.modules.setdefault(f"services.{_name}", importlib.import_module(f"services.market.services.{_name}"))
+
+from services.market.services import document_builder_service as dbs  # noqa: E402
+from services.market.services.document_artifacts import ArtifactStore  # noqa: E402
+from services.market.services.document_sessions import DocumentSessionStore  # noqa: E402
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None):
+        self.data[key] = value
+
+    async def delete(self, key: str):
+        self.data.pop(key, None)
+
+
+class _Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _Ref:
+    def __init__(self, db, key):
+        self._db, self._key = db, key
+
+    async def get(self):
+        self._db.reads += 1
+        return _Snapshot(self._db.docs.get(self._key))
+
+    async def set(self, data):
+        self._db.docs[self._key] = dict(data)
+
+    async def update(self, data):
+        self._db.docs[self._key].update(data)
+
+
+class _DB:
+    def __init__(self):
+        self.docs: dict[str, dict] = {}
+        self.reads = 0
+
+    def collection(self, _name):
+        return self
+
+    def document(self, key):
+        return _Ref(self, key)
+
+
+@pytest.fixture
+def redis(monkeypatch: pytest.MonkeyPatch, tmp_path) -> _FakeRedis:
+    fake = _FakeRedis()
+
+    async def factory():
+        return fake
+
+    monkeypatch.setattr(market_cache, "get_redis", factory)
+    monkeypatch.setattr(dbs, "get_artifact_store", lambda: ArtifactStore(str(tmp_path / "artifacts")))
+    DocumentSessionStore.counters = {key: 0 for key in DocumentSessionStore.counters}
+    return fake
+
+
+def _session() -> dict:
+    return {
+        "session_id": "abc123def456",
+        "scheme_name": "PM-KISAN",
+        "form_fields": [
+            {"field": "farmer_name", "label": "Farmer Name", "required": True},
+            {"field": "mobile_number", "label": "Mobile Number", "required": True},
+        ],
+        "filled_fields": {"farmer_name": "Asha"},
+        "questions_asked": ["mobile_number"],
+        "status": "in_progress",
+    }
+
+
+async def test_answers_write_to_mongo_and_invalidate_the_cached_session(redis) -> None:
+    db = _DB()
+    await DocumentSessionStore.create(db, "abc123def456", _session())
+
+    result = await dbs.DocumentBuilderService.submit_answers(db, "abc123def456", {"mobile_number": "9876543210"})
+    assert result["document_ready"] is True and db.reads == 0
+
+    stored = db.docs["abc123def456"]
+    assert stored["status"] == "completed" and stored["document_html"] == ""
+    assert stored["document_artifact"]["sha256"]
+    # The write dropped the cached copy: the next read re-caches Mongo's state once.
+    assert not redis.data
+    session = await dbs.DocumentBuilderService.get_session(db, "abc123def456")
+    await dbs.DocumentBuilderService.get_session(db, "abc123def456")
+    assert db.reads == 1
+    assert session["filled_fields"]["mobile_number"] == "9876543210"
+    assert "Asha" in session["document_html"]
+
+
+async def test_concurrent_writers_never_leave_a_partial_view_cached(redis) -> None:
+    db = _DB()
+    await DocumentSessionStore.create(db, "abc123def456", _session())
+    first = await DocumentSessionStore.get(db, "abc123def456")
+    second = await DocumentSessionStore.get(db, "abc123def456")
+
+    await DocumentSessionStore.update(db, "abc123def456", first, {"status": "completed"})
+    await DocumentSessionStore.update(db, "abc123def456", second, {"filled_fields": {"farmer_name": "Asha K"}})
+
+    session = await DocumentSessionStore.get(db, "abc123def456")
+    assert session["status"] == "completed" and session["filled_fields"] == {"farmer_name": "Asha K"}
+
+
+async def test_download_uses_artifact_reference_and_regenerates_when_missing(redis, monkeypatch: pytest.MonkeyPatch) -> None:
+    db = _DB()
+    await DocumentSessionStore.create(db, "abc123def456", {**_session(), "filled_fields": {"farmer_name": "Asha", "mobile_number": "9"}})
+
+    def no_listing(*_args, **_kwargs):
+        raise AssertionError("download listed a directory")
+
+    monkeypatch.setattr(os, "listdir", no_listing)
+
+    first = await dbs.DocumentBuilderService.get_document_file(db, "abc123def456")
+    assert os.path.isfile(first["filepath"]) and first["etag"].strip('"') in first["filepath"]
+    again = await dbs.DocumentBuilderService.get_document_file(db, "abc123def456")
+    assert again["filepath"] == first["filepath"] and again["etag"] == first["etag"]
+
+    os.remove(first["filepath"])
+    regenerated = await dbs.DocumentBuilderService.get_document_file(db, "abc123def456")
+    assert os.path.isfile(regenerated["filepath"])
+
+
+def test_artifact_store_deduplicates_by_content(tmp_path) -> None:
+    store = ArtifactStore(str(tmp_path))
+    a = store.put("<html>same</html>", filename="a.html")
+    b = store.put("<html>same</html>", filename="b.html")
+    assert store.path_for(a) == store.path_for(b)
+    assert store.read_text(b) == "<html>same</html>"
+    assert ArtifactStore.etag(a) == f'"{a["sha256"]}"'
+    assert not store.exists({"sha256": "0" * 64, "ext": ".html"})
+
+
+async def test_answers_submitted_during_extraction_are_kept(redis, monkeypatch: pytest.MonkeyPatch) -> None:
+    db = _DB()
+    session = {**_session(), "filled_fields": {}}
+    session["form_fields"].append({"field": "aadhaar_number", "label": "Aadhaar", "required": False})
+    await DocumentSessionStore.create(db, "abc123def456", session)
+
+    async def extract(*_args):
+        # The farmer keeps answering while the upload is being read.
+        await dbs.DocumentBuilderService.submit_answers(db, "abc123def456", {"mobile_number": "9876543210"})
+        return {"method": "langextract", "fields": {"farmer_name": "Asha", "mobile_number": "1111111111"}}
+
+    class _Pool:
+        async def cached(self, _key, compute):
+            return await compute(), False
+
+    monkeypatch.setattr(dbs, "get_extraction_pool", lambda: _Pool())
+    monkeypatch.setattr(dbs.DocumentBuilderService, "_extract_fields", staticmethod(extract))
+
+    result = await dbs.DocumentBuilderService._run_extraction_job(db, "abc123def456", b"%PDF", "id.pdf")
+    assert result["extracted_fields"] == {"farmer_name": "Asha"}
+    stored = db.docs["abc123def456"]
+    assert stored["filled_fields"] == {"mobile_number": "9876543210", "farmer_name": "Asha"}
+    assert stored["uploaded_documents"][0]["extracted_fields"] == ["farmer_name"]
@@ -0,0 +1,164 @@
+"""Unit tests for equipment booking conflict detection and availability."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+
+from shared.db.mongodb import DocumentAlreadyExists
+from shared.errors import AppError
+from services.equipment.services.booking_calendar import (
+    BookingCalendar,
+    IntervalIndex,
+    parse_booking_time,
+)
+
+
+def _dt(day: int, hour: int = 0) -> datetime:
+    return datetime(2026, 11, day, hour, tzinfo=timezone.utc)
+
+
+class _Snap:
+    def __init__(self, doc_id: str, data: dict | None):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> dict:
+        return dict(self._data or {})
+
+
+class _Ref:
+    def __init__(self, table: dict, doc_id: str):
+        self._table = table
+        self.id = doc_id
+
+    async def get(self) -> _Snap:
+        await asyncio.sleep(0)
+        return _Snap(self.id, self._table.get(self.id))
+
+    async def create(self, data: dict) -> None:
+        if self.id in self._table:
+            raise DocumentAlreadyExists(self.id)
+        self._table[self.id] = dict(data)
+
+    async def update_if(self, expected: dict, data: dict) -> bool:
+        await asyncio.sleep(0)
+        current = self._table.get(self.id)
+        if current is None or any(current.get(k) != v for k, v in expected.items()):
+            return False
+        current.update(data)
+        return True
+
+
+class _Query:
+    def __init__(self, table: dict, field: str, op: str, value: Any):
+        self._table, self._field, self._op, self._value = table, field, op, value
+
+    async def stream(self):
+        for doc_id, row in list(self._table.items()):
+            value = row.get(self._field)
+            if (self._op == "==" and value == self._value) or (self._op == "in" and value in self._value):
+                yield _Snap(doc_id, row)
+
+
+class _Collection:
+    def __init__(self, table: dict):
+        self._table = table
+
+    def document(self, doc_id: str) -> _Ref:
+        return _Ref(self._table, doc_id)
+
+    def where(self, *, filter) -> _Query:
+        return _Query(self._table, filter.field_path, filter.op_string, filter.value)
+
+
+class _DB:
+    def __init__(self, bookings: dict | None = None):
+        self.tables: dict[str, dict] = {"equipment_bookings": bookings or {}, "equipment_booking_calendars": {}}
+
+    def collection(self, name: str) -> _Collection:
+        return _Collection(self.tables.setdefault(name, {}))
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(BookingCalendar, "_indexes", {})
+
+
+def test_interval_index_handles_legacy_overlaps() -> None:
+    index = IntervalIndex([(_dt(1), _dt(10), "long"), (_dt(2), _dt(3), "short"), (_dt(20), _dt(22), "late")])
+
+    assert index.has_overlap(_dt(8), _dt(9))
+    assert not index.has_overlap(_dt(10), _dt(20))
+    assert [bid for _, _, bid in index.overlapping(_dt(2, 12), _dt(21))] == ["long", "short", "late"]
+
+
+def test_bare_end_date_is_inclusive() -> None:
+    assert parse_booking_time("2026-11-05", inclusive_end=True) == _dt(6)
+    assert parse_booking_time("2026-11-05T10:00:00+05:30") == datetime(2026, 11, 5, 4, 30, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_reserve_seeds_from_bookings_and_rejects_overlap() -> None:
+    db = _DB({"b1": {"equipment_id": "tractor-1", "status": "approved", "start_date": "2026-11-03", "end_date": "2026-11-04"}})
+
+    with pytest.raises(AppError) as exc:
+        await BookingCalendar.reserve(db, "tractor-1", "b2", _dt(4, 6), _dt(6))
+    assert exc.value.status_code == 409
+
+    await BookingCalendar.reserve(db, "tractor-1", "b3", _dt(5), _dt(6))
+    calendar = db.tables["equipment_booking_calendars"]["tractor-1"]
+    assert calendar["version"] == 1
+    assert [e["booking_id"] for e in calendar["intervals"]] == ["b1", "b3"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reservations_cannot_double_book() -> None:
+    db = _DB()
+
+    results = await asyncio.gather(
+        *(BookingCalendar.reserve(db, "drone-1", f"b{i}", _dt(10), _dt(12)) for i in range(4)),
+        return_exceptions=True,
+    )
+
+    assert sum(r is None for r in results) == 1
+    assert all(isinstance(r, AppError) for r in results if r is not None)
+    assert len(db.tables["equipment_booking_calendars"]["drone-1"]["intervals"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_retried_write_that_already_landed_is_not_a_conflict(monkeypatch: pytest.MonkeyPatch) -> None:
+    db = _DB()
+    applied_once = _Ref.update_if
+
+    async def lost_ack(self, expected: dict, data: dict) -> bool:
+        # First attempt lands but its reply is lost; the driver's retry then matches nothing.
+        await applied_once(self, expected, data)
+        return await applied_once(self, expected, data)
+
+    monkeypatch.setattr(_Ref, "update_if", lost_ack)
+
+    await BookingCalendar.reserve(db, "tractor-1", "b1", _dt(10), _dt(12))
+
+    calendar = db.tables["equipment_booking_calendars"]["tractor-1"]
+    assert calendar["version"] == 1
+    assert [e["booking_id"] for e in calendar["intervals"]] == ["b1"]
+
+
+@pytest.mark.asyncio
+async def test_release_and_bulk_availability() -> None:
+    db = _DB({"old": {"equipment_id": "harvester-9", "status": "pending", "start_date": "2026-11-15", "end_date": "2026-11-16"}})
+    await BookingCalendar.reserve(db, "tractor-1", "b1", _dt(10), _dt(12))
+    await BookingCalendar.reserve(db, "tractor-1", "b2", _dt(14), _dt(15))
+    await BookingCalendar.release(db, "tractor-1", "b1")
+
+    result = await BookingCalendar.availability(db, ["tractor-1", "harvester-9", "unused"], _dt(9), _dt(20))
+
+    assert [b["start"] for b in result["tractor-1"]["busy"]] == [_dt(14).isoformat()]
+    assert result["harvester-9"]["busy"][0]["status"] == "pending"
+    assert result["unused"] == {"available": True, "busy": []}
+    assert "harvester-9" not in db.tables["equipment_booking_calendars"]
@@ -0,0 +1,123 @@
+"""Unit tests for the in-memory equipment provider catalog."""
+
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+
+from services.equipment.services.provider_catalog import ProviderCatalog
+
+
+class _Snap:
+    def __init__(self, doc_id: str, data: dict[str, Any]):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self._data)
+
+
+class _Query:
+    def __init__(self, db: "_AsyncDB", since: str | None = None):
+        self._db = db
+        self._since = since
+
+    def where(self, *, filter) -> "_Query":
+        assert (filter.field_path, filter.op_string) == ("_ingested_at", ">")
+        return _Query(self._db, filter.value)
+
+    async def stream(self):
+        self._db.streams.append(self._since)
+        for doc_id, row in list(self._db.rows.items()):
+            if self._since is None or row.get("_ingested_at", "") > self._since:
+                yield _Snap(doc_id, row)
+
+
+class _AsyncDB:
+    def __init__(self, rows: dict[str, dict[str, Any]]):
+        self.rows = rows
+        self.streams: list[str | None] = []
+
+    def collection(self, name: str) -> _Query:
+        assert name == "ref_equipment_providers"
+        return _Query(self)
+
+
+def _row(rental_id: str, name: str, category: str, state: str, district: str, **extra: Any) -> dict[str, Any]:
+    return {
+        "rental_id": rental_id,
+        "name": name,
+        "category": category,
+        "state": state,
+        "district": district,
+        "provider_name": extra.pop("provider_name", "Shivam Agro CHC"),
+        "source_type": extra.pop("source_type", "CHC"),
+        "_ingested_at": extra.pop("_ingested_at", "2026-01-01T00:00:00+00:00"),
+        **extra,
+    }
+
+
+@pytest.fixture
+def catalog_db(monkeypatch: pytest.MonkeyPatch) -> _AsyncDB:
+    db = _AsyncDB(
+        {
+            "p1-tractor": _row("p1-tractor", "Tractor 45 HP", "tractor", "Maharashtra", "Pune"),
+            "p1-rotavator": _row("p1-rotavator", "Rotavator", "rotavator", "Maharashtra", "Pune"),
+            "p2-harvester": _row(
+                "p2-harvester", "Combine Harvester", "harvester", "Punjab", "Ludhiana", source_type="private"
+            ),
+            "p3-old": _row("p3-old", "Tractor 35 HP", "tractor", "Punjab", "Ludhiana", is_active=False),
+        }
+    )
+    ProviderCatalog._reset()
+    ProviderCatalog.invalidate()
+    monkeypatch.setattr("services.equipment.services.provider_catalog._REFRESH_SECONDS", 0)
+    monkeypatch.setattr("services.equipment.services.provider_catalog.get_async_db", lambda: db)
+    return db
+
+
+def _ids(rows: list[dict[str, Any]]) -> list[str]:
+    return [r["rental_id"] for r in rows]
+
+
+@pytest.mark.asyncio
+async def test_filters_use_indexes_and_preserve_order(catalog_db: _AsyncDB) -> None:
+    await ProviderCatalog.ensure_loaded()
+
+    assert ProviderCatalog.size() == 3
+    assert _ids(ProviderCatalog.query(state="maharashtra ", district="PUNE")) == ["p1-tractor", "p1-rotavator"]
+    assert _ids(ProviderCatalog.query(search="tor")) == ["p1-tractor", "p1-rotavator"]
+    assert _ids(ProviderCatalog.query(search="ludh")) == ["p2-harvester"]
+    assert _ids(ProviderCatalog.query(search="ag")) == ["p1-tractor", "p1-rotavator", "p2-harvester"]
+    assert _ids(ProviderCatalog.query(equipment_name="tractor", state="Punjab")) == []
+    assert _ids(ProviderCatalog.query(source_type="Private")) == ["p2-harvester"]
+
+
+@pytest.mark.asyncio
+async def test_incremental_refresh_applies_changes_since_watermark(catalog_db: _AsyncDB) -> None:
+    await ProviderCatalog.ensure_loaded()
+
+    catalog_db.rows["p1-tractor"] = _row(
+        "p1-tractor", "Tractor 45 HP", "tractor", "Maharashtra", "Nashik", _ingested_at="2026-02-01T00:00:00+00:00"
+    )
+    catalog_db.rows["p4-drone"] = _row(
+        "p4-drone", "Spray Drone", "drone", "Maharashtra", "Pune", _ingested_at="2026-02-01T00:00:00+00:00"
+    )
+    await ProviderCatalog.ensure_loaded()
+
+    assert catalog_db.streams == [None, "2026-01-01T00:00:00+00:00"]
+    assert _ids(ProviderCatalog.query(district="pune")) == ["p1-rotavator", "p4-drone"]
+    assert _ids(ProviderCatalog.query(district="nashik")) == ["p1-tractor"]
+
+
+@pytest.mark.asyncio
+async def test_invalidate_forces_full_reload(catalog_db: _AsyncDB) -> None:
+    await ProviderCatalog.ensure_loaded()
+    del catalog_db.rows["p2-harvester"]
+
+    ProviderCatalog.invalidate()
+    await ProviderCatalog.ensure_loaded()
+
+    assert catalog_db.streams == [None, None]
+    assert ProviderCatalog.query(category="harvester") == []
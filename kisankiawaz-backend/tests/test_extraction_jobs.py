@@ -0,0 +1,170 @@
+"""Unit tests for the document extraction job pool."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from shared.errors import AppError
+
+# The service imports its sibling modules from the service root (``/app`` in the image).
+for _name in (
+    "document_artifacts",
+    "document_sessions",
+    "extraction_jobs",
+    "scheme_document_index",
+    "scheme_document_downloader",
+):
+    sys.modules.setdefault(f"services.{_name}", importlib.import_module(f"services.market.services.{_name}"))
+
+from services.market.services import document_builder_service as dbs  # noqa: E402
+from services.market.services import extraction_jobs as ej  # noqa: E402
+from services.market.services.langextract_service import read_document_text  # noqa: E402
+
+
+async def _no_redis():
+    raise ConnectionError("redis down")
+
+
+def _pool(**kwargs) -> ej.ExtractionJobPool:
+    return ej.ExtractionJobPool(
+        executor=ThreadPoolExecutor(max_workers=1), redis_factory=_no_redis, **kwargs
+    )
+
+
+async def test_jobs_are_bounded_queued_and_polled() -> None:
+    pool = _pool(max_concurrency=1, queue_limit=1)
+    release = asyncio.Event()
+
+    async def slow() -> dict:
+        await release.wait()
+        return {"extracted_fields": {"farmer_name": "Asha"}}
+
+    first = await pool.submit(slow, session_id="s1")
+    await asyncio.sleep(0)
+    second = await pool.submit(slow, session_id="s2")
+    assert pool.stats()["running"] == 1 and pool.stats()["queue_depth"] == 1
+    assert (await pool.status(second["job_id"]))["state"] == "queued"
+
+    with pytest.raises(AppError):
+        await pool.submit(slow)
+    assert pool.stats()["rejected"] == 1
+
+    release.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    done = await pool.status(first["job_id"])
+    assert done["state"] == "completed" and done["result"]["extracted_fields"] == {"farmer_name": "Asha"}
+    assert pool.stats()["queue_depth"] == 0 and pool.stats()["completed"] == 2
+
+    async def broken() -> dict:
+        raise ValueError("unreadable scan")
+
+    with pytest.raises(ValueError):
+        await pool.run(broken)
+    assert pool.stats()["failed"] == 1
+    await pool.aclose()
+
+
+async def test_reupload_is_served_from_content_hash_cache() -> None:
+    pool = _pool()
+    calls = []
+
+    async def compute() -> dict:
+        calls.append(1)
+        return {"fields": {"aadhaar_number": "4567 8901 2345"}, "method": "langextract"}
+
+    key = ej.content_key(b"aadhaar-scan", ["aadhaar_number", "farmer_name"])
+    assert key == ej.content_key(b"aadhaar-scan", ["farmer_name", "aadhaar_number"])
+    assert key != ej.content_key(b"aadhaar-scan", ["farmer_name"])
+
+    first, hit = await pool.cached(key, compute)
+    again, hit_again = await pool.cached(key, compute)
+    assert (hit, hit_again) == (False, True)
+    assert again == first and len(calls) == 1
+
+    # Empty extractions are not cached, so a later attempt can still succeed.
+    async def nothing() -> dict:
+        return {"fields": {}, "method": "failed"}
+
+    empty_key = ej.content_key(b"blurry", [])
+    await pool.cached(empty_key, nothing)
+    assert (await pool.cached(empty_key, compute))[0]["fields"]
+    await pool.aclose()
+
+
+async def test_text_extraction_runs_in_worker_process(tmp_path) -> None:
+    path = tmp_path / "passbook.txt"
+    path.write_text("Account Number: 33245678901\nIFSC Code: SBIN0001234", encoding="utf-8")
+    pool = ej.ExtractionJobPool(executor=ProcessPoolExecutor(max_workers=1), redis_factory=_no_redis)
+
+    info = await pool.run_cpu(read_document_text, str(path))
+    assert info["method"] == "plain_text" and "SBIN0001234" in info["text"]
+    await pool.aclose()
+
+
+class _Snapshot:
+    def __init__(self, data):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class _SessionRef:
+    def __init__(self, store, key):
+        self._store, self._key = store, key
+
+    async def get(self):
+        return _Snapshot(self._store.get(self._key))
+
+    async def update(self, data):
+        self._store[self._key].update(data)
+
+
+class _SessionDB:
+    def __init__(self, sessions):
+        self.sessions = sessions
+
+    def collection(self, _name):
+        return self
+
+    def document(self, key):
+        return _SessionRef(self.sessions, key)
+
+
+async def test_document_upload_merges_fields_and_reuses_cached_extraction(monkeypatch: pytest.MonkeyPatch) -> None:
+    from shared.cache import market_cache
+
+    monkeypatch.setattr(market_cache, "get_redis", _no_redis)
+    pool = _pool()
+    monkeypatch.setattr(dbs, "get_extraction_pool", lambda: pool)
+    calls = []
+
+    async def fake_extract(file_path, file_content, filename, field_names):
+        calls.append(filename)
+        return {"fields": {"farmer_name": "Asha Patil", "unknown": "x"}, "method": "langextract"}
+
+    monkeypatch.setattr(dbs.DocumentBuilderService, "_extract_fields", staticmethod(fake_extract))
+    db = _SessionDB({
+        "s1": {"form_fields": [{"field": "farmer_name"}], "filled_fields": {}},
+        "s2": {"form_fields": [{"field": "farmer_name"}], "filled_fields": {}},
+    })
+
+    first = await dbs.DocumentBuilderService.extract_from_document(db, "s1", b"%PDF scan", "aadhaar.pdf")
+    assert first["extracted_fields"] == {"farmer_name": "Asha Patil"} and first["cache_hit"] is False
+    assert db.sessions["s1"]["filled_fields"] == {"farmer_name": "Asha Patil"}
+
+    job = await dbs.DocumentBuilderService.extract_from_document(db, "s2", b"%PDF scan", "aadhaar.pdf", wait=False)
+    assert job["state"] == "queued"
+    for _ in range(5):
+        await asyncio.sleep(0)
+    polled = await dbs.DocumentBuilderService.get_extraction_job(job["job_id"])
+    assert polled["state"] == "completed" and polled["result"]["cache_hit"] is True
+    assert calls == ["aadhaar.pdf"]
+    await pool.aclose()
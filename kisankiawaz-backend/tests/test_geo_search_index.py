@@ -0,0 +1,122 @@
+"""Unit tests for the memory-mapped village/PIN search index."""
+
+from __future__ import annotations
+
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from shared.services.geo_search_index import GeoIndexRegistry, GeoSearchIndex, write_index
+
+
+def _pin(village: str, district: str, state: str, pincode: str, subdistrict: str = "") -> dict:
+    return {
+        "village_name": village,
+        "subdistrict_name": subdistrict,
+        "district_name": district,
+        "state_name": state,
+        "pincode": pincode,
+    }
+
+
+ROWS = [
+    _pin("Sangli", "Sangli", "Maharashtra", "416416", "Miraj"),
+    _pin("Sangamner", "Ahmednagar", "Maharashtra", "422605"),
+    _pin("Sangrur", "Sangrur", "Punjab", "148001"),
+    _pin("Khanna", "Ludhiana", "Punjab", "141401"),
+    _pin("Sangli", "Sangli", "Maharashtra", "416416", "Miraj"),
+]
+
+
+def _index(tmp_path) -> GeoSearchIndex:
+    path = tmp_path / "geo.bin"
+    write_index(str(path), ROWS)
+    return GeoSearchIndex(str(path))
+
+
+def test_prefix_search_dedupes_and_partitions_by_state(tmp_path) -> None:
+    index = _index(tmp_path)
+    assert len(index) == 4 and set(index.states) == {"maharashtra", "punjab"}
+
+    names = [r["village_name"] for r in index.search("sang", limit=10)]
+    assert sorted(names) == ["Sangamner", "Sangli", "Sangrur"]
+    assert [r["village_name"] for r in index.search("sang", state="Punjab")] == ["Sangrur"]
+    assert index.search("sang", state="Kerala") == []
+
+
+def test_typos_and_pincodes(tmp_path) -> None:
+    index = _index(tmp_path)
+
+    assert index.search("sangamnre")[0]["village_name"] == "Sangamner"
+    assert index.search("ludhiyana")[0]["village_name"] == "Khanna"
+    top = index.search("141401")[0]
+    assert (top["village_name"], top["district_name"], top["source"]) == ("Khanna", "Ludhiana", "pin_index")
+    assert index.search("xyzzy") == []
+
+
+def test_registry_picks_up_rebuilt_file(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "geo.bin"
+    write_index(str(path), ROWS[:1])
+    monkeypatch.setattr("shared.services.geo_search_index._RELOAD_CHECK_SECONDS", 0)
+    GeoIndexRegistry.reset()
+    try:
+        assert len(GeoIndexRegistry.get(str(path))) == 1
+        time.sleep(0.01)
+        write_index(str(path), ROWS)
+        assert len(GeoIndexRegistry.get(str(path))) == 4
+    finally:
+        GeoIndexRegistry.reset()
+
+
+
+def test_concurrent_builds_never_publish_a_partial_file(tmp_path) -> None:
+    path = tmp_path / "geo.bin"
+    rows = ROWS * 400  # large enough that writes overlap
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        sizes = list(pool.map(lambda _: write_index(str(path), rows), range(16)))
+
+    assert len(set(sizes)) == 1 and path.stat().st_size == sizes[0]
+    assert len(GeoSearchIndex(str(path))) == 4
+    assert [p.name for p in tmp_path.iterdir()] == ["geo.bin"]
+
+class _PinMaster:
+    def __init__(self, rows: list[dict] | None) -> None:
+        self.rows = rows
+        self.streams = 0
+
+    def collection(self, _name: str) -> "_PinMaster":
+        return self
+
+    async def stream(self):
+        self.streams += 1
+        if self.rows is None:
+            raise RuntimeError("mongo unavailable")
+        for row in self.rows:
+            yield types.SimpleNamespace(to_dict=lambda row=row: dict(row))
+
+
+async def test_village_index_builds_in_background_and_keeps_state_filter(tmp_path, monkeypatch) -> None:
+    from services.geo.services import geo_service
+    from services.geo.services.geo_service import GeoService
+
+    monkeypatch.setattr(geo_service, "INDEX_PATH", str(tmp_path / "geo.bin"))
+    monkeypatch.setattr(geo_service.QdrantService, "search", staticmethod(lambda **_kwargs: []))
+    monkeypatch.setattr(GeoService, "_build_failed_at", 0.0)
+    monkeypatch.setattr(GeoService, "_build_task", None)
+    GeoIndexRegistry.reset()
+    try:
+        down = _PinMaster(None)
+        assert (await GeoService.search_village(down, "sang"))["results"] == []
+        await GeoService._build_task
+        # A failed build is remembered: requests fall back without rescanning PIN master.
+        await GeoService.search_village(down, "sang")
+        assert down.streams == 1
+
+        monkeypatch.setattr(GeoService, "_build_failed_at", 0.0)
+        await GeoService.warm_village_index(_PinMaster(ROWS))
+        found = await GeoService.search_village(down, "sang", state="Punjab")
+        assert [r["village_name"] for r in found["results"]] == ["Sangrur"]
+        assert (await GeoService.search_village(down, "khanna", state="Maharashtra"))["results"] == []
+    finally:
+        GeoIndexRegistry.reset()
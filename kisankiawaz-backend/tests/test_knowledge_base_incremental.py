@@ -0,0 +1,90 @@
+"""Unit tests for incremental, content-hashed knowledge-base indexing."""
+
+from __future__ import annotations
+
+import uuid
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct
+
+from shared.services.knowledge_base_service import KnowledgeBaseService
+
+
+class _CountingKB(KnowledgeBaseService):
+    def __init__(self) -> None:
+        super().__init__()
+        self._qdrant = QdrantClient(":memory:")
+        self.embedded_texts: list[str] = []
+
+    def _embed_texts(self, texts):
+        self.embedded_texts.extend(texts)
+        return [[0.1] * 768 for _ in texts]
+
+
+def _prices(wheat_price: float) -> list[dict]:
+    return [
+        {"commodity": "Wheat", "modal_price": wheat_price, "state": "MP", "market": "Indore"},
+        {"commodity": "Onion", "modal_price": 1800, "state": "MH", "market": "Lasalgaon"},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_unchanged_rebuild_embeds_nothing() -> None:
+    kb = _CountingKB()
+
+    first = await kb.embed_market_prices(_prices(2400))
+    assert first["reembedded"] == 2
+    assert len(kb.embedded_texts) == 2
+
+    second = await kb.embed_market_prices(_prices(2400))
+    assert second == {"embedded": 2, "reembedded": 0, "unchanged": 2, "deleted": 0}
+    assert len(kb.embedded_texts) == 2
+
+
+@pytest.mark.asyncio
+async def test_changed_and_removed_sources_are_synced() -> None:
+    kb = _CountingKB()
+    await kb.embed_market_prices(_prices(2400))
+
+    result = await kb.embed_market_prices(_prices(2500)[:1], complete=True)
+
+    assert result == {"embedded": 1, "reembedded": 1, "unchanged": 0, "deleted": 1}
+    assert "Wheat current market price: ₹2500" in kb.embedded_texts[-1]
+    assert kb._qdrant.count("market_knowledge").count == 1
+
+
+@pytest.mark.asyncio
+async def test_partial_price_batches_keep_other_commodities() -> None:
+    kb = _CountingKB()
+    await kb.embed_market_prices(_prices(2400))
+
+    result = await kb.embed_market_prices(_prices(2500)[:1])
+
+    assert result == {"embedded": 1, "reembedded": 1, "unchanged": 0, "deleted": 0}
+    assert kb._qdrant.count("market_knowledge").count == 2
+
+
+@pytest.mark.asyncio
+async def test_points_from_other_writers_survive_a_complete_sync() -> None:
+    kb = _CountingKB()
+    kb._ensure_collection("market_knowledge")
+    # The mandi fetcher writes the same payload type with random ids and no content hash.
+    fetched = uuid.uuid4().hex
+    kb._qdrant.upsert(
+        collection_name="market_knowledge",
+        points=[
+            PointStruct(id=fetched, vector=[0.2] * 768, payload={"type": "market_price", "text": "Tomato ..."}),
+            PointStruct(id=uuid.uuid4().hex, vector=[0.2] * 768, payload={"type": "crop_tip", "text": "keep"}),
+        ],
+    )
+
+    await kb.embed_market_prices(_prices(2400))
+    result = await kb.embed_market_prices(_prices(2400)[:1], complete=True)
+
+    assert result["deleted"] == 1
+    assert kb._qdrant.count("market_knowledge").count == 3
+    assert kb._qdrant.retrieve("market_knowledge", ids=[fetched])
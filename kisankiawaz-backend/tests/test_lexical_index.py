@@ -0,0 +1,270 @@
+"""Unit tests for the BM25/exact-name lexical index and hybrid scheme search."""
+
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from typing import Any
+
+from shared.services import scheme_catalog
+from shared.services.lexical_index import (
+    BM25Index,
+    RefCorpus,
+    reciprocal_rank_fusion,
+    tokenize,
+)
+from shared.services.scheme_catalog import SchemeCatalog, title_acronym
+
+
+class _Snap:
+    def __init__(self, doc_id: str, data: dict[str, Any]):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self._data)
+
+
+class _Collection:
+    def __init__(self, db: "_DB", name: str):
+        self._db = db
+        self._name = name
+        self._since: str | None = None
+
+    def where(self, field: str, op: str, value: Any) -> "_Collection":
+        assert (field, op) == ("_ingested_at", ">")
+        self._since = value
+        return self
+
+    def stream(self):
+        self._db.streams.append(self._since)
+        for doc_id, row in self._db.rows.get(self._name, {}).items():
+            if self._since is None or str(row.get("_ingested_at", "")) > self._since:
+                yield _Snap(doc_id, row)
+
+
+class _DB:
+    def __init__(self, rows: dict[str, dict[str, dict[str, Any]]]):
+        self.rows = rows
+        self.streams: list[str | None] = []
+
+    def collection(self, name: str) -> _Collection:
+        return _Collection(self, name)
+
+
+SCHEMES = {
+    "scheme_pm_kisan": {
+        "scheme_id": "pm_kisan",
+        "title": "PM-KISAN",
+        "acronym": "PM-KISAN",
+        "summary": "Income support of Rs 6000 per year to landholding farmer families.",
+        "beneficiary_state": ["All"],
+        "_ingested_at": "2026-01-01T00:00:00+00:00",
+    },
+    "scheme_kcc": {
+        "scheme_id": "kcc",
+        "title": "Kisan Credit Card",
+        "acronym": "KCC",
+        "summary": "Short term crop loans at concessional interest.",
+        "beneficiary_state": ["All"],
+        "_ingested_at": "2026-01-01T00:00:00+00:00",
+    },
+    "scheme_mh_drip": {
+        "scheme_id": "mh_drip",
+        "title": "Drip Irrigation Subsidy",
+        "summary": "Subsidy on drip and sprinkler irrigation sets for small farmers.",
+        "beneficiary_state": ["Maharashtra"],
+        "_ingested_at": "2026-01-01T00:00:00+00:00",
+    },
+}
+
+
+def test_tokenize_joins_hyphenated_names() -> None:
+    assert tokenize("PM-KISAN for farmers") == ["pm", "kisan", "pmkisan", "farmers"]
+
+
+def test_bm25_ranks_and_updates_incrementally() -> None:
+    index = BM25Index()
+    index.upsert("a", "drip irrigation subsidy")
+    index.upsert("b", "crop loan interest subvention")
+
+    assert [doc_id for doc_id, _ in index.search("irrigation subsidy")] == ["a"]
+
+    index.upsert("a", "solar pump subsidy")
+    assert index.search("irrigation") == []
+    index.remove("b")
+    assert len(index) == 1 and index.search("loan") == []
+
+
+def test_exact_names_ignore_filler_words() -> None:
+    index = BM25Index()
+    index.upsert("pm_kisan", "income support", names=["PM-KISAN", "pm_kisan"])
+
+    assert index.exact("pm kisan scheme eligibility") == ["pm_kisan"]
+    assert index.exact("PM-KISAN") == ["pm_kisan"]
+    assert index.exact("crop insurance") == []
+
+
+def test_reciprocal_rank_fusion_rewards_agreement() -> None:
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["d", "b"]])
+    assert fused[0] == "b"
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_ref_corpus_refreshes_only_new_rows() -> None:
+    db = _DB({"ref_farmer_schemes": {k: dict(v) for k, v in SCHEMES.items()}})
+    corpus = RefCorpus(
+        "ref_farmer_schemes",
+        doc_id=lambda doc_id, row: row.get("scheme_id") or doc_id,
+        text=lambda row: f"{row.get('title')} {row.get('summary')}",
+        names=lambda row: [row.get("title", "")],
+        refresh_seconds=0,
+        db_factory=lambda: db,
+    )
+
+    corpus.ensure_fresh()
+    assert len(corpus.rows) == 3 and corpus.version == 1
+
+    db.rows["ref_farmer_schemes"]["scheme_pmfby"] = {
+        "scheme_id": "pmfby",
+        "title": "PMFBY",
+        "summary": "Crop insurance against yield loss.",
+        "_ingested_at": "2026-02-01T00:00:00+00:00",
+    }
+    corpus.ensure_fresh()
+    corpus.ensure_fresh()
+
+    assert db.streams == [None, "2026-01-01T00:00:00+00:00", "2026-02-01T00:00:00+00:00"]
+    assert corpus.index.exact("pmfby") == ["pmfby"]
+    assert corpus.version == 2
+
+
+
+def test_refresh_publishes_a_new_generation_without_touching_readers() -> None:
+    db = _DB({"ref_farmer_schemes": {k: dict(v) for k, v in SCHEMES.items()}})
+    corpus = RefCorpus(
+        "ref_farmer_schemes",
+        doc_id=lambda doc_id, row: row.get("scheme_id") or doc_id,
+        text=lambda row: f"{row.get('title')} {row.get('summary')}",
+        names=lambda row: [row.get("title", "")],
+        refresh_seconds=0,
+        full_reload_seconds=3600,
+        db_factory=lambda: db,
+    )
+    before = corpus.ensure_fresh()
+    db.rows["ref_farmer_schemes"]["scheme_pmfby"] = {
+        "scheme_id": "pmfby",
+        "title": "PMFBY",
+        "summary": "Crop insurance against yield loss.",
+        "_ingested_at": "2026-02-01T00:00:00+00:00",
+    }
+    after = corpus.ensure_fresh()
+
+    assert after is not before and after.version == before.version + 1
+    assert "pmfby" not in before.rows and before.index.exact("pmfby") == []
+    assert after.index.exact("pmfby") == ["pmfby"] and len(after.rows) == len(before.rows) + 1
+
+    corpus.full_reload_seconds = 0
+    reloaded = corpus.ensure_fresh()
+    assert len(after.rows) == len(reloaded.rows) and "pmfby" in after.index
+
+
+def _load_scheme_tools(embedding_service: Any):
+    if "services.embedding_service" not in sys.modules:
+        stub = types.ModuleType("services.embedding_service")
+        stub.EmbeddingService = object
+        sys.modules["services.embedding_service"] = stub
+    module_name = "services.agent.tools.scheme_tools"
+    module = (
+        importlib.reload(sys.modules[module_name])
+        if module_name in sys.modules
+        else importlib.import_module(module_name)
+    )
+    module._get_embedding_service = lambda: embedding_service
+    return module
+
+
+def _use_scheme_db(monkeypatch, db: "_DB") -> None:
+    corpus = RefCorpus(
+        "ref_farmer_schemes",
+        doc_id=scheme_catalog._scheme_doc_id,
+        text=scheme_catalog._scheme_text,
+        names=scheme_catalog._scheme_names,
+        db_factory=lambda: db,
+    )
+    monkeypatch.setattr(scheme_catalog, "SCHEME_CORPUS", corpus)
+    monkeypatch.setattr(SchemeCatalog, "_snapshot", None)
+
+
+class _RecordingEmbeddings:
+    def __init__(self, hits: list[dict[str, Any]]):
+        self.hits = hits
+        self.calls: list[tuple[str, str]] = []
+
+    def search(self, collection: str, query: str, top_k: int = 5) -> list[dict[str, Any]]:
+        self.calls.append((collection, query))
+        return self.hits
+
+
+def test_exact_scheme_name_skips_embedding(monkeypatch) -> None:
+    svc = _RecordingEmbeddings([])
+    st = _load_scheme_tools(svc)
+    db = _DB({"ref_farmer_schemes": SCHEMES})
+    _use_scheme_db(monkeypatch, db)
+
+    result = st.search_government_schemes("KCC scheme details")
+
+    assert result["match"] == "exact"
+    assert [r["scheme_id"] for r in result["results"]] == ["kcc"]
+    assert svc.calls == []
+
+
+def test_descriptive_query_fuses_lexical_and_vector_hits(monkeypatch) -> None:
+    svc = _RecordingEmbeddings([{"text": "", "score": 0.8, "metadata": {"scheme_id": "pm_kisan"}}])
+    st = _load_scheme_tools(svc)
+    db = _DB({"ref_farmer_schemes": SCHEMES})
+    _use_scheme_db(monkeypatch, db)
+
+    result = st.search_government_schemes("subsidy for irrigation", state="Maharashtra")
+
+    assert result["match"] == "hybrid"
+    assert [r["scheme_id"] for r in result["results"]] == ["mh_drip", "pm_kisan"]
+    assert svc.calls == [("schemes_semantic", "subsidy for irrigation")]
+
+
+def test_title_acronym_and_state_bitmap() -> None:
+    assert title_acronym("Pradhan Mantri Fasal Bima Yojana") == "pmfby"
+    assert title_acronym("PM-KISAN") == ""
+
+    snapshot = scheme_catalog.SchemeSnapshot(1, {k.split("_", 1)[1]: v for k, v in SCHEMES.items()})
+    mask = snapshot.state_mask("Punjab")
+    assert [d for d in snapshot.rows if snapshot.in_mask(d, mask)] == ["pm_kisan", "kcc"]
+    assert snapshot.in_mask("mh_drip", snapshot.state_mask(" maharashtra "))
+
+
+def test_acronym_lookup_and_eligibility_use_cached_snapshot(monkeypatch) -> None:
+    svc = _RecordingEmbeddings([])
+    st = _load_scheme_tools(svc)
+    rows = dict(SCHEMES)
+    rows["scheme_pmfby"] = {
+        "scheme_id": "pmfby",
+        "title": "Pradhan Mantri Fasal Bima Yojana",
+        "summary": "Crop insurance against yield loss.",
+        "eligibility": "All farmers growing notified crops.",
+        "beneficiary_state": [],
+        "_ingested_at": "2026-01-01T00:00:00+00:00",
+    }
+    db = _DB({"ref_farmer_schemes": rows})
+    _use_scheme_db(monkeypatch, db)
+
+    result = st.search_government_schemes("how to claim under pmfby", state="Bihar")
+    assert result["match"] == "exact"
+    assert [r["scheme_id"] for r in result["results"]] == ["pmfby"]
+
+    snapshot = SchemeCatalog._snapshot
+    eligibility = st.check_scheme_eligibility("drip irrigation")
+    assert eligibility["scheme"] == "Drip Irrigation Subsidy"
+    assert st.check_scheme_eligibility("PMFBY")["eligibility"] == "All farmers growing notified crops."
+    assert SchemeCatalog._snapshot is snapshot
+    assert db.streams == [None] and svc.calls == []
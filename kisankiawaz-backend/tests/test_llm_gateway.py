@@ -0,0 +1,114 @@
+"""Unit tests for LLM admission control: token buckets, AIMD and priority shedding."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from shared.patterns import llm_gateway as lg
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_at_key_derived_rate() -> None:
+    clock = _Clock()
+    bucket = lg.TokenBucket(rate=0.5, burst=2, clock=clock)
+    assert bucket.take() and bucket.take() and not bucket.take()
+    assert bucket.wait_for(1) == pytest.approx(2.0)
+    clock.now += 2.0
+    assert bucket.take()
+
+
+def test_aimd_grows_per_window_and_halves_once_per_overload() -> None:
+    clock = _Clock()
+    limit = lg.AimdLimit(initial=4, minimum=1, maximum=16, latency_target=10, clock=clock)
+    for _ in range(4):
+        limit.on_success(latency=1.0)
+    assert limit.current == 4 and limit.limit > 4.9
+
+    limit.on_overload()
+    limit.on_overload()  # same window: in-flight calls reporting the same burst
+    assert limit.current == 2 and limit.decreases == 1
+
+    clock.now += 11
+    limit.on_success(latency=30.0)  # slower than target counts as overload
+    assert limit.current == 1
+
+
+async def test_voice_is_admitted_before_queued_chat_and_background() -> None:
+    gateway = lg.LlmGateway(key_count=lambda _p: 1)
+    lane = gateway.lane("gemini")
+    lane.limit.limit = lane.limit.maximum = 1
+    lane.bucket = lg.TokenBucket(rate=100, burst=10)
+    order: list[str] = []
+    release = asyncio.Event()
+
+    async def call(name: str) -> str:
+        order.append(name)
+        await release.wait()
+        return name
+
+    first = asyncio.create_task(gateway.run("gemini", lambda: call("first"), priority="chat"))
+    await asyncio.sleep(0)
+    waiting = [
+        asyncio.create_task(gateway.run("gemini", lambda n=name: call(n), priority=name))
+        for name in ("background", "chat", "voice")
+    ]
+    await asyncio.sleep(0)
+    assert lane.stats()["queue_depth"] == 3
+
+    release.set()
+    await asyncio.gather(first, *waiting)
+    assert order == ["first", "voice", "chat", "background"]
+    stats = gateway.stats()["gemini"]["priorities"]
+    assert stats["voice"]["admitted"] == 1 and stats["voice"]["queue_wait"]["count"] == 1
+
+
+async def test_requests_that_cannot_meet_deadline_are_shed_fast() -> None:
+    # All keys cooling for 60s: a voice turn (8s budget) is refused at once.
+    gateway = lg.LlmGateway(key_count=lambda _p: 2, ready_in=lambda _p: 60.0)
+    with pytest.raises(lg.LlmGatewayShed) as excinfo:
+        await gateway.run("groq", lambda: asyncio.sleep(0), priority="voice")
+    assert excinfo.value.reason == "deadline" and excinfo.value.retry_after == 60.0
+
+    stats = gateway.stats()["groq"]
+    assert stats["priorities"]["voice"]["shed_rate"] == 1.0 and stats["shed_reasons"] == {"deadline": 1}
+
+
+async def test_full_queue_evicts_lower_priority_and_overload_shrinks_limit() -> None:
+    gateway = lg.LlmGateway(key_count=lambda _p: 1, max_queue=1)
+    lane = gateway.lane("gemini")
+    lane.limit.limit = 1
+    release = asyncio.Event()
+
+    async def rate_limited() -> None:
+        await release.wait()
+        raise RuntimeError("429 RESOURCE_EXHAUSTED")
+
+    running = asyncio.create_task(
+        gateway.run("gemini", rate_limited, is_overload=lambda exc: "429" in str(exc))
+    )
+    await asyncio.sleep(0)
+    background = asyncio.create_task(gateway.run("gemini", lambda: asyncio.sleep(0), priority="background"))
+    await asyncio.sleep(0)
+    voice = asyncio.create_task(gateway.run("gemini", lambda: asyncio.sleep(0, "ok"), priority="voice"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(lg.LlmGatewayShed) as excinfo:
+        await background
+    assert excinfo.value.reason == "evicted"
+
+    release.set()
+    with pytest.raises(RuntimeError):
+        await running
+    assert await voice == "ok"
+    stats = lane.stats()
+    assert stats["overloads"] == 1 and stats["limit_decreases"] == 0  # already at the floor
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
@@ -6,10 +6,33 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import Any
 
+import pytest
+
 from shared.core.constants import MongoCollections
+from shared.services.district_centroids import CentroidTable, compute_centroids, district_id
+from shared.services.soil_samples import SoilSampleStore
 from services.market.services import weather_service as ws
 
 
+@pytest.fixture(autouse=True)
+def _isolated_coordinate_caches(monkeypatch: pytest.MonkeyPatch) -> dict[str, Any]:
+    user_cache: dict[str, Any] = {}
+
+    async def fake_get(user_id: str):
+        return user_cache.get(user_id)
+
+    async def fake_set(user_id: str, resolution: dict[str, Any]) -> None:
+        user_cache[user_id] = resolution
+
+    monkeypatch.setattr(ws, "get_cached_user_coordinates", fake_get)
+    monkeypatch.setattr(ws, "set_cached_user_coordinates", fake_set)
+    CentroidTable.reset()
+    SoilSampleStore.reset()
+    yield user_cache
+    CentroidTable.reset()
+    SoilSampleStore.reset()
+
+
 class FakeDoc:
     def __init__(self, data: dict[str, Any]):
         self._data = data
@@ -219,6 +242,52 @@ def test_resolve_coordinates_pin_master_fallback() -> None:
     assert round(resolved.lon, 2) == 76.64
 
 
+def test_centroids_prefer_mandi_average_over_pin_master() -> None:
+    docs = compute_centroids(
+        [
+            {"state": "Maharashtra", "district": "Pune", "lat": 18.4, "lon": 73.8},
+            {"state": "Maharashtra", "district": "Pune", "lat": 18.6, "lon": 73.9},
+            {"state": "Maharashtra", "district": "Mars", "lat": 0.0, "lon": 0.0},
+        ],
+        [
+            {"state_name": "Maharashtra", "district_name": "pune ", "latitude": 19.0, "longitude": 74.0, "pincode": 411001},
+            {"state_name": "Karnataka", "district_name": "Mysuru", "latitude": 12.3, "longitude": 76.64},
+        ],
+    )
+
+    pune = docs[district_id("maharashtra", "Pune")]
+    assert (pune["lat"], pune["lon"], pune["source"]) == (18.5, 73.85, "profile_district_mandi")
+    assert docs["pincode:411001"]["lat"] == 19.0
+    assert docs[district_id("Karnataka", "Mysuru")]["source"] == "profile_district_pin_master"
+    assert district_id("Maharashtra", "Mars") not in docs
+
+
+def test_resolve_coordinates_hits_centroid_table_then_user_cache(_isolated_coordinate_caches) -> None:
+    CentroidTable._entries = {district_id("Punjab", "Ludhiana"): (30.9, 75.85, "profile_district_mandi")}
+    CentroidTable._checked_at = float("inf")
+    db = FakeDB({MongoCollections.FARMER_PROFILES: [{"user_id": "u3", "state": "Punjab", "district": "Ludhiana"}]})
+
+    resolved = asyncio.run(ws.resolve_coordinates(db=db, user={"id": "u3"}))
+    assert (resolved.lat, resolved.lon, resolved.source) == (30.9, 75.85, "profile_district_mandi")
+    assert _isolated_coordinate_caches["u3"]["location_label"] == "Ludhiana, Punjab"
+
+    again = asyncio.run(ws.resolve_coordinates(db=None, user={"id": "u3"}))
+    assert again == resolved
+
+
+def test_live_resolution_is_remembered_in_centroid_table() -> None:
+    db = FakeDB(
+        {
+            MongoCollections.FARMER_PROFILES: [{"user_id": "u4", "state": "Bihar", "district": "Gaya"}],
+            MongoCollections.REF_MANDI_DIRECTORY: [{"state": "Bihar", "district": "Gaya", "lat": 24.79, "lon": 85.0}],
+        }
+    )
+
+    asyncio.run(ws.resolve_coordinates(db=db, user={"id": "u4"}))
+
+    assert CentroidTable.lookup(district_id("Bihar", "Gaya")) == (24.79, 85.0, "profile_district_mandi")
+
+
 def test_soil_composition_graceful_fallback_when_provider_fails() -> None:
     old_cache_get = ws._cache_get_json
     old_cache_set = ws._cache_set_json
@@ -300,3 +369,108 @@ def test_soil_composition_uses_wcs_when_rest_provider_fails() -> None:
     assert result["available"] is True
     assert result["provider"] == "soilgrids-wcs"
     assert result["metrics"]["sand"]["value"] is not None
+
+
+
+class _SampleDoc:
+    def __init__(self, store: dict[str, dict[str, Any]], doc_id: str):
+        self._store, self.id = store, doc_id
+
+    async def get(self):
+        data = self._store.get(self.id)
+        return type("Snap", (), {"exists": data is not None, "to_dict": lambda _self: dict(data or {})})()
+
+    async def set(self, data: dict[str, Any], merge: bool = False) -> None:
+        self._store[self.id] = dict(data)
+
+
+class _SampleDB:
+    def __init__(self) -> None:
+        self.docs: dict[str, dict[str, Any]] = {}
+
+    def collection(self, name: str):
+        assert name == MongoCollections.REF_SOIL_SAMPLES
+        return type("Coll", (), {"document": lambda _self, doc_id: _SampleDoc(self.docs, doc_id)})()
+
+
+def test_soil_composition_served_from_sample_store_and_refills_gaps(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[Any] = []
+
+    async def no_cache(*_args, **_kwargs):
+        return None
+
+    async def rest_down(_url: str, _params: dict[str, Any], timeout: float = 30.0):
+        calls.append("rest")
+        raise RuntimeError("provider-down")
+
+    async def fake_wcs(lat: float, lon: float, layers=None):
+        calls.append(layers)
+        if layers is None:
+            return {p: {d: (None if p == "cec" else 20.0) for d in ws.SOIL_DEPTH_LIST} for p in ws.SOIL_PROPERTY_LIST}
+        return {p: {d: 130.0} for p, d in layers}
+
+    monkeypatch.setattr(ws, "_cache_get_json", no_cache)
+    monkeypatch.setattr(ws, "_cache_set_json", no_cache)
+    monkeypatch.setattr(ws, "_http_json", rest_down)
+    monkeypatch.setattr(ws, "_fetch_soilgrids_via_wcs", fake_wcs)
+    db = _SampleDB()
+
+    first = asyncio.run(ws.get_soil_composition(lat=18.521, lon=73.856, db=db))
+    assert first["provider"] == "soilgrids-wcs"
+    assert first["metrics"]["cec"]["value"] is None
+    assert list(db.docs) == [first["sample"]["cell"]]
+
+    # A nearby point in the same cell, after a restart, never reaches REST.
+    SoilSampleStore.reset()
+    db.docs[first["sample"]["cell"]]["checked_at"] = 0
+    calls.clear()
+    second = asyncio.run(ws.get_soil_composition(lat=18.53, lon=73.86, db=db))
+    assert "rest" not in calls
+    assert calls == [[("cec", d) for d in ws.SOIL_DEPTH_LIST]]
+    assert second["metrics"]["cec"]["value"] == 130.0
+    assert second["metrics"]["sand"]["value"] == 20.0
+
+    calls.clear()
+    asyncio.run(ws.get_soil_composition(lat=18.54, lon=73.87, db=db))
+    assert calls == []
+
+
+def test_build_farm_decisions_finds_spray_window_and_frost_day() -> None:
+    now = datetime.now(ws.IST).replace(minute=0, second=0, microsecond=0)
+    hourly = _build_hourly(
+        now,
+        wind=5.0,
+        precip_prob=40.0,
+        temp=36.0,
+        humidity=60.0,
+        top_moisture=0.25,
+        root_moisture=0.22,
+        soil_temp6=22.0,
+    )
+    # Calm (0 km/h) and dry (0%) from hour 5 onwards; the heat breaks at hour 10.
+    for i in range(5, 72):
+        hourly["wind_speed_10m"][i] = 0.0
+        hourly["precipitation_probability"][i] = 0.0
+    for i in range(10, 72):
+        hourly["temperature_2m"][i] = 30.0
+    hourly["temperature_2m"][3] = None
+    daily = _build_daily(now, et0_today=3.0, precip_today=0.0, tmax_today=36.0, min_week_temp=8.0)
+    daily["temperature_2m_min"][4] = 2.5
+
+    decisions = ws._build_farm_decisions(hourly=hourly, daily=daily, current={"wind_speed": 5.0})
+
+    window = decisions["spray_window"]["next_good_window"]
+    assert decisions["spray_window"]["good_now"] is False
+    assert window["start"] == hourly["time"][5]
+    assert window["end"] == hourly["time"][6]
+    assert decisions["heat_stress"]["consecutive_hot_hours"] == 6
+    assert decisions["frost_risk"]["alert"] is True
+    assert decisions["frost_risk"]["lowest_temp"] == 2.5
+    assert decisions["frost_risk"]["when"] == daily["time"][4]
+
+
+def test_find_closest_time_index_naive_timestamps() -> None:
+    now = datetime.now(ws.IST).replace(tzinfo=None, minute=0, second=0, microsecond=0)
+    times = [(now + timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M") for i in range(-5, 20)]
+    assert ws._find_closest_time_index(times) in (5, 6)
+    assert ws._find_closest_time_index(["not-a-time", *times]) in (6, 7)
@@ -0,0 +1,113 @@
+"""Unit tests for page-parallel, early-exit document text extraction."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from services.market.services import langextract_service as ls
+
+PAGES = {
+    0: "Khasra No: 112, 113\nOwner Name: Suresh Yadav\nVillage: Bhadohi, Tehsil: Gopiganj",
+    1: "District: Bhadohi, State: Uttar Pradesh\nTotal Area: 3.5 Acres",
+    2: "Mutation history ...",
+    3: "Mutation history ...",
+    4: "Mutation history ...",
+    5: "Contact mobile: 9876543210",
+}
+
+
+@pytest.fixture
+def fake_pdf(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ls, "DOCUMENT_TEXT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(ls, "PDF_PAGE_BATCH", 1)
+    monkeypatch.setattr(ls, "PDF_PAGE_PARALLELISM", 2)
+    path = tmp_path / "khatauni.pdf"
+    path.write_bytes(b"%PDF-1.4 land record")
+    reads: list[int] = []
+
+    def fake_outline(file_path):
+        digest = ls.file_digest(file_path)
+        return {"digest": digest, "page_count": len(PAGES), "pages": ls.load_text_cache(digest).get("pages") or {}}
+
+    def fake_pages(file_path, page_numbers):
+        reads.extend(page_numbers)
+        return [(n, PAGES[n]) for n in page_numbers]
+
+    monkeypatch.setattr(ls, "pdf_outline", fake_outline)
+    monkeypatch.setattr(ls, "read_pdf_pages", fake_pages)
+    return str(path), reads
+
+
+async def _run_cpu(fn, *args):
+    await asyncio.sleep(0)
+    return fn(*args)
+
+
+def test_field_patterns_match_common_document_text() -> None:
+    text = (
+        "Name / नाम: Rajesh Kumar Singh\nDate of Birth / जन्म तिथि: 25/06/1980\n"
+        "Aadhaar Number: 9876 5432 1098\nState Bank of India\nAccount Number: 33245678901\n"
+        "IFSC Code: SBIN0001234\nFather’s Name: Ram Prasad"
+    )
+    found = ls.match_fields(
+        text,
+        ["farmer_name", "date_of_birth", "aadhaar_number", "bank_account_number", "ifsc_code", "father_name", "bank_name", "crop_name"],
+    )
+    assert found == {
+        "farmer_name": "Rajesh Kumar Singh",
+        "date_of_birth": "25/06/1980",
+        "aadhaar_number": "9876 5432 1098",
+        "bank_account_number": "33245678901",
+        "ifsc_code": "SBIN0001234",
+        "father_name": "Ram Prasad",
+        "bank_name": "State Bank of India",
+    }
+    # A field without a pattern can never be confirmed, so it disables early exit.
+    assert not ls.fields_complete(found, ["farmer_name", "crop_name"])
+    assert not ls.fields_complete(found, [])
+
+
+async def test_parallel_read_stops_once_requested_fields_match(fake_pdf) -> None:
+    path, reads = fake_pdf
+    fields = ["khasra_number", "farmer_name", "village", "district", "land_area_acres"]
+
+    result = await ls.read_document_text_async(path, fields, _run_cpu)
+    assert result["early_exit"] is True and result["pages_read"] == 2
+    assert result["matches"]["land_area_acres"] == "3.5"
+    assert result["text"] == PAGES[0] + "\n" + PAGES[1]
+    assert sorted(reads) == [0, 1]
+
+
+async def test_page_text_is_cached_per_document_hash(fake_pdf) -> None:
+    path, reads = fake_pdf
+
+    full = await ls.read_document_text_async(path, ["mobile_number"], _run_cpu)
+    assert full["pages_read"] == len(PAGES) and full["matches"] == {"mobile_number": "9876543210"}
+    assert sorted(reads) == list(PAGES)
+
+    reads.clear()
+    again = ls.read_document_text(path, ["farmer_name", "crop_name"])
+    assert reads == [] and again["pages_read"] == len(PAGES)
+    assert again["text"] == full["text"]
+
+
+def test_text_cache_expires_and_stays_under_its_size_cap(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ls, "DOCUMENT_TEXT_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(ls, "DOCUMENT_TEXT_CACHE_TTL_SECONDS", 3600)
+    now = time.time()
+    for age, digest in [(7200, "aa01"), (1800, "bb02"), (600, "cc03"), (60, "dd04")]:
+        ls.store_text_cache(digest, {"pages": {"0": "Aadhaar Number: 9876 5432 1098"}})
+        os.utime(ls._text_cache_path(digest), (now - age, now - age))
+
+    assert ls.load_text_cache("aa01") == {}  # expired: dropped on read
+    assert not os.path.exists(ls._text_cache_path("aa01"))
+
+    size = os.path.getsize(ls._text_cache_path("dd04"))
+    monkeypatch.setattr(ls, "DOCUMENT_TEXT_CACHE_MAX_BYTES", 2 * size)
+    assert ls.purge_text_cache(now) == 1
+    assert ls.load_text_cache("bb02") == {}
+    assert ls.load_text_cache("cc03") and ls.load_text_cache("dd04")
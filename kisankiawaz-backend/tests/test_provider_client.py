@@ -0,0 +1,65 @@
+"""Unit tests for pooled provider clients, breakers and latency histograms."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from shared.patterns.circuit_breaker import CircuitBreakerOpen
+from shared.patterns.provider_client import LatencyHistogram, ProviderClient
+
+
+def test_histogram_buckets_and_percentiles() -> None:
+    hist = LatencyHistogram(buckets_ms=(10, 100, 1000))
+    for ms in (5, 8, 50, 60, 70, 500, 5000):
+        hist.observe(ms, ok=ms < 1000)
+
+    snap = hist.snapshot()
+    assert snap["buckets"] == {"le_10": 2, "le_100": 3, "le_1000": 1, "gt_last": 1}
+    assert (snap["count"], snap["errors"], snap["p50_ms"]) == (7, 1, 100.0)
+    assert snap["p99_ms"] is None
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_server_errors_but_not_client_errors() -> None:
+    status = {"code": 404}
+    transport = httpx.MockTransport(lambda request: httpx.Response(status["code"], json={}))
+    client = ProviderClient("soil", failure_threshold=2, recovery_timeout=60, transport=transport)
+
+    for _ in range(3):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.get_json("https://soil.test/q")
+    assert client.stats()["circuit"] == "CLOSED"
+
+    status["code"] = 503
+    for _ in range(2):
+        with pytest.raises(Exception):
+            await client.get_json("https://soil.test/q")
+    with pytest.raises(CircuitBreakerOpen):
+        await client.get_json("https://soil.test/q")
+
+    stats = client.stats()
+    assert stats["circuit"] == "OPEN" and stats["rejected_while_open"] == 1
+    assert stats["latency"]["count"] == 5 and stats["latency"]["errors"] == 2
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fan_out_respects_concurrency_cap() -> None:
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, content=b"tiff")
+
+    client = ProviderClient("wcs", max_concurrency=3, transport=httpx.MockTransport(handler))
+    results = await asyncio.gather(*(client.get_bytes("https://wcs.test/map") for _ in range(12)))
+
+    assert results == [b"tiff"] * 12
+    assert in_flight["peak"] == 3
+    await client.aclose()
@@ -0,0 +1,77 @@
+"""Unit tests for the shadow-collection / alias-swap Qdrant rebuild."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import QdrantClient
+
+from shared.services.qdrant_service import QdrantService
+
+
+@pytest.fixture
+def local_qdrant(monkeypatch: pytest.MonkeyPatch) -> QdrantClient:
+    client = QdrantClient(":memory:")
+    monkeypatch.setattr(QdrantService, "_client", client)
+    monkeypatch.setattr(QdrantService, "_model", object())
+    calls: list[int] = []
+
+    def _fake_embed_batch(cls, texts):
+        calls.append(len(texts))
+        return [[float(len(text))] + [0.1] * 767 for text in texts]
+
+    monkeypatch.setattr(QdrantService, "embed_batch", classmethod(_fake_embed_batch))
+    client.embed_calls = calls  # type: ignore[attr-defined]
+    return client
+
+
+def _docs(count: int):
+    for idx in range(count):
+        yield idx, f"doc {idx}", {"text": f"doc {idx}"}
+
+
+def test_rebuild_streams_batches_and_swaps_alias(local_qdrant: QdrantClient) -> None:
+    QdrantService.ensure_collection("schemes_semantic")
+
+    total = QdrantService.rebuild_collection(
+        "schemes_semantic", _docs(250), embed_batch_size=40, upsert_batch_size=64, upsert_workers=3
+    )
+
+    assert total == 250
+    assert local_qdrant.embed_calls == [40, 40, 40, 40, 40, 40, 10]
+    aliases = QdrantService._alias_targets()
+    assert aliases["schemes_semantic"].startswith("schemes_semantic__")
+    assert QdrantService._collection_names() == {aliases["schemes_semantic"]}
+    assert local_qdrant.count("schemes_semantic").count == 250
+
+
+def test_rebuild_drops_previous_generation(local_qdrant: QdrantClient) -> None:
+    QdrantService.rebuild_collection("equipment_semantic", _docs(5))
+    first = QdrantService._alias_targets()["equipment_semantic"]
+
+    QdrantService.rebuild_collection("equipment_semantic", _docs(3))
+    second = QdrantService._alias_targets()["equipment_semantic"]
+
+    assert first != second
+    assert QdrantService._collection_names() == {second}
+    assert local_qdrant.count("equipment_semantic").count == 3
+
+
+def test_failed_rebuild_keeps_serving_old_generation(
+    local_qdrant: QdrantClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    QdrantService.rebuild_collection("schemes_semantic", _docs(4))
+    live = QdrantService._alias_targets()["schemes_semantic"]
+
+    def _broken_docs():
+        yield from _docs(2)
+        raise RuntimeError("mongo cursor died")
+
+    with pytest.raises(RuntimeError):
+        QdrantService.rebuild_collection("schemes_semantic", _broken_docs(), embed_batch_size=1)
+
+    assert QdrantService._alias_targets()["schemes_semantic"] == live
+    assert QdrantService._collection_names() == {live}
+    assert local_qdrant.count("schemes_semantic").count == 4
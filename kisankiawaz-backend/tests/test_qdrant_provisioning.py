@@ -0,0 +1,124 @@
+"""Unit tests for spec-driven Qdrant provisioning, payload indexes and search params."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client.models import ScalarType
+
+from shared.core.config import Settings
+from shared.services import qdrant_service
+from shared.services.qdrant_service import QdrantService
+
+
+class _StubClient:
+    def __init__(self) -> None:
+        self.collections: dict[str, SimpleNamespace] = {}
+        self.created: dict[str, dict] = {}
+        self.index_calls: list[str] = []
+        self.info_calls = 0
+        self.failing: set[str] = set()
+
+    def get_collections(self):
+        return SimpleNamespace(collections=[SimpleNamespace(name=name) for name in self.collections])
+
+    def get_aliases(self):
+        return SimpleNamespace(aliases=[])
+
+    def create_collection(self, collection_name, vectors_config, hnsw_config, quantization_config):
+        self.created[collection_name] = {
+            "vectors": vectors_config,
+            "hnsw": hnsw_config,
+            "quantization": quantization_config,
+        }
+        self.add(collection_name, quantized=quantization_config is not None)
+
+    def add(self, name: str, indexed: tuple[str, ...] = (), quantized: bool = False) -> None:
+        self.collections[name] = SimpleNamespace(
+            payload_schema={field: "keyword" for field in indexed},
+            config=SimpleNamespace(quantization_config=object() if quantized else None),
+        )
+
+    def get_collection(self, collection_name):
+        self.info_calls += 1
+        return self.collections[collection_name]
+
+    def search(self, collection_name, query_vector, limit, query_filter, search_params):
+        return []
+
+    def create_payload_index(self, collection_name, field_name, field_schema, wait):
+        self.index_calls.append(field_name)
+        if field_name in self.failing:
+            raise RuntimeError("timeout")
+        self.collections[collection_name].payload_schema[field_name] = field_schema
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> _StubClient:
+    stub = _StubClient()
+    settings = Settings(QDRANT_SCALAR_QUANTIZATION=True, QDRANT_QUANTIZATION_OVERSAMPLING=0.5, QDRANT_SEARCH_HNSW_EF=0)
+    monkeypatch.setattr(qdrant_service, "get_settings", lambda: settings)
+    monkeypatch.setattr(QdrantService, "_client", stub)
+    monkeypatch.setattr(QdrantService, "_model", object())
+    monkeypatch.setattr(QdrantService, "_indexed_collections", set())
+    monkeypatch.setattr(QdrantService, "_index_retry_at", {})
+    monkeypatch.setattr(QdrantService, "_quantized_collections", {})
+    return stub
+
+
+def test_collections_are_provisioned_from_their_spec(client: _StubClient) -> None:
+    QdrantService.ensure_collection("equipment_semantic__20260101")
+    QdrantService.ensure_collection("schemes_faq")
+
+    large = client.created["equipment_semantic__20260101"]
+    assert large["vectors"].on_disk is True and large["vectors"].size == 768
+    assert large["quantization"].scalar.type == ScalarType.INT8 and large["quantization"].scalar.always_ram
+    assert (large["hnsw"].m, large["hnsw"].ef_construct) == (16, 100)
+    assert set(client.collections["equipment_semantic__20260101"].payload_schema) >= {"equipment_id", "is_active"}
+
+    small = client.created["schemes_faq"]
+    assert small["vectors"].on_disk is False and small["quantization"] is None
+
+
+def test_failed_payload_indexes_are_retried_after_a_backoff(
+    client: _StubClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    client.add("crop_knowledge", indexed=("type",))
+    client.failing = {"state"}
+
+    assert QdrantService.ensure_payload_indexes("crop_knowledge") == ["crop"]
+    assert client.index_calls == ["crop", "state"]
+
+    # Within the back-off a failing field is not retried, and searches never create indexes.
+    client.failing = set()
+    assert QdrantService.ensure_payload_indexes("crop_knowledge") == []
+    QdrantService.search("crop_knowledge", "", filter_payload={"state": "Bihar"}, query_vector=[0.0] * 768)
+    assert client.index_calls == ["crop", "state"]
+
+    monkeypatch.setitem(QdrantService._index_retry_at, "crop_knowledge", 0.0)
+    assert QdrantService.ensure_payload_indexes("crop_knowledge") == ["state"]
+    assert client.index_calls == ["crop", "state", "state"]
+
+    # Complete now: later calls skip the collection without reading its info.
+    reads = client.info_calls
+    assert QdrantService.ensure_payload_indexes("crop_knowledge") == []
+    assert client.info_calls == reads
+
+
+def test_search_params_follow_quantization_and_overrides(client: _StubClient) -> None:
+    client.add("farming_general")
+    client.add("mandi_price_intelligence", quantized=True)
+
+    assert QdrantService._search_params("farming_general") is None
+    tuned = QdrantService._search_params("farming_general", hnsw_ef=128)
+    assert (tuned.hnsw_ef, tuned.exact, tuned.quantization) == (128, False, None)
+
+    quantized = QdrantService._search_params("mandi_price_intelligence")
+    assert quantized.quantization.rescore is True and quantized.quantization.oversampling == 1.0
+
+    exact = QdrantService._search_params("mandi_price_intelligence", exact=True)
+    assert exact.exact is True and exact.quantization is None
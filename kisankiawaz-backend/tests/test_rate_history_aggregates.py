@@ -0,0 +1,193 @@
+"""Unit tests for materialized equipment rate-history aggregates."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from shared.services import rate_history_aggregates as rha
+from shared.services.rate_history_aggregates import (
+    ALL_STATES,
+    aggregate_doc_id,
+    apply_rate_history_entry_async,
+    backfill_rate_history_aggregates,
+    compute_aggregates,
+    history_rows,
+    plan_aggregate_sync,
+)
+
+
+def _row(name: str, state: str, period: str, daily: float, hourly: float = 0, per_acre: Any = None) -> dict:
+    return {
+        "equipment_name": name,
+        "category": "land_preparation",
+        "state": state,
+        "period": period,
+        "rate_daily": daily,
+        "rate_hourly": hourly,
+        "rate_per_acre": per_acre,
+    }
+
+
+SOURCE = [
+    _row("Tractor 45 HP", "Punjab", "2026-01", 2000, 250),
+    _row("Tractor 45 HP", "Punjab", "2026-01", 2400, 0, 900),
+    _row("tractor-45 hp", "Bihar", "2026-01", 1600, 200),
+    _row("Tractor 45 HP", "Punjab", "2026-02", 2600, 300),
+]
+
+
+def test_aggregates_match_per_request_bucketing() -> None:
+    docs = compute_aggregates(SOURCE)
+
+    punjab = [d for d in docs.values() if d["equipment_key"] == "tractor 45 hp" and d["state_key"] == "punjab"]
+    rows = history_rows(punjab, "Tractor 45 HP", "Punjab")
+    assert [(r["period"], r["rate_daily"], r["rate_hourly"], r["rate_per_acre"], r["sample_size"]) for r in rows] == [
+        ("2026-01", 2200.0, 250.0, 900.0, 2),
+        ("2026-02", 2600.0, 300.0, None, 1),
+    ]
+
+    everywhere = [d for d in docs.values() if d["state_key"] == ALL_STATES]
+    rows = history_rows(everywhere, "Tractor 45 HP", None)
+    assert rows[0]["state"] == "All states"
+    assert rows[0]["rate_daily"] == 2000.0 and rows[0]["sample_size"] == 3
+
+
+def test_sync_plan_only_rewrites_changed_buckets() -> None:
+    existing = compute_aggregates(SOURCE)
+    changed = SOURCE[:3] + [_row("Tractor 45 HP", "Punjab", "2026-02", 2800, 300)]
+
+    upserts, deletes = plan_aggregate_sync(changed, existing)
+    assert set(upserts) == {
+        aggregate_doc_id("tractor 45 hp", "punjab", "2026-02"),
+        aggregate_doc_id("tractor 45 hp", ALL_STATES, "2026-02"),
+    }
+    assert deletes == []
+
+    upserts, deletes = plan_aggregate_sync(SOURCE[:3], existing, equipment_keys={"rotavator"})
+    assert upserts == {} and deletes == []
+
+
+class _Snap:
+    def __init__(self, data: dict | None):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> dict:
+        return dict(self._data or {})
+
+
+class _Ref:
+    def __init__(self, store: dict, doc_id: str):
+        self._store = store
+        self._id = doc_id
+
+    async def get(self) -> _Snap:
+        return _Snap(self._store.get(self._id))
+
+    async def set(self, data: dict, merge: bool = False) -> None:
+        self._store[self._id] = dict(data)
+
+    async def delete(self) -> None:
+        self._store.pop(self._id, None)
+
+
+class _AggDB:
+    def __init__(self, store: dict):
+        self.store = store
+
+    def collection(self, name: str):
+        assert name == "ref_equipment_rate_history_agg"
+        return self
+
+    def document(self, doc_id: str) -> _Ref:
+        return _Ref(self.store, doc_id)
+
+
+@pytest.mark.asyncio
+async def test_single_entry_edit_moves_its_contribution() -> None:
+    store = compute_aggregates(SOURCE)
+    db = _AggDB(store)
+    bihar_jan = aggregate_doc_id("tractor 45 hp", "bihar", "2026-01")
+
+    await apply_rate_history_entry_async(db, SOURCE[2], {**SOURCE[2], "rate_daily": 1800})
+    assert store[bihar_jan]["rate_daily_sum"] == 1800
+    assert store[aggregate_doc_id("tractor 45 hp", ALL_STATES, "2026-01")]["rate_daily_sum"] == 6200
+
+    await apply_rate_history_entry_async(db, {**SOURCE[2], "rate_daily": 1800}, None)
+    assert bihar_jan not in store
+    assert store[aggregate_doc_id("tractor 45 hp", ALL_STATES, "2026-01")]["sample_size"] == 2
+
+
+class _Doc:
+    def __init__(self, doc_id: str, data: dict):
+        self.id = doc_id
+        self._data = data
+
+    def to_dict(self) -> dict:
+        return dict(self._data)
+
+
+class _Table:
+    def __init__(self, rows: dict):
+        self.rows = rows
+        self.streams = 0
+
+    def limit(self, _count: int) -> "_Table":
+        return _Table(dict(list(self.rows.items())[:1]))
+
+    async def stream(self):
+        self.streams += 1
+        for doc_id, row in list(self.rows.items()):
+            await asyncio.sleep(0)
+            yield _Doc(doc_id, row)
+
+    def document(self, doc_id: str) -> _Ref:
+        return _Ref(self.rows, doc_id)
+
+
+class _BackfillDB:
+    def __init__(self, source: list[dict]):
+        self.tables = {
+            "ref_equipment_rate_history": _Table({str(i): row for i, row in enumerate(source)}),
+            "ref_equipment_rate_history_agg": _Table({}),
+        }
+
+    def collection(self, name: str) -> _Table:
+        return self.tables[name]
+
+
+class _LockRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def set(self, key: str, value: str, ex: int | None = None, nx: bool = False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key: str):
+        self.data.pop(key, None)
+
+
+@pytest.mark.asyncio
+async def test_backfill_runs_once_across_concurrent_workers(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = _LockRedis()
+
+    async def factory():
+        return redis
+
+    monkeypatch.setattr(rha, "get_redis", factory)
+    db = _BackfillDB(SOURCE)
+
+    results = await asyncio.gather(*(backfill_rate_history_aggregates(db) for _ in range(3)))
+
+    assert sum(r is not None for r in results) == 1
+    assert db.tables["ref_equipment_rate_history"].streams == 1
+    assert set(db.tables["ref_equipment_rate_history_agg"].rows) == set(compute_aggregates(SOURCE))
+    assert not redis.data
+    # Table populated: later starts do nothing.
+    assert await backfill_rate_history_aggregates(db) is None
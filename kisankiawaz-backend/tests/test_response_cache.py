@@ -0,0 +1,224 @@
+"""Unit tests for the shared reply cache of repeated farmer questions."""
+
+from __future__ import annotations
+
+import pytest
+
+from services.agent.services import response_cache as rc
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None):
+        self.data[key] = value
+
+    async def delete(self, key: str):
+        self.data.pop(key, None)
+
+    async def hgetall(self, key: str):
+        return dict(self.hashes.get(key, {}))
+
+    async def hset(self, key: str, field: str, value: str):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def hdel(self, key: str, field: str):
+        self.hashes.get(key, {}).pop(field, None)
+
+    async def hlen(self, key: str):
+        return len(self.hashes.get(key, {}))
+
+    async def expire(self, key: str, ttl: int):
+        return True
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1_800_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _embed(text: str) -> list[float]:
+    # Bag-of-words with rate/bhav folded into price: enough to tell paraphrases from different questions.
+    vocab = ["wheat", "price", "onion", "indore", "mandi"]
+    words = ["price" if w in {"rate", "bhav"} else w for w in rc.normalize_intent(text).split()]
+    return [float(words.count(v)) for v in vocab]
+
+
+@pytest.fixture
+def cache():
+    fake, clock = _FakeRedis(), _Clock()
+
+    async def factory():
+        return fake
+
+    return rc.ResponseCache(redis_factory=factory, embed=_embed, clock=clock, similarity=0.9), fake, clock
+
+
+def _key(cache: rc.ResponseCache, message: str, topic: str = "market") -> rc.CacheKey:
+    return cache.key_for(
+        message=message,
+        topic=topic,
+        crop="wheat",
+        state="Madhya Pradesh",
+        district="Indore",
+        language="hi",
+        agent_type=None,
+    )
+
+
+def test_only_standalone_impersonal_questions_are_shareable() -> None:
+    assert rc.normalize_intent("Wheat price in Indore today?") == rc.normalize_intent("today Indore wheat price")
+    assert rc.is_shareable_question("wheat price in indore", "gehu ka bhav indore")
+    assert not rc.is_shareable_question("what is my pm-kisan status")
+    assert not rc.is_shareable_question("and what about onion for that")
+    assert not rc.is_shareable_question("status for application 4455667788")
+
+
+def test_data_digest_ignores_fetch_metadata() -> None:
+    first = {"market": {"modal_price": 2400, "fetched_at": "10:00", "cache": {"hit": False}}}
+    refetched = {"market": {"modal_price": 2400, "fetched_at": "10:05", "cache": {"hit": True}}}
+    moved = {"market": {"modal_price": 2450, "fetched_at": "10:05"}}
+    assert rc.tool_data_digest(first) == rc.tool_data_digest(refetched)
+    assert rc.tool_data_digest(first) != rc.tool_data_digest(moved)
+    assert rc.tool_data_digest({"average": 1}) != rc.tool_data_digest({"average": 2})
+
+
+async def test_exact_and_semantic_hits_share_one_reply(cache) -> None:
+    store, _fake, clock = cache
+    key = _key(store, "wheat price in Indore mandi today")
+    assert await store.lookup(key, "wheat price in Indore mandi today") is None
+    assert await store.store(
+        key, "wheat price in Indore mandi today", "Gehu ₹2400/qtl", data_digest="d1", llm_calls=2, private_terms=[]
+    )
+
+    exact = await store.lookup(_key(store, "Indore mandi wheat price?"), "Indore mandi wheat price?")
+    assert exact["match"] == "exact" and exact["response"] == "Gehu ₹2400/qtl"
+
+    paraphrase = "wheat rate Indore mandi"
+    semantic = await store.lookup(_key(store, paraphrase), paraphrase)
+    assert semantic["match"] == "semantic" and semantic["similarity"] >= 0.9
+    store.served(semantic)
+
+    assert await store.lookup(_key(store, "onion price Indore mandi"), "onion price Indore mandi") is None
+    clock.now += rc.TOPIC_BUCKET_SECONDS["market"]  # next freshness bucket: never served
+    assert await store.lookup(_key(store, "Indore mandi wheat price"), "Indore mandi wheat price") is None
+
+    stats = store.stats()
+    assert stats["exact_hits"] == 1 and stats["semantic_hits"] == 1 and stats["llm_calls_saved"] == 2
+
+
+async def test_private_replies_are_not_stored_and_stale_entries_are_dropped(cache) -> None:
+    store, fake, clock = cache
+    key = _key(store, "wheat price Indore")
+    assert not await store.store(
+        key, "wheat price Indore", "Ramesh ji, Rau mandi ...", data_digest="d1", llm_calls=1, private_terms=["Rau"]
+    )
+    assert store.counters["skipped_private"] == 1 and not fake.data
+
+    await store.store(key, "wheat price Indore", "₹2400/qtl", data_digest="d1", llm_calls=1, private_terms=[])
+    entry = await store.lookup(key, "wheat price Indore")
+    assert not store.needs_verification(entry)
+    clock.now += rc.TOPIC_VERIFY_SECONDS["market"] + 1
+    assert store.needs_verification(entry)
+
+    await store.drop(entry)
+    assert await store.lookup(key, "wheat price Indore") is None
+    assert store.counters["stale_dropped"] == 1 and not any(fake.hashes.values())
+
+
+async def test_farmers_with_different_profiles_share_one_reply(cache) -> None:
+    store, _fake, _clock = cache
+
+    def key(district: str) -> rc.CacheKey:
+        # The key only sees the question and public location; nothing from a farmer's profile.
+        return store.key_for(
+            message="weather this week Indore",
+            topic="weather",
+            crop="",
+            state="Madhya Pradesh",
+            district=district,
+            language="en",
+            agent_type=None,
+        )
+
+    # Farmer in Rau growing wheat on 2 acres asks first ...
+    await store.store(key("Indore"), "weather this week Indore", "Light rain Thu", data_digest="w1", llm_calls=1, private_terms=["Ramesh"])
+    # ... a farmer in Mhow with soybean gets the same reply; another district does not.
+    assert (await store.lookup(key("Indore"), "weather this week Indore"))["response"] == "Light rain Thu"
+    assert await store.lookup(key("Dewas"), "weather this week Indore") is None
+
+
+async def test_semantic_hits_require_the_same_named_entities() -> None:
+    fake = _FakeRedis()
+
+    async def factory():
+        return fake
+
+    # Worst case embedding: every question looks identical, only the entity gate separates them.
+    store = rc.ResponseCache(redis_factory=factory, embed=lambda _text: [1.0, 0.0], clock=_Clock())
+
+    def key(message: str) -> rc.CacheKey:
+        return store.key_for(
+            message=message, topic="scheme", crop="", state="Bihar", district="Patna", language="en", agent_type=None
+        )
+
+    await store.store(key("PM-KISAN eligibility"), "PM-KISAN eligibility", "PM-KISAN: ...", data_digest="", llm_calls=1, private_terms=[])
+    assert (await store.lookup(key("who is eligible for PM-KISAN"), "who is eligible for PM-KISAN"))["match"] == "semantic"
+    assert await store.lookup(key("PMFBY eligibility"), "PMFBY eligibility") is None
+    assert await store.lookup(key("jowar price"), "jowar price") is None
+
+
+_REAL_MODEL = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"  # same model as EmbeddingService
+
+
+@pytest.fixture(scope="module")
+def real_embed():
+    fastembed = pytest.importorskip("fastembed")
+    try:
+        # Uses the model cache the agent service warms at startup; never downloads from a test run.
+        model = fastembed.TextEmbedding(model_name=_REAL_MODEL, local_files_only=True)
+    except Exception as exc:  # noqa: BLE001
+        pytest.skip(f"embedding model not in the local fastembed cache: {exc}")
+    return lambda text: [float(v) for v in next(iter(model.embed([text])))]
+
+
+async def test_similarity_threshold_against_the_production_embedding_model(real_embed) -> None:
+    fake = _FakeRedis()
+
+    async def factory():
+        return fake
+
+    store = rc.ResponseCache(redis_factory=factory, embed=real_embed, clock=_Clock())
+
+    def key(message: str, topic: str) -> rc.CacheKey:
+        return store.key_for(
+            message=message, topic=topic, crop="", state="Madhya Pradesh", district="Indore", language="en", agent_type=None
+        )
+
+    cached = [
+        ("wheat price in Indore mandi", "market"),
+        ("PM-KISAN eligibility criteria", "scheme"),
+    ]
+    for question, topic in cached:
+        await store.store(key(question, topic), question, f"reply: {question}", data_digest="", llm_calls=1, private_terms=[])
+
+    paraphrases = [("what is the wheat rate at Indore mandi", "market"), ("eligibility criteria for PM-KISAN scheme", "scheme")]
+    for question, topic in paraphrases:
+        entry = await store.lookup(key(question, topic), question)
+        assert entry is not None and entry["match"] == "semantic", question
+
+    different = [
+        ("PMFBY eligibility criteria", "scheme"),
+        ("soybean price in Indore mandi", "market"),
+        ("wheat price in Dewas mandi", "market"),
+    ]
+    for question, topic in different:
+        assert await store.lookup(key(question, topic), question) is None, question
@@ -0,0 +1,197 @@
+"""Unit tests for the SQLite-backed scheme document index."""
+
+from __future__ import annotations
+
+import builtins
+import hashlib
+import importlib
+import json
+import os
+import sys
+
+import httpx
+import pytest
+
+# The service imports its sibling modules from the service root (``/app`` in the image).
+for _name in ("scheme_document_index", "scheme_document_downloader"):
+    sys.modules.setdefault(f"services.{_name}", importlib.import_module(f"services.market.services.{_name}"))
+
+from services.market.services import scheme_document_downloader as sdd  # noqa: E402
+
+FORM_HTML = "<html><form><label>Name</label><input name='farmer_name'></form></html>"
+
+
+@pytest.fixture
+def base_dir(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(sdd, "SCHEME_SEED_DIR", "")
+    (tmp_path / "pmfby").mkdir()
+    (tmp_path / "pmfby" / "claim-form.html").write_text(FORM_HTML, encoding="utf-8")
+    (tmp_path / "pmfby" / "guidelines.pdf").write_bytes(b"%PDF-1.4")
+    (tmp_path / "kcc").mkdir()
+    (tmp_path / "kcc" / "loose.html").write_text(FORM_HTML, encoding="utf-8")
+    (tmp_path / "kcc" / "notes.html").write_text("<html>no controls</html>", encoding="utf-8")
+    manifest = {
+        "documents": {
+            "aaa111": {
+                "scheme": "PMFBY",
+                "name": "Claim Form",
+                "filename": "claim-form.html",
+                "local_path": str(tmp_path / "pmfby" / "claim-form.html"),
+                "content_type": "text/html",
+                "size": 1,
+            },
+            "bbb222": {
+                "scheme": "PMFBY",
+                "name": "Guidelines",
+                "filename": "guidelines.pdf",
+                "local_path": str(tmp_path / "pmfby" / "guidelines.pdf"),
+                "content_type": "application/pdf",
+            },
+        },
+        "last_updated": "2026-01-01T00:00:00+00:00",
+    }
+    (tmp_path / "manifest.json").write_text(json.dumps(manifest), encoding="utf-8")
+    return tmp_path
+
+
+def test_listing_is_served_from_index_without_file_io(base_dir, monkeypatch: pytest.MonkeyPatch) -> None:
+    downloader = sdd.SchemeDocumentDownloader(str(base_dir))
+
+    def no_io(*_args, **_kwargs):
+        raise AssertionError("document listing touched the filesystem")
+
+    monkeypatch.setattr(builtins, "open", no_io)
+    monkeypatch.setattr(os, "listdir", no_io)
+    monkeypatch.setattr(os.path, "exists", no_io)
+
+    docs = {d["filename"]: d for d in downloader.get_scheme_documents("pmfby")}
+    assert set(docs) == {"claim-form.html", "guidelines.pdf"}
+    assert docs["claim-form.html"]["autofill_possible"] is True
+    assert docs["claim-form.html"]["size"] == len(FORM_HTML)
+    assert docs["guidelines.pdf"]["autofill_possible"] is False
+    assert len(docs["guidelines.pdf"]["sha256"]) == 64
+
+    kcc = downloader.get_scheme_documents("KCC")
+    assert [d["filename"] for d in kcc] == ["loose.html"]
+    assert kcc[0]["source"] == "local_seed"
+
+    summary = downloader.get_all_downloaded()
+    assert summary["by_scheme"]["PMFBY"]["count"] == 2
+    assert summary["by_scheme"]["kcc"]["count"] == 1
+    assert summary["last_updated"] == "2026-01-01T00:00:00+00:00"
+
+
+def test_index_survives_restart_and_reset(base_dir) -> None:
+    first = sdd.SchemeDocumentDownloader(str(base_dir))
+    built_at = first.index.get_meta("built_at")
+
+    second = sdd.SchemeDocumentDownloader(str(base_dir))
+    assert second.index.get_meta("built_at") == built_at
+    assert len(second.get_scheme_documents("PMFBY")) == 2
+
+    second.reset_storage()
+    assert second.get_scheme_documents("PMFBY") == []
+    assert os.path.exists(base_dir / sdd.INDEX_FILENAME)
+    assert json.loads((base_dir / "manifest.json").read_text())["documents"] == {}
+
+
+
+def test_startup_reconciles_files_changed_while_down(base_dir, monkeypatch: pytest.MonkeyPatch) -> None:
+    sdd.SchemeDocumentDownloader(str(base_dir)).index.close()
+
+    (base_dir / "kcc" / "loose.html").write_text("<html>replaced, no form</html>", encoding="utf-8")
+    (base_dir / "kcc" / "apply.html").write_text(FORM_HTML, encoding="utf-8")
+    (base_dir / "pmfby" / "guidelines.pdf").unlink()
+
+    restarted = sdd.SchemeDocumentDownloader(str(base_dir))
+    assert [d["filename"] for d in restarted.get_scheme_documents("KCC")] == ["apply.html"]
+    docs = {d["filename"]: d for d in restarted.get_scheme_documents("PMFBY")}
+    assert docs["guidelines.pdf"]["exists"] is False and docs["claim-form.html"]["exists"] is True
+
+    # Unchanged directories are not read again on the next start.
+    restarted.index.close()
+    monkeypatch.setattr(builtins, "open", lambda *_a, **_k: pytest.fail("unchanged file was re-read"))
+    assert sdd.SchemeDocumentDownloader(str(base_dir)).reconcile_index() == {
+        "documents": 0, "local_files": 0, "removed": 0
+    }
+
+async def test_bulk_download_streams_revalidates_and_resumes(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(sdd, "SCHEME_SEED_DIR", "")
+    monkeypatch.setattr(sdd, "SCHEME_DOWNLOAD_HOST_DELAY_SECONDS", 0.0)
+    monkeypatch.setattr(sdd, "SCHEME_DOWNLOAD_CHUNK_BYTES", 16)
+    bodies = {
+        "https://a.gov.in/forms/claim.pdf": (b"%PDF-1.4 " + b"x" * 100, "application/pdf"),
+        "https://b.gov.in/apply/form.html": (FORM_HTML.encode(), "text/html"),
+    }
+    requested: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        url = str(request.url)
+        requested.append(url)
+        body, content_type = bodies[url]
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, content=body, headers={"content-type": content_type, "etag": etag})
+
+    downloader = sdd.SchemeDocumentDownloader(str(tmp_path))
+    monkeypatch.setattr(
+        downloader,
+        "_new_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True),
+    )
+    schemes = [
+        {"short_name": "PMFBY", "form_download_urls": [{"name": "Claim", "url": "https://a.gov.in/forms/claim.pdf"}]},
+        {"short_name": "KCC", "form_download_urls": ["https://b.gov.in/apply/form.html"]},
+    ]
+
+    first = await downloader.download_all_schemes(schemes=schemes)
+    assert first["total_downloaded"] == 2 and first["total_failed"] == 0
+    pdf = downloader.get_scheme_documents("PMFBY")[0]
+    assert pdf["sha256"] == hashlib.sha256(bodies["https://a.gov.in/forms/claim.pdf"][0]).hexdigest()
+    assert downloader.get_scheme_documents("KCC")[0]["autofill_possible"] is True
+    assert not list(tmp_path.rglob("*.part"))
+
+    # A forced refresh revalidates with If-None-Match instead of re-downloading.
+    second = await downloader.download_all_schemes(force=True, schemes=schemes)
+    assert second["total_cached"] == 2 and second["total_downloaded"] == 0
+    assert {dl["status"] for r in second["scheme_results"] for dl in r["downloads"]} == {"not_modified"}
+
+    # A forced refresh interrupted after PMFBY resumes with KCC only.
+    job = downloader.index.open_job(["pmfby", "kcc"], force=True)
+    downloader.index.finish_job_item(job["job_id"], "pmfby", second["scheme_results"][0])
+    requested.clear()
+    resumed = await downloader.download_all_schemes(force=True, schemes=schemes)
+    assert resumed["job_id"] == job["job_id"] and resumed["resumed_schemes"] == 1
+    assert requested == ["https://b.gov.in/apply/form.html"]
+    assert [r["scheme"] for r in resumed["scheme_results"]] == ["PMFBY", "KCC"]
+    progress = downloader.download_job_progress()
+    assert (progress["state"], progress["done"], progress["total"]) == ("completed", 2, 2)
+
+
+async def test_missing_local_copy_is_fetched_again_not_revalidated(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(sdd, "SCHEME_SEED_DIR", "")
+    monkeypatch.setattr(sdd, "SCHEME_DOWNLOAD_HOST_DELAY_SECONDS", 0.0)
+    body = b"%PDF-1.4 claim"
+    etag = f'"{hashlib.md5(body).hexdigest()}"'
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, content=body, headers={"content-type": "application/pdf", "etag": etag})
+
+    downloader = sdd.SchemeDocumentDownloader(str(tmp_path))
+    monkeypatch.setattr(
+        downloader,
+        "_new_client",
+        lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler), follow_redirects=True),
+    )
+    schemes = [{"short_name": "PMFBY", "form_download_urls": ["https://a.gov.in/forms/claim.pdf"]}]
+    await downloader.download_all_schemes(schemes=schemes)
+    local_path = downloader.get_scheme_documents("PMFBY")[0]["local_path"]
+    os.remove(local_path)
+
+    refreshed = await downloader.download_all_schemes(force=True, schemes=schemes)
+    assert refreshed["total_downloaded"] == 1 and refreshed["total_cached"] == 0
+    with open(local_path, "rb") as f:
+        assert f.read() == body
@@ -0,0 +1,119 @@
+"""Unit tests for the language check, per-turn LLM accounting and Groq JSON mode behind single-pass generation."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import httpx
+
+from services.agent.services import groq_fallback_service, llm_usage
+from services.agent.services.language_check import expected_script, language_mismatch, script_shares
+from services.agent.services.single_pass_reply import parse_single_pass_reply
+
+ROMAN_HINDI = {"kya", "hai", "aap", "karo", "chahiye", "mandi", "fasal"}
+
+
+def test_native_script_replies_may_carry_latin_names_and_units() -> None:
+    reply = "इंदौर मंडी में गेहूं का भाव ₹2400/qtl है (PM-KISAN)।"
+    assert script_shares(reply)["devanagari"] > 0.5
+    assert language_mismatch(reply, "hi", "इंदौर में गेहूं का भाव") == ""
+    assert language_mismatch("Wheat is ₹2400/qtl in Indore.", "hi", "इंदौर में गेहूं का भाव") == "script:latin"
+    assert language_mismatch("ಗೋಧಿ ಬೆಲೆ ₹2400", "auto-tamil", "கோதுமை விலை") == "script:kannada"
+
+
+def test_script_follows_the_farmer_when_typing_in_latin_letters() -> None:
+    assert expected_script("hi", "gehu ka bhav kya hai") == "latin"
+    assert expected_script("auto", "கோதுமை விலை") == "tamil"
+    assert language_mismatch("Gehu ka bhav ₹2400 hai.", "hi", "gehu ka bhav kya hai") == ""
+    assert language_mismatch("गेहूं का भाव ₹2400 है।", "auto-latin", "gehu ka bhav") == "script:devanagari"
+
+
+def test_english_target_flags_heavy_roman_hindi_only() -> None:
+    english = "Sell wheat at Indore mandi this week; prices are firm and arrivals are low."
+    hinglish = "Aap wheat abhi mat becho, mandi mein kya rate hai dekh karo, wait karna chahiye."
+    assert language_mismatch(english, "en", romanized_hindi=ROMAN_HINDI) == ""
+    assert language_mismatch(hinglish, "en", romanized_hindi=ROMAN_HINDI) == "romanized_hindi"
+
+
+
+def test_structured_reply_survives_fences_truncation_and_plain_text() -> None:
+    assert parse_single_pass_reply('{"reply": "Sow after 15 June.", "in_domain": true}') == ("Sow after 15 June.", True)
+    fenced = '```json\n{"reply": "Gehu ₹2400/qtl", "in_domain": true}\n```'
+    assert parse_single_pass_reply(fenced) == ("Gehu ₹2400/qtl", True)
+    truncated = '{"reply": "Spray neem oil\\n- 5 ml per litre\\u09'
+    assert parse_single_pass_reply(truncated) == ("Spray neem oil\n- 5 ml per litre", True)
+    assert parse_single_pass_reply("Plain text after a JSON-mode retry.") == ("Plain text after a JSON-mode retry.", True)
+    # Nothing usable: the caller serves its degraded reply instead of raw JSON.
+    assert parse_single_pass_reply('{"in_domain": true, "rep') == ("", True)
+
+
+def test_out_of_domain_replies_take_the_domain_guard_path() -> None:
+    reply, in_domain = parse_single_pass_reply('{"reply": "I can only help with farming.", "in_domain": false}')
+    assert (reply, in_domain) == ("I can only help with farming.", False)
+    fenced = '```\n{"in_domain": false, "reply": "Only farming questions, please."}\n```'
+    assert parse_single_pass_reply(fenced) == ("Only farming questions, please.", False)
+    assert parse_single_pass_reply('{"in_domain": false, "reply": "Only farm') == ("Only farm", False)
+
+
+async def test_turn_usage_counts_calls_and_latency_per_stage() -> None:
+    llm_usage.begin_turn()
+    with llm_usage.llm_call("generation"):
+        await asyncio.sleep(0.01)
+
+    def _repair() -> None:
+        with llm_usage.llm_call("language_repair"):
+            pass
+
+    await asyncio.to_thread(_repair)  # worker threads share the turn's tally
+    meta = llm_usage.usage_metadata("single_pass")
+    assert meta["mode"] == "single_pass" and meta["llm_calls"] == 2
+    assert meta["by_stage"]["generation"]["latency_ms"] >= 10
+    assert meta["by_stage"]["language_repair"]["calls"] == 1
+    assert meta["turn_latency_ms"] >= meta["llm_latency_ms"]
+
+
+class _Allocator:
+    def __init__(self) -> None:
+        self.reports: list[str] = []
+
+    def has_provider(self, provider: str) -> bool:
+        return True
+
+    def snapshot(self) -> dict:
+        return {"providers": {"groq": {"keys": [{"cooldown_remaining_seconds": 0}]}}}
+
+    def acquire(self, provider: str):
+        return type("Lease", (), {"key": "gsk_test"})()
+
+    def report_success(self, lease) -> None:
+        self.reports.append("success")
+
+    def report_error(self, lease, error: str) -> None:
+        self.reports.append("error")
+
+    def report_rate_limited(self, lease, error: str = "") -> None:
+        self.reports.append("rate_limited")
+
+
+def test_groq_json_validation_failure_retries_as_text_without_blaming_the_key(monkeypatch) -> None:
+    bodies: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        bodies.append(body)
+        if "response_format" in body:
+            return httpx.Response(400, json={"error": {"code": "json_validate_failed"}})
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Gehu ₹2400/qtl"}}]})
+
+    real_client = httpx.Client
+    allocator = _Allocator()
+    monkeypatch.setattr(groq_fallback_service, "get_api_key_allocator", lambda: allocator)
+    monkeypatch.setattr(
+        groq_fallback_service.httpx, "Client", lambda **kw: real_client(transport=httpx.MockTransport(handler), **kw)
+    )
+
+    result = groq_fallback_service.generate_groq_reply("gehu ka bhav", "hi", json_mode=True)
+    assert result["response"] == "Gehu ₹2400/qtl"
+    assert ["response_format" in body for body in bodies] == [True, False]
+    assert allocator.reports == ["success", "success"]
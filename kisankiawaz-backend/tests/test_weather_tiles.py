@@ -0,0 +1,237 @@
+"""Unit tests for the grid-snapped weather tile cache."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any
+
+import pytest
+
+from shared.services.district_centroids import CentroidTable, district_id, state_id
+from shared.services.tile_cache import TileCache, snap_to_grid
+from services.market.services import weather_service as ws
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.data: dict[str, str] = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value: str, ex: int | None = None, nx: bool = False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+
+def _cache(redis: _FakeRedis, fetch) -> TileCache:
+    async def factory():
+        return redis
+
+    return TileCache(
+        "weather:tile:test",
+        fetch,
+        step_deg=0.05,
+        fresh_seconds=100,
+        revalidate_seconds=200,
+        max_stale_seconds=1000,
+        redis_factory=factory,
+    )
+
+
+def _age(redis: _FakeRedis, seconds: float) -> None:
+    for key, raw in redis.data.items():
+        envelope = json.loads(raw)
+        envelope["fetched_at"] = time.time() - seconds
+        redis.data[key] = json.dumps(envelope)
+
+
+def test_nearby_points_share_a_tile() -> None:
+    a = snap_to_grid(18.5204, 73.8567, 0.05)
+    b = snap_to_grid(18.5399, 73.8801, 0.05)
+    assert a == b
+    assert (a.lat, a.lon, a.key) == (18.525, 73.875, "0.05:18.525:73.875")
+    assert snap_to_grid(18.551, 73.8567, 0.05) != a
+    assert snap_to_grid(30.9, 75.85, 0.05).key == "0.05:30.925:75.875"
+
+
+@pytest.mark.asyncio
+async def test_miss_fetches_once_then_serves_fresh() -> None:
+    calls: list[tuple[float, float]] = []
+
+    async def fetch(lat: float, lon: float) -> dict[str, Any]:
+        calls.append((lat, lon))
+        await asyncio.sleep(0.01)
+        return {"temp": 30}
+
+    cache = _cache(_FakeRedis(), fetch)
+    results = await asyncio.gather(*(cache.get(18.52, 73.85) for _ in range(5)))
+    assert calls == [(18.525, 73.875)]
+    assert all(payload == {"temp": 30} for payload, _ in results)
+
+    payload, meta = await cache.get(18.53, 73.86)
+    assert meta["state"] == "fresh" and len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_tile_is_served_while_refreshing() -> None:
+    values = iter([{"temp": 30}, {"temp": 31}])
+
+    async def fetch(lat: float, lon: float) -> dict[str, Any]:
+        return next(values)
+
+    redis = _FakeRedis()
+    cache = _cache(redis, fetch)
+    await cache.get(18.52, 73.85)
+    _age(redis, 150)
+
+    payload, meta = await cache.get(18.52, 73.85)
+    assert payload == {"temp": 30} and meta["state"] == "stale"
+    await asyncio.gather(*cache._background)
+
+    payload, meta = await cache.get(18.52, 73.85)
+    assert payload == {"temp": 31} and meta["state"] == "fresh"
+    assert cache.counters["background_refresh"] == 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_outage_serves_stale_copy() -> None:
+    state = {"up": True}
+
+    async def fetch(lat: float, lon: float) -> dict[str, Any]:
+        if not state["up"]:
+            raise RuntimeError("upstream down")
+        return {"temp": 30}
+
+    redis = _FakeRedis()
+    cache = _cache(redis, fetch)
+    await cache.get(18.52, 73.85)
+    _age(redis, 500)
+    state["up"] = False
+
+    payload, meta = await cache.get(18.52, 73.85)
+    assert payload == {"temp": 30} and meta["state"] == "stale"
+    assert cache.counters["stale_on_error"] == 1
+    with pytest.raises(RuntimeError):
+        await cache.get(28.6, 77.2)
+
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_the_shared_fetch() -> None:
+    release = asyncio.Event()
+    calls: list[tuple[float, float]] = []
+
+    async def fetch(lat: float, lon: float) -> dict[str, Any]:
+        calls.append((lat, lon))
+        await release.wait()
+        return {"temp": 30}
+
+    redis = _FakeRedis()
+    cache = _cache(redis, fetch)
+    first = asyncio.create_task(cache.get(18.52, 73.85))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(cache.get(18.52, 73.85))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    payload, meta = await second
+    assert payload == {"temp": 30} and meta["state"] == "fresh"
+    assert first.cancelled() and len(calls) == 1 and redis.data and not cache._inflight
+
+
+class _Doc:
+    def __init__(self, data: dict[str, Any]):
+        self._data = data
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self._data)
+
+
+class _ProfilesDB:
+    def __init__(self, rows: list[dict[str, Any]]):
+        self._rows = rows
+
+    def collection(self, name: str) -> "_ProfilesDB":
+        return self
+
+    async def stream(self):
+        for row in self._rows:
+            yield _Doc(row)
+
+
+@pytest.mark.asyncio
+async def test_hot_tiles_rank_by_farmer_profiles(monkeypatch: pytest.MonkeyPatch) -> None:
+    CentroidTable.reset()
+    monkeypatch.setattr(CentroidTable, "_checked_at", float("inf"))
+    monkeypatch.setattr(
+        CentroidTable,
+        "_entries",
+        {
+            district_id("Maharashtra", "Pune"): (18.52, 73.85, "profile_district_mandi"),
+            district_id("Punjab", "Ludhiana"): (30.9, 75.85, "profile_district_mandi"),
+        },
+    )
+    db = _ProfilesDB(
+        [
+            {"state": "Punjab", "district": "Ludhiana"},
+            {"state": "Maharashtra", "district": "Pune"},
+            {"state": "Maharashtra", "district": "Pune"},
+            {"state": "Kerala", "district": "Unknown"},
+        ]
+    )
+
+    tiles = await ws.hot_weather_tiles(db, limit=5)
+
+    assert [t.key for t in tiles] == ["0.05:18.525:73.875", "0.05:30.925:75.875"]
+    CentroidTable.reset()
+
+
+class _ProfileLookupDB(_ProfilesDB):
+    def __init__(self, rows: list[dict[str, Any]]):
+        super().__init__(rows)
+        self.saved: dict[str, dict[str, Any]] = {}
+
+    def where(self, *_args) -> "_ProfileLookupDB":
+        return self
+
+    def limit(self, _count: int) -> "_ProfileLookupDB":
+        return self
+
+    def document(self, doc_id: str):
+        saved = self.saved
+
+        class _Ref:
+            async def set(self, row: dict[str, Any], merge: bool = False) -> None:
+                saved[doc_id] = row
+
+        return _Ref()
+
+
+@pytest.mark.asyncio
+async def test_state_fallback_is_not_remembered_as_the_district_centroid(monkeypatch: pytest.MonkeyPatch) -> None:
+    CentroidTable.reset()
+    monkeypatch.setattr(CentroidTable, "_checked_at", float("inf"))
+
+    async def no_cache(*_args, **_kwargs):
+        return None
+
+    async def state_only(db, state, district, pincode):
+        return (22.97, 78.65), "profile_state_geocode"  # district geocode failed this once
+
+    monkeypatch.setattr(ws, "get_cached_user_coordinates", no_cache)
+    monkeypatch.setattr(ws, "set_cached_user_coordinates", no_cache)
+    monkeypatch.setattr(ws, "_resolve_live", state_only)
+    db = _ProfileLookupDB([{"user_id": "u1", "state": "Madhya Pradesh", "district": "Dewas"}])
+
+    resolution = await ws.resolve_coordinates(db, {"id": "u1"})
+
+    assert resolution.source == "profile_state_geocode"
+    assert CentroidTable.lookup(district_id("Madhya Pradesh", "Dewas")) is None
+    assert set(db.saved) == {state_id("Madhya Pradesh")} and db.saved[state_id("Madhya Pradesh")]["kind"] == "state"
+    CentroidTable.reset()
@@ -8,7 +8,12 @@ from loguru import logger
 
 @app.task(name="refresh_qdrant_indexes")
 def refresh_qdrant_indexes():
-    """Rebuild all Qdrant indexes from MongoCollections data."""
+    """Rebuild scheme/equipment Qdrant indexes from MongoCollections data.
+
+    Each collection is streamed from Mongo, embedded in batches and written to
+    a shadow collection; the public alias is switched only when the shadow is
+    complete, so semantic search stays available throughout.
+    """
     logger.info("Starting Qdrant index refresh...")
     from shared.db.mongodb import init_mongodb, get_db
     init_mongodb()
@@ -21,38 +26,30 @@ def refresh_qdrant_indexes():
 
     from shared.core.constants import MongoCollections, Qdrant
     from shared.services.qdrant_service import QdrantService
-    from qdrant_client.models import PointStruct
     import uuid
-    from collections import defaultdict
 
-    # Rebuild schemes_semantic
-    QdrantService.recreate_collection(Qdrant.SCHEMES_SEMANTIC)
-    points = []
-    for doc in db.collection(MongoCollections.REF_FARMER_SCHEMES).stream():
-        data = doc.to_dict()
-        categories = data.get("categories", [])
-        if isinstance(categories, str):
-            categories = [categories]
-        text = f"{data.get('title', '')}. {data.get('summary', '')}. Eligibility: {data.get('eligibility', '')}. Categories: {', '.join(categories)}"
-        vector = QdrantService.embed_text(text)
-        points.append(PointStruct(id=uuid.uuid4().hex, vector=vector, payload={"scheme_id": data.get("scheme_id", ""), "title": data.get("title", ""), "ministry": data.get("ministry", ""), "text": text[:500]}))
-    if points:
-        QdrantService.upsert(Qdrant.SCHEMES_SEMANTIC, points)
-    logger.info(f"Refreshed schemes_semantic: {len(points)} vectors")
-
-    # Rebuild equipment_semantic
-    QdrantService.recreate_collection(Qdrant.EQUIPMENT_SEMANTIC)
-    eq_points = []
-    for doc in db.collection(MongoCollections.REF_EQUIPMENT_PROVIDERS).stream():
-        data = doc.to_dict()
-        text = f"{data.get('name', '')} {data.get('category', '')} in {data.get('district', '')}, {data.get('state', '')}"
-        vector = QdrantService.embed_text(text)
-        eq_points.append(PointStruct(id=uuid.uuid4().hex, vector=vector, payload={"equipment_id": data.get("rental_id", doc.id), "name": data.get("name", ""), "state": data.get("state", ""), "text": text[:300]}))
-    if eq_points:
-        QdrantService.upsert(Qdrant.EQUIPMENT_SEMANTIC, eq_points)
-    logger.info(f"Refreshed equipment_semantic: {len(eq_points)} vectors")
-
-    return {"schemes_semantic": len(points), "equipment_semantic": len(eq_points)}
+    def _scheme_documents():
+        for doc in db.collection(MongoCollections.REF_FARMER_SCHEMES).stream():
+            data = doc.to_dict()
+            categories = data.get("categories", [])
+            if isinstance(categories, str):
+                categories = [categories]
+            text = f"{data.get('title', '')}. {data.get('summary', '')}. Eligibility: {data.get('eligibility', '')}. Categories: {', '.join(categories)}"
+            yield uuid.uuid4().hex, text, {"scheme_id": data.get("scheme_id", ""), "title": data.get("title", ""), "ministry": data.get("ministry", ""), "text": text[:500]}
+
+    def _equipment_documents():
+        for doc in db.collection(MongoCollections.REF_EQUIPMENT_PROVIDERS).stream():
+            data = doc.to_dict()
+            text = f"{data.get('name', '')} {data.get('category', '')} in {data.get('district', '')}, {data.get('state', '')}"
+            yield uuid.uuid4().hex, text, {"equipment_id": data.get("rental_id", doc.id), "name": data.get("name", ""), "state": data.get("state", ""), "text": text[:300]}
+
+    schemes_count = QdrantService.rebuild_collection(Qdrant.SCHEMES_SEMANTIC, _scheme_documents())
+    logger.info(f"Refreshed schemes_semantic: {schemes_count} vectors")
+
+    equipment_count = QdrantService.rebuild_collection(Qdrant.EQUIPMENT_SEMANTIC, _equipment_documents())
+    logger.info(f"Refreshed equipment_semantic: {equipment_count} vectors")
+
+    return {"schemes_semantic": schemes_count, "equipment_semantic": equipment_count}
 
 
 @app.task(name="generate_analytics_snapshot")